@@ -0,0 +1,3 @@
+"""
+客戶端熱路徑的微基準測試（pytest-benchmark）
+"""
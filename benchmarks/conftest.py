@@ -0,0 +1,81 @@
+"""
+基準測試配置和 Fixtures
+
+    pytest benchmarks/ --no-cov --benchmark-save=baseline
+    pytest benchmarks/ --no-cov --benchmark-compare --benchmark-compare-fail=median:20%
+"""
+import json
+from pathlib import Path
+from typing import Dict, Generator
+
+import pytest
+
+from benchmarks import payloads
+from utils.binance_client import BinanceClient
+from utils.cassette import REPLAY, Cassette, Interaction, attach, match_key
+from utils.rate_limiter import RateLimiter
+
+# pytest-benchmark 預設的儲存位置（未指定 --benchmark-storage 時改存到此目錄）
+DEFAULT_STORAGE = 'file://./.benchmarks'
+BASELINE_DIR = Path(__file__).parent / 'baselines'
+
+SECRET_KEY = 's' * 64
+# 請求由記憶體中的卡帶返回，不會連線
+OFFLINE_URL = 'http://127.0.0.1:9'
+
+RESPONSE_HEADERS = {'Content-Type': 'application/json;charset=UTF-8', 'X-MBX-USED-WEIGHT-1M': '1'}
+
+
+def pytest_configure(config):
+    """基準存放在 benchmarks/baselines；覆蓋率追蹤會使計時失真，執行基準時必須關閉"""
+    if config.getoption("benchmark_storage") == DEFAULT_STORAGE:
+        config.option.benchmark_storage = f"file://{BASELINE_DIR}"
+
+    coverage = config.getoption("cov_source", None) and not config.getoption("no_cov", False)
+    if coverage and not config.getoption("benchmark_disable"):
+        raise pytest.UsageError("執行基準測試時請加上 --no-cov（或以 --benchmark-disable 只驗證正確性）")
+
+
+@pytest.fixture(scope="session")
+def encoded_payloads() -> Dict[str, bytes]:
+    """depth / klines / ticker 響應的 JSON 位元組"""
+    return payloads.encoded()
+
+
+@pytest.fixture(scope="session")
+def replay_cassette() -> Cassette:
+    """客戶端熱路徑基準使用的響應"""
+    cassette = Cassette()
+    responses = {
+        ('GET', '/api/v3/ping'): {},
+        ('GET', '/api/v3/depth?symbol=BTCUSDT&limit=100'): payloads.depth(levels=100),
+        ('GET', '/api/v3/account'): payloads.account(),
+        ('POST', '/api/v3/order?symbol=BTCUSDT&side=BUY&type=LIMIT&quantity=0.001&timeInForce=GTC'
+                 '&price=20000&newClientOrderId=*'): payloads.order(),
+    }
+    for (method, path), payload in responses.items():
+        content = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        cassette.record(match_key(method, f"{OFFLINE_URL}{path}"), Interaction(200, 'OK', RESPONSE_HEADERS,
+                                                                               content, 0.0))
+    return cassette
+
+
+@pytest.fixture
+def replay_client(replay_cassette: Cassette) -> Generator[BinanceClient, None, None]:
+    """
+    以記憶體卡帶作為傳輸層的客戶端
+
+    啟用重試、下單對帳、請求合併與延遲量測，限速器額度放大到不會等待，
+    量測的是客戶端本身加上 requests 的開銷
+    """
+    unlimited = 10 ** 12
+    client = BinanceClient(
+        api_key='key', secret_key=SECRET_KEY, base_url=OFFLINE_URL,
+        rate_limiter=RateLimiter(unlimited, unlimited, unlimited)
+    )
+    client.enable_retry()
+    client.enable_metrics()
+    client.enable_single_flight()
+    attach(client.session, replay_cassette, REPLAY)
+    yield client
+    client.close()
@@ -0,0 +1,131 @@
+"""
+基準測試用的響應內容
+依固定亂數種子產生與 Binance 格式、大小相同的響應（價格與數量為 8 位小數的字串），
+每次執行內容一致，基準之間可以互相比較
+"""
+import json
+import random
+from typing import Any, Dict, List
+
+SEED = 20240101
+BASE_PRICE = 27000.0
+TICK = 0.01
+
+
+def _decimal(value: float) -> str:
+    return f"{value:.8f}"
+
+
+def _dumps(payload: Any) -> bytes:
+    # 與 Binance 相同的緊湊格式
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+
+def depth(levels: int = 5000, seed: int = SEED) -> Dict[str, Any]:
+    """
+    GET /api/v3/depth 的響應
+
+    Args:
+        levels: 每邊檔位數
+        seed: 亂數種子
+    """
+    rng = random.Random(seed)
+    return {
+        'lastUpdateId': 1000000,
+        'bids': [[_decimal(BASE_PRICE - i * TICK), _decimal(rng.uniform(0.001, 5))] for i in range(levels)],
+        'asks': [[_decimal(BASE_PRICE + (i + 1) * TICK), _decimal(rng.uniform(0.001, 5))] for i in range(levels)],
+    }
+
+
+def klines(rows: int = 1000, seed: int = SEED) -> List[List[Any]]:
+    """GET /api/v3/klines 的響應（1 分鐘 K 線，12 欄位陣列）"""
+    rng = random.Random(seed)
+    start = 1700000000000
+    price = BASE_PRICE
+    result = []
+    for i in range(rows):
+        open_price = price
+        price += rng.uniform(-20, 20)
+        high, low = max(open_price, price) + rng.uniform(0, 5), min(open_price, price) - rng.uniform(0, 5)
+        volume = rng.uniform(1, 100)
+        result.append([
+            start + i * 60000, _decimal(open_price), _decimal(high), _decimal(low), _decimal(price),
+            _decimal(volume), start + i * 60000 + 59999, _decimal(volume * price), rng.randint(100, 5000),
+            _decimal(volume / 2), _decimal(volume * price / 2), '0'
+        ])
+    return result
+
+
+def tickers(symbols: int = 2000, seed: int = SEED) -> List[Dict[str, Any]]:
+    """不指定交易對時 GET /api/v3/ticker/24hr 的響應"""
+    rng = random.Random(seed)
+    result = []
+    for i in range(symbols):
+        last = rng.uniform(0.0001, 50000)
+        change = last * rng.uniform(-0.1, 0.1)
+        result.append({
+            'symbol': f"SYM{i:04d}USDT", 'priceChange': _decimal(change),
+            'priceChangePercent': f"{change / last * 100:.3f}", 'weightedAvgPrice': _decimal(last),
+            'prevClosePrice': _decimal(last - change), 'lastPrice': _decimal(last), 'lastQty': _decimal(1),
+            'bidPrice': _decimal(last * 0.9999), 'bidQty': _decimal(2), 'askPrice': _decimal(last * 1.0001),
+            'askQty': _decimal(3), 'openPrice': _decimal(last - change), 'highPrice': _decimal(last * 1.05),
+            'lowPrice': _decimal(last * 0.95), 'volume': _decimal(rng.uniform(1, 1e6)),
+            'quoteVolume': _decimal(rng.uniform(1, 1e9)), 'openTime': 1700000000000,
+            'closeTime': 1700086399999, 'firstId': 1, 'lastId': 100000, 'count': 100000,
+        })
+    return result
+
+
+def depth_events(snapshot: Dict[str, Any], count: int = 1000, levels: int = 10,
+                 seed: int = SEED) -> List[Dict[str, Any]]:
+    """
+    接續快照的 depthUpdate 事件：更新集中在最佳價位附近，約一成為刪除
+
+    Args:
+        snapshot: depth() 的結果
+        count: 事件數
+        levels: 每個事件每邊更新的檔位數
+        seed: 亂數種子
+    """
+    rng = random.Random(seed)
+    update_id = snapshot['lastUpdateId']
+    events = []
+    for _ in range(count):
+        bids = [[_decimal(BASE_PRICE - int(rng.expovariate(0.1)) * TICK),
+                 '0.00000000' if rng.random() < 0.1 else _decimal(rng.uniform(0.001, 5))] for _ in range(levels)]
+        asks = [[_decimal(BASE_PRICE + (int(rng.expovariate(0.1)) + 1) * TICK),
+                 '0.00000000' if rng.random() < 0.1 else _decimal(rng.uniform(0.001, 5))] for _ in range(levels)]
+        events.append({'e': 'depthUpdate', 'U': update_id + 1, 'u': update_id + levels, 'b': bids, 'a': asks})
+        update_id += levels
+    return events
+
+
+def order(client_order_id: str = 'x-benchmark') -> Dict[str, Any]:
+    """POST /api/v3/order 的響應（FULL）"""
+    return {
+        'symbol': 'BTCUSDT', 'orderId': 123456, 'orderListId': -1, 'clientOrderId': client_order_id,
+        'transactTime': 1700000000000, 'price': _decimal(20000), 'origQty': _decimal(0.001),
+        'executedQty': '0.00000000', 'cummulativeQuoteQty': '0.00000000', 'status': 'NEW',
+        'timeInForce': 'GTC', 'type': 'LIMIT', 'side': 'BUY', 'workingTime': 1700000000000,
+        'fills': [], 'selfTradePreventionMode': 'EXPIRE_MAKER',
+    }
+
+
+def account(assets: int = 400) -> Dict[str, Any]:
+    """GET /api/v3/account 的響應"""
+    return {
+        'makerCommission': 10, 'takerCommission': 10, 'canTrade': True, 'canWithdraw': False,
+        'canDeposit': False, 'updateTime': 1700000000000, 'accountType': 'SPOT',
+        'balances': [{'asset': f"A{i:03d}", 'free': _decimal(1000 if i < 5 else 0), 'locked': '0.00000000'}
+                     for i in range(assets)],
+        'permissions': ['SPOT'],
+    }
+
+
+def encoded() -> Dict[str, bytes]:
+    """各端點響應的 JSON 位元組"""
+    return {
+        'depth': _dumps(depth()),
+        'klines': _dumps(klines()),
+        'ticker': _dumps(tickers()),
+    }
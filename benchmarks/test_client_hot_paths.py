@@ -0,0 +1,103 @@
+"""
+客戶端熱路徑基準：簽名、參數編碼與 _request 的開銷
+"""
+import hashlib
+import hmac
+from urllib.parse import urlencode
+
+import pytest
+from requests.models import RequestEncodingMixin
+from utils.binance_client import BinanceClient
+
+ORDER_PARAMS = {
+    'symbol': 'BTCUSDT',
+    'side': 'BUY',
+    'type': 'LIMIT',
+    'quantity': 0.001,
+    'price': 20000,
+    'timeInForce': 'GTC',
+    'timestamp': 1700000000000,
+}
+
+KLINE_PARAMS = {
+    'symbol': 'BTCUSDT',
+    'interval': '1m',
+    'startTime': 1700000000000,
+    'endTime': 1700059999999,
+    'limit': 1000,
+}
+
+
+def _legacy_signed_query(secret_key: str, params: dict) -> str:
+    """舊流程：每次重新建立 HMAC，且簽名與送出各編碼一次"""
+    params['timestamp'] = 1700000000000
+    query_string = urlencode(params)
+    params['signature'] = hmac.new(secret_key.encode('utf-8'), query_string.encode('utf-8'), hashlib.sha256).hexdigest()
+    # requests 組 URL 時會再編碼一次 params
+    return RequestEncodingMixin._encode_params(params)
+
+
+@pytest.mark.performance
+class TestSigningBenchmarks:
+    """簽名基準"""
+
+    def test_generate_signature(self, benchmark, replay_client: BinanceClient):
+        """TC-BM001: 由參數字典產生簽名"""
+        benchmark.group = 'signing'
+        signature = benchmark(replay_client._generate_signature, ORDER_PARAMS)
+        assert len(signature) == 64
+
+    def test_sign_query(self, benchmark, replay_client: BinanceClient):
+        """TC-BM002: 對已編碼的查詢字串簽名"""
+        benchmark.group = 'signing'
+        query_string = urlencode(ORDER_PARAMS)
+        assert benchmark(replay_client._sign_query, query_string) == replay_client._generate_signature(ORDER_PARAMS)
+
+
+@pytest.mark.performance
+class TestEncodingBenchmarks:
+    """參數編碼基準"""
+
+    def test_build_unsigned_query(self, benchmark, replay_client: BinanceClient):
+        """TC-BM003: 公開端點的查詢字串"""
+        benchmark.group = 'encoding'
+        assert benchmark(replay_client._build_query, KLINE_PARAMS, False) == urlencode(KLINE_PARAMS)
+
+    def test_build_signed_query(self, benchmark, replay_client: BinanceClient):
+        """TC-BM004: 加入時間戳並簽名的查詢字串"""
+        benchmark.group = 'encoding'
+        params = dict(ORDER_PARAMS)
+        del params['timestamp']
+        query_string = benchmark(lambda: replay_client._build_query(dict(params), True))
+        assert '&signature=' in query_string
+
+    def test_legacy_signed_query(self, benchmark, replay_client: BinanceClient):
+        """TC-BM011: 對照組：每次重新建立 HMAC、簽名與送出各編碼一次的舊流程"""
+        benchmark.group = 'encoding'
+        params = dict(ORDER_PARAMS)
+        del params['timestamp']
+        query_string = benchmark(lambda: _legacy_signed_query(replay_client.secret_key, dict(params)))
+        assert '&signature=' in query_string
+
+
+@pytest.mark.performance
+class TestRequestBenchmarks:
+    """_request 開銷基準（記憶體卡帶作為傳輸層）"""
+
+    def test_transport_only(self, benchmark, replay_client: BinanceClient):
+        """TC-BM005: 對照組：直接以 Session 送出，不經過客戶端"""
+        benchmark.group = 'request'
+        url = f"{replay_client.base_url}/api/v3/ping"
+        assert benchmark(replay_client.session.get, url).status_code == 200
+
+    @pytest.mark.parametrize('call', [
+        pytest.param(lambda client: client.ping(), id='ping'),
+        pytest.param(lambda client: client.get_order_book('BTCUSDT', limit=100), id='depth'),
+        pytest.param(lambda client: client.get_account_info(), id='account-signed'),
+        pytest.param(lambda client: client.create_order('BTCUSDT', 'BUY', 'LIMIT', quantity=0.001, price=20000),
+                     id='order-signed'),
+    ])
+    def test_request(self, benchmark, replay_client: BinanceClient, call):
+        """TC-BM006: 經過限速、簽名、重試、請求合併與延遲量測的完整請求"""
+        benchmark.group = 'request'
+        assert benchmark(call, replay_client).status_code == 200
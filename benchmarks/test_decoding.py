@@ -0,0 +1,86 @@
+"""
+響應處理基準：JSON 解析、模型包裝與訂單簿增量更新
+"""
+import json
+from decimal import Decimal
+from typing import Any, Dict, List
+
+import pytest
+from benchmarks import payloads
+from utils.models import DepthSnapshot, Kline, Ticker, loads, orjson, wrap
+from utils.order_book import OrderBook
+
+PAYLOADS = ['depth', 'klines', 'ticker']
+
+DECODERS = [
+    pytest.param(json.loads, id='json'),
+    pytest.param(orjson.loads if orjson is not None else None, id='orjson',
+                 marks=pytest.mark.skipif(orjson is None, reason="未安裝 orjson")),
+]
+
+
+def _read_models(name: str, content: bytes) -> Any:
+    """解析並讀取各端點常用的欄位（數值欄位轉為 Decimal）"""
+    payload = loads(content)
+    if name == 'depth':
+        return wrap(payload, DepthSnapshot).bids[:20]
+    if name == 'klines':
+        return [kline.close for kline in wrap(payload, Kline)]
+    return [ticker.last_price for ticker in wrap(payload, Ticker)]
+
+
+@pytest.mark.performance
+class TestDecodingBenchmarks:
+    """JSON 解析基準"""
+
+    @pytest.mark.parametrize('name', PAYLOADS)
+    @pytest.mark.parametrize('decode', DECODERS)
+    def test_decode(self, benchmark, encoded_payloads: Dict[str, bytes], name: str, decode):
+        """TC-BM007: 以不同 JSON 後端解析真實大小的響應"""
+        benchmark.group = f'decode-{name}'
+        benchmark.extra_info['bytes'] = len(encoded_payloads[name])
+        assert benchmark(decode, encoded_payloads[name])
+
+    @pytest.mark.parametrize('name', PAYLOADS)
+    def test_models(self, benchmark, encoded_payloads: Dict[str, bytes], name: str):
+        """TC-BM008: 解析後以模型讀取數值欄位"""
+        benchmark.group = f'decode-{name}'
+        values = benchmark(_read_models, name, encoded_payloads[name])
+        assert values and all(isinstance(v, (Decimal, tuple)) for v in values)
+
+
+@pytest.mark.performance
+class TestOrderBookBenchmarks:
+    """訂單簿基準"""
+
+    @pytest.fixture(scope="class")
+    def snapshot(self) -> Dict[str, Any]:
+        return payloads.depth(levels=5000)
+
+    @pytest.fixture(scope="class")
+    def events(self, snapshot: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return payloads.depth_events(snapshot, count=1000)
+
+    def test_load_snapshot(self, benchmark, snapshot: Dict[str, Any]):
+        """TC-BM009: 載入 5000 檔的深度快照"""
+        benchmark.group = 'order-book'
+        book = OrderBook('BTCUSDT')
+        assert benchmark(book.load_snapshot, snapshot)
+        assert len(book.bids) == len(book.asks) == 5000
+
+    def test_apply_updates(self, benchmark, snapshot: Dict[str, Any], events: List[Dict[str, Any]]):
+        """TC-BM010: 連續套用 1000 筆增量事件（每筆每邊 10 檔）"""
+        benchmark.group = 'order-book'
+
+        def setup():
+            book = OrderBook('BTCUSDT')
+            book.load_snapshot(snapshot)
+            return (book,), {}
+
+        def apply(book: OrderBook) -> OrderBook:
+            for event in events:
+                book.process_event(event)
+            return book
+
+        book = benchmark.pedantic(apply, setup=setup, rounds=30)
+        assert book.last_update_id == events[-1]['u'] and book.resync_count == 0
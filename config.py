@@ -20,11 +20,79 @@ class Config:
 
     # WebSocket 配置
     WS_URL = os.getenv('BINANCE_WS_URL', 'wss://testnet.binance.vision/ws')
+    WS_API_URL = os.getenv('BINANCE_WS_API_URL', 'wss://ws-api.testnet.binance.vision/ws-api/v3')
+
+    # 非同步客戶端下單通道：rest 或 ws（WebSocket API）
+    ORDER_TRANSPORT = os.getenv('ORDER_TRANSPORT', 'rest').lower()
 
     # 請求配置
     REQUEST_TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', '10'))
     MAX_RETRIES = int(os.getenv('MAX_RETRIES', '3'))
 
+    # 讀取請求重試與下單對帳（預設關閉，測試斷言原始響應；指數退避上限與含重試的總延遲預算，單位為秒）
+    RETRY_ENABLED = os.getenv('RETRY_ENABLED', 'false').lower() == 'true'
+    RETRY_BACKOFF_BASE = float(os.getenv('RETRY_BACKOFF_BASE', '0.1'))
+    RETRY_BACKOFF_MAX = float(os.getenv('RETRY_BACKOFF_MAX', '5'))
+    RETRY_BUDGET = float(os.getenv('RETRY_BUDGET', '30'))
+
+    # 請求延遲量測（依端點與階段記錄延遲直方圖；預設關閉，會替換 Session 的連線池類別）
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() == 'true'
+
+    # 延遲回歸檢查（與基準比較 p50 / p95 / p99）
+    LATENCY_REGRESSION_THRESHOLD = float(os.getenv('LATENCY_REGRESSION_THRESHOLD', '0.2'))
+    LATENCY_CONFIDENCE = float(os.getenv('LATENCY_CONFIDENCE', '0.95'))
+    LATENCY_BOOTSTRAP_ITERATIONS = int(os.getenv('LATENCY_BOOTSTRAP_ITERATIONS', '2000'))
+    LATENCY_MIN_SAMPLES = int(os.getenv('LATENCY_MIN_SAMPLES', '30'))
+
+    # 讀取請求對沖：超過端點延遲分位數仍未完成時再送出一個
+    HEDGE_ENABLED = os.getenv('HEDGE_ENABLED', 'false').lower() == 'true'
+    HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', '0.95'))
+    HEDGE_MIN_SAMPLES = int(os.getenv('HEDGE_MIN_SAMPLES', '20'))
+
+    # 同步客戶端共用連線池配置
+    POOL_CONNECTIONS = int(os.getenv('POOL_CONNECTIONS', '10'))
+    POOL_MAXSIZE = int(os.getenv('POOL_MAXSIZE', '50'))
+    POOL_BLOCK = os.getenv('POOL_BLOCK', 'false').lower() == 'true'
+    POOL_KEEPALIVE = os.getenv('POOL_KEEPALIVE', 'true').lower() == 'true'
+
+    # 非同步客戶端連線池配置（0 表示不限制）
+    ASYNC_CONNECTION_LIMIT = int(os.getenv('ASYNC_CONNECTION_LIMIT', '1000'))
+    ASYNC_CONNECTION_LIMIT_PER_HOST = int(os.getenv('ASYNC_CONNECTION_LIMIT_PER_HOST', '0'))
+
+    # 批次下單同時在途的請求數
+    BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', '50'))
+
+    # 請求權重限速配置（同一 API Key 的客戶端共用額度）
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_WEIGHT_PER_MINUTE = int(os.getenv('RATE_LIMIT_WEIGHT_PER_MINUTE', '6000'))
+    RATE_LIMIT_ORDERS_PER_10S = int(os.getenv('RATE_LIMIT_ORDERS_PER_10S', '100'))
+    RATE_LIMIT_ORDERS_PER_DAY = int(os.getenv('RATE_LIMIT_ORDERS_PER_DAY', '200000'))
+    # 跨程序共用額度的狀態目錄（pytest-xdist 執行時由 conftest 自動設定；空字串表示不共享）
+    RATE_LIMIT_STATE_DIR = os.getenv('RATE_LIMIT_STATE_DIR', '')
+
+    # 伺服器時間同步配置（recvWindow 單位為毫秒）
+    TIME_SYNC_SAMPLES = int(os.getenv('TIME_SYNC_SAMPLES', '5'))
+    TIME_SYNC_INTERVAL = float(os.getenv('TIME_SYNC_INTERVAL', '300'))
+    RECV_WINDOW_MIN = int(os.getenv('RECV_WINDOW_MIN', '1000'))
+    RECV_WINDOW_MAX = int(os.getenv('RECV_WINDOW_MAX', '60000'))
+
+    # JSON 解析後端：auto（有安裝 orjson 時使用）、orjson、json
+    JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto').lower()
+
+    # exchangeInfo 交易對規則快取有效秒數
+    EXCHANGE_INFO_TTL = float(os.getenv('EXCHANGE_INFO_TTL', '3600'))
+
+    # 公開端點響應快取（記憶體層項目上限；磁碟層 SQLite 路徑，空字串表示不使用）
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'false').lower() == 'true'
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '256'))
+    RESPONSE_CACHE_PATH = os.getenv('RESPONSE_CACHE_PATH', '')
+
+    # 相同的未簽名 GET 已在途時共用同一次請求（預設關閉，併發測試需要每個請求實際送出）
+    SINGLE_FLIGHT_ENABLED = os.getenv('SINGLE_FLIGHT_ENABLED', 'false').lower() == 'true'
+
+    # K 線本地快取目錄（只存放已收盤的 K 線）
+    KLINE_CACHE_DIR = os.getenv('KLINE_CACHE_DIR', '.cache/klines')
+
     # API 端點
     API_V3 = f"{BASE_URL}/api/v3"
 
@@ -39,6 +107,12 @@ class Config:
     # 日誌配置
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 
+    # 請求追蹤（抽樣記錄到環形緩衝區，測試失敗時輸出；錯誤響應的抽樣率另計）
+    TRACE_ENABLED = os.getenv('TRACE_ENABLED', 'false').lower() == 'true'
+    TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '1.0'))
+    TRACE_ERROR_SAMPLE_RATE = float(os.getenv('TRACE_ERROR_SAMPLE_RATE', '1.0'))
+    TRACE_BUFFER_SIZE = int(os.getenv('TRACE_BUFFER_SIZE', '1000'))
+
     @classmethod
     def validate(cls):
         """驗證配置是否完整"""
@@ -1,11 +1,25 @@
 """
 Pytest 配置和 Fixtures
 """
+import shutil
+import tempfile
 import pytest
+import pytest_asyncio
 import logging
-from typing import Generator
+from typing import AsyncGenerator, Generator, Optional
 
 from utils.binance_client import BinanceClient
+from utils.async_client import AsyncBinanceClient
+from utils.cassette import NEW_EPISODES, RECORD, RECORD_MODES, Cassette, attach
+from utils.client_factory import ClientFactory, close_all_sessions, get_session
+from utils.latency_baseline import (
+    RegressionReport, compare, endpoint_histograms, load_baseline, merge_histograms, save_baseline
+)
+from utils.local_server import LocalBinanceServer
+from utils.metrics import Histogram, get_metrics
+from utils.order_tracker import OrderTracker
+from utils.retry import set_client_order_namespace
+from utils.tracing import get_tracer
 from config import Config
 
 # 配置日誌
@@ -16,27 +30,153 @@ logging.basicConfig(
 
 
 @pytest.fixture(scope="session")
-def binance_client() -> Generator[BinanceClient, None, None]:
+def local_server() -> Generator[LocalBinanceServer, None, None]:
+    """
+    Session 級別的本地模擬伺服器
+    整個測試會話共用一個伺服器實例
+    """
+    server = LocalBinanceServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def local_server_config(request) -> Generator[None, None, None]:
+    """
+    指定 --local-server 時將 Config 的 API 與 WebSocket 設定指向本地模擬伺服器
+    直接以預設參數建構客戶端或讀取 Config.BASE_URL 的測試也不會連到外部網絡，測試會話結束時還原
+    """
+    if not request.config.getoption("--local-server"):
+        yield
+        return
+    server = request.getfixturevalue("local_server")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(Config, 'BASE_URL', server.base_url)
+        patch.setattr(Config, 'API_KEY', server.api_key)
+        patch.setattr(Config, 'SECRET_KEY', server.secret_key)
+        patch.setattr(Config, 'WS_URL', server.ws_url)
+        patch.setattr(Config, 'WS_API_URL', server.ws_api_url)
+        yield
+
+
+@pytest.fixture(scope="session")
+def client_settings(request) -> dict:
+    """
+    客戶端建構參數
+    指定 --local-server 時指向本地模擬伺服器，否則使用 Config 設定
+    """
+    if request.config.getoption("--local-server"):
+        server = request.getfixturevalue("local_server")
+        return {
+            'api_key': server.api_key,
+            'secret_key': server.secret_key,
+            'base_url': server.base_url
+        }
+    return {}
+
+
+@pytest.fixture(scope="session")
+def cassette(request) -> Generator[Optional[Cassette], None, None]:
+    """
+    指定 --record-mode 時的卡帶
+    錄製模式在測試會話結束時寫回檔案；未指定時為 None
+    """
+    mode = request.config.getoption("--record-mode")
+    if mode is None:
+        yield None
+        return
+    cassette = Cassette(request.config.getoption("--cassette"))
+    yield cassette
+    if cassette.dirty:
+        cassette.save()
+
+
+@pytest.fixture(scope="session")
+def client_factory(request, client_settings: dict, cassette: Optional[Cassette]) -> Generator[ClientFactory, None, None]:
+    """
+    Session 級別的客戶端工廠
+    產生的客戶端共用程序內連線池，測試會話結束時統一關閉；
+    指定 --record-mode 時在共用 Session 上掛載錄製與重播轉接器
+    """
+    factory = ClientFactory(**client_settings)
+    if cassette is not None:
+        attach(
+            get_session(factory.base_url, factory.api_key),
+            cassette,
+            request.config.getoption("--record-mode"),
+            replay_latency=request.config.getoption("--replay-latency")
+        )
+    yield factory
+    close_all_sessions()
+
+
+@pytest.fixture(scope="session")
+def binance_client(client_factory: ClientFactory) -> Generator[BinanceClient, None, None]:
     """
     Session 級別的 Binance 客戶端
     整個測試會話共用一個客戶端實例
     """
-    client = BinanceClient()
+    client = client_factory.create()
     yield client
     client.close()
 
 
 @pytest.fixture(scope="function")
-def binance_client_function() -> Generator[BinanceClient, None, None]:
+def binance_client_function(client_factory: ClientFactory) -> Generator[BinanceClient, None, None]:
     """
     Function 級別的 Binance 客戶端
-    每個測試函數都會創建新的客戶端實例
+    每個測試函數都會創建新的客戶端實例（共用連線池，不重新握手）
     """
-    client = BinanceClient()
+    client = client_factory.create()
     yield client
     client.close()
 
 
+@pytest.fixture(scope="session")
+def local_binance_client(local_server: LocalBinanceServer) -> Generator[BinanceClient, None, None]:
+    """
+    連線到本地模擬伺服器的客戶端
+    不需網絡與 API 憑證
+    """
+    client = BinanceClient(
+        api_key=local_server.api_key,
+        secret_key=local_server.secret_key,
+        base_url=local_server.base_url
+    )
+    yield client
+    client.close()
+
+
+@pytest.fixture(scope="session")
+def ws_url(request) -> str:
+    """WebSocket 基礎 URL（--local-server 時指向本地模擬伺服器）"""
+    if request.config.getoption("--local-server"):
+        return request.getfixturevalue("local_server").ws_url
+    return Config.WS_URL
+
+
+@pytest.fixture(scope="session")
+def order_tracker(binance_client: BinanceClient, ws_url: str) -> Generator[OrderTracker, None, None]:
+    """
+    Session 級別的訂單狀態追蹤器
+    以用戶數據流取代下單後的固定等待，在背景執行緒中維持連線
+    """
+    tracker = OrderTracker(binance_client, ws_url).start_in_thread()
+    yield tracker
+    tracker.stop_thread()
+
+
+@pytest_asyncio.fixture
+async def async_binance_client(client_settings: dict) -> AsyncGenerator[AsyncBinanceClient, None]:
+    """
+    非同步 Binance 客戶端
+    pytest-asyncio 每個測試使用獨立事件迴圈，因此為 function 級別
+    """
+    client = AsyncBinanceClient(**client_settings)
+    yield client
+    await client.close()
+
+
 @pytest.fixture(scope="session")
 def test_symbol():
     """測試用交易對"""
@@ -75,6 +215,63 @@ def market_order_params():
 
 # ==================== Hooks ====================
 
+def pytest_addoption(parser):
+    """註冊命令行選項"""
+    parser.addoption(
+        "--local-server",
+        action="store_true",
+        default=False,
+        help="使用本地模擬伺服器取代 Binance 測試網（離線執行）"
+    )
+    parser.addoption(
+        "--trace-requests",
+        action="store_true",
+        default=False,
+        help="追蹤請求（抽樣率見 TRACE_SAMPLE_RATE），測試失敗時輸出到 reports/traces/"
+    )
+    parser.addoption(
+        "--record-mode",
+        choices=RECORD_MODES,
+        default=None,
+        help="錄製或重播 binance_client 的請求：record / replay / new_episodes"
+    )
+    parser.addoption(
+        "--cassette",
+        default="tests/cassettes/session.json.gz",
+        help="卡帶檔路徑（搭配 --record-mode）"
+    )
+    parser.addoption(
+        "--replay-latency",
+        action="store_true",
+        default=False,
+        help="重播時依錄製的延遲等待"
+    )
+    parser.addoption(
+        "--latency-save-baseline",
+        metavar="PATH",
+        default=None,
+        help="把本次各端點的延遲分佈保存為基準檔"
+    )
+    parser.addoption(
+        "--latency-baseline",
+        metavar="PATH",
+        default=None,
+        help="與基準檔比較各端點的 p50 / p95 / p99，有端點退步時測試失敗"
+    )
+    parser.addoption(
+        "--latency-report",
+        metavar="PATH",
+        default="reports/latency_regression.json",
+        help="延遲回歸檢查結果的 JSON 輸出路徑（搭配 --latency-baseline）"
+    )
+    parser.addoption(
+        "--latency-threshold",
+        type=float,
+        default=None,
+        help="分位數退步門檻（0.2 表示慢 20%%，預設 LATENCY_REGRESSION_THRESHOLD）"
+    )
+
+
 def pytest_configure(config):
     """Pytest 配置 hook"""
     # 註冊自定義標記
@@ -82,10 +279,81 @@ def pytest_configure(config):
         "markers", "smoke: 冒煙測試"
     )
 
+    # 在建立任何客戶端之前開啟追蹤
+    if config.getoption("--trace-requests"):
+        Config.TRACE_ENABLED = True
+    # 延遲回歸檢查以客戶端的延遲量測為樣本
+    if _latency_gate_enabled(config):
+        Config.METRICS_ENABLED = True
+
+    _configure_xdist(config)
+
+
+# ==================== 並行執行（pytest-xdist） ====================
+
+# 依模組分組：同一組的測試由同一個 worker 依序執行（pytest -n 時自動改用 --dist loadgroup）
+XDIST_GROUPS = {
+    'test_api_trading': 'trading',        # 在共用帳戶下單並比對餘額
+    'test_performance': 'performance',    # 量測延遲與探測限速，彼此不應同時執行
+}
+
+_RATE_LIMIT_STATE_DIR = pytest.StashKey[str]()
+
+
+def _configure_xdist(config):
+    """
+    xdist 控制程序建立共用的限速狀態目錄並傳給各 worker（見 pytest_configure_node），
+    worker 的客戶端因此共用同一份權重額度，下單的 newClientOrderId 帶有 worker 命名空間
+    """
+    workerinput = getattr(config, 'workerinput', None)
+    if workerinput is not None:
+        Config.RATE_LIMIT_STATE_DIR = workerinput['rate_limit_state_dir']
+        set_client_order_namespace(workerinput['workerid'])
+        # worker 重新解析命令行，需沿用控制程序改過的 --dist
+        config.option.loadgroup = workerinput['loadgroup']
+        return
+
+    dist = getattr(config.option, 'dist', 'no')
+    if dist == 'no':
+        return
+    if config.getoption("--record-mode") in (RECORD, NEW_EPISODES):
+        raise pytest.UsageError("錄製卡帶時不支援 pytest -n（各 worker 會互相覆寫卡帶檔）")
+    if dist == 'load':
+        config.option.dist = 'loadgroup'
+    if not Config.RATE_LIMIT_STATE_DIR:
+        Config.RATE_LIMIT_STATE_DIR = tempfile.mkdtemp(prefix='binance-rate-limit-')
+        config.stash[_RATE_LIMIT_STATE_DIR] = Config.RATE_LIMIT_STATE_DIR
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """傳給 xdist worker 的設定"""
+    node.workerinput['rate_limit_state_dir'] = Config.RATE_LIMIT_STATE_DIR
+    node.workerinput['loadgroup'] = node.config.option.dist == 'loadgroup'
+
+
+def pytest_unconfigure(config):
+    """移除控制程序建立的限速狀態目錄"""
+    state_dir = config.stash.get(_RATE_LIMIT_STATE_DIR, None)
+    if state_dir:
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+
+_TRACE_MARK = pytest.StashKey[int]()
+
+
+def pytest_runtest_setup(item):
+    """記錄測試開始前最後一筆追蹤記錄，失敗時只輸出此測試期間的請求"""
+    if Config.TRACE_ENABLED:
+        item.stash[_TRACE_MARK] = get_tracer().mark()
 
+
+@pytest.hookimpl(tryfirst=True)
 def pytest_collection_modifyitems(config, items):
-    """修改測試項目的 hook"""
+    """修改測試項目的 hook（先於 xdist worker 依 xdist_group 改寫 nodeid）"""
     # 為沒有標記的測試添加默認標記
+    grouped = config.pluginmanager.hasplugin("xdist")
+    offline = pytest.mark.skip(reason="--local-server 時不連線到測試網")
     for item in items:
         if "test_security" in item.nodeid:
             item.add_marker(pytest.mark.security)
@@ -93,6 +361,92 @@ def pytest_collection_modifyitems(config, items):
             item.add_marker(pytest.mark.performance)
         if "test_api" in item.nodeid:
             item.add_marker(pytest.mark.api)
+        if config.getoption("--local-server") and item.get_closest_marker("network") is not None:
+            item.add_marker(offline)
+        group = XDIST_GROUPS.get(item.path.stem)
+        if grouped and group and item.get_closest_marker("xdist_group") is None:
+            item.add_marker(pytest.mark.xdist_group(group))
+
+
+# ==================== 延遲回歸檢查 ====================
+
+_LATENCY_WORKER_KEY = 'latency_histograms'
+_LATENCY_HISTOGRAMS = pytest.StashKey[dict]()
+_LATENCY_REPORT = pytest.StashKey[RegressionReport]()
+
+
+def _latency_gate_enabled(config) -> bool:
+    return bool(config.getoption("--latency-baseline") or config.getoption("--latency-save-baseline"))
+
+
+def _latency_meta(config) -> dict:
+    """基準與本次執行的說明（目標伺服器不同時比較結果會加上警告）"""
+    return {
+        'target': 'local' if config.getoption("--local-server") else Config.BASE_URL,
+        'args': list(config.invocation_params.args),
+    }
+
+
+def pytest_sessionstart(session):
+    """只統計本次測試會話的請求"""
+    if _latency_gate_enabled(session.config):
+        get_metrics().reset()
+        session.config.stash[_LATENCY_HISTOGRAMS] = {}
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """合併 xdist worker 的延遲分佈"""
+    data = getattr(node, 'workeroutput', {}).get(_LATENCY_WORKER_KEY)
+    if data:
+        merge_histograms(
+            node.config.stash[_LATENCY_HISTOGRAMS],
+            {key: Histogram.from_dict(item) for key, item in data.items()}
+        )
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_sessionfinish(session, exitstatus):
+    """保存基準或與基準比較（在 pytest-html 產生報告之前）"""
+    config = session.config
+    if not _latency_gate_enabled(config):
+        return
+
+    histograms = endpoint_histograms(get_metrics())
+    if hasattr(config, 'workerinput'):
+        config.workeroutput[_LATENCY_WORKER_KEY] = {key: h.to_dict() for key, h in histograms.items()}
+        return
+    merge_histograms(histograms, config.stash[_LATENCY_HISTOGRAMS])
+
+    meta = _latency_meta(config)
+    save_path = config.getoption("--latency-save-baseline")
+    if save_path:
+        save_baseline(save_path, histograms, meta)
+
+    baseline_path = config.getoption("--latency-baseline")
+    if baseline_path:
+        baseline, baseline_meta = load_baseline(baseline_path)
+        report = compare(baseline, histograms, threshold=config.getoption("--latency-threshold"),
+                         baseline_meta=baseline_meta, meta=meta)
+        report.dump(config.getoption("--latency-report"))
+        config.stash[_LATENCY_REPORT] = report
+        if report.regressions and session.exitstatus == pytest.ExitCode.OK:
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """輸出延遲回歸檢查結果"""
+    report = config.stash.get(_LATENCY_REPORT, None)
+    if report is not None:
+        terminalreporter.write_sep("=", "latency regression check", red=bool(report.regressions))
+        terminalreporter.write_line(report.format())
+
+
+def pytest_html_results_summary(prefix, summary, postfix, session):
+    """在 HTML 報告摘要加入延遲回歸檢查結果"""
+    report = session.config.stash.get(_LATENCY_REPORT, None)
+    if report is not None:
+        prefix.append(report.to_html())
 
 
 def pytest_html_report_title(report):
@@ -120,3 +474,13 @@ def pytest_runtest_makereport(item, call):
         # 測試失敗時的處理
         if report.failed:
             logging.error(f"Test failed: {item.nodeid}")
+            if Config.TRACE_ENABLED:
+                _dump_traces(item, report)
+
+
+def _dump_traces(item, report):
+    """輸出失敗測試期間的請求追蹤記錄"""
+    name = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in item.nodeid)
+    path = get_tracer().dump(f"reports/traces/{name}.jsonl", since=item.stash.get(_TRACE_MARK, 0))
+    if path is not None:
+        report.sections.append(("request traces", str(path)))
@@ -2,8 +2,9 @@
 API 測試 - 交易相關（需要 API 認證）
 """
 import pytest
-import time
 from utils.binance_client import BinanceClient
+from utils.models import Account
+from utils.order_tracker import OPEN_STATUSES, OrderTracker
 from config import Config
 
 
@@ -40,13 +41,8 @@ class TestAccountAPI:
         response = binance_client.get_account_info()
         assert response.status_code == 200
 
-        data = response.json()
-        balances = data['balances']
-
-        # 篩選非零餘額
-        non_zero_balances = [
-            b for b in balances if float(b['free']) > 0 or float(b['locked']) > 0
-        ]
+        # 篩選非零餘額（數值欄位只轉換一次）
+        non_zero_balances = Account.from_response(response).non_zero_balances()
 
         assert len(non_zero_balances) > 0, "測試帳戶應有虛擬資金"
 
@@ -73,7 +69,9 @@ class TestOrderAPI:
         assert response.json() == {}
 
     @pytest.mark.skipif(not Config.is_configured(), reason="需要 API 憑證")
-    def test_create_limit_order(self, binance_client: BinanceClient, order_params: dict):
+    def test_create_limit_order(
+        self, binance_client: BinanceClient, order_tracker: OrderTracker, order_params: dict
+    ):
         """TC-A004: 創建限價單"""
         response = binance_client.create_order(
             symbol=order_params['symbol'],
@@ -96,8 +94,10 @@ class TestOrderAPI:
         # 保存訂單 ID 用於後續測試
         order_id = data['orderId']
 
-        # 查詢訂單
-        time.sleep(1)  # 等待訂單處理
+        # 等待用戶數據流回報訂單已進入撮合簿，再查詢訂單
+        order_tracker.wait_for_blocking(
+            order_id, OPEN_STATUSES | {'FILLED'}, timeout=Config.REQUEST_TIMEOUT, symbol=order_params['symbol']
+        )
         query_response = binance_client.get_order(
             symbol=order_params['symbol'],
             order_id=order_id
@@ -113,7 +113,7 @@ class TestOrderAPI:
 
     @pytest.mark.skipif(not Config.is_configured(), reason="需要 API 憑證")
     def test_create_and_cancel_order(
-        self, binance_client: BinanceClient, order_params: dict
+        self, binance_client: BinanceClient, order_tracker: OrderTracker, order_params: dict
     ):
         """TC-A005: 創建並取消訂單"""
         # 1. 創建訂單
@@ -130,7 +130,9 @@ class TestOrderAPI:
         order_id = create_response.json()['orderId']
 
         # 2. 取消訂單
-        time.sleep(1)
+        order_tracker.wait_for_blocking(
+            order_id, 'NEW', timeout=Config.REQUEST_TIMEOUT, symbol=order_params['symbol']
+        )
         cancel_response = binance_client.cancel_order(
             symbol=order_params['symbol'],
             order_id=order_id
@@ -142,7 +144,9 @@ class TestOrderAPI:
         assert cancel_data['status'] == 'CANCELED'
 
     @pytest.mark.skipif(not Config.is_configured(), reason="需要 API 憑證")
-    def test_query_order(self, binance_client: BinanceClient, order_params: dict):
+    def test_query_order(
+        self, binance_client: BinanceClient, order_tracker: OrderTracker, order_params: dict
+    ):
         """TC-A006: 查詢訂單狀態"""
         # 先創建訂單
         create_response = binance_client.create_order(
@@ -156,7 +160,9 @@ class TestOrderAPI:
         order_id = create_response.json()['orderId']
 
         # 查詢訂單
-        time.sleep(1)
+        order_tracker.wait_for_blocking(
+            order_id, OPEN_STATUSES | {'FILLED'}, timeout=Config.REQUEST_TIMEOUT, symbol=order_params['symbol']
+        )
         query_response = binance_client.get_order(
             symbol=order_params['symbol'],
             order_id=order_id
@@ -198,7 +204,9 @@ class TestCompleteTradeFlow:
 
     @pytest.mark.skipif(not Config.is_configured(), reason="需要 API 憑證")
     @pytest.mark.slow
-    def test_complete_trade_flow(self, binance_client: BinanceClient, test_symbol: str):
+    def test_complete_trade_flow(
+        self, binance_client: BinanceClient, order_tracker: OrderTracker, test_symbol: str
+    ):
         """TC-I001: 完整交易流程 - 查詢餘額 > 下單 > 查詢 > 取消 > 驗證"""
 
         # 1. 查詢初始帳戶餘額
@@ -220,7 +228,7 @@ class TestCompleteTradeFlow:
         print(f"訂單已創建: {order_id}")
 
         # 3. 查詢訂單狀態
-        time.sleep(2)
+        order_tracker.wait_for_blocking(order_id, 'NEW', timeout=Config.REQUEST_TIMEOUT, symbol=test_symbol)
         query_response = binance_client.get_order(symbol=test_symbol, order_id=order_id)
         assert query_response.status_code == 200
         order_data = query_response.json()
@@ -241,7 +249,8 @@ class TestCompleteTradeFlow:
         print("訂單已取消")
 
         # 6. 再次查詢訂單確認已取消
-        time.sleep(1)
+        tracked = order_tracker.wait_for_blocking(order_id, 'CANCELED', timeout=Config.REQUEST_TIMEOUT)
+        assert tracked['status'] == 'CANCELED'
         final_query = binance_client.get_order(symbol=test_symbol, order_id=order_id)
         assert final_query.status_code == 200
         assert final_query.json()['status'] == 'CANCELED'
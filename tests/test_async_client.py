@@ -0,0 +1,75 @@
+"""
+非同步客戶端測試
+"""
+import asyncio
+import pytest
+import time
+from utils.async_client import AsyncBinanceClient
+from utils.binance_client import BinanceClient
+
+
+@pytest.mark.functional
+@pytest.mark.p1
+class TestAsyncClientSigning:
+    """非同步客戶端簽名測試（不需網絡）"""
+
+    def test_signature_matches_sync_client(self):
+        """TC-AS001: 非同步與同步客戶端產生相同簽名"""
+        params = {'symbol': 'BTCUSDT', 'side': 'BUY', 'type': 'LIMIT', 'timestamp': 1700000000000}
+
+        sync_client = BinanceClient(api_key='key', secret_key='secret')
+        async_client = AsyncBinanceClient(api_key='key', secret_key='secret')
+
+        assert async_client._generate_signature(dict(params)) == \
+            sync_client._generate_signature(dict(params))
+        sync_client.close()
+
+    def test_public_methods_return_awaitables(self):
+        """TC-AS002: 公開方法回傳 awaitable"""
+        client = AsyncBinanceClient(api_key='key', secret_key='secret')
+        coroutine = client.ping()
+
+        assert asyncio.iscoroutine(coroutine), "非同步客戶端的公開方法應回傳 coroutine"
+        coroutine.close()
+
+
+@pytest.mark.functional
+@pytest.mark.p1
+class TestAsyncClientFunctionality:
+    """非同步客戶端功能測試"""
+
+    @pytest.mark.asyncio
+    async def test_async_ping(self, async_binance_client: AsyncBinanceClient):
+        """TC-AS003: 非同步 Ping"""
+        response = await async_binance_client.ping()
+
+        assert response.status_code == 200
+        assert response.json() == {}
+
+    @pytest.mark.asyncio
+    async def test_async_order_book(self, async_binance_client: AsyncBinanceClient, test_symbol: str):
+        """TC-AS004: 非同步深度查詢"""
+        response = await async_binance_client.get_order_book(symbol=test_symbol, limit=5)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert 'bids' in data
+        assert 'asks' in data
+
+    @pytest.mark.performance
+    @pytest.mark.asyncio
+    async def test_async_concurrent_requests(self, async_binance_client: AsyncBinanceClient):
+        """TC-AS005: 單一事件迴圈併發請求"""
+        num_requests = 50
+
+        start_time = time.time()
+        responses = await asyncio.gather(
+            *(async_binance_client.get_server_time() for _ in range(num_requests))
+        )
+        total_time = time.time() - start_time
+
+        success_count = sum(1 for r in responses if r.status_code == 200)
+        print(f"\n非同步併發 {num_requests} 個請求耗時: {total_time:.2f}s")
+
+        assert success_count == num_requests, f"所有請求都應成功，成功率: {success_count}/{num_requests}"
+        assert total_time < 10, f"併發請求總時間應小於 10s，實際: {total_time:.2f}s"
@@ -0,0 +1,140 @@
+"""
+批次下單測試（離線）
+"""
+import time
+import pytest
+from utils.async_client import AsyncBinanceClient
+from utils.binance_client import BinanceClient
+from utils.local_server import LocalBinanceServer
+from utils.rate_limiter import RateLimiter
+
+
+def _grid(symbol: str, levels: int, base_price: int = 20000) -> list:
+    """低於市價的限價買單網格（不會成交）"""
+    return [
+        {'symbol': symbol, 'side': 'BUY', 'order_type': 'LIMIT', 'quantity': 0.001, 'price': base_price + i}
+        for i in range(levels)
+    ]
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p1
+class TestBatchOrders:
+    """批次下單與取消測試"""
+
+    def test_submit_orders_in_input_order(self, local_binance_client: BinanceClient, test_symbol: str):
+        """TC-B001: 結果依輸入順序返回並包含個別錯誤"""
+        orders = _grid(test_symbol, 20)
+        orders.insert(5, {'symbol': 'INVALIDPAIR', 'side': 'BUY', 'order_type': 'LIMIT',
+                          'quantity': 0.001, 'price': 1})
+
+        results = local_binance_client.submit_orders(orders)
+
+        assert len(results) == len(orders)
+        assert not results[5].ok
+        assert results[5].json()['code'] == -1121
+        placed = [r for r in results if r.ok]
+        assert len(placed) == 20
+        assert [float(r.json()['price']) for r in placed] == [o['price'] for o in _grid(test_symbol, 20)]
+
+        order_ids = [r.json()['orderId'] for r in placed]
+        cancels = local_binance_client.cancel_orders(test_symbol, order_ids)
+        assert all(r.ok for r in cancels)
+        assert [r.json()['orderId'] for r in cancels] == order_ids
+
+    def test_cancel_all_open_orders(self, local_binance_client: BinanceClient, test_symbol: str):
+        """TC-B002: 未指定訂單時以單一請求取消所有掛單"""
+        local_binance_client.submit_orders(_grid(test_symbol, 10))
+        open_ids = {o['orderId'] for o in local_binance_client.get_open_orders(symbol=test_symbol).json()}
+        assert len(open_ids) >= 10
+
+        results = local_binance_client.cancel_orders(test_symbol)
+
+        assert len(results) == 1 and results[0].ok
+        assert {o['orderId'] for o in results[0].json()} == open_ids
+        assert all(o['status'] == 'CANCELED' for o in results[0].json())
+        assert local_binance_client.get_open_orders(symbol=test_symbol).json() == []
+
+        again = local_binance_client.cancel_open_orders(symbol=test_symbol)
+        assert again.status_code == 400
+        assert again.json()['code'] == -2011
+
+    def test_order_count_limit_respected(self, local_server: LocalBinanceServer, test_symbol: str):
+        """TC-B003: 超過下單次數額度時排隊等待"""
+        client = BinanceClient(
+            api_key=local_server.api_key, secret_key=local_server.secret_key, base_url=local_server.base_url,
+            rate_limiter=RateLimiter(orders_per_10s=50)
+        )
+        try:
+            start = time.perf_counter()
+            results = client.submit_orders(_grid(test_symbol, 55))
+            elapsed = time.perf_counter() - start
+            client.cancel_orders(test_symbol)
+        finally:
+            client.close()
+
+        assert all(r.ok for r in results)
+        assert elapsed >= 0.9, "超出額度的 5 筆訂單應等待令牌回補（每秒 5 筆）"
+
+    def test_connection_error_reported_per_order(self, test_symbol: str):
+        """TC-B004: 連線錯誤記錄在個別結果中"""
+        client = BinanceClient(api_key='key', secret_key='secret', base_url='http://127.0.0.1:9', rate_limit=False)
+        try:
+            results = client.submit_orders(_grid(test_symbol, 3))
+        finally:
+            client.close()
+
+        assert len(results) == 3
+        assert all(not r.ok and r.error is not None and r.json() is None for r in results)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('transport', ['rest', 'ws'])
+    async def test_async_batch(self, local_server: LocalBinanceServer, test_symbol: str, transport: str):
+        """TC-B005: 非同步批次下單（REST 與 WebSocket API）"""
+        async with AsyncBinanceClient(
+            api_key=local_server.api_key, secret_key=local_server.secret_key, base_url=local_server.base_url,
+            order_transport=transport, ws_api_url=local_server.ws_api_url
+        ) as client:
+            results = await client.submit_orders(_grid(test_symbol, 30))
+            assert all(r.ok for r in results)
+            assert [float(r.json()['price']) for r in results] == [o['price'] for o in _grid(test_symbol, 30)]
+
+            cancels = await client.cancel_orders(test_symbol)
+            assert cancels[0].ok
+            assert len(cancels[0].json()) == 30
+
+
+@pytest.mark.local
+@pytest.mark.performance
+@pytest.mark.p2
+class TestBatchOrderPerformance:
+    """批次下單性能測試"""
+
+    def test_grid_requote_latency(self, local_server: LocalBinanceServer, test_symbol: str):
+        """TC-B006: 100 檔網格的批次下單接近單次往返時間"""
+        # 只量測併發效果，不受其他測試已用掉的下單額度影響
+        client = BinanceClient(
+            api_key=local_server.api_key, secret_key=local_server.secret_key, base_url=local_server.base_url,
+            rate_limit=False
+        )
+        local_server.set_latency(0.02)
+        try:
+            start = time.perf_counter()
+            for order in _grid(test_symbol, 10):
+                client.create_order(**order)
+            sequential = (time.perf_counter() - start) / 10 * 100
+            client.cancel_orders(test_symbol)
+
+            start = time.perf_counter()
+            results = client.submit_orders(_grid(test_symbol, 100), max_concurrency=100)
+            elapsed = time.perf_counter() - start
+            client.cancel_orders(test_symbol)
+        finally:
+            local_server.set_latency(0.0)
+            client.close()
+
+        print(f"\n100 筆訂單: 逐筆約 {sequential * 1000:.0f}ms, 批次 {elapsed * 1000:.0f}ms")
+        assert all(r.ok for r in results)
+        # 本地伺服器與客戶端共用同一個程序，批次耗時主要是雙方的 CPU 處理時間
+        assert elapsed < sequential / 3, "批次送出應遠快於逐筆送出"
@@ -0,0 +1,178 @@
+"""
+錄製與重播傳輸層測試（離線）
+"""
+import time
+import pytest
+from utils.binance_client import BinanceClient
+from utils.cassette import (
+    NEW_EPISODES, RECORD, REPLAY, Cassette, CassetteMissError, Interaction, attach, match_key
+)
+from utils.local_server import LocalBinanceServer
+from utils.retry import new_client_order_id
+from utils.time_sync import TimeSync
+
+# 重播用的客戶端指向沒有服務的埠，任何實際送出的請求都會失敗
+OFFLINE_URL = 'http://127.0.0.1:9'
+
+
+def _client(base_url: str, api_key: str = 'key', secret_key: str = 'secret') -> BinanceClient:
+    client = BinanceClient(api_key=api_key, secret_key=secret_key, base_url=base_url, rate_limit=False)
+    client.single_flight = None
+    client.retry_policy = None
+    return client
+
+
+@pytest.fixture
+def recording_client(local_server: LocalBinanceServer):
+    """連線到本地模擬伺服器的客戶端"""
+    client = _client(local_server.base_url, local_server.api_key, local_server.secret_key)
+    yield client
+    client.close()
+    local_server.set_latency(0.0)
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p1
+class TestCassette:
+    """錄製與重播測試"""
+
+    def test_match_key_normalization(self):
+        """TC-CS001: 參數排序，忽略時間戳、recvWindow、簽名與自動產生的訂單 ID"""
+        first = match_key('get', 'https://a/api/v3/order?symbol=BTCUSDT&orderId=1&timestamp=1&signature=ab')
+        second = match_key('GET', 'http://b/api/v3/order?orderId=1&symbol=BTCUSDT&timestamp=2&recvWindow=1500'
+                                  '&signature=cd')
+        assert first == second == 'GET /api/v3/order?orderId=1&symbol=BTCUSDT'
+        assert match_key('GET', 'https://a/api/v3/ping') == 'GET /api/v3/ping'
+
+        generated = match_key('POST', f'https://a/api/v3/order?newClientOrderId={new_client_order_id()}')
+        assert generated == match_key('POST', f'https://a/api/v3/order?newClientOrderId={new_client_order_id()}')
+        assert match_key('POST', 'https://a/api/v3/order?newClientOrderId=my-order') != generated
+
+    def test_record_then_replay_offline(self, recording_client: BinanceClient, local_server: LocalBinanceServer,
+                                        test_symbol: str, tmp_path):
+        """TC-CS002: 錄製後以離線客戶端重播，響應內容一致且不送出請求"""
+        path = tmp_path / 'session.json.gz'
+        recorder = attach(recording_client.session, Cassette(str(path)), RECORD)
+        recorded = [
+            recording_client.get_order_book(test_symbol, limit=100),
+            recording_client.get_account_info(),
+            recording_client.get_order(test_symbol, order_id=999999999),
+        ]
+        recorder.cassette.save()
+        assert recorder.recorded == 3
+
+        requests_before = local_server.request_count
+        replay_client = _client(OFFLINE_URL)
+        player = attach(replay_client.session, Cassette(str(path)), REPLAY)
+        replayed = [
+            replay_client.get_order_book(test_symbol, limit=100),
+            replay_client.get_account_info(),
+            replay_client.get_order(test_symbol, order_id=999999999),
+        ]
+
+        assert [r.status_code for r in replayed] == [200, 200, 400]
+        assert [r.content for r in replayed] == [r.content for r in recorded]
+        assert replayed[0].headers['X-MBX-USED-WEIGHT-1M'] == recorded[0].headers['X-MBX-USED-WEIGHT-1M']
+        assert player.hits == 3
+        assert local_server.request_count == requests_before
+
+        with pytest.raises(CassetteMissError):
+            replay_client.get_order_book(test_symbol, limit=5)
+        replay_client.close()
+
+    def test_sequential_replay(self, recording_client: BinanceClient, test_symbol: str):
+        """TC-CS003: 同一個請求錄到多個響應時依序重播，用完後重複最後一個"""
+        cassette = Cassette()
+        attach(recording_client.session, cassette, RECORD)
+        order_id = recording_client.create_order(
+            symbol=test_symbol, side='BUY', order_type='LIMIT', quantity=0.001, price=20000
+        ).json()['orderId']
+        recording_client.get_order(test_symbol, order_id=order_id)
+        recording_client.cancel_order(test_symbol, order_id)
+        recording_client.get_order(test_symbol, order_id=order_id)
+
+        replay_client = _client(OFFLINE_URL)
+        attach(replay_client.session, cassette, REPLAY)
+        created = replay_client.create_order(
+            symbol=test_symbol, side='BUY', order_type='LIMIT', quantity=0.001, price=20000
+        )
+        statuses = [replay_client.get_order(test_symbol, order_id=order_id).json()['status'] for _ in range(3)]
+
+        assert created.json()['orderId'] == order_id
+        assert statuses == ['NEW', 'CANCELED', 'CANCELED']
+        replay_client.close()
+
+    def test_new_episodes_and_file_format(self, recording_client: BinanceClient, test_symbol: str, tmp_path):
+        """TC-CS004: new_episodes 只錄製新請求；非 UTF-8 內容可存取"""
+        cassette = Cassette()
+        cassette.record('GET /api/v3/ping', Interaction(200, 'OK', {}, b'{}', 0.001))
+        cassette.record('GET /binary', Interaction(200, 'OK', {'Content-Type': 'application/octet-stream'},
+                                                   b'\xff\x00\xfe', 0.002))
+        adapter = attach(recording_client.session, cassette, NEW_EPISODES)
+
+        recording_client.ping()
+        recording_client.get_server_time()
+        assert (adapter.hits, adapter.recorded) == (1, 1)
+
+        path = cassette.save(str(tmp_path / 'episodes.json.gz'))
+        loaded = Cassette(str(path))
+        assert len(loaded) == 3
+        assert loaded.play('GET /binary').content == b'\xff\x00\xfe'
+        assert loaded.bodies('/api/v3/time')[0].startswith(b'{"serverTime"')
+
+        with pytest.raises(ValueError):
+            attach(recording_client.session, cassette, 'once')
+
+    def test_replay_with_different_recv_window(self, recording_client: BinanceClient, test_symbol: str):
+        """TC-CS006: 時間同步估計的 recvWindow 與錄製時不同仍可重播簽名請求"""
+        cassette = Cassette()
+        recording_client.time_sync = TimeSync(lambda: 0)
+        recording_client.time_sync.recv_window = 1200
+        attach(recording_client.session, cassette, RECORD)
+        recorded = recording_client.get_open_orders(test_symbol)
+        assert recorded.status_code == 200
+        assert 'recvWindow=1200' in recorded.request.url
+
+        replay_client = _client(OFFLINE_URL)
+        replay_client.time_sync = TimeSync(lambda: 0)
+        replay_client.time_sync.recv_window = 3400
+        attach(replay_client.session, cassette, REPLAY)
+        replayed = replay_client.get_open_orders(test_symbol)
+        replay_client.close()
+
+        assert 'recvWindow=3400' in replayed.request.url
+        assert replayed.content == recorded.content
+
+
+@pytest.mark.local
+@pytest.mark.performance
+@pytest.mark.p2
+class TestReplayLatency:
+    """重播延遲測試"""
+
+    def test_replay_speed_and_recorded_latency(self, recording_client: BinanceClient,
+                                               local_server: LocalBinanceServer):
+        """TC-CS005: 預設立即重播；replay_latency 時依錄製的延遲等待"""
+        cassette = Cassette()
+        local_server.set_latency(0.05)
+        attach(recording_client.session, cassette, RECORD)
+        recording_client.ping()
+        assert cassette.play('GET /api/v3/ping').latency >= 0.05
+
+        client = _client(OFFLINE_URL)
+        attach(client.session, cassette, REPLAY)
+        start = time.perf_counter()
+        for _ in range(200):
+            client.ping()
+        per_request = (time.perf_counter() - start) / 200
+
+        attach(client.session, cassette, REPLAY, replay_latency=True)
+        start = time.perf_counter()
+        client.ping()
+        delayed = time.perf_counter() - start
+        client.close()
+
+        print(f"\n重播: {per_request * 1e6:.0f}µs/請求, 依錄製延遲重播: {delayed * 1000:.1f}ms")
+        assert per_request < 0.005
+        assert delayed >= 0.05
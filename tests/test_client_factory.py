@@ -0,0 +1,59 @@
+"""
+共用連線池與客戶端工廠測試（離線）
+"""
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from utils.client_factory import ClientFactory, get_session, pool_stats
+from utils.local_server import LocalBinanceServer
+
+
+@pytest.mark.local
+@pytest.mark.performance
+@pytest.mark.p1
+class TestClientFactory:
+    """客戶端工廠測試"""
+
+    def test_clients_share_session_per_key(self, local_server: LocalBinanceServer):
+        """TC-CF001: 相同 base_url 與 API Key 的客戶端共用 Session"""
+        factory = ClientFactory(local_server.api_key, local_server.secret_key, local_server.base_url)
+
+        first = factory.create()
+        second = factory.create()
+        other_key = factory.create(api_key='another-key')
+
+        assert first.session is second.session
+        assert first.session is get_session(local_server.base_url, local_server.api_key)
+        assert other_key.session is not first.session
+        assert other_key.session.headers['X-MBX-APIKEY'] == 'another-key'
+
+    def test_close_keeps_shared_pool(self, local_server: LocalBinanceServer):
+        """TC-CF002: 關閉客戶端不會關閉共用連線池"""
+        factory = ClientFactory(local_server.api_key, local_server.secret_key, local_server.base_url)
+
+        client = factory.create()
+        assert client.ping().status_code == 200
+        client.close()
+
+        assert factory.create().ping().status_code == 200
+
+    def test_connections_are_reused(self):
+        """TC-CF003: 多執行緒請求重用連線"""
+        with LocalBinanceServer() as server:
+            factory = ClientFactory(server.api_key, server.secret_key, server.base_url)
+
+            def make_request(_):
+                client = factory.create()
+                client.single_flight = None  # 每個請求都要實際送出，才能量測連線重用
+                status = client.get_server_time().status_code
+                client.close()
+                return status
+
+            with ThreadPoolExecutor(max_workers=10) as executor:
+                statuses = list(executor.map(make_request, range(200)))
+
+            stats = pool_stats()[server.base_url]
+
+        assert statuses == [200] * 200
+        assert stats['requests'] == 200
+        assert stats['connections'] <= 50, f"連線應被重用，實際新建 {stats['connections']} 條"
+        assert stats['reused'] >= 150
@@ -0,0 +1,81 @@
+"""
+K 線本地快取測試（離線）
+"""
+import pytest
+import numpy as np
+from utils.binance_client import BinanceClient
+from utils.kline_cache import KlineCache
+from utils.kline_store import INTERVAL_MS
+
+MINUTE = INTERVAL_MS['1m']
+
+
+def _closed_end(client: BinanceClient) -> int:
+    """最後一根已收盤 1m K 線的開盤時間"""
+    now = client._get_timestamp()
+    return now - now % MINUTE - 2 * MINUTE
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p1
+class TestKlineCache:
+    """K 線快取測試"""
+
+    def test_second_query_served_from_disk(self, local_binance_client: BinanceClient, test_symbol: str, tmp_path):
+        """TC-KC001: 已收盤區間第二次查詢不發送請求且為記憶體映射"""
+        cache = KlineCache(local_binance_client, cache_dir=str(tmp_path))
+        start_time = _closed_end(local_binance_client) - 1999 * MINUTE
+
+        first = cache.get_klines(test_symbol, '1m', limit=1500, start_time=start_time)
+        assert len(first['open_time']) == 1500
+        assert cache.fetched_ranges == 1
+
+        second = cache.get_klines(test_symbol, '1m', limit=1500, start_time=start_time)
+        assert cache.fetched_ranges == 1, "已快取的區間不應重新抓取"
+        assert isinstance(second['close'], np.memmap)
+        assert np.array_equal(first['close'], second['close'])
+
+    def test_only_gaps_fetched(self, local_binance_client: BinanceClient, test_symbol: str, tmp_path):
+        """TC-KC002: 只抓取缺口並合併為單一區段"""
+        cache = KlineCache(local_binance_client, cache_dir=str(tmp_path))
+        base = _closed_end(local_binance_client) - 299 * MINUTE
+
+        cache.get_klines(test_symbol, '1m', limit=100, start_time=base)
+        cache.get_klines(test_symbol, '1m', limit=100, start_time=base + 200 * MINUTE)
+        assert cache.missing_ranges(test_symbol, '1m', base, base + 300 * MINUTE - 1) == [
+            (base + 100 * MINUTE, base + 200 * MINUTE - 1)
+        ]
+
+        columns = cache.get_klines(test_symbol, '1m', limit=300, start_time=base)
+        assert cache.fetched_ranges == 3
+        assert cache.missing_ranges(test_symbol, '1m', base, base + 300 * MINUTE - 1) == []
+        assert (np.diff(columns['open_time']) == MINUTE).all()
+
+        direct = local_binance_client.get_klines(symbol=test_symbol, interval='1m', limit=300, start_time=base).json()
+        assert columns['close'].tolist() == [float(row[4]) for row in direct]
+        assert len(cache._get_series(test_symbol, '1m').segments) == 1
+
+    def test_open_candle_not_cached(self, local_binance_client: BinanceClient, test_symbol: str, tmp_path):
+        """TC-KC003: 最新查詢包含未收盤 K 線但不寫入快取"""
+        cache = KlineCache(local_binance_client, cache_dir=str(tmp_path))
+
+        columns = cache.get_klines(test_symbol, '1m', limit=50)
+        assert len(columns['open_time']) == 50
+
+        now = local_binance_client._get_timestamp()
+        series = cache._get_series(test_symbol, '1m')
+        assert series.segments[-1].end < now - MINUTE + 1
+        assert columns['open_time'][-1] > series.segments[-1].end
+
+    def test_cache_persists_across_instances(self, local_binance_client: BinanceClient, test_symbol: str, tmp_path):
+        """TC-KC004: 重新建立快取時讀取既有區段"""
+        start_time = _closed_end(local_binance_client) - 99 * MINUTE
+        KlineCache(local_binance_client, cache_dir=str(tmp_path)).get_klines(
+            test_symbol, '1m', limit=100, start_time=start_time
+        )
+
+        cache = KlineCache(local_binance_client, cache_dir=str(tmp_path))
+        columns = cache.get_klines(test_symbol, '1m', limit=100, start_time=start_time)
+        assert cache.fetched_ranges == 0
+        assert len(columns['open_time']) == 100
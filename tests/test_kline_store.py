@@ -0,0 +1,77 @@
+"""
+列式 K 線載入器測試（離線）
+"""
+import pytest
+import numpy as np
+from utils.binance_client import BinanceClient
+from utils.kline_store import INTERVAL_MS, KLINE_COLUMNS, KLINE_DTYPE, KlineStore, decode_rows, empty_columns
+
+
+def _range(client: BinanceClient, candles: int, interval: str = '1m'):
+    """取得最近 candles 根已收盤 K 線的時間範圍"""
+    interval_ms = INTERVAL_MS[interval]
+    now = client.get_server_time().json()['serverTime']
+    end_time = now - now % interval_ms - 1
+    return end_time - candles * interval_ms + 1, end_time
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p1
+class TestKlineStore:
+    """K 線載入器測試"""
+
+    def test_decode_rows(self, local_binance_client: BinanceClient, test_symbol: str):
+        """TC-K001: 單頁解碼與原始資料一致"""
+        rows = local_binance_client.get_klines(symbol=test_symbol, interval='1m', limit=10).json()
+        columns = empty_columns(10)
+
+        assert decode_rows(rows, columns) == 10
+        assert columns['open_time'].tolist() == [row[0] for row in rows]
+        assert columns['close'].tolist() == [float(row[4]) for row in rows]
+        assert columns['trade_count'].tolist() == [row[8] for row in rows]
+
+    def test_paginated_backfill(self, local_binance_client: BinanceClient, test_symbol: str):
+        """TC-K002: 跨頁抓取結果連續且與逐頁查詢一致"""
+        start_time, end_time = _range(local_binance_client, 2500)
+        store = KlineStore(local_binance_client)
+
+        columns = store.fetch_columns(test_symbol, '1m', start_time, end_time)
+
+        assert set(columns) == set(KLINE_COLUMNS)
+        assert all(len(column) == 2500 for column in columns.values())
+        assert all(column.flags['C_CONTIGUOUS'] for column in columns.values())
+        assert columns['open_time'][0] == start_time
+        assert (np.diff(columns['open_time']) == INTERVAL_MS['1m']).all(), "K 線應連續且不重複"
+        assert (columns['high'] >= columns['low']).all()
+
+        direct = local_binance_client.get_klines(
+            symbol=test_symbol, interval='1m', limit=1000, start_time=start_time + 1000 * 60_000
+        ).json()
+        assert columns['close'][1000:2000].tolist() == [float(row[4]) for row in direct]
+
+    def test_structured_array(self, local_binance_client: BinanceClient, test_symbol: str):
+        """TC-K003: 結構化陣列與欄位陣列一致"""
+        start_time, end_time = _range(local_binance_client, 120, '1h')
+        store = KlineStore(local_binance_client, page_limit=50)
+
+        array = store.fetch(test_symbol, '1h', start_time, end_time)
+
+        assert array.dtype == KLINE_DTYPE
+        assert len(array) == 120
+        assert (np.diff(array['open_time']) == INTERVAL_MS['1h']).all()
+
+    def test_range_beyond_available(self, local_binance_client: BinanceClient, test_symbol: str):
+        """TC-K004: 範圍超出現有資料時截斷"""
+        start_time, _ = _range(local_binance_client, 10)
+        end_time = start_time + 10_000 * INTERVAL_MS['1m']
+
+        columns = KlineStore(local_binance_client).fetch_columns(test_symbol, '1m', start_time, end_time)
+
+        assert 10 <= len(columns['open_time']) <= 12
+        assert columns['open_time'][0] == start_time
+
+    def test_invalid_interval(self, local_binance_client: BinanceClient, test_symbol: str):
+        """TC-K005: 不支援的 K 線間隔"""
+        with pytest.raises(ValueError):
+            KlineStore(local_binance_client).fetch_columns(test_symbol, '7m', 0, 1)
@@ -0,0 +1,154 @@
+"""
+延遲基準與回歸檢查測試（離線）
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from utils.binance_client import BinanceClient
+from utils.latency_baseline import (
+    INSUFFICIENT, NEW, OK, REGRESSED, compare, compare_endpoint, endpoint_histograms, load_baseline,
+    mann_whitney, save_baseline
+)
+from utils.local_server import LocalBinanceServer
+from utils.metrics import Histogram, MetricsRecorder, _bucket_index
+
+
+def _histogram(samples) -> Histogram:
+    histogram = Histogram()
+    for seconds in samples:
+        histogram.record(float(seconds))
+    return histogram
+
+
+def _latencies(n: int, seed: int, median: float = 0.02) -> np.ndarray:
+    """對數常態分佈的延遲樣本（秒）"""
+    return np.random.default_rng(seed).lognormal(np.log(median), 0.4, n)
+
+
+def _tail_regression(samples: np.ndarray, share: float = 0.03, factor: float = 1.5) -> np.ndarray:
+    """只讓最慢的 share 比例變慢 factor 倍"""
+    cut = np.quantile(samples, 1 - share)
+    return np.where(samples > cut, samples * factor, samples)
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p1
+class TestStatistics:
+    """統計檢定測試"""
+
+    def test_histogram_round_trip_and_baseline_file(self, tmp_path):
+        """TC-LB001: 直方圖與基準檔可完整保存與還原"""
+        histogram = _histogram(_latencies(500, 1))
+        restored = Histogram.from_dict(json.loads(json.dumps(histogram.to_dict())))
+        assert restored.counts == histogram.counts
+        assert (restored.count, restored.min, restored.max) == (histogram.count, histogram.min, histogram.max)
+        assert Histogram.from_dict(Histogram().to_dict()).snapshot() == {'count': 0}
+
+        path = save_baseline(str(tmp_path / 'latency.json'), {'GET /api/v3/ping': histogram}, {'target': 'local'})
+        loaded, meta = load_baseline(str(path))
+        assert meta == {'target': 'local'}
+        assert loaded['GET /api/v3/ping'].percentile(0.99) == histogram.percentile(0.99)
+
+    def test_mann_whitney(self):
+        """TC-LB002: U 統計量與逐對比較一致；分佈偏移時 p 值顯著，相同分佈時不顯著"""
+        baseline, current = _latencies(40, 5), _latencies(50, 6) * 1.1
+        buckets = lambda samples: [_bucket_index(int(s * 1e6)) for s in samples]
+        expected = sum((y > x) + 0.5 * (y == x) for x in buckets(baseline) for y in buckets(current))
+        u, _ = mann_whitney(_histogram(baseline), _histogram(current))
+        assert u == expected
+
+        assert mann_whitney(_histogram(_latencies(500, 1)), _histogram(_latencies(500, 2) * 1.2))[1] < 1e-6
+        assert mann_whitney(_histogram(_latencies(500, 1)), _histogram(_latencies(500, 2)))[1] > 0.01
+        assert mann_whitney(_histogram(_latencies(500, 1)), _histogram(_latencies(500, 2) * 0.8))[1] > 0.99
+        assert mann_whitney(Histogram(), _histogram([0.01])) == (0.0, 1.0)
+
+    def test_tail_regression_detected(self):
+        """TC-LB003: 只有最慢 3% 變慢 50% 時 p99 判定退步、p50 不受影響"""
+        for seed in range(5):
+            baseline = _histogram(_latencies(2000, seed))
+            current = _histogram(_tail_regression(_latencies(2000, seed + 100)))
+            result = compare_endpoint('GET /api/v3/depth', baseline, current, threshold=0.2, seed=seed)
+
+            assert result.status == REGRESSED
+            p50, p95, p99 = result.quantiles
+            assert p99.regressed and p99.ratio > 1.2 and p99.ci_low > 1.0
+            assert not p50.regressed and not p95.regressed
+
+    def test_no_false_positives(self):
+        """TC-LB004: 相同分佈的兩次執行不判定退步"""
+        results = [
+            compare_endpoint('GET /api/v3/ping', _histogram(_latencies(1000, seed)),
+                             _histogram(_latencies(1000, seed + 100)), threshold=0.2, seed=seed)
+            for seed in range(20)
+        ]
+        assert [r.status for r in results] == [OK] * 20
+
+    def test_report(self, tmp_path):
+        """TC-LB005: 新端點、樣本不足與警告；JSON、文字與 HTML 輸出"""
+        baseline = {
+            'GET /api/v3/depth': _histogram(_latencies(1000, 1)),
+            'GET /api/v3/ping': _histogram(_latencies(1000, 2)),
+            'GET /api/v3/account': _histogram(_latencies(5, 3)),
+            'GET /api/v3/trades': _histogram(_latencies(100, 4)),
+        }
+        current = {
+            'GET /api/v3/depth': _histogram(_latencies(1000, 5) * 1.3),
+            'GET /api/v3/ping': _histogram(_latencies(1000, 6)),
+            'GET /api/v3/account': _histogram(_latencies(5, 7)),
+            'GET /api/v3/klines': _histogram(_latencies(100, 8)),
+        }
+        report = compare(baseline, current, threshold=0.2, baseline_meta={'target': 'local'},
+                         meta={'target': 'https://testnet.binance.vision'}, seed=1)
+
+        statuses = {r.endpoint: r.status for r in report.endpoints}
+        assert statuses == {'GET /api/v3/account': INSUFFICIENT, 'GET /api/v3/depth': REGRESSED,
+                            'GET /api/v3/klines': NEW, 'GET /api/v3/ping': OK}
+        assert [r.endpoint for r in report.regressions] == ['GET /api/v3/depth']
+        assert len(report.warnings) == 2 and 'GET /api/v3/trades' in report.warnings[1]
+
+        data = json.loads(report.dump(str(tmp_path / 'latency_regression.json')).read_text(encoding='utf-8'))
+        assert data['regressions'] == ['GET /api/v3/depth']
+        depth = next(item for item in data['endpoints'] if item['endpoint'] == 'GET /api/v3/depth')
+        assert set(depth['quantiles']) == {'p50', 'p95', 'p99'}
+        assert depth['mann_whitney']['p_value'] < 0.05
+
+        assert '[regressed] GET /api/v3/depth' in report.format()
+        assert report.to_html().count('<tr') == 5
+
+
+@pytest.mark.local
+@pytest.mark.performance
+@pytest.mark.p2
+class TestClientLatencyRegression:
+    """以本地伺服器延遲驗證回歸檢查"""
+
+    def test_server_slowdown_detected(self, local_server: LocalBinanceServer, tmp_path):
+        """TC-LB006: 伺服器延遲增加 50% 時判定退步，相同延遲時中位數不判定退步（尾端受排程雜訊影響，不在此斷言）"""
+        client = BinanceClient(api_key=local_server.api_key, secret_key=local_server.secret_key,
+                               base_url=local_server.base_url, rate_limit=False)
+        client.single_flight = None
+
+        def measure(latency: float) -> dict:
+            recorder = client.enable_metrics(MetricsRecorder())
+            local_server.set_latency(latency)
+            # 並發數維持在 CPU 不飽和的範圍，延遲才由伺服器延遲主導（覆蓋率追蹤下亦然）
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(lambda _: client.ping(), range(120)))
+            return endpoint_histograms(recorder)
+
+        try:
+            measure(0.0)  # 預先建立連線，避免連線建立的延遲混入基準
+            path = save_baseline(str(tmp_path / 'latency.json'), measure(0.05))
+            baseline, _ = load_baseline(str(path))
+            same = compare(baseline, measure(0.05), threshold=0.2, seed=1)
+            slower = compare(baseline, measure(0.075), threshold=0.2, seed=1)
+        finally:
+            local_server.set_latency(0.0)
+            client.close()
+
+        same_p50, slower_p50 = same.endpoints[0].quantiles[0], slower.endpoints[0].quantiles[0]
+        assert not same_p50.regressed
+        assert [r.endpoint for r in slower.regressions] == ['GET /api/v3/ping'] and slower_p50.regressed
@@ -0,0 +1,175 @@
+"""
+負載產生器測試（離線）
+"""
+import asyncio
+import time
+import pytest
+from utils.load_generator import (
+    CLOSED, OPEN, LoadProfile, Operation, RequestMix, Stage, run, run_closed, run_multiprocess, run_open
+)
+from utils.local_server import LocalBinanceServer
+
+
+class _Response:
+    def __init__(self, status_code: int = 200):
+        self.status_code = status_code
+
+
+class _StallingClient:
+    """
+    一次只處理一個請求的假客戶端，第 stall_at 個請求卡住 stall 秒
+
+    用來重現伺服器暫停時的協同遺漏
+    """
+
+    def __init__(self, stall_at: int = None, stall: float = 0.0, service: float = 0.001):
+        self.stall_at = stall_at
+        self.stall = stall
+        self.service = service
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = None
+
+    async def ping(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            async with self._lock:
+                self.calls += 1
+                await asyncio.sleep(self.stall if self.calls == self.stall_at else self.service)
+        finally:
+            self.in_flight -= 1
+        return _Response()
+
+    async def fail(self):
+        return _Response(503)
+
+
+class _ConcurrentClient(_StallingClient):
+    """不排隊的假客戶端（記錄同時進行中的請求數）"""
+
+    async def ping(self):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.service)
+        finally:
+            self.in_flight -= 1
+        return _Response()
+
+
+@pytest.fixture
+def load_settings(local_server: LocalBinanceServer) -> dict:
+    """連線到本地模擬伺服器、不限速的客戶端參數"""
+    return {
+        'api_key': local_server.api_key,
+        'secret_key': local_server.secret_key,
+        'base_url': local_server.base_url,
+        'rate_limit': False
+    }
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p1
+class TestWorkloadModel:
+    """負載描述測試"""
+
+    def test_weighted_mix(self):
+        """TC-LG001: 請求依權重抽選，固定種子可重現"""
+        operations = [Operation('ping', 6), Operation('get_order_book', 3, symbol='BTCUSDT'), Operation('get_server_time', 1)]
+        mix = RequestMix(operations, seed=42)
+        names = [mix.choose().name for _ in range(10000)]
+
+        assert names.count('ping') / 10000 == pytest.approx(0.6, abs=0.03)
+        assert names.count('get_order_book') / 10000 == pytest.approx(0.3, abs=0.03)
+        replay = RequestMix(operations, seed=42)
+        assert [replay.choose().name for _ in range(50)] == names[:50]
+
+        with pytest.raises(ValueError):
+            Operation('ping', 0)
+
+    def test_profile_ramp_and_arrivals(self):
+        """TC-LG002: 線性爬升的目標值與開放模型的到達次數"""
+        profile = LoadProfile([Stage(2, 100), Stage(2, 100), Stage(1, 0)])
+        assert profile.duration == 5
+        assert profile.target_at(1) == pytest.approx(50)
+        assert profile.target_at(3) == pytest.approx(100)
+        assert profile.target_at(4.5) == pytest.approx(50)
+
+        # 到達次數為到達率的積分：100 + 200 + 50
+        assert len(list(profile.arrivals())) == pytest.approx(350, rel=0.03)
+        assert len(list(LoadProfile.constant(100, 2).scaled(0.25).arrivals())) == 50
+
+
+@pytest.mark.local
+@pytest.mark.performance
+@pytest.mark.p1
+class TestLoadRunners:
+    """負載執行測試"""
+
+    @pytest.mark.asyncio
+    async def test_open_model_counts_queueing(self):
+        """TC-LG003: 開放模型在伺服器暫停期間照常送出，排隊時間計入延遲"""
+        client = _StallingClient(stall_at=50, stall=0.3)
+        result = await run_open(client, RequestMix([Operation('ping')]), LoadProfile.constant(100, 2))
+
+        print(f"\n{result.format()}")
+        assert result.requests == 200
+        assert result.latency.percentile(0.90) > 0.1, "暫停期間預定送出的請求都應記錄為慢請求"
+        assert result.latency.max >= 0.3
+
+    @pytest.mark.asyncio
+    async def test_closed_model_pacing_avoids_coordinated_omission(self):
+        """TC-LG004: 封閉模型不設 pacing 時只記錄到一個慢請求，設定 pacing 後以預定時間校正"""
+        mix = RequestMix([Operation('ping')])
+        plain = await run_closed(_StallingClient(stall_at=50, stall=0.3), mix, LoadProfile.constant(1, 1.5))
+        paced = await run_closed(_StallingClient(stall_at=50, stall=0.3), mix, LoadProfile.constant(1, 1.5),
+                                 pacing=0.01)
+
+        print(f"\np99: 未校正 {plain.latency.percentile(0.99) * 1000:.1f}ms, "
+              f"校正 {paced.latency.percentile(0.99) * 1000:.1f}ms")
+        assert plain.latency.percentile(0.95) < 0.05
+        assert paced.latency.percentile(0.95) > 0.1
+
+    @pytest.mark.asyncio
+    async def test_closed_model_ramps_users(self):
+        """TC-LG005: 虛擬用戶數依負載曲線爬升，錯誤依狀態碼分類"""
+        client = _ConcurrentClient(service=0.01)
+        mix = RequestMix([Operation('ping', 9), Operation('fail', 1)], seed=1)
+        result = await run_closed(client, mix, LoadProfile.ramp(8, ramp_up=0.5, hold=0.5))
+
+        assert client.max_in_flight == 8
+        first, last = result.series()[0], result.series()[-1]
+        assert result.failed == result.errors['503'] > 0
+        assert result.requests == sum(h.count for h in result.operations.values())
+        assert first['time'] == 0 and last['throughput'] > 0
+
+    def test_open_model_against_local_server(self, load_settings: dict, test_symbol: str):
+        """TC-LG006: 以非同步客戶端對本地伺服器達到目標到達率"""
+        mix = RequestMix([
+            Operation('ping', 5),
+            Operation('get_order_book', 2, symbol=test_symbol, limit=100),
+            Operation('get_server_time', 3),
+        ], seed=7)
+        result = run(OPEN, mix, LoadProfile.ramp(200, ramp_up=1, hold=2), client_settings=load_settings)
+
+        print(f"\n{result.format()}")
+        assert result.error_rate == 0
+        assert result.requests == pytest.approx(100 + 400, rel=0.02)
+        assert set(result.operations) == {'ping', 'get_order_book', 'get_server_time'}
+        assert result.series()[2]['throughput'] == pytest.approx(200, rel=0.1)
+
+    def test_multiprocess(self, load_settings: dict):
+        """TC-LG007: 多程序執行並合併結果"""
+        start = time.perf_counter()
+        result = run_multiprocess(CLOSED, RequestMix([Operation('ping')]), LoadProfile.constant(8, 2),
+                                  processes=2, client_settings=load_settings, pacing=0.02)
+
+        print(f"\n{result.format()}")
+        assert result.error_rate == 0
+        assert result.requests == pytest.approx(8 * 2 / 0.02, rel=0.1)
+        assert time.perf_counter() - start < 10
@@ -0,0 +1,160 @@
+"""
+本地模擬伺服器測試（離線）
+"""
+import pytest
+import time
+from utils.binance_client import BinanceClient
+from utils.local_server import LocalBinanceServer
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p1
+class TestLocalMarketData:
+    """本地伺服器市場數據測試"""
+
+    def test_ping_and_time(self, local_binance_client: BinanceClient):
+        """TC-L001: Ping 與伺服器時間"""
+        assert local_binance_client.ping().json() == {}
+
+        server_time = local_binance_client.get_server_time().json()['serverTime']
+        assert abs(server_time - int(time.time() * 1000)) < 5000
+
+    def test_order_book_sorted(self, local_binance_client: BinanceClient, test_symbol: str):
+        """TC-L002: 深度資訊排序與數量"""
+        response = local_binance_client.get_order_book(symbol=test_symbol, limit=5000)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data['bids']) == 5000
+        assert len(data['asks']) == 5000
+        assert float(data['bids'][0][0]) > float(data['bids'][1][0])
+        assert float(data['asks'][0][0]) < float(data['asks'][1][0])
+        assert float(data['bids'][0][0]) < float(data['asks'][0][0])
+
+    def test_klines_paging_is_deterministic(self, local_binance_client: BinanceClient, test_symbol: str):
+        """TC-L003: K 線依時間分頁結果一致"""
+        first = local_binance_client.get_klines(symbol=test_symbol, interval='1m', limit=10).json()
+        assert len(first) == 10
+        assert all(len(kline) == 12 for kline in first)
+
+        again = local_binance_client.get_klines(
+            symbol=test_symbol, interval='1m', limit=5, start_time=first[5][0]
+        ).json()
+        assert again == first[5:]
+
+    def test_invalid_symbol_rejected(self, local_binance_client: BinanceClient):
+        """TC-L004: 非法與不存在的交易對"""
+        response = local_binance_client.get_order_book(symbol="<script>alert('XSS')</script>", limit=5)
+        assert response.status_code == 400
+        assert '<script>' not in response.text.lower()
+
+        response = local_binance_client.get_order_book(symbol='INVALIDPAIR', limit=5)
+        assert response.status_code == 400
+        assert response.json()['code'] == -1121
+
+    def test_weight_header(self, local_binance_client: BinanceClient, test_symbol: str):
+        """TC-L005: 返回已使用權重的響應頭"""
+        response = local_binance_client.get_24hr_ticker(symbol=test_symbol)
+
+        assert response.status_code == 200
+        assert int(response.headers['X-MBX-USED-WEIGHT-1M']) >= 2
+
+
+@pytest.mark.local
+@pytest.mark.api
+@pytest.mark.p0
+class TestLocalTrading:
+    """本地伺服器交易測試"""
+
+    def test_signature_verified(self, local_server: LocalBinanceServer):
+        """TC-L006: 錯誤 Secret 與 API Key 應被拒絕"""
+        bad_secret = BinanceClient(local_server.api_key, 'wrong-secret', base_url=local_server.base_url)
+        response = bad_secret.get_account_info()
+        assert response.status_code == 401
+        assert response.json()['code'] == -1022
+        bad_secret.close()
+
+        bad_key = BinanceClient('wrong-key', local_server.secret_key, base_url=local_server.base_url)
+        response = bad_key.get_account_info()
+        assert response.json()['code'] == -2015
+        bad_key.close()
+
+    def test_order_lifecycle(self, local_binance_client: BinanceClient, test_symbol: str):
+        """TC-L007: 下單 > 查詢 > 掛單列表 > 取消"""
+        create = local_binance_client.create_order(
+            symbol=test_symbol, side='BUY', order_type='LIMIT',
+            quantity=0.001, price=20000, time_in_force='GTC'
+        )
+        assert create.status_code == 200, create.text
+        order_id = create.json()['orderId']
+        assert create.json()['status'] == 'NEW'
+
+        query = local_binance_client.get_order(symbol=test_symbol, order_id=order_id)
+        assert query.json()['status'] == 'NEW'
+
+        open_ids = [o['orderId'] for o in local_binance_client.get_open_orders(symbol=test_symbol).json()]
+        assert order_id in open_ids
+
+        cancel = local_binance_client.cancel_order(symbol=test_symbol, order_id=order_id)
+        assert cancel.json()['status'] == 'CANCELED'
+
+        cancel_again = local_binance_client.cancel_order(symbol=test_symbol, order_id=order_id)
+        assert cancel_again.status_code == 400
+
+    def test_marketable_order_fills(self, local_binance_client: BinanceClient, test_symbol: str):
+        """TC-L008: 可成交的限價單與市價單立即成交"""
+        limit = local_binance_client.create_order(
+            symbol=test_symbol, side='BUY', order_type='LIMIT',
+            quantity=0.5, price=40000, time_in_force='GTC'
+        ).json()
+        assert limit['status'] == 'FILLED'
+        assert len(limit['fills']) > 0
+
+        market = local_binance_client.create_order(
+            symbol=test_symbol, side='SELL', order_type='MARKET', quantity=0.001
+        ).json()
+        assert market['status'] == 'FILLED'
+
+    def test_negative_quantity_rejected(self, local_binance_client: BinanceClient, test_symbol: str):
+        """TC-L009: 負數數量應返回 400"""
+        response = local_binance_client.test_new_order(
+            symbol=test_symbol, side='BUY', order_type='MARKET', quantity=-0.001
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize('query_string, code', [
+        ('timestamp=abc', -1100),
+        ('timestamp=', -1102),
+        (None, -1100),
+    ])
+    def test_malformed_timestamp_rejected(self, local_binance_client: BinanceClient, query_string, code):
+        """TC-L011: 格式錯誤的 timestamp / recvWindow 應返回 400 與錯誤碼，而非伺服器錯誤"""
+        if query_string is None:
+            query_string = f"timestamp={int(time.time() * 1000)}&recvWindow=5s"
+        signature = local_binance_client._sign_query(query_string)
+        response = local_binance_client.session.get(
+            f"{local_binance_client.base_url}/api/v3/account?{query_string}&signature={signature}"
+        )
+        assert response.status_code == 400
+        assert response.json()['code'] == code
+
+
+@pytest.mark.local
+@pytest.mark.performance
+@pytest.mark.p2
+class TestLocalInjection:
+    """延遲與錯誤注入測試"""
+
+    def test_latency_and_error_injection(self):
+        """TC-L010: 延遲與錯誤注入"""
+        with LocalBinanceServer(latency=0.05, error_rate=1.0, error_status=503, seed=1) as server:
+            client = BinanceClient(server.api_key, server.secret_key, base_url=server.base_url)
+
+            start = time.time()
+            response = client.ping()
+            elapsed = time.time() - start
+            client.close()
+
+        assert response.status_code == 503
+        assert elapsed >= 0.05
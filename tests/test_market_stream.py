@@ -0,0 +1,122 @@
+"""
+WebSocket 市場數據串流測試（離線）
+"""
+import asyncio
+import pytest
+from utils.binance_client import BinanceClient
+from utils.local_server import LocalBinanceServer
+from utils.market_stream import (
+    OVERFLOW_DROP_OLDEST,
+    MarketStream,
+    book_ticker_stream,
+    combined_base_url,
+    depth_stream,
+    kline_stream,
+    trade_stream,
+)
+
+
+async def _publish(server: LocalBinanceServer, stream: str, count: int):
+    for i in range(count):
+        server.publish(stream, {'e': 'test', 'n': i})
+    # 等待訊息送達客戶端
+    await asyncio.sleep(0.1)
+
+
+@pytest.mark.local
+@pytest.mark.websocket
+@pytest.mark.p1
+class TestMarketStream:
+    """市場數據串流測試"""
+
+    def test_stream_names(self):
+        """TC-WS001: 串流名稱與組合串流 URL"""
+        assert trade_stream('BTCUSDT') == 'btcusdt@trade'
+        assert kline_stream('ETHUSDT', '1m') == 'ethusdt@kline_1m'
+        assert depth_stream('BTCUSDT') == 'btcusdt@depth@100ms'
+        assert depth_stream('BTCUSDT', levels=5, speed='1000ms') == 'btcusdt@depth5'
+        assert combined_base_url('wss://testnet.binance.vision/ws') == 'wss://testnet.binance.vision/stream'
+
+    @pytest.mark.asyncio
+    async def test_order_events_delivered(self, local_server: LocalBinanceServer,
+                                          local_binance_client: BinanceClient, test_symbol: str):
+        """TC-WS002: 成交後收到 trade、depth 與 bookTicker 事件"""
+        async with MarketStream(ws_url=local_server.ws_url) as market:
+            trades = await market.subscribe(trade_stream(test_symbol))
+            book = await market.subscribe(depth_stream(test_symbol), book_ticker_stream(test_symbol))
+            await market.wait_connected(timeout=5)
+            await asyncio.sleep(0.05)
+
+            response = local_binance_client.create_order(
+                symbol=test_symbol, side='BUY', order_type='MARKET', quantity=0.001
+            )
+            assert response.status_code == 200
+
+            trade = await asyncio.wait_for(trades.get(), timeout=5)
+            assert trade['stream'] == trade_stream(test_symbol)
+            assert trade['data']['e'] == 'trade'
+
+            received = {(await asyncio.wait_for(book.get(), timeout=5))['stream'] for _ in range(2)}
+            assert received == {depth_stream(test_symbol), book_ticker_stream(test_symbol)}
+
+    @pytest.mark.asyncio
+    async def test_streams_split_across_connections(self, local_server: LocalBinanceServer, test_symbols: list):
+        """TC-WS003: 超過單一連線上限時分散到多條連線"""
+        streams = [trade_stream(s) for s in test_symbols] + [book_ticker_stream(s) for s in test_symbols[:2]]
+        async with MarketStream(ws_url=local_server.ws_url, max_streams_per_connection=2) as market:
+            subscription = await market.subscribe(*streams)
+            await market.wait_connected(timeout=5)
+            await asyncio.sleep(0.05)
+            assert len(market.connections) == 3
+            assert all(len(c.streams) <= 2 for c in market.connections)
+
+            for stream in streams:
+                await _publish(local_server, stream, 1)
+            received = {(await asyncio.wait_for(subscription.get(), timeout=5))['stream'] for _ in streams}
+            assert received == set(streams)
+
+    @pytest.mark.asyncio
+    async def test_reconnect_resubscribes(self, local_server: LocalBinanceServer, test_symbol: str):
+        """TC-WS004: 伺服器斷線後自動重連並重新訂閱"""
+        stream = trade_stream(test_symbol)
+        async with MarketStream(ws_url=local_server.ws_url, reconnect_delay=0.05) as market:
+            subscription = await market.subscribe(stream)
+            await market.wait_connected(timeout=5)
+            await asyncio.sleep(0.05)
+
+            await asyncio.get_running_loop().run_in_executor(None, local_server.drop_ws_connections)
+            await asyncio.sleep(0.1)
+            await market.wait_connected(timeout=5)
+            await asyncio.sleep(0.05)
+            assert market.reconnects >= 1
+
+            await _publish(local_server, stream, 1)
+            message = await asyncio.wait_for(subscription.get(), timeout=5)
+            assert message['stream'] == stream
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest_policy(self, local_server: LocalBinanceServer, test_symbol: str):
+        """TC-WS005: drop_oldest 策略只保留最新訊息"""
+        stream = book_ticker_stream(test_symbol)
+        async with MarketStream(ws_url=local_server.ws_url) as market:
+            subscription = await market.subscribe(stream, maxsize=2, overflow=OVERFLOW_DROP_OLDEST)
+            await market.wait_connected(timeout=5)
+            await asyncio.sleep(0.05)
+
+            await _publish(local_server, stream, 5)
+            assert subscription.dropped == 3
+            assert [(await subscription.get())['data']['n'] for _ in range(2)] == [3, 4]
+
+    @pytest.mark.asyncio
+    async def test_block_policy_keeps_all_messages(self, local_server: LocalBinanceServer, test_symbol: str):
+        """TC-WS006: block 策略以背壓保留所有訊息"""
+        stream = kline_stream(test_symbol, '1m')
+        async with MarketStream(ws_url=local_server.ws_url) as market:
+            subscription = await market.subscribe(stream, maxsize=2)
+            await market.wait_connected(timeout=5)
+            await asyncio.sleep(0.05)
+
+            await _publish(local_server, stream, 10)
+            received = [(await asyncio.wait_for(subscription.get(), timeout=5))['data']['n'] for _ in range(10)]
+            assert received == list(range(10))
+            assert subscription.dropped == 0
@@ -0,0 +1,174 @@
+"""
+請求延遲量測測試（離線）
+"""
+import json
+import time
+import numpy as np
+import pytest
+import requests
+from utils.async_client import AsyncBinanceClient
+from utils.binance_client import BinanceClient
+from utils.local_server import LocalBinanceServer
+from utils.metrics import EXPORTERS, Histogram, MetricsRecorder, PROMETHEUS_BUCKETS, register_exporter
+
+
+@pytest.fixture
+def recorder() -> MetricsRecorder:
+    return MetricsRecorder()
+
+
+@pytest.fixture
+def metrics_client(local_server: LocalBinanceServer, recorder: MetricsRecorder):
+    """使用獨立記錄器與獨立 Session 的本地客戶端（第一個請求會新建連線）"""
+    client = BinanceClient(
+        api_key=local_server.api_key, secret_key=local_server.secret_key, base_url=local_server.base_url
+    )
+    client.single_flight = None
+    client.enable_metrics(recorder)
+    yield client
+    client.close()
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p1
+class TestHistogram:
+    """直方圖測試"""
+
+    def test_percentiles_within_error_bound(self):
+        """TC-MT001: 分位數與精確值的相對誤差在 5% 以內，合併後結果一致"""
+        samples = np.random.default_rng(7).lognormal(mean=-6, sigma=1.0, size=20000)
+        first, second = Histogram(), Histogram()
+        for i, value in enumerate(samples):
+            (first if i % 2 else second).record(float(value))
+        first.merge(second)
+
+        assert first.count == len(samples)
+        assert first.max == pytest.approx(samples.max())
+        for q in (0.5, 0.9, 0.99, 0.999):
+            exact = float(np.quantile(samples, q))
+            assert abs(first.percentile(q) - exact) / exact < 0.05, f"p{q * 100:g} 誤差過大"
+
+    def test_cumulative_buckets(self):
+        """TC-MT002: Prometheus 桶為累計值且與樣本一致"""
+        histogram = Histogram()
+        for value in (0.0003, 0.0009, 0.002, 0.04, 0.3, 20.0):
+            histogram.record(value)
+        counts = dict(zip(PROMETHEUS_BUCKETS, histogram.cumulative(PROMETHEUS_BUCKETS)))
+        assert counts[0.0005] == 1
+        assert counts[0.001] == 2
+        assert counts[0.05] == 4
+        assert counts[10.0] == 5
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p1
+class TestClientMetrics:
+    """客戶端量測測試"""
+
+    def test_phases_status_bytes_and_weight(self, metrics_client: BinanceClient, recorder: MetricsRecorder,
+                                            test_symbol: str):
+        """TC-MT003: 依端點記錄各階段延遲、狀態碼、位元組數與權重響應頭"""
+        for _ in range(5):
+            metrics_client.get_order_book(test_symbol, limit=100)
+        metrics_client.get_order(test_symbol, order_id=999999999)
+
+        depth = recorder.snapshot()['endpoints']['GET /api/v3/depth']
+        assert depth['requests'] == 5
+        assert depth['status_codes'] == {'200': 5}
+        assert depth['bytes_received'] > 5 * 1000
+        assert depth['bytes_sent'] == 5 * len('symbol=BTCUSDT&limit=100')
+        assert set(depth['phases']) >= {'total', 'connect', 'ttfb', 'body'}
+        assert depth['phases']['connect']['count'] == 1, "只有第一個請求需要建立連線"
+        assert depth['phases']['total']['p50'] >= depth['phases']['ttfb']['p50']
+
+        assert recorder.snapshot()['endpoints']['GET /api/v3/order']['status_codes'] == {'400': 1}
+        assert recorder.weights['X-MBX-USED-WEIGHT-1M'] > 0
+
+    def test_connection_errors_recorded(self, recorder: MetricsRecorder):
+        """TC-MT004: 連線錯誤依例外類型計數"""
+        client = BinanceClient('key', 'secret', base_url='http://127.0.0.1:9', rate_limit=False)
+        client.retry_policy = None
+        client.enable_metrics(recorder)
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.ping()
+        client.close()
+
+        assert recorder.snapshot()['endpoints']['GET /api/v3/ping']['errors'] == {'ConnectionError': 1}
+
+    @pytest.mark.asyncio
+    async def test_async_phases(self, local_server: LocalBinanceServer, recorder: MetricsRecorder,
+                                test_symbol: str):
+        """TC-MT005: 非同步客戶端記錄連線、首位元組與 body 階段"""
+        async with AsyncBinanceClient(
+            api_key=local_server.api_key, secret_key=local_server.secret_key, base_url=local_server.base_url
+        ) as client:
+            client.single_flight = None
+            client.enable_metrics(recorder)
+            for _ in range(5):
+                await client.get_order_book(test_symbol, limit=100)
+
+        phases = recorder.snapshot()['endpoints']['GET /api/v3/depth']['phases']
+        assert phases['total']['count'] == 5
+        assert phases['connect']['count'] == 1
+        assert phases['ttfb']['count'] == 5
+        assert phases['body']['count'] == 5
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p2
+class TestExporters:
+    """輸出格式測試"""
+
+    def test_prometheus_and_json(self, metrics_client: BinanceClient, recorder: MetricsRecorder, tmp_path):
+        """TC-MT006: Prometheus 文字格式、JSON 與自訂輸出格式"""
+        for _ in range(3):
+            metrics_client.ping()
+
+        text = recorder.export('prometheus')
+        lines = [line for line in text.splitlines() if line.startswith('binance_request_duration_seconds_bucket')
+                 and 'endpoint="/api/v3/ping"' in line and 'phase="total"' in line]
+        counts = [int(line.rsplit(' ', 1)[1]) for line in lines]
+        assert counts == sorted(counts), "桶必須是累計值"
+        assert counts[-1] == 3 and 'le="+Inf"' in lines[-1]
+        assert 'binance_requests_total{method="GET",endpoint="/api/v3/ping",status="200"} 3' in text
+
+        path = recorder.dump(str(tmp_path / 'metrics.json'))
+        assert json.loads(path.read_text())['endpoints']['GET /api/v3/ping']['requests'] == 3
+
+        register_exporter('csv', lambda r: '\n'.join(
+            f"{name},{stats['requests']}" for name, stats in r.snapshot()['endpoints'].items()
+        ))
+        try:
+            assert recorder.export('csv') == 'GET /api/v3/ping,3'
+        finally:
+            EXPORTERS.pop('csv')
+
+
+@pytest.mark.local
+@pytest.mark.performance
+@pytest.mark.p2
+class TestMetricsOverhead:
+    """量測開銷測試"""
+
+    def test_observe_overhead(self, metrics_client: BinanceClient, recorder: MetricsRecorder):
+        """TC-MT007: 每次記錄的開銷低於一次本地往返的 5%"""
+        round_trips = []
+        for _ in range(50):
+            start = time.perf_counter()
+            metrics_client.ping()
+            round_trips.append(time.perf_counter() - start)
+        round_trip = float(np.median(round_trips))
+
+        phases = {'total': 0.0012, 'connect': 0.0002, 'ttfb': 0.0006, 'body': 0.0004}
+        headers = {'Content-Type': 'application/json', 'X-MBX-USED-WEIGHT-1M': '10'}
+        count = 20000
+        start = time.perf_counter()
+        for _ in range(count):
+            recorder.observe('GET', '/api/v3/depth', 200, phases, 24, 4096, headers)
+        per_call = (time.perf_counter() - start) / count
+
+        print(f"\n每次記錄: {per_call * 1e6:.2f}µs, 本地往返: {round_trip * 1e6:.0f}µs")
+        assert per_call < round_trip * 0.05, f"記錄開銷過高: {per_call * 1e6:.2f}µs"
@@ -0,0 +1,76 @@
+"""
+型別化響應模型測試（離線）
+"""
+import pytest
+from decimal import Decimal
+from utils.binance_client import BinanceClient
+from utils.models import (
+    Account, DepthSnapshot, Kline, ModelList, Order, Ticker, Trade, parse_json
+)
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p1
+class TestModels:
+    """響應模型測試"""
+
+    def test_parse_json_cached(self, local_binance_client: BinanceClient):
+        """TC-M001: 同一響應只解析一次"""
+        response = local_binance_client.get_server_time()
+
+        assert parse_json(response) is parse_json(response)
+        assert parse_json(response) == response.json()
+
+    def test_klines_lazy_decimal(self, local_binance_client: BinanceClient, test_symbol: str):
+        """TC-M002: K 線數值欄位延遲轉換並快取"""
+        response = local_binance_client.get_klines(symbol=test_symbol, interval='1m', limit=1000)
+        klines = Kline.from_response(response)
+
+        assert isinstance(klines, ModelList)
+        assert len(klines) == 1000
+
+        kline = klines[0]
+        assert isinstance(kline.close, Decimal)
+        assert kline.close is kline.close, "Decimal 應只轉換一次"
+        assert kline.close == Decimal(response.json()[0][4])
+        assert kline.high >= kline.low
+        assert kline.close_time == kline.open_time + 60_000 - 1
+
+    def test_depth_snapshot(self, local_binance_client: BinanceClient, test_symbol: str):
+        """TC-M003: 深度快照最佳價與完整檔位"""
+        snapshot = DepthSnapshot.from_response(
+            local_binance_client.get_order_book(symbol=test_symbol, limit=5000)
+        )
+
+        best_bid, best_ask = snapshot.best_bid, snapshot.best_ask
+        assert best_bid[0] < best_ask[0]
+        assert len(snapshot.bids) == 5000
+        assert snapshot.bids[0] == best_bid
+        assert snapshot.asks is snapshot.asks
+
+    def test_account_non_zero_balances(self, local_binance_client: BinanceClient):
+        """TC-M004: 帳戶非零餘額"""
+        account = Account.from_response(local_binance_client.get_account_info())
+
+        balances = account.non_zero_balances()
+        assert len(balances) > 0
+        assert all(b.total > 0 for b in balances)
+
+    def test_order_trade_ticker(self, local_binance_client: BinanceClient, test_symbol: str):
+        """TC-M005: 訂單、成交與 ticker 模型"""
+        order = Order.from_response(local_binance_client.create_order(
+            symbol=test_symbol, side='BUY', order_type='LIMIT',
+            quantity=0.001, price=20000, time_in_force='GTC'
+        ))
+        assert order.is_open
+        assert order.price == Decimal('20000')
+        assert order.orig_qty == Decimal('0.001')
+        local_binance_client.cancel_order(symbol=test_symbol, order_id=order.order_id)
+
+        trades = Trade.from_response(local_binance_client.get_recent_trades(symbol=test_symbol, limit=10))
+        assert all(t.price > 0 for t in trades)
+
+        ticker = Ticker.from_response(local_binance_client.get_24hr_ticker(symbol=test_symbol))
+        assert ticker.symbol == test_symbol
+        assert ticker.bid_price < ticker.ask_price
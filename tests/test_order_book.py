@@ -0,0 +1,157 @@
+"""
+本地訂單簿測試（離線）
+"""
+import asyncio
+import json
+import random
+import time
+import pytest
+import websockets
+from utils.binance_client import BinanceClient
+from utils.order_book import OrderBook
+
+
+def _event(first_id: int, final_id: int, bids=(), asks=()) -> dict:
+    return {'e': 'depthUpdate', 'E': 0, 's': 'BTCUSDT', 'U': first_id, 'u': final_id,
+            'b': [list(level) for level in bids], 'a': [list(level) for level in asks]}
+
+
+@pytest.fixture
+def snapshot(local_binance_client: BinanceClient, test_symbol: str) -> dict:
+    """本地伺服器的 5000 檔深度快照"""
+    return local_binance_client.get_order_book(symbol=test_symbol, limit=5000).json()
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p1
+class TestOrderBookSync:
+    """訂單簿同步規則測試"""
+
+    def test_snapshot_and_updates(self, snapshot: dict, test_symbol: str):
+        """TC-OB001: 快照與增量更新後的最佳價位"""
+        book = OrderBook(test_symbol)
+        assert book.load_snapshot(snapshot)
+
+        best_bid = float(snapshot['bids'][0][0])
+        best_ask = float(snapshot['asks'][0][0])
+        assert book.best_bid() == (best_bid, float(snapshot['bids'][0][1]))
+        assert book.best_ask()[0] == best_ask
+        assert len(book.bids) == 5000
+
+        last_id = snapshot['lastUpdateId']
+        new_bid = f"{best_bid + 0.01:.2f}"
+        assert book.process_event(_event(last_id - 3, last_id + 1, bids=[(new_bid, '2')],
+                                          asks=[(snapshot['asks'][0][0], '0')]))
+
+        assert book.best_bid() == (float(new_bid), 2.0)
+        assert book.best_ask()[0] == float(snapshot['asks'][1][0])
+        assert book.depth(3)['bids'][1][0] == best_bid
+        assert book.last_update_id == last_id + 1
+
+    def test_buffered_events_replayed(self, snapshot: dict, test_symbol: str):
+        """TC-OB002: 快照前的事件先緩衝，舊事件丟棄"""
+        book = OrderBook(test_symbol)
+        last_id = snapshot['lastUpdateId']
+        best_bid = float(snapshot['bids'][0][0])
+
+        assert not book.process_event(_event(last_id - 10, last_id - 5, bids=[('1.00', '1')]))
+        assert not book.process_event(_event(last_id - 4, last_id + 2, bids=[(f"{best_bid}", '0')]))
+        assert not book.process_event(_event(last_id + 3, last_id + 3, bids=[(f"{best_bid + 0.05:.2f}", '1')]))
+        assert book.load_snapshot(snapshot)
+
+        assert book.last_update_id == last_id + 3
+        assert book.best_bid() == (round(best_bid + 0.05, 2), 1.0)
+        assert book.bids.quantity(1.0) == 0.0, "快照前的舊事件不應套用"
+        assert book.bids.quantity(best_bid) == 0.0
+
+    def test_gap_triggers_resync(self, snapshot: dict, test_symbol: str):
+        """TC-OB003: 序號缺口時清空並重新同步"""
+        book = OrderBook(test_symbol)
+        book.load_snapshot(snapshot)
+        last_id = snapshot['lastUpdateId']
+
+        assert book.process_event(_event(last_id, last_id + 1))
+        assert not book.process_event(_event(last_id + 3, last_id + 4))
+
+        assert not book.synced
+        assert book.resync_count == 1
+        assert book.best_bid() is None
+
+    def test_stale_snapshot_rejected(self, snapshot: dict, test_symbol: str):
+        """TC-OB004: 快照比緩衝事件舊時需重新取得"""
+        book = OrderBook(test_symbol)
+        last_id = snapshot['lastUpdateId']
+        book.process_event(_event(last_id + 5, last_id + 6))
+
+        assert not book.load_snapshot(snapshot)
+        assert not book.synced
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p1
+class TestOrderBookStream:
+    """訂單簿串流測試"""
+
+    @pytest.mark.asyncio
+    async def test_run_with_diff_stream(self, local_binance_client: BinanceClient, test_symbol: str):
+        """TC-OB005: 訂閱增量串流並在缺口後自動重新同步"""
+        last_id = local_binance_client.get_order_book(symbol=test_symbol, limit=5).json()['lastUpdateId']
+        connections = []
+        paths = []
+
+        async def handler(websocket, path):
+            paths.append(path)
+            connections.append(websocket)
+            await websocket.send(json.dumps(_event(last_id - 1, last_id + 1)))
+            await websocket.wait_closed()
+
+        async with websockets.serve(handler, '127.0.0.1', 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            book = OrderBook(test_symbol, local_binance_client, ws_url=f"ws://127.0.0.1:{port}/ws")
+            task = asyncio.create_task(book.run())
+            try:
+                await book.wait_synced(timeout=5)
+                assert paths == [f"/ws/{test_symbol.lower()}@depth@100ms"]
+                assert book.last_update_id == last_id + 1
+
+                await connections[0].send(json.dumps(_event(last_id + 2, last_id + 2, bids=[('1.00', '3')])))
+                await connections[0].send(json.dumps(_event(last_id + 9, last_id + 9)))
+                await asyncio.sleep(0.05)
+                assert book.resync_count == 1
+
+                await book.wait_synced(timeout=5)
+                assert book.last_update_id == last_id
+                assert book.bids.quantity(1.0) == 0.0
+            finally:
+                book.stop()
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+
+@pytest.mark.local
+@pytest.mark.performance
+@pytest.mark.p2
+class TestOrderBookPerformance:
+    """訂單簿性能測試"""
+
+    def test_update_and_top_of_book_throughput(self, snapshot: dict, test_symbol: str):
+        """TC-OB006: 5000 檔訂單簿的更新與最佳價位讀取"""
+        book = OrderBook(test_symbol)
+        book.load_snapshot(snapshot)
+        best_bid = float(snapshot['bids'][0][0])
+        rng = random.Random(42)
+        updates = [
+            (round(best_bid - rng.randint(0, 50) * 0.01, 2), rng.choice([0.0, 0.5, 1.0]))
+            for _ in range(50000)
+        ]
+
+        start = time.perf_counter()
+        for price, qty in updates:
+            book.bids.update(price, qty)
+            book.best_bid()
+        elapsed = time.perf_counter() - start
+
+        print(f"\n每次更新 + 讀取最佳價位: {elapsed / len(updates) * 1e6:.2f}us")
+        assert elapsed < 2.0
@@ -0,0 +1,159 @@
+"""
+訂單狀態追蹤測試（離線）
+"""
+import asyncio
+from decimal import Decimal
+import pytest
+import pytest_asyncio
+from utils.binance_client import BinanceClient
+from utils.local_server import LocalBinanceServer
+from utils.order_tracker import OrderTerminatedError, OrderTracker, order_from_event
+
+
+def _limit_below_market(client: BinanceClient, symbol: str) -> dict:
+    """遠低於市價、不會成交的限價買單"""
+    best_bid = Decimal(client.get_order_book(symbol=symbol, limit=5).json()['bids'][0][0])
+    response = client.create_order(
+        symbol=symbol, side='BUY', order_type='LIMIT', quantity=0.001,
+        price=f"{best_bid * Decimal('0.5'):.2f}", time_in_force='GTC'
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@pytest_asyncio.fixture
+async def tracker(local_server: LocalBinanceServer, local_binance_client: BinanceClient):
+    """在測試的事件迴圈中執行的追蹤器"""
+    tracker = OrderTracker(local_binance_client, ws_url=local_server.ws_url, reconnect_delay=0.2)
+    task = asyncio.create_task(tracker.run())
+    await tracker.wait_ready(timeout=5)
+    yield tracker
+    await tracker.stop()
+    await asyncio.wait_for(task, 5)
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p1
+class TestOrderTracker:
+    """用戶數據流訂單追蹤測試"""
+
+    @pytest.mark.asyncio
+    async def test_limit_order_lifecycle(self, tracker: OrderTracker, local_binance_client: BinanceClient,
+                                         test_symbol: str):
+        """TC-OT001: 限價單 NEW → CANCELED 由串流事件推進，不需輪詢"""
+        updates = []
+        tracker.on_update(lambda order: updates.append((order['orderId'], order['status'])))
+
+        order = await asyncio.to_thread(_limit_below_market, local_binance_client, test_symbol)
+        state = await tracker.wait_for(order['orderId'], 'NEW', timeout=5)
+        assert state['clientOrderId'] == order['clientOrderId']
+        assert state['symbol'] == test_symbol
+
+        response = await asyncio.to_thread(
+            local_binance_client.cancel_order, symbol=test_symbol, order_id=order['orderId']
+        )
+        assert response.status_code == 200
+        state = await tracker.wait_for(order['orderId'], 'CANCELED', timeout=5)
+        assert state['executedQty'] == '0'
+        assert (order['orderId'], 'NEW') in updates
+        assert (order['orderId'], 'CANCELED') in updates
+
+        with pytest.raises(OrderTerminatedError):
+            await tracker.wait_for(order['orderId'], 'FILLED', timeout=5)
+
+    @pytest.mark.asyncio
+    async def test_maker_fill_reported(self, tracker: OrderTracker, local_binance_client: BinanceClient,
+                                       test_symbol: str):
+        """TC-OT002: 掛單被對手市價單吃掉時收到 FILLED，協程回呼也會被呼叫"""
+        filled = asyncio.Event()
+
+        async def on_update(order):
+            if order['status'] == 'FILLED':
+                filled.set()
+
+        tracker.on_update(on_update)
+
+        depth = local_binance_client.get_order_book(symbol=test_symbol, limit=5).json()
+        best_bid, best_ask = Decimal(depth['bids'][0][0]), Decimal(depth['asks'][0][0])
+        price = ((best_bid + best_ask) / 2).quantize(Decimal('0.01'), rounding='ROUND_DOWN')
+        # 價差只有一檔時排在既有流動性之後，市價單需連同前方數量一起吃掉
+        ahead = Decimal(depth['bids'][0][1]) if price == best_bid else Decimal(0)
+        resting = local_binance_client.create_order(
+            symbol=test_symbol, side='BUY', order_type='LIMIT', quantity=0.001,
+            price=f"{price:f}", time_in_force='GTC'
+        ).json()
+        assert resting['status'] == 'NEW'
+
+        taker = local_binance_client.create_order(
+            symbol=test_symbol, side='SELL', order_type='MARKET', quantity=f"{ahead + Decimal('0.001'):f}"
+        ).json()
+        assert taker['status'] == 'FILLED'
+
+        state = await tracker.wait_for(resting['orderId'], 'FILLED', timeout=5)
+        assert Decimal(state['executedQty']) == Decimal('0.001')
+        assert (await tracker.wait_for(taker['orderId'], 'FILLED', timeout=5))['side'] == 'SELL'
+        await asyncio.wait_for(filled.wait(), 5)
+
+    @pytest.mark.asyncio
+    async def test_reconcile_after_reconnect(self, tracker: OrderTracker, local_server: LocalBinanceServer,
+                                             local_binance_client: BinanceClient, test_symbol: str):
+        """TC-OT003: 斷線期間取消的訂單在重新連線後以 REST 對帳補上"""
+        order = _limit_below_market(local_binance_client, test_symbol)
+        await tracker.wait_for(order['orderId'], 'NEW', timeout=5)
+
+        await asyncio.to_thread(local_server.drop_ws_connections)
+        response = local_binance_client.cancel_order(symbol=test_symbol, order_id=order['orderId'])
+        assert response.status_code == 200
+
+        state = await tracker.wait_for(order['orderId'], 'CANCELED', timeout=5)
+        assert state['status'] == 'CANCELED'
+        assert tracker.reconnects >= 1
+
+    @pytest.mark.asyncio
+    async def test_unknown_order_fetched_by_symbol(self, tracker: OrderTracker,
+                                                   local_binance_client: BinanceClient, test_symbol: str):
+        """TC-OT004: 追蹤器沒有狀態的訂單，提供 symbol 時以 REST 查詢"""
+        order = _limit_below_market(local_binance_client, test_symbol)
+        tracker.orders.clear()
+
+        state = await tracker.wait_for(order['orderId'], 'NEW', timeout=5, symbol=test_symbol)
+        assert state['orderId'] == order['orderId']
+        local_binance_client.cancel_order(symbol=test_symbol, order_id=order['orderId'])
+
+    def test_stale_updates_ignored(self):
+        """TC-OT005: 比現有狀態舊的更新被忽略，取消事件使用原始 clientOrderId"""
+        tracker = OrderTracker(client=None)
+        event = {
+            'e': 'executionReport', 's': 'BTCUSDT', 'c': 'cancel-request', 'C': 'my-order', 'S': 'BUY',
+            'o': 'LIMIT', 'f': 'GTC', 'q': '1', 'p': '100', 'x': 'CANCELED', 'X': 'CANCELED', 'i': 7,
+            'z': '0.4', 'Z': '40', 'T': 2000, 'O': 1000
+        }
+        canceled = order_from_event(event)
+        assert canceled['clientOrderId'] == 'my-order'
+
+        assert tracker.track(dict(canceled, status='PARTIALLY_FILLED', updateTime=1500))
+        assert tracker.track(canceled)
+        # REST 響應比串流事件晚到，但內容較舊
+        assert not tracker.track(dict(canceled, status='NEW', executedQty='0', updateTime=1000))
+        assert tracker.get(7)['status'] == 'CANCELED'
+        assert tracker.symbols == {'BTCUSDT'}
+
+    def test_blocking_interface_and_listen_key(self, local_server: LocalBinanceServer,
+                                               local_binance_client: BinanceClient, test_symbol: str):
+        """TC-OT006: 同步介面與 listenKey 續期、關閉"""
+        tracker = OrderTracker(local_binance_client, ws_url=local_server.ws_url).start_in_thread(timeout=5)
+        try:
+            listen_key = tracker.listen_key
+            assert local_binance_client.create_listen_key().json()['listenKey'] == listen_key
+            assert local_binance_client.keepalive_listen_key(listen_key).status_code == 200
+            assert local_binance_client.keepalive_listen_key('unknown').json()['code'] == -1125
+
+            order = _limit_below_market(local_binance_client, test_symbol)
+            state = tracker.wait_for_blocking(order['orderId'], 'NEW', timeout=5)
+            assert state['orderId'] == order['orderId']
+            local_binance_client.cancel_order(symbol=test_symbol, order_id=order['orderId'])
+            assert tracker.wait_for_blocking(order['orderId'], 'CANCELED', timeout=5)['status'] == 'CANCELED'
+        finally:
+            tracker.stop_thread()
+        assert local_server.listen_key is None
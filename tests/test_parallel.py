@@ -0,0 +1,128 @@
+"""
+並行執行測試：跨程序共用的限速額度與 worker 命名空間（離線）
+"""
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+import pytest
+from config import Config
+from utils import rate_limiter as rate_limiter_module, retry as retry_module
+from utils.cassette import match_key
+from utils.rate_limiter import RateLimiter, SharedTokenBucket, get_rate_limiter
+from utils.retry import client_order_prefix, new_client_order_id, set_client_order_namespace
+
+# Binance 對 newClientOrderId 的格式要求
+CLIENT_ORDER_ID = re.compile(r'^[.A-Z:/a-z0-9_-]{1,36}$')
+
+
+def _reserve_many(path: str, count: int) -> List[float]:
+    """在子程序中從共用令牌桶預約 count 次，返回各次需要等待的秒數"""
+    bucket = SharedTokenBucket(path, capacity=100, period=3600)
+    return [bucket.reserve(1) for _ in range(count)]
+
+
+@pytest.fixture
+def client_order_namespace():
+    """測試結束後還原命名空間（xdist worker 原本使用 worker id）"""
+    original = retry_module._client_order_namespace
+    yield set_client_order_namespace
+    set_client_order_namespace(original)
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p1
+class TestSharedBudget:
+    """跨程序額度測試"""
+
+    def test_processes_share_bucket(self, tmp_path):
+        """TC-PX001: 多個程序共用同一個令牌桶，合計只有容量內的請求不需等待"""
+        path = str(tmp_path / 'weight')
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(_reserve_many, [path] * 4, [50] * 4))
+
+        delays = sorted(delay for result in results for delay in result)
+        assert delays.count(0.0) == 100
+        # 超出容量的 100 次依序排隊，每次相隔 1 / rate = 36 秒
+        assert delays[-1] == pytest.approx(100 * 36, rel=0.01)
+        assert len(set(round(delay) for delay in delays[100:])) == 100, "每個請求應排在不同的位置"
+
+    def test_limiters_share_state_dir(self, tmp_path):
+        """TC-PX002: 相同狀態目錄的限速器共用權重、下單次數與 429 暫停"""
+        first = RateLimiter(weight_per_minute=600, orders_per_10s=5, state_dir=str(tmp_path))
+        second = RateLimiter(weight_per_minute=600, orders_per_10s=5, state_dir=str(tmp_path))
+
+        first.weight.reserve(600)
+        assert second.reserve('GET', '/api/v3/time') > 0
+
+        second.update(200, {'X-MBX-ORDER-COUNT-10S': '5'})
+        assert first.order_buckets[10].available < 1
+
+        first.update(429, {'Retry-After': '30'})
+        assert second.reserve('GET', '/api/v3/ping') == pytest.approx(30, abs=1)
+
+        unshared = RateLimiter(weight_per_minute=600)
+        assert unshared.reserve('GET', '/api/v3/time') == 0.0
+
+    def test_get_rate_limiter_uses_configured_dir(self, tmp_path, monkeypatch):
+        """TC-PX003: 設定 RATE_LIMIT_STATE_DIR 時依 base_url 與 API Key 分開存放"""
+        monkeypatch.setattr(Config, 'RATE_LIMIT_STATE_DIR', str(tmp_path))
+        monkeypatch.setattr(rate_limiter_module, '_limiters', {})
+
+        limiter = get_rate_limiter('key', 'http://127.0.0.1:1')
+        other = get_rate_limiter('other', 'http://127.0.0.1:1')
+        assert isinstance(limiter.weight, SharedTokenBucket)
+        assert limiter.state_dir != other.state_dir
+        assert limiter.state_dir.startswith(str(tmp_path))
+
+        # 另一個程序（以新的實例模擬）看到相同的已用額度
+        limiter.weight.sync(5000)
+        shared = RateLimiter(state_dir=limiter.state_dir).weight.available
+        assert shared == pytest.approx(Config.RATE_LIMIT_WEIGHT_PER_MINUTE - 5000, abs=10)
+        assert other.weight.available == pytest.approx(Config.RATE_LIMIT_WEIGHT_PER_MINUTE)
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p1
+class TestWorkerNamespace:
+    """worker 命名空間測試"""
+
+    def test_client_order_namespace(self, client_order_namespace):
+        """TC-PX004: 訂單 ID 帶有 worker 命名空間，長度與格式符合 Binance 要求"""
+        client_order_namespace('gw12')
+        ids = {new_client_order_id() for _ in range(1000)}
+
+        assert len(ids) == 1000
+        assert client_order_prefix() == 'x-gw12-'
+        assert all(order_id.startswith('x-gw12-') and CLIENT_ORDER_ID.match(order_id) for order_id in ids)
+        assert len(next(iter(ids))) == 36
+
+        # 卡帶比對時自動產生的 ID 一律正規化
+        key = match_key('POST', f'https://a/api/v3/order?newClientOrderId={ids.pop()}')
+        assert key == 'POST /api/v3/order?newClientOrderId=%2A'
+
+        with pytest.raises(ValueError):
+            client_order_namespace('gw-0')
+        client_order_namespace('')
+        assert new_client_order_id().startswith('x-') and len(new_client_order_id()) == 34
+
+
+@pytest.mark.local
+@pytest.mark.performance
+@pytest.mark.p2
+class TestSharedBudgetOverhead:
+    """跨程序額度開銷測試"""
+
+    def test_reserve_overhead(self, tmp_path):
+        """TC-PX005: 共用令牌桶的預約開銷遠小於一次本地請求"""
+        bucket = SharedTokenBucket(str(tmp_path / 'weight'), capacity=10 ** 9, period=60)
+        start = time.perf_counter()
+        for _ in range(2000):
+            bucket.reserve(1)
+        per_call = (time.perf_counter() - start) / 2000
+
+        print(f"\n共用令牌桶預約: {per_call * 1e6:.1f}µs/次")
+        assert per_call < 0.0005
@@ -6,6 +6,8 @@ import time
 import statistics
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from utils.binance_client import BinanceClient
+from utils.client_factory import ClientFactory
+from utils.load_generator import OPEN, LoadProfile, Operation, RequestMix, run
 
 
 @pytest.mark.performance
@@ -76,12 +78,14 @@ class TestResponseTime:
 class TestConcurrency:
     """併發測試"""
 
-    def test_concurrent_requests(self, test_symbol: str):
+    def test_concurrent_requests(self, client_factory: ClientFactory, test_symbol: str):
         """TC-P004: 併發請求測試"""
         num_requests = 50
 
         def make_request(i):
-            client = BinanceClient()
+            # 每個請求仍建立獨立客戶端，但共用連線池，不會重新建立 TCP/TLS 連線
+            client = client_factory.create()
+            client.single_flight = None  # 相同的 GET 不合併，每個請求都實際送出
             start = time.time()
             response = client.get_server_time()
             elapsed = time.time() - start
@@ -105,45 +109,39 @@ class TestConcurrency:
         print(f"  成功數: {success_count}")
         print(f"  總耗時: {total_time:.2f}s")
         print(f"  平均響應時間: {avg_response_time:.3f}s")
+        print(f"  連線池統計: {client_factory.stats()}")
 
         # 斷言
         assert success_count == num_requests, f"所有請求都應成功，成功率: {success_count}/{num_requests}"
         assert total_time < 10, f"併發請求總時間應小於 10s，實際: {total_time:.2f}s"
 
     @pytest.mark.slow
-    def test_sustained_load(self, binance_client: BinanceClient, test_symbol: str):
-        """TC-P005: 持續負載測試"""
-        duration = 30  # 測試 30 秒
-        request_count = 0
-        error_count = 0
-        start_time = time.time()
-
-        print(f"\n持續負載測試 ({duration} 秒)...")
-
-        while time.time() - start_time < duration:
-            try:
-                response = binance_client.ping()
-                if response.status_code == 200:
-                    request_count += 1
-                else:
-                    error_count += 1
-            except Exception:
-                error_count += 1
-
-            time.sleep(0.1)  # 100ms 間隔
-
-        elapsed = time.time() - start_time
-        requests_per_second = request_count / elapsed
-
-        print(f"\n持續負載測試結果:")
-        print(f"  總請求數: {request_count}")
-        print(f"  錯誤數: {error_count}")
-        print(f"  持續時間: {elapsed:.2f}s")
-        print(f"  平均 RPS: {requests_per_second:.2f}")
-
-        # 斷言錯誤率 < 1%
-        error_rate = error_count / (request_count + error_count) if request_count > 0 else 1
-        assert error_rate < 0.01, f"錯誤率應小於 1%，實際: {error_rate*100:.2f}%"
+    def test_sustained_load(self, request, client_settings: dict, test_symbol: str):
+        """TC-P005: 持續負載測試（開放模型，10 秒爬升到 20 req/s 後維持 20 秒）"""
+        mix = RequestMix([
+            Operation('ping', 5),
+            Operation('get_server_time', 3),
+            Operation('get_order_book', 2, symbol=test_symbol, limit=100),
+        ])
+        profile = LoadProfile.ramp(20, ramp_up=10, hold=20)
+
+        # 本地伺服器不限制權重，不經過程序內共用的限速器：同一分鐘內先前測試用掉的額度會讓請求排隊，
+        # 結果取決於執行順序；連到測試網時保留限速器，避免觸發 429 或被封禁 IP
+        settings = dict(client_settings)
+        if request.config.getoption("--local-server"):
+            settings['rate_limit'] = False
+
+        print(f"\n持續負載測試 ({profile.duration:.0f} 秒)...")
+        result = run(OPEN, mix, profile, client_settings=settings)
+
+        print(f"\n{result.format()}")
+
+        # 斷言錯誤率 < 1%，且達到目標到達率（延遲從預定送出時間起算，不受協同遺漏影響）
+        assert result.requests > 0, "應完成至少一個請求"
+        assert result.error_rate < 0.01, f"錯誤率應小於 1%，實際: {result.error_rate*100:.2f}%"
+        assert result.requests >= 0.95 * (10 * 20 / 2 + 20 * 20), f"未達目標到達率，完成 {result.requests} 個請求"
+        p99 = result.latency.percentile(0.99)
+        assert p99 < 2.0, f"p99 延遲應小於 2s，實際: {p99:.3f}s"
 
 
 @pytest.mark.performance
@@ -152,16 +150,19 @@ class TestConcurrency:
 class TestRateLimit:
     """速率限制測試"""
 
-    def test_rate_limit_detection(self, binance_client: BinanceClient):
+    def test_rate_limit_detection(self, client_factory: ClientFactory, binance_client: BinanceClient):
         """TC-P006: 速率限制測試（謹慎執行）"""
         # 注意：此測試會嘗試觸發速率限制，執行需謹慎
+        # 客戶端限速器會在 429 之前自行節流，探測伺服器的限制時必須繞過
+        client = client_factory.create(rate_limit=False)
 
         print("\n測試速率限制（發送快速連續請求）...")
         request_count = 0
         rate_limit_hit = False
 
         for i in range(1500):  # 嘗試發送大量請求
-            response = binance_client.get_server_time()
+            response = client.get_server_time()
+            assert response.status_code in (200, 429), f"非預期的狀態碼: {response.status_code}"
 
             if response.status_code == 429:
                 print(f"在第 {i+1} 次請求時觸發速率限制")
@@ -171,6 +172,9 @@ class TestRateLimit:
                 if 'Retry-After' in response.headers:
                     print(f"Retry-After: {response.headers['Retry-After']}")
 
+                # 讓共用的限速器依 Retry-After 暫停，避免後續測試繼續觸發 429 而被封禁 IP
+                if binance_client.rate_limiter is not None:
+                    binance_client.rate_limiter.update(response.status_code, response.headers)
                 break
 
             request_count += 1
@@ -179,6 +183,7 @@ class TestRateLimit:
                 print(f"已完成 {i} 次請求")
                 time.sleep(0.1)  # 稍微降低速度
 
+        client.close()
         print(f"\n總共發送 {request_count} 次請求")
 
         if rate_limit_hit:
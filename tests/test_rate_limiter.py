@@ -0,0 +1,103 @@
+"""
+請求權重限速器測試（離線）
+"""
+import pytest
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.binance_client import BinanceClient
+from utils.local_server import LocalBinanceServer
+from utils.rate_limiter import RateLimiter, TokenBucket, get_rate_limiter, request_weight
+
+
+@pytest.mark.local
+@pytest.mark.performance
+@pytest.mark.p1
+class TestRequestWeight:
+    """端點權重計算測試"""
+
+    @pytest.mark.parametrize("limit, expected", [(5, 5), (100, 5), (500, 25), (1000, 50), (5000, 250)])
+    def test_depth_weight_by_limit(self, limit: int, expected: int):
+        """TC-R001: 深度權重依 limit 變化"""
+        assert request_weight('GET', '/api/v3/depth', {'symbol': 'BTCUSDT', 'limit': limit}) == expected
+
+    def test_ticker_without_symbol_is_heavy(self):
+        """TC-R002: 不帶 symbol 的 24hr ticker 權重較高"""
+        assert request_weight('GET', '/api/v3/ticker/24hr', {'symbol': 'BTCUSDT'}) == 2
+        assert request_weight('GET', '/api/v3/ticker/24hr', {}) == 80
+
+
+@pytest.mark.local
+@pytest.mark.performance
+@pytest.mark.p1
+class TestTokenBucket:
+    """令牌桶測試"""
+
+    def test_reserve_queues_when_empty(self):
+        """TC-R003: 額度用完後依補充速率排隊"""
+        bucket = TokenBucket(capacity=10, period=1)
+
+        assert bucket.reserve(10) == 0
+        assert bucket.reserve(5) == pytest.approx(0.5, abs=0.05)
+        assert bucket.reserve(5) == pytest.approx(1.0, abs=0.05)
+
+    def test_sync_only_tightens(self):
+        """TC-R004: 伺服器回報用量只會收緊額度"""
+        bucket = TokenBucket(capacity=100, period=60)
+
+        bucket.sync(90)
+        assert bucket.available <= 10.1
+
+        bucket.sync(0)
+        assert bucket.available <= 10.1
+
+    def test_retry_after_blocks_requests(self):
+        """TC-R005: 429 的 Retry-After 會暫停後續請求"""
+        limiter = RateLimiter(weight_per_minute=6000)
+        limiter.update(429, {'Retry-After': '2'})
+
+        assert limiter.reserve('GET', '/api/v3/ping') == pytest.approx(2, abs=0.1)
+
+    def test_threads_share_budget(self):
+        """TC-R006: 多執行緒共用同一份額度"""
+        limiter = RateLimiter(weight_per_minute=600)  # 每秒補充 10
+        # 前 600 權重立即取得，之後的 20 個權重 1 請求需排隊約 2 秒
+        limiter.weight.reserve(600)
+
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            delays = list(executor.map(lambda _: limiter.reserve('GET', '/api/v3/time'), range(20)))
+
+        assert max(delays) == pytest.approx(2.0, abs=0.1)
+        assert len(set(round(d, 3) for d in delays)) == 20, "每個請求應排在不同的位置"
+
+
+@pytest.mark.local
+@pytest.mark.performance
+@pytest.mark.p1
+class TestClientRateLimit:
+    """客戶端整合測試"""
+
+    def test_clients_with_same_key_share_limiter(self, local_server: LocalBinanceServer):
+        """TC-R007: 相同 API Key 的客戶端共用限速器"""
+        first = BinanceClient(local_server.api_key, local_server.secret_key, base_url=local_server.base_url)
+        second = BinanceClient(local_server.api_key, local_server.secret_key, base_url=local_server.base_url)
+
+        assert first.rate_limiter is second.rate_limiter
+        assert first.rate_limiter is get_rate_limiter(local_server.api_key, local_server.base_url)
+        first.close()
+        second.close()
+
+    def test_client_paces_before_server_limit(self):
+        """TC-R008: 客戶端在觸發 429 前自行節流"""
+        with LocalBinanceServer(weight_limit=50) as server:
+            limiter = RateLimiter(weight_per_minute=3000)  # 每秒補充 50
+            client = BinanceClient(server.api_key, server.secret_key, base_url=server.base_url,
+                                   rate_limiter=limiter)
+            limiter.weight.reserve(3000 - 10)
+
+            start = time.time()
+            statuses = [client.get_order_book('BTCUSDT', limit=5).status_code for _ in range(4)]
+            elapsed = time.time() - start
+            client.close()
+
+        assert statuses == [200] * 4
+        assert elapsed >= 0.15, "超出額度的請求應被延後"
@@ -0,0 +1,173 @@
+"""
+公開端點響應快取測試（離線）
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from utils.async_client import AsyncBinanceClient
+from utils.binance_client import BinanceClient
+from utils.local_server import LocalBinanceServer
+from utils.models import parse_json
+from utils.response_cache import ResponseCache
+
+
+def _client(base_url: str, cache: ResponseCache, **kwargs) -> BinanceClient:
+    client = BinanceClient(api_key='local-api-key', secret_key='local-secret-key', base_url=base_url, **kwargs)
+    client.enable_response_cache(cache)
+    return client
+
+
+@pytest.fixture
+def cached_client(local_server: LocalBinanceServer):
+    """使用獨立快取的本地客戶端"""
+    client = _client(local_server.base_url, ResponseCache(disk_path=''))
+    yield client
+    client.close()
+
+
+class _ETagHandler(BaseHTTPRequestHandler):
+    """固定內容並支援 If-None-Match 的 exchangeInfo"""
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.send_header('ETag', '"v1"')
+            self.end_headers()
+            return
+        body = b'{"timezone": "UTC", "symbols": []}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', '"v1"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p1
+class TestResponseCache:
+    """快取行為測試"""
+
+    def test_exchange_info_cached(self, cached_client: BinanceClient, local_server: LocalBinanceServer):
+        """TC-RC001: 重複的 exchangeInfo 只送出一次，並共用 JSON 解析結果"""
+        before = local_server.request_count
+        first = cached_client.get_exchange_info()
+        second = cached_client.get_exchange_info()
+
+        assert first.status_code == 200
+        assert second is first
+        assert parse_json(second) is parse_json(first)
+        assert local_server.request_count == before + 1
+        assert cached_client.response_cache.hits == 1
+
+    def test_ttl_and_uncached_endpoints(self, local_server: LocalBinanceServer, test_symbol: str):
+        """TC-RC002: 過期後重新請求；未設定 TTL 的端點與簽名請求不快取"""
+        client = _client(local_server.base_url, ResponseCache(ttls={'/api/v3/exchangeInfo': 0.05}, disk_path=''))
+        before = local_server.request_count
+        client.get_exchange_info()
+        client.get_exchange_info()
+        time.sleep(0.06)
+        client.get_exchange_info()
+        assert local_server.request_count == before + 2
+
+        before = local_server.request_count
+        client.get_order_book(symbol=test_symbol, limit=5)
+        client.get_order_book(symbol=test_symbol, limit=5)
+        client.get_server_time()
+        client.get_server_time()
+        client.get_account_info()
+        client.get_account_info()
+        assert local_server.request_count == before + 6
+
+    def test_lru_bound_and_query_keys(self, local_server: LocalBinanceServer, test_symbols: list):
+        """TC-RC003: 不同參數分別快取，記憶體層超過上限時淘汰最久未用的項目"""
+        cache = ResponseCache(maxsize=2, disk_path='')
+        client = _client(local_server.base_url, cache)
+        for symbol in test_symbols:
+            assert client.get_24hr_ticker(symbol=symbol).json()['symbol'] == symbol
+
+        assert len(cache.memory) == 2
+        before = local_server.request_count
+        client.get_24hr_ticker(symbol=test_symbols[-1])
+        assert local_server.request_count == before
+        client.get_24hr_ticker(symbol=test_symbols[0])
+        assert local_server.request_count == before + 1
+
+    def test_disk_backend_shared(self, local_server: LocalBinanceServer, tmp_path):
+        """TC-RC004: 磁碟層讓另一個快取實例（另一個程序）直接命中"""
+        path = str(tmp_path / 'responses.sqlite')
+        first = _client(local_server.base_url, ResponseCache(disk_path=path))
+        second = _client(local_server.base_url, ResponseCache(disk_path=path))
+
+        before = local_server.request_count
+        payload = first.get_exchange_info().json()
+        response = second.get_exchange_info()
+        assert local_server.request_count == before + 1
+        assert response.status_code == 200
+        assert response.json() == payload
+        assert response.headers['Content-Type'].startswith('application/json')
+        assert second.response_cache.hits == 1
+
+    def test_etag_revalidation(self):
+        """TC-RC005: 過期後以 If-None-Match 重新驗證，304 時沿用舊響應"""
+        _ETagHandler.requests = []
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _ETagHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            cache = ResponseCache(ttls={'/api/v3/exchangeInfo': 0.01}, disk_path='')
+            client = _client(f"http://127.0.0.1:{server.server_port}", cache, rate_limit=False)
+            first = client.get_exchange_info()
+            time.sleep(0.02)
+            second = client.get_exchange_info()
+
+            assert second is first
+            assert second.json() == {'timezone': 'UTC', 'symbols': []}
+            assert _ETagHandler.requests == [None, '"v1"']
+            assert cache.revalidated == 1
+        finally:
+            server.shutdown()
+
+
+@pytest.mark.local
+@pytest.mark.performance
+@pytest.mark.p1
+class TestResponseCacheCoalescing:
+    """在途請求合併測試"""
+
+    def test_concurrent_threads_single_fetch(self, cached_client: BinanceClient, local_server: LocalBinanceServer):
+        """TC-RC006: 50 個執行緒同時請求 exchangeInfo 只送出一次"""
+        local_server.set_latency(0.05)
+        try:
+            before = local_server.request_count
+            with ThreadPoolExecutor(max_workers=50) as executor:
+                responses = list(executor.map(lambda _: cached_client.get_exchange_info(), range(50)))
+        finally:
+            local_server.set_latency(0.0)
+
+        assert all(r.status_code == 200 for r in responses)
+        assert local_server.request_count == before + 1
+        assert cached_client.response_cache.coalesced + cached_client.response_cache.hits == 49
+
+    @pytest.mark.asyncio
+    async def test_concurrent_tasks_single_fetch(self, local_server: LocalBinanceServer):
+        """TC-RC007: 非同步客戶端的併發請求共用同一次往返"""
+        async with AsyncBinanceClient(
+            api_key=local_server.api_key, secret_key=local_server.secret_key, base_url=local_server.base_url
+        ) as client:
+            cache = client.enable_response_cache(ResponseCache(disk_path=''))
+            before = local_server.request_count
+            responses = await asyncio.gather(*(client.get_exchange_info() for _ in range(50)))
+
+            assert all(r is responses[0] for r in responses)
+            assert local_server.request_count == before + 1
+            assert cache.coalesced == 49
@@ -0,0 +1,197 @@
+"""
+重試、對沖請求與下單對帳測試（離線）
+"""
+import asyncio
+import itertools
+import time
+import pytest
+import requests
+from utils.async_client import AsyncBinanceClient
+from utils.binance_client import BinanceClient
+from utils.local_server import LocalBinanceServer
+from utils.retry import RetryPolicy
+
+
+class _Response:
+    """只有狀態碼與響應頭的響應"""
+
+    def __init__(self, status_code: int, headers: dict = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def _tail_latency():
+    """每 40 個請求有一個 100ms，其餘 1ms（慢請求落在 p95 之外）"""
+    counter = itertools.count()
+    return lambda: 0.1 if next(counter) % 40 == 20 else 0.001
+
+
+def _p99(samples: list) -> float:
+    return sorted(samples)[int(len(samples) * 0.99)]
+
+
+@pytest.fixture
+def retry_client(local_server: LocalBinanceServer):
+    """使用獨立策略（短退避）的本地客戶端"""
+    client = BinanceClient(
+        api_key=local_server.api_key, secret_key=local_server.secret_key, base_url=local_server.base_url
+    )
+    client.single_flight = None
+    client.enable_retry(RetryPolicy(max_retries=3, backoff_base=0.01))
+    yield client
+    client.close()
+    local_server.set_error_injection(0.0)
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p1
+class TestReadRetry:
+    """讀取請求重試測試"""
+
+    def test_backoff_and_retry_after(self):
+        """TC-RT001: 退避加倍且有上限，429 依 Retry-After，超出預算或次數時不再重試"""
+        policy = RetryPolicy(max_retries=5, backoff_base=0.1, backoff_max=0.3, budget=10)
+        assert all(0 <= policy.backoff(0) <= 0.1 for _ in range(100))
+        assert all(0 <= policy.backoff(4) <= 0.3 for _ in range(100))
+
+        assert policy.delay(0, 0, _Response(429, {'Retry-After': '2'})) >= 2
+        assert policy.delay(0, 9, _Response(429, {'Retry-After': '2'})) is None
+        assert policy.delay(5, 0, _Response(503)) is None
+
+    def test_5xx_retried_until_success(self, retry_client: BinanceClient, local_server: LocalBinanceServer,
+                                       test_symbol: str):
+        """TC-RT002: 5xx 重試後成功"""
+        local_server.set_error_injection(1.0, 503, path='/api/v3/depth', count=2)
+        response = retry_client.get_order_book(test_symbol, limit=5)
+
+        assert response.status_code == 200
+        assert retry_client.retry_policy.retries == 2
+
+    def test_gives_up_after_max_retries(self, retry_client: BinanceClient, local_server: LocalBinanceServer):
+        """TC-RT003: 重試用盡時返回最後的錯誤響應；連線錯誤同樣重試後拋出"""
+        local_server.set_error_injection(1.0, 503, path='/api/v3/ping')
+        assert retry_client.ping().status_code == 503
+        assert retry_client.retry_policy.stats()['retries'] == 3
+        assert retry_client.retry_policy.gave_up == 1
+
+        closed = BinanceClient('key', 'secret', base_url='http://127.0.0.1:9', rate_limit=False)
+        policy = closed.enable_retry(RetryPolicy(max_retries=2, backoff_base=0.01))
+        with pytest.raises(requests.exceptions.ConnectionError):
+            closed.ping()
+        assert policy.retries == 2
+        closed.close()
+
+    def test_writes_not_retried(self, retry_client: BinanceClient, local_server: LocalBinanceServer,
+                                test_symbol: str):
+        """TC-RT004: 下單以外的寫入請求不重試"""
+        local_server.set_error_injection(1.0, 503, method='DELETE', path='/api/v3/openOrders', count=1)
+        before = local_server.request_count
+        assert retry_client.cancel_open_orders(test_symbol).status_code == 503
+        assert local_server.request_count == before + 1
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p1
+class TestOrderReconciliation:
+    """下單結果不明時的對帳測試"""
+
+    def _orders(self, server: LocalBinanceServer, client_order_id: str) -> list:
+        return [o for o in server.orders.values() if o['clientOrderId'] == client_order_id]
+
+    def test_lost_response_reconciled(self, retry_client: BinanceClient, local_server: LocalBinanceServer,
+                                      test_symbol: str):
+        """TC-RT005: 已成立但響應遺失的訂單以 clientOrderId 查回，不重複下單"""
+        local_server.set_error_injection(1.0, 503, method='POST', path='/api/v3/order', after=True, count=1)
+        response = retry_client.create_order(
+            symbol=test_symbol, side='BUY', order_type='LIMIT', quantity=0.001, price=20000,
+            client_order_id='reconcile-lost'
+        )
+
+        assert response.status_code == 200
+        assert response.json()['clientOrderId'] == 'reconcile-lost'
+        assert len(self._orders(local_server, 'reconcile-lost')) == 1
+        assert retry_client.retry_policy.reconciled == 1
+        retry_client.cancel_order(test_symbol, response.json()['orderId'])
+
+    def test_rejected_order_resent(self, retry_client: BinanceClient, local_server: LocalBinanceServer,
+                                   test_symbol: str):
+        """TC-RT006: 確認未成立的訂單以同一個 clientOrderId 重送"""
+        local_server.set_error_injection(1.0, 503, method='POST', path='/api/v3/order', count=1)
+        response = retry_client.create_order(
+            symbol=test_symbol, side='BUY', order_type='LIMIT', quantity=0.001, price=20000
+        )
+
+        assert response.status_code == 200
+        client_order_id = response.json()['clientOrderId']
+        assert client_order_id.startswith('x-')
+        assert len(self._orders(local_server, client_order_id)) == 1
+        assert retry_client.retry_policy.retries == 1
+        assert retry_client.retry_policy.reconciled == 0
+        retry_client.cancel_order(test_symbol, response.json()['orderId'])
+
+    @pytest.mark.asyncio
+    async def test_async_lost_response_reconciled(self, local_server: LocalBinanceServer, test_symbol: str):
+        """TC-RT007: 非同步客戶端同樣以 clientOrderId 對帳"""
+        local_server.set_error_injection(1.0, 502, method='POST', path='/api/v3/order', after=True, count=1)
+        try:
+            async with AsyncBinanceClient(
+                api_key=local_server.api_key, secret_key=local_server.secret_key, base_url=local_server.base_url
+            ) as client:
+                policy = client.enable_retry(RetryPolicy(backoff_base=0.01))
+                response = await client.create_order(
+                    symbol=test_symbol, side='BUY', order_type='LIMIT', quantity=0.001, price=20000
+                )
+                assert response.status_code == 200
+                assert len(self._orders(local_server, response.json()['clientOrderId'])) == 1
+                assert policy.reconciled == 1
+                await client.cancel_order(test_symbol, response.json()['orderId'])
+        finally:
+            local_server.set_error_injection(0.0)
+
+
+@pytest.mark.local
+@pytest.mark.performance
+@pytest.mark.p2
+class TestHedging:
+    """對沖請求測試"""
+
+    def test_hedging_cuts_p99(self):
+        """TC-RT008: 超過 p95 時送出對沖請求，p99 下降且額外請求只佔少數"""
+        def run(policy: RetryPolicy, latency) -> list:
+            samples = []
+            for _ in range(400):
+                start = time.perf_counter()
+                policy.call('/api/v3/depth', lambda: time.sleep(latency()) or _Response(200), ())
+                samples.append(time.perf_counter() - start)
+            return samples[100:]
+
+        plain = run(RetryPolicy(hedge=False), _tail_latency())
+        policy = RetryPolicy(hedge=True, hedge_min_samples=50)
+        hedged = run(policy, _tail_latency())
+
+        print(f"\np99: 無對沖 {_p99(plain) * 1000:.1f}ms, 對沖 {_p99(hedged) * 1000:.1f}ms, "
+              f"對沖請求 {policy.hedged} 次（勝出 {policy.hedge_wins}）")
+        assert _p99(hedged) < _p99(plain) / 3
+        assert policy.hedged < 400 * 0.15, "對沖請求應只佔少數"
+        assert policy.hedge_wins > 0
+
+    @pytest.mark.asyncio
+    async def test_async_hedging_cuts_p99(self):
+        """TC-RT009: 非同步對沖請求，落後的請求被取消"""
+        latency = _tail_latency()
+
+        async def send():
+            await asyncio.sleep(latency())
+            return _Response(200)
+
+        policy = RetryPolicy(hedge=True, hedge_min_samples=50)
+        samples = []
+        for _ in range(400):
+            start = time.perf_counter()
+            await policy.call_async('/api/v3/depth', send, ())
+            samples.append(time.perf_counter() - start)
+
+        assert _p99(samples[100:]) < 0.05
+        assert 0 < policy.hedged < 400 * 0.15
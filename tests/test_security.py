@@ -143,6 +143,7 @@ class TestInputValidation:
 class TestHTTPSSecurity:
     """HTTPS 安全性測試"""
 
+    @pytest.mark.network
     def test_https_enforced(self):
         """TC-S008: 驗證強制使用 HTTPS"""
         import ssl
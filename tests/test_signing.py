@@ -0,0 +1,71 @@
+"""
+簽名與查詢字串編碼測試（離線）
+"""
+import hashlib
+import hmac
+import pytest
+from urllib.parse import urlencode
+from requests.models import RequestEncodingMixin
+from utils.binance_client import BinanceClient
+
+SECRET_KEY = 's' * 64
+
+ORDER_PARAMS = {
+    'symbol': 'BTCUSDT',
+    'side': 'BUY',
+    'type': 'LIMIT',
+    'quantity': 0.001,
+    'price': 20000,
+    'timeInForce': 'GTC'
+}
+
+
+def legacy_sign_and_encode(params: dict) -> str:
+    """舊流程：每次重新建立 HMAC，且簽名與送出各編碼一次"""
+    params['timestamp'] = 1700000000000
+    query_string = urlencode(params)
+    params['signature'] = hmac.new(
+        SECRET_KEY.encode('utf-8'),
+        query_string.encode('utf-8'),
+        hashlib.sha256
+    ).hexdigest()
+    # requests 組 URL 時會再編碼一次 params
+    return RequestEncodingMixin._encode_params(params)
+
+
+@pytest.fixture(scope="module")
+def signing_client():
+    """只用於簽名的客戶端（不發送請求）"""
+    client = BinanceClient(api_key='key', secret_key=SECRET_KEY, rate_limit=False)
+    client._get_timestamp = lambda: 1700000000000
+    yield client
+    client.close()
+
+
+@pytest.mark.functional
+@pytest.mark.p0
+class TestSigning:
+    """簽名正確性測試"""
+
+    def test_signature_matches_reference(self, signing_client: BinanceClient):
+        """TC-SG001: 預先建立的 HMAC 狀態產生相同簽名"""
+        query_string = urlencode(dict(ORDER_PARAMS, timestamp=1700000000000))
+        expected = hmac.new(SECRET_KEY.encode('utf-8'), query_string.encode('utf-8'), hashlib.sha256).hexdigest()
+
+        assert signing_client._sign_query(query_string) == expected
+        assert signing_client._sign_query(query_string) == expected, "重複簽名不應受先前狀態影響"
+
+    def test_sent_query_is_signed_query(self, signing_client: BinanceClient):
+        """TC-SG002: 送出的查詢字串即為簽名內容"""
+        query_string = signing_client._build_query(dict(ORDER_PARAMS), signed=True)
+        payload, signature = query_string.rsplit('&signature=', 1)
+
+        assert payload == urlencode(dict(ORDER_PARAMS, timestamp=1700000000000))
+        assert signature == signing_client._sign_query(payload)
+        assert query_string == legacy_sign_and_encode(dict(ORDER_PARAMS))
+
+    def test_unsigned_query(self, signing_client: BinanceClient):
+        """TC-SG003: 未簽名請求不加入 timestamp"""
+        assert signing_client._build_query({}, signed=False) == ''
+        assert signing_client._build_query({'symbol': 'BTCUSDT'}, signed=False) == 'symbol=BTCUSDT'
+
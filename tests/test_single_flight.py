@@ -0,0 +1,144 @@
+"""
+在途請求合併測試（離線）
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from utils.async_client import AsyncBinanceClient
+from utils.binance_client import BinanceClient
+from utils.local_server import LocalBinanceServer
+from utils.models import parse_json
+from utils.single_flight import SingleFlight
+
+
+@pytest.fixture
+def flight_client(local_server: LocalBinanceServer):
+    """使用獨立 SingleFlight 的本地客戶端（統計不受其他測試影響）"""
+    client = BinanceClient(
+        api_key=local_server.api_key, secret_key=local_server.secret_key, base_url=local_server.base_url
+    )
+    client.enable_single_flight(SingleFlight())
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def slow_server(local_server: LocalBinanceServer):
+    """每個請求延遲 50ms，讓併發請求確實重疊"""
+    local_server.set_latency(0.05)
+    yield local_server
+    local_server.set_latency(0.0)
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p1
+class TestSingleFlight:
+    """合併行為測試"""
+
+    def test_errors_shared_by_waiters(self):
+        """TC-SF001: 送出者的例外傳給所有等待者，結束後下一次呼叫重新執行"""
+        flight = SingleFlight()
+        started = threading.Event()
+
+        def failing():
+            started.set()
+            time.sleep(0.05)
+            raise ConnectionError("upstream down")
+
+        def call(_):
+            try:
+                flight.do('key', failing)
+            except ConnectionError as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            leader = executor.submit(call, None)
+            started.wait()
+            errors = list(executor.map(call, range(9))) + [leader.result()]
+
+        assert all(isinstance(e, ConnectionError) for e in errors)
+        assert flight.stats() == {'calls': 1, 'deduplicated': 9}
+        assert flight.do('key', lambda: 'ok') == 'ok'
+        assert flight.calls == 2
+
+    def test_signed_and_distinct_requests_not_merged(self, flight_client: BinanceClient,
+                                                      slow_server: LocalBinanceServer, test_symbols: list):
+        """TC-SF002: 簽名請求與參數不同的請求各自送出"""
+        before = slow_server.request_count
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            accounts = list(executor.map(lambda _: flight_client.get_account_info(), range(5)))
+            books = list(executor.map(lambda s: flight_client.get_order_book(s, limit=5), test_symbols))
+
+        assert all(r.status_code == 200 for r in accounts + books)
+        assert slow_server.request_count == before + 5 + len(test_symbols)
+        assert flight_client.single_flight.deduplicated == 0
+
+    def test_time_sync_bypasses_single_flight(self, flight_client: BinanceClient):
+        """TC-SF003: TimeSync 取樣不經合併（RTT 必須是實際往返）"""
+        flight_client.enable_time_sync(background=False)
+        assert flight_client.single_flight.calls == 0
+
+
+@pytest.mark.local
+@pytest.mark.performance
+@pytest.mark.p1
+class TestSingleFlightFanOut:
+    """突發扇出測試"""
+
+    def test_concurrent_threads_share_one_request(self, flight_client: BinanceClient,
+                                                   slow_server: LocalBinanceServer, test_symbol: str):
+        """TC-SF004: 50 個執行緒同時請求相同訂單簿只送出一次，並共用 JSON 解析結果"""
+        barrier = threading.Barrier(50)
+
+        def fetch(_):
+            barrier.wait()
+            return flight_client.get_order_book(test_symbol, limit=5)
+
+        before = slow_server.request_count
+        with ThreadPoolExecutor(max_workers=50) as executor:
+            responses = list(executor.map(fetch, range(50)))
+
+        assert all(r is responses[0] for r in responses)
+        assert all(parse_json(r) is parse_json(responses[0]) for r in responses)
+        assert slow_server.request_count - before == flight_client.single_flight.calls
+        assert flight_client.single_flight.calls <= 5, "同時發出的相同請求應合併"
+        assert flight_client.single_flight.deduplicated == 50 - flight_client.single_flight.calls
+
+    def test_clients_share_process_wide_flight(self, slow_server: LocalBinanceServer):
+        """TC-SF005: 每個執行緒各自的客戶端也共用在途請求（如 test_concurrent_requests）"""
+        flight = SingleFlight()
+        barrier = threading.Barrier(20)
+
+        def fetch(_):
+            client = BinanceClient(slow_server.api_key, slow_server.secret_key, base_url=slow_server.base_url)
+            client.enable_single_flight(flight)
+            barrier.wait()
+            try:
+                return client.get_server_time().status_code
+            finally:
+                client.close()
+
+        before = slow_server.request_count
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            statuses = list(executor.map(fetch, range(20)))
+
+        assert statuses == [200] * 20
+        assert slow_server.request_count - before == flight.calls
+        assert flight.deduplicated >= 15
+
+    @pytest.mark.asyncio
+    async def test_concurrent_tasks_share_one_request(self, slow_server: LocalBinanceServer):
+        """TC-SF006: 非同步客戶端的相同請求共用同一次往返"""
+        async with AsyncBinanceClient(
+            api_key=slow_server.api_key, secret_key=slow_server.secret_key, base_url=slow_server.base_url
+        ) as client:
+            flight = client.enable_single_flight(SingleFlight())
+            before = slow_server.request_count
+            responses = await asyncio.gather(*(client.get_server_time() for _ in range(50)))
+
+            assert all(r is responses[0] for r in responses)
+            assert slow_server.request_count == before + 1
+            assert flight.stats() == {'calls': 1, 'deduplicated': 49}
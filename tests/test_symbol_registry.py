@@ -0,0 +1,177 @@
+"""
+交易對規則快取與下單前驗證測試（離線）
+"""
+import time
+from decimal import Decimal
+import pytest
+from utils.binance_client import BinanceClient
+from utils.local_server import LocalBinanceServer
+from utils.symbol_registry import OrderValidationError, SymbolRegistry
+
+
+@pytest.fixture(scope="module")
+def registry(local_binance_client: BinanceClient) -> SymbolRegistry:
+    """以本地伺服器 exchangeInfo 載入的規則快取"""
+    registry = SymbolRegistry(local_binance_client._fetch_exchange_info)
+    registry.load()
+    return registry
+
+
+@pytest.fixture
+def validating_client(local_server: LocalBinanceServer) -> BinanceClient:
+    """啟用本地驗證的客戶端"""
+    client = BinanceClient(
+        api_key=local_server.api_key,
+        secret_key=local_server.secret_key,
+        base_url=local_server.base_url
+    )
+    client.enable_order_validation()
+    yield client
+    client.close()
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p1
+class TestSymbolRegistry:
+    """規則索引與驗證測試"""
+
+    def test_filters_indexed(self, registry: SymbolRegistry, test_symbol: str):
+        """TC-SR001: exchangeInfo 整理為每個交易對的規則索引"""
+        filters = registry.get(test_symbol)
+        assert filters.tick_size == Decimal('0.01')
+        assert filters.step_size == Decimal('0.00001')
+        assert filters.min_notional == Decimal('5')
+        assert 'LIMIT' in filters.order_types
+        assert registry.get('INVALIDPAIR') is None
+
+    @pytest.mark.parametrize("kwargs,filter_type", [
+        ({'quantity': 0.001, 'price': 20000.005}, 'PRICE_FILTER'),
+        ({'quantity': 0.0000001, 'price': 20000}, 'LOT_SIZE'),
+        ({'quantity': 0.000015, 'price': 20000}, 'LOT_SIZE'),
+        ({'quantity': 10000, 'price': 20000}, 'LOT_SIZE'),
+        ({'quantity': 0.0001, 'price': 20000}, 'NOTIONAL'),
+        ({'quantity': 0.001, 'price': 2000000}, 'PRICE_FILTER'),
+    ])
+    def test_filter_violations(self, registry: SymbolRegistry, test_symbol: str, kwargs: dict, filter_type: str):
+        """TC-SR002: 違反 PRICE_FILTER / LOT_SIZE / NOTIONAL 的限價單"""
+        with pytest.raises(OrderValidationError) as excinfo:
+            registry.validate_order(test_symbol, 'BUY', 'LIMIT', **kwargs)
+        assert excinfo.value.filter_type == filter_type
+
+    def test_invalid_orders(self, registry: SymbolRegistry, test_symbol: str):
+        """TC-SR003: 無效交易對、負數數量、缺少價格與市價單數量上限"""
+        registry.validate_order(test_symbol, 'BUY', 'LIMIT', quantity=0.001, price=20000)
+        registry.validate_order(test_symbol, 'SELL', 'MARKET', quantity=0.001)
+        registry.validate_order(test_symbol, 'BUY', 'MARKET', quote_order_qty=10)
+
+        with pytest.raises(OrderValidationError):
+            registry.validate_order('INVALIDPAIR', 'BUY', 'MARKET', quantity=0.001)
+        with pytest.raises(OrderValidationError):
+            registry.validate_order(test_symbol, 'BUY', 'MARKET', quantity=-0.001)
+        with pytest.raises(OrderValidationError):
+            registry.validate_order(test_symbol, 'BUY', 'LIMIT', quantity=0.001)
+        with pytest.raises(OrderValidationError):
+            registry.validate_order(test_symbol, 'BUY', 'STOP_LOSS', quantity=0.001)
+        with pytest.raises(OrderValidationError) as excinfo:
+            registry.validate_order(test_symbol, 'BUY', 'MARKET', quantity=500)
+        assert excinfo.value.filter_type == 'MARKET_LOT_SIZE'
+
+    def test_stop_orders_without_price(self, local_binance_client: BinanceClient, test_symbol: str):
+        """TC-SR008: STOP_LOSS / TAKE_PROFIT 只需數量，*_LIMIT 類型仍需價格"""
+        def fetch() -> dict:
+            info = local_binance_client._fetch_exchange_info()
+            for symbol in info['symbols']:
+                symbol['orderTypes'] += ['STOP_LOSS', 'STOP_LOSS_LIMIT', 'TAKE_PROFIT', 'TAKE_PROFIT_LIMIT']
+            return info
+
+        registry = SymbolRegistry(fetch)
+        registry.load()
+        registry.validate_order(test_symbol, 'SELL', 'STOP_LOSS', quantity=0.001)
+        registry.validate_order(test_symbol, 'BUY', 'TAKE_PROFIT', quantity=0.001)
+        registry.validate_order(test_symbol, 'SELL', 'STOP_LOSS_LIMIT', quantity=0.001, price=20000)
+
+        with pytest.raises(OrderValidationError, match='price'):
+            registry.validate_order(test_symbol, 'SELL', 'TAKE_PROFIT_LIMIT', quantity=0.001)
+        with pytest.raises(OrderValidationError, match='quantity'):
+            registry.validate_order(test_symbol, 'SELL', 'STOP_LOSS')
+        with pytest.raises(OrderValidationError) as excinfo:
+            registry.validate_order(test_symbol, 'SELL', 'STOP_LOSS', quantity=0.000015)
+        assert excinfo.value.filter_type == 'LOT_SIZE'
+
+    def test_rounding(self, registry: SymbolRegistry, test_symbol: str):
+        """TC-SR004: 價格與數量取整後可通過驗證"""
+        price = registry.round_price(test_symbol, 20000.126)
+        quantity = registry.round_qty(test_symbol, 0.0012399)
+        assert str(price) == '20000.13'
+        assert str(quantity) == '0.00123'
+        assert str(registry.round_qty('BNBUSDT', 1.9999)) == '1.999'
+        registry.validate_order(test_symbol, 'BUY', 'LIMIT', quantity=quantity, price=price)
+
+    def test_ttl_refresh_in_background(self, local_binance_client: BinanceClient, test_symbol: str):
+        """TC-SR005: 規則過期時沿用舊規則並在背景重新載入"""
+        registry = SymbolRegistry(local_binance_client._fetch_exchange_info, ttl=0.05)
+        registry.load()
+        time.sleep(0.06)
+        assert registry.expired
+
+        assert registry.get(test_symbol) is not None
+        deadline = time.monotonic() + 5
+        while registry.load_count < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert registry.load_count == 2
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p1
+class TestClientOrderValidation:
+    """客戶端下單前驗證測試"""
+
+    def test_invalid_order_not_sent(self, validating_client: BinanceClient, local_server: LocalBinanceServer,
+                                    test_symbol: str):
+        """TC-SR006: 不合規的訂單在本地拒絕，不產生請求"""
+        before = local_server.request_count
+        with pytest.raises(OrderValidationError):
+            validating_client.create_order(symbol='INVALIDPAIR', side='BUY', order_type='MARKET', quantity=0.001)
+        with pytest.raises(OrderValidationError):
+            validating_client.test_new_order(symbol=test_symbol, side='BUY', order_type='MARKET', quantity=-0.001)
+        assert local_server.request_count == before
+
+        response = validating_client.test_new_order(
+            symbol=test_symbol, side='BUY', order_type='LIMIT', quantity=0.001, price=20000
+        )
+        assert response.status_code == 200
+        assert local_server.request_count == before + 1
+
+        results = validating_client.submit_orders([
+            {'symbol': test_symbol, 'side': 'BUY', 'order_type': 'LIMIT', 'quantity': 0.001, 'price': 20000.001}
+        ])
+        assert isinstance(results[0].error, OrderValidationError)
+
+
+@pytest.mark.local
+@pytest.mark.performance
+@pytest.mark.p2
+class TestSymbolRegistryPerformance:
+    """本地驗證性能測試"""
+
+    def test_validation_faster_than_round_trip(self, registry: SymbolRegistry,
+                                               local_binance_client: BinanceClient, test_symbol: str):
+        """TC-SR007: 本地驗證遠快於一次請求往返"""
+        count = 10000
+        start = time.perf_counter()
+        for i in range(count):
+            registry.validate_order(test_symbol, 'BUY', 'LIMIT', quantity=0.001, price=20000 + i * 0.01)
+        per_order = (time.perf_counter() - start) / count
+
+        start = time.perf_counter()
+        response = local_binance_client.test_new_order(
+            symbol=test_symbol, side='BUY', order_type='LIMIT', quantity=0.001, price=20000.001
+        )
+        round_trip = time.perf_counter() - start
+        assert response.status_code == 200
+
+        print(f"\n本地驗證: {per_order * 1e6:.1f}µs/筆, 往返: {round_trip * 1000:.2f}ms")
+        assert per_order < 0.0001, f"本地驗證應低於 100µs，實際 {per_order * 1e6:.1f}µs"
+        assert per_order < round_trip / 10
@@ -0,0 +1,73 @@
+"""
+伺服器時間同步測試（離線）
+"""
+import pytest
+import time
+from utils.binance_client import BinanceClient
+from utils.local_server import LocalBinanceServer
+from utils.time_sync import TimeSync
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p1
+class TestTimeSync:
+    """時間同步測試"""
+
+    def test_offset_uses_min_rtt_sample(self):
+        """TC-T001: 以往返延遲最小的樣本估計時間差"""
+        delays = iter([0.05, 0.002, 0.03])
+
+        def fetch_server_time():
+            delay = next(delays)
+            time.sleep(delay)
+            # 伺服器比本機快 2 秒，且時間戳在去程結束時產生
+            return int(time.time() * 1000) + 2000
+
+        time_sync = TimeSync(fetch_server_time, samples=3)
+        offset = time_sync.sync()
+
+        assert offset == pytest.approx(2000, abs=10)
+        assert time_sync.rtt_ms < 20
+        assert time_sync.timestamp() == pytest.approx(time.time() * 1000 + 2000, abs=20)
+
+    def test_recv_window_bounds(self):
+        """TC-T002: recvWindow 依抖動計算並受上下限約束"""
+        time_sync = TimeSync(lambda: int(time.time() * 1000), samples=3,
+                             min_recv_window=1000, max_recv_window=60000)
+        time_sync.sync()
+
+        assert 1000 <= time_sync.recv_window <= 60000
+
+    def test_background_resync(self):
+        """TC-T003: 要求重新同步時背景執行緒立即取樣"""
+        calls = []
+
+        def fetch_server_time():
+            calls.append(time.time())
+            return int(time.time() * 1000)
+
+        time_sync = TimeSync(fetch_server_time, samples=1, interval=3600).start()
+        time_sync.request_resync()
+        deadline = time.time() + 2
+        while not calls and time.time() < deadline:
+            time.sleep(0.01)
+        time_sync.stop()
+
+        assert len(calls) == 1
+
+    def test_signed_requests_survive_clock_drift(self):
+        """TC-T004: 伺服器時鐘偏移時，啟用時間同步後簽名請求可通過"""
+        with LocalBinanceServer(clock_offset_ms=30000) as server:
+            client = BinanceClient(server.api_key, server.secret_key, base_url=server.base_url)
+
+            drifted = client.get_account_info()
+            assert drifted.status_code == 400
+            assert drifted.json()['code'] == -1021
+
+            client.enable_time_sync(background=False)
+            synced = client.get_account_info()
+            client.close()
+
+        assert synced.status_code == 200, synced.text
+        assert client.time_sync.offset_ms == pytest.approx(30000, abs=200)
@@ -0,0 +1,113 @@
+"""
+請求追蹤與延遲日誌測試（離線）
+"""
+import json
+import logging
+import pytest
+import requests
+from utils.async_client import AsyncBinanceClient
+from utils.binance_client import BinanceClient
+from utils.local_server import LocalBinanceServer
+from utils.tracing import PREVIEW_BYTES, Tracer
+
+
+@pytest.fixture
+def trace_client(local_server: LocalBinanceServer):
+    """不合併請求的本地客戶端"""
+    client = BinanceClient(
+        api_key=local_server.api_key, secret_key=local_server.secret_key, base_url=local_server.base_url
+    )
+    client.single_flight = None
+    yield client
+    client.close()
+
+
+@pytest.mark.local
+@pytest.mark.functional
+@pytest.mark.p1
+class TestTracer:
+    """追蹤記錄測試"""
+
+    def test_records_request_summary(self, trace_client: BinanceClient, test_symbol: str):
+        """TC-TR001: 記錄端點、權重、狀態碼、延遲與大小；錯誤響應保留 body 片段"""
+        tracer = trace_client.enable_tracing(Tracer())
+        trace_client.get_order_book(test_symbol, limit=100)
+        trace_client.get_order(test_symbol, order_id=999999999)
+
+        depth, order = tracer.records()
+        assert (depth.method, depth.endpoint, depth.status, depth.weight) == ('GET', '/api/v3/depth', 200, 5)
+        assert depth.response_bytes > 1000 and depth.request_bytes == len('symbol=BTCUSDT&limit=100')
+        assert depth.latency > 0 and depth.preview is None
+        assert int(depth.used_weight) > 0
+
+        assert order.status == 400
+        assert b'-2013' in order.preview and len(order.preview) <= PREVIEW_BYTES
+        assert order.seq == depth.seq + 1
+
+    def test_sampling(self, trace_client: BinanceClient, test_symbol: str):
+        """TC-TR002: 成功請求依抽樣率記錄，錯誤響應另依錯誤抽樣率記錄"""
+        tracer = trace_client.enable_tracing(Tracer(sample_rate=0.0, error_sample_rate=1.0))
+        for _ in range(20):
+            trace_client.ping()
+        trace_client.get_order(test_symbol, order_id=999999999)
+        assert tracer.seen >= 21
+        assert [record.status for record in tracer] == [400]
+
+        sampled = Tracer(sample_rate=0.2)
+        for _ in range(5000):
+            sampled.observe('GET', '/api/v3/ping', {}, 200, 0.001, 0, b'{}', {})
+        assert len(sampled) == pytest.approx(1000, rel=0.15)
+
+    def test_ring_buffer_and_dump(self, tmp_path):
+        """TC-TR003: 只保留最近的記錄，依 mark 輸出 JSON Lines"""
+        tracer = Tracer(capacity=10)
+        for _ in range(25):
+            tracer.observe('GET', '/api/v3/ping', {}, 200, 0.001, 0, b'{}', {})
+        assert len(tracer) == 10
+        assert [record.seq for record in tracer] == list(range(16, 26))
+
+        mark = tracer.mark()
+        tracer.observe('GET', '/api/v3/depth', {'limit': 5000}, 503, 0.2, 10, b'{"code":-1}', {})
+        tracer.observe_error('GET', '/api/v3/ping', {}, requests.exceptions.ConnectionError(), 0.01)
+        assert tracer.dump(str(tmp_path / 'none.jsonl'), since=tracer.mark()) is None
+
+        path = tracer.dump(str(tmp_path / 'traces.jsonl'), since=mark)
+        lines = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+        assert [line['status'] for line in lines] == [503, None]
+        assert lines[0]['weight'] == 250 and lines[0]['preview'] == '{"code":-1}'
+        assert lines[1]['error'] == 'ConnectionError'
+
+    @pytest.mark.asyncio
+    async def test_async_client_tracing(self, local_server: LocalBinanceServer):
+        """TC-TR004: 非同步客戶端同樣記錄"""
+        async with AsyncBinanceClient(
+            api_key=local_server.api_key, secret_key=local_server.secret_key, base_url=local_server.base_url
+        ) as client:
+            tracer = client.enable_tracing(Tracer())
+            await client.get_server_time()
+
+        assert [(r.endpoint, r.status, r.weight) for r in tracer] == [('/api/v3/time', 200, 1)]
+
+
+@pytest.mark.local
+@pytest.mark.performance
+@pytest.mark.p2
+class TestLazyLogging:
+    """延遲日誌測試"""
+
+    def test_body_not_decoded_without_debug(self, trace_client: BinanceClient, monkeypatch, caplog,
+                                            test_symbol: str):
+        """TC-TR005: 未啟用 DEBUG 時不解碼響應；啟用時只解碼前 200 個位元組"""
+        decoded = []
+        original = requests.Response.text
+        monkeypatch.setattr(requests.Response, 'text', property(lambda r: decoded.append(1) or original.fget(r)))
+
+        caplog.set_level(logging.INFO, logger='utils.binance_client')
+        trace_client.get_order_book(test_symbol, limit=1000)
+        assert decoded == []
+
+        caplog.set_level(logging.DEBUG, logger='utils.binance_client')
+        trace_client.get_order_book(test_symbol, limit=1000)
+        assert decoded == []
+        messages = [r.getMessage() for r in caplog.records if r.getMessage().startswith('Response: 200')]
+        assert messages and len(messages[-1]) <= len('Response: 200 - ') + 200
@@ -0,0 +1,144 @@
+"""
+WebSocket API 下單通道測試（離線）
+"""
+import asyncio
+import statistics
+import time
+import pytest
+import pytest_asyncio
+from utils.async_client import AsyncBinanceClient
+from utils.local_server import LocalBinanceServer
+from utils.ws_api import rate_limit_headers
+
+
+@pytest_asyncio.fixture
+async def ws_order_client(local_server: LocalBinanceServer):
+    """以 WebSocket API 下單的非同步客戶端"""
+    client = AsyncBinanceClient(
+        api_key=local_server.api_key,
+        secret_key=local_server.secret_key,
+        base_url=local_server.base_url,
+        order_transport='ws',
+        ws_api_url=local_server.ws_api_url
+    )
+    yield client
+    await client.close()
+
+
+@pytest.mark.local
+@pytest.mark.websocket
+@pytest.mark.p1
+class TestWsApiOrders:
+    """WebSocket API 下單測試"""
+
+    def test_rate_limit_headers(self):
+        """TC-WA001: rateLimits 轉為等效響應頭"""
+        headers = rate_limit_headers([
+            {'rateLimitType': 'REQUEST_WEIGHT', 'interval': 'MINUTE', 'intervalNum': 1, 'limit': 6000, 'count': 12},
+            {'rateLimitType': 'ORDERS', 'interval': 'SECOND', 'intervalNum': 10, 'limit': 100, 'count': 3},
+            {'rateLimitType': 'ORDERS', 'interval': 'DAY', 'intervalNum': 1, 'limit': 200000, 'count': 30},
+        ])
+        assert headers == {
+            'X-MBX-USED-WEIGHT-1M': '12',
+            'X-MBX-ORDER-COUNT-10S': '3',
+            'X-MBX-ORDER-COUNT-1D': '30'
+        }
+
+    @pytest.mark.asyncio
+    async def test_order_lifecycle(self, ws_order_client: AsyncBinanceClient, test_symbol: str):
+        """TC-WA002: 以相同方法簽名下單、查詢與取消"""
+        response = await ws_order_client.create_order(
+            symbol=test_symbol, side='BUY', order_type='LIMIT', quantity=0.001, price=20000
+        )
+        assert response.status_code == 200, response.text
+        assert response.url.endswith('#order.place')
+        order = response.json()
+        assert order['status'] == 'NEW'
+
+        status = await ws_order_client.get_order(symbol=test_symbol, order_id=order['orderId'])
+        assert status.json()['clientOrderId'] == order['clientOrderId']
+
+        canceled = await ws_order_client.cancel_order(symbol=test_symbol, order_id=order['orderId'])
+        assert canceled.json()['status'] == 'CANCELED'
+
+        missing = await ws_order_client.get_order(symbol=test_symbol, order_id=order['orderId'] + 10**6)
+        assert missing.status_code == 400
+        assert missing.json()['code'] == -2013
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_correlated(self, ws_order_client: AsyncBinanceClient,
+                                                  local_server: LocalBinanceServer, test_symbol: str):
+        """TC-WA003: 多筆在途請求依 id 對應響應"""
+        local_server.set_latency(0.0, jitter=0.02)
+        try:
+            prices = [20000 + i for i in range(30)]
+            responses = await asyncio.gather(*(
+                ws_order_client.create_order(symbol=test_symbol, side='BUY', order_type='LIMIT',
+                                             quantity=0.001, price=price)
+                for price in prices
+            ))
+        finally:
+            local_server.set_latency(0.0)
+
+        orders = [r.json() for r in responses]
+        assert [float(o['price']) for o in orders] == prices, "響應應對應各自的請求"
+        assert len({o['orderId'] for o in orders}) == len(prices)
+        assert ws_order_client.ws_api.ws is not None, "所有請求應共用同一條連線"
+
+        await asyncio.gather(*(
+            ws_order_client.cancel_order(symbol=test_symbol, order_id=o['orderId']) for o in orders
+        ))
+
+    @pytest.mark.asyncio
+    async def test_rest_endpoints_unchanged(self, ws_order_client: AsyncBinanceClient, test_symbol: str):
+        """TC-WA004: 無對應方法的端點仍走 REST"""
+        response = await ws_order_client.get_order_book(symbol=test_symbol, limit=5)
+
+        assert response.status_code == 200
+        assert '#' not in response.url
+        assert ws_order_client.ws_api is None or ws_order_client.ws_api.ws is None
+
+    @pytest.mark.asyncio
+    async def test_invalid_signature(self, local_server: LocalBinanceServer, test_symbol: str):
+        """TC-WA005: 錯誤的 Secret 密鑰返回 -1022"""
+        async with AsyncBinanceClient(
+            api_key=local_server.api_key, secret_key='wrong-secret', base_url=local_server.base_url,
+            order_transport='ws', ws_api_url=local_server.ws_api_url
+        ) as client:
+            response = await client.test_new_order(symbol=test_symbol, side='BUY', order_type='MARKET', quantity=0.001)
+
+        assert response.status_code == 401
+        assert response.json()['code'] == -1022
+
+
+@pytest.mark.local
+@pytest.mark.performance
+@pytest.mark.p2
+class TestWsApiPerformance:
+    """WebSocket API 下單延遲測試"""
+
+    @pytest.mark.asyncio
+    async def test_order_round_trip_vs_rest(self, ws_order_client: AsyncBinanceClient,
+                                            local_server: LocalBinanceServer, test_symbol: str):
+        """TC-WA006: WebSocket API 與 REST 的下單往返時間"""
+        async def measure(client: AsyncBinanceClient) -> float:
+            samples = []
+            for _ in range(100):
+                start = time.perf_counter()
+                response = await client.test_new_order(
+                    symbol=test_symbol, side='BUY', order_type='LIMIT', quantity=0.001, price=20000
+                )
+                samples.append(time.perf_counter() - start)
+                assert response.status_code == 200
+            return statistics.median(samples)
+
+        async with AsyncBinanceClient(
+            api_key=local_server.api_key, secret_key=local_server.secret_key, base_url=local_server.base_url
+        ) as rest_client:
+            await measure(rest_client)
+            rest_median = await measure(rest_client)
+        await measure(ws_order_client)
+        ws_median = await measure(ws_order_client)
+
+        print(f"\n下單往返中位數: REST {rest_median * 1000:.2f}ms, WebSocket API {ws_median * 1000:.2f}ms")
+        assert ws_median < rest_median * 1.5
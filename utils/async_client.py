@@ -0,0 +1,412 @@
+"""
+Binance API 非同步客戶端
+基於 asyncio + aiohttp，單一事件迴圈即可同時維持數千個請求
+"""
+import asyncio
+import functools
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import aiohttp
+from requests.structures import CaseInsensitiveDict
+from yarl import URL
+
+from config import Config
+from utils.binance_client import LOOKUP, SEND, BinanceClient, OrderResult
+from utils.metrics import MetricsRecorder, create_trace_config, finish_phases, get_metrics
+from utils.rate_limiter import RateLimiter
+from utils.symbol_registry import OrderValidationError, SymbolRegistry
+from utils.time_sync import TimeSync
+
+logger = logging.getLogger(__name__)
+
+# 視為暫時性失敗而重試的例外（WebSocket API 斷線時為 ConnectionError）
+RETRY_ERRORS = (aiohttp.ClientConnectionError, asyncio.TimeoutError, ConnectionError)
+
+
+class AsyncResponse:
+    """
+    非同步請求的響應對象
+
+    在連線歸還連線池前就讀完 body，介面與 requests.Response 常用部分一致
+    （status_code / headers / content / text / json()），測試可直接沿用
+    """
+
+    def __init__(self, status_code: int, headers: Dict[str, str], content: bytes, url: str):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+        self.url = url
+
+    @property
+    def ok(self) -> bool:
+        """狀態碼是否小於 400"""
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        """以 UTF-8 解碼的響應內容"""
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self) -> Any:
+        """解析 JSON 響應內容"""
+        return json.loads(self.content)
+
+    def __repr__(self) -> str:
+        return f"<AsyncResponse [{self.status_code}]>"
+
+
+class AsyncBinanceClient(BinanceClient):
+    """
+    幣安 API 非同步客戶端
+
+    公開方法（ping、get_order_book、create_order ...）與參數組裝、簽名
+    完全沿用 BinanceClient，只替換底層的 _request，因此每個公開方法
+    都會回傳 awaitable：
+
+        async with AsyncBinanceClient() as client:
+            response = await client.ping()
+    """
+
+    def __init__(
+        self,
+        api_key: str = None,
+        secret_key: str = None,
+        base_url: str = None,
+        rate_limit: bool = None,
+        rate_limiter: RateLimiter = None,
+        connection_limit: int = None,
+        connection_limit_per_host: int = None,
+        order_transport: str = None,
+        ws_api_url: str = None
+    ):
+        """
+        初始化客戶端
+
+        Args:
+            api_key: API 密鑰
+            secret_key: Secret 密鑰
+            base_url: API 基礎 URL（預設 Config.BASE_URL，可指向本地模擬伺服器）
+            rate_limit: 是否啟用請求權重限速（預設 Config.RATE_LIMIT_ENABLED）
+            rate_limiter: 自訂限速器（預設與相同 API Key 的客戶端共用）
+            connection_limit: 連線池總連線數上限（0 表示不限制）
+            connection_limit_per_host: 單一主機連線數上限（0 表示不限制）
+            order_transport: 下單通道，rest 或 ws（預設 Config.ORDER_TRANSPORT）
+            ws_api_url: WebSocket API URL（預設 Config.WS_API_URL）
+        """
+        self._sync_client: Optional[BinanceClient] = None
+        self.connection_limit = (
+            Config.ASYNC_CONNECTION_LIMIT if connection_limit is None else connection_limit
+        )
+        self.connection_limit_per_host = (
+            Config.ASYNC_CONNECTION_LIMIT_PER_HOST
+            if connection_limit_per_host is None else connection_limit_per_host
+        )
+        self.order_transport = (order_transport or Config.ORDER_TRANSPORT).lower()
+        if self.order_transport not in ('rest', 'ws'):
+            raise ValueError(f"不支援的下單通道: {self.order_transport}")
+        self.ws_api_url = ws_api_url
+        self.ws_api = None
+        super().__init__(api_key, secret_key, base_url, rate_limit, rate_limiter)
+
+    def _open_session(self, session: None) -> Optional[aiohttp.ClientSession]:
+        """aiohttp Session 必須在事件迴圈內建立，延遲到第一次請求（見 _get_session）"""
+        return None
+
+    def _get_ws_api(self):
+        """取得 WebSocket API 通道（延遲建立，整個客戶端共用一條連線）"""
+        if self.ws_api is None:
+            from utils.ws_api import WsApiClient
+            self.ws_api = WsApiClient(self, url=self.ws_api_url)
+        return self.ws_api
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        取得共用的 aiohttp Session
+
+        ClientSession 必須在事件迴圈內建立，因此延遲到第一次請求時才建立
+        """
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                limit_per_host=self.connection_limit_per_host,
+                ttl_dns_cache=300
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                headers={'X-MBX-APIKEY': self.api_key},
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trace_configs=[create_trace_config()] if self.metrics is not None else None
+            )
+        return self.session
+
+    def enable_metrics(self, recorder: MetricsRecorder = None) -> MetricsRecorder:
+        """
+        啟用請求延遲量測
+
+        連線階段（連線池等待、DNS、連線）需在第一次請求前啟用才會記錄
+
+        Args:
+            recorder: 自訂記錄器（預設使用程序內共用的記錄器，見 get_metrics）
+
+        Returns:
+            MetricsRecorder 實例
+        """
+        self.metrics = recorder or get_metrics()
+        return self.metrics
+
+    def enable_time_sync(self, interval: float = None, background: bool = True) -> TimeSync:
+        """
+        啟用伺服器時間同步
+
+        取樣在背景執行緒以同步客戶端進行，不佔用事件迴圈；
+        請在事件迴圈外（或以 run_in_executor）呼叫
+
+        Args:
+            interval: 重新同步間隔（秒，預設 Config.TIME_SYNC_INTERVAL）
+            background: 是否啟動背景同步
+
+        Returns:
+            TimeSync 實例
+        """
+        self.time_sync = TimeSync(self._get_sync_client()._fetch_server_time, interval=interval)
+        self.time_sync.sync()
+        if background:
+            self.time_sync.start()
+        return self.time_sync
+
+    def enable_order_validation(self, ttl: float = None) -> SymbolRegistry:
+        """
+        啟用下單前的本地規則驗證
+
+        exchangeInfo 以同步客戶端載入，之後過期時在背景執行緒重新載入；
+        請在事件迴圈外（或以 run_in_executor）呼叫
+
+        Args:
+            ttl: 規則有效秒數（預設 Config.EXCHANGE_INFO_TTL）
+
+        Returns:
+            SymbolRegistry 實例
+        """
+        self.symbol_registry = SymbolRegistry(self._get_sync_client()._fetch_exchange_info, ttl=ttl)
+        self.symbol_registry.load()
+        return self.symbol_registry
+
+    def _get_sync_client(self) -> BinanceClient:
+        """背景工作（時間同步、規則載入）使用的同步客戶端，與本客戶端共用限速器"""
+        if self._sync_client is None:
+            self._sync_client = BinanceClient(
+                api_key=self.api_key,
+                secret_key=self.secret_key,
+                base_url=self.base_url,
+                rate_limiter=self.rate_limiter
+            )
+        return self._sync_client
+
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        signed: bool = False
+    ) -> AsyncResponse:
+        """
+        發送非同步 HTTP 請求
+
+        Args:
+            method: HTTP 方法 (GET, POST, PUT, DELETE)
+            endpoint: API 端點
+            params: 請求參數
+            signed: 是否需要簽名
+
+        Returns:
+            AsyncResponse 對象
+        """
+        params = params or {}
+        place_order = self._places_order(method, endpoint)
+        if self.order_transport == 'ws':
+            ws_api = self._get_ws_api()
+            if ws_api.supports(method, endpoint):
+                send = functools.partial(ws_api.request_rest, method, endpoint, params, signed)
+                return await (self._place_order(params, send) if place_order else send())
+
+        if place_order:
+            return await self._place_order(params, functools.partial(self._send, method, endpoint, params, signed))
+        if method != 'GET':
+            return await self._send(method, endpoint, params, signed)
+
+        key, ttl = self._read_key(endpoint, params, signed)
+        if ttl:
+            return await self.response_cache.fetch_async(
+                key, ttl, lambda headers: self._send_read(endpoint, params, signed, headers), AsyncResponse
+            )
+        if key is not None and self.single_flight is not None:
+            return await self.single_flight.do_async(key, lambda: self._send_read(endpoint, params, signed))
+        return await self._send_read(endpoint, params, signed)
+
+    async def _send_read(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        signed: bool,
+        headers: Optional[Dict[str, str]] = None
+    ) -> AsyncResponse:
+        """送出 GET 請求（重試與對沖同 BinanceClient._send_read）"""
+        if self.retry_policy is None:
+            return await self._send('GET', endpoint, params, signed, headers)
+        return await self.retry_policy.call_async(
+            endpoint, lambda: self._send('GET', endpoint, params, signed, headers), RETRY_ERRORS
+        )
+
+    async def _place_order(self, params: Dict[str, Any], send: Callable[[], Any]) -> AsyncResponse:
+        """下單並在結果不明時以 newClientOrderId 對帳（流程見 BinanceClient._order_steps）"""
+        steps = self._order_steps(params)
+        try:
+            step, argument = next(steps)
+            while True:
+                if step == SEND:
+                    try:
+                        result = await send()
+                    except RETRY_ERRORS as e:
+                        result = e
+                elif step == LOOKUP:
+                    result = await self.get_order(params['symbol'], client_order_id=argument)
+                else:
+                    result = await asyncio.sleep(argument)
+                step, argument = steps.send(result)
+        except StopIteration as done:
+            return done.value
+
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        params: Dict[str, Any],
+        signed: bool,
+        headers: Optional[Dict[str, str]] = None
+    ) -> AsyncResponse:
+        """送出 HTTP 請求（限速、簽名、更新限速狀態）"""
+        url = f"{self.base_url}{endpoint}"
+
+        # 先排隊再簽名，避免等待期間時間戳過期
+        delay = 0.0
+        if self.rate_limiter is not None:
+            delay = self.rate_limiter.reserve(method, endpoint, params)
+            if delay:
+                await asyncio.sleep(delay)
+
+        # 查詢字串只編碼一次，送出的內容與簽名時使用的完全一致
+        query_string = self._build_query(params, signed)
+        if query_string:
+            url = f"{url}?{query_string}"
+
+        # 日誌字串只在 DEBUG 啟用時才組裝
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(f"{method} {url}")
+
+        phases = {} if self.metrics is not None else None
+        start = time.perf_counter()
+        try:
+            async with self._get_session().request(
+                method, URL(url, encoded=True), headers=headers, trace_request_ctx=phases
+            ) as response:
+                content = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self._record_error(method, endpoint, params, e, time.perf_counter() - start)
+            if isinstance(e, aiohttp.ClientError):
+                logger.error(f"Request failed: {e}")
+            raise
+
+        end = time.perf_counter()
+        if debug:
+            logger.debug(f"Response: {response.status} - {content[:200].decode('utf-8', errors='replace')}")
+        if phases is not None:
+            phases = finish_phases(phases, start, phases.get('_headers', end), end)
+            if delay:
+                phases['queue'] = delay
+        self._record_response(method, endpoint, params, signed, response.status, response.headers,
+                              content, len(query_string), phases, end - start)
+        return AsyncResponse(response.status, dict(response.headers), content, url)
+
+    # ==================== 批次下單 ====================
+
+    async def submit_orders(self, orders: List[Dict[str, Any]], max_concurrency: int = None) -> List[OrderResult]:
+        """
+        併發送出多筆訂單（參數與返回值同 BinanceClient.submit_orders）
+
+        使用 WebSocket API 下單通道時，所有訂單在同一條連線上同時在途
+        """
+        return await self._run_batch(self.create_order, orders, max_concurrency)
+
+    async def cancel_orders(
+        self,
+        symbol: str,
+        order_ids: List[int] = None,
+        max_concurrency: int = None
+    ) -> List[OrderResult]:
+        """批次取消訂單（參數與返回值同 BinanceClient.cancel_orders）"""
+        if order_ids is None:
+            return await self._run_batch(self.cancel_open_orders, [{'symbol': symbol}], max_concurrency)
+        batch = [{'symbol': symbol, 'order_id': order_id} for order_id in order_ids]
+        return await self._run_batch(self.cancel_order, batch, max_concurrency)
+
+    async def _run_batch(
+        self,
+        method: Callable[..., Any],
+        batch: List[Dict[str, Any]],
+        max_concurrency: Optional[int]
+    ) -> List[OrderResult]:
+        """以 Semaphore 限制在途數量，結果依輸入順序返回"""
+        semaphore = asyncio.Semaphore(max_concurrency or Config.BATCH_MAX_CONCURRENCY)
+
+        async def call(kwargs: Dict[str, Any]) -> OrderResult:
+            async with semaphore:
+                try:
+                    return OrderResult(kwargs, await method(**kwargs))
+                except (aiohttp.ClientError, ConnectionError, asyncio.TimeoutError, OrderValidationError) as e:
+                    return OrderResult(kwargs, error=e)
+
+        return list(await asyncio.gather(*(call(kwargs) for kwargs in batch)))
+
+    # ==================== 工具方法 ====================
+
+    async def close(self):
+        """關閉 Session 與連線池"""
+        if self.time_sync is not None:
+            self.time_sync.stop()
+        if self._sync_client is not None:
+            self._sync_client.close()
+        if self.ws_api is not None:
+            await self.ws_api.close()
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    async def __aenter__(self) -> 'AsyncBinanceClient':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+async def call_client(client: BinanceClient, method: str, **kwargs) -> Any:
+    """
+    在事件迴圈中呼叫同步或非同步客戶端的公開方法
+
+    同步客戶端的請求在執行緒池中執行，不阻塞事件迴圈
+
+    Args:
+        client: BinanceClient 或 AsyncBinanceClient
+        method: 方法名稱（例如 get_order_book）
+        kwargs: 方法參數
+
+    Returns:
+        響應對象
+    """
+    function = getattr(client, method)
+    if isinstance(client, AsyncBinanceClient):
+        return await function(**kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(function, **kwargs))
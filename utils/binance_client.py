@@ -5,35 +5,122 @@ Binance API 客戶端封裝
 import time
 import hmac
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlencode
 import requests
 import logging
-from typing import Dict, Optional, Any
+from requests.structures import CaseInsensitiveDict
+from typing import Any, Callable, Dict, Generator, List, Mapping, Optional, Tuple
 
 from config import Config
+from utils.metrics import MetricsRecorder, begin_connection_phases, finish_phases, get_metrics, instrument_session
+from utils.rate_limiter import RateLimiter, get_rate_limiter
+from utils.response_cache import ResponseCache, get_response_cache
+from utils.retry import RETRY_STATUSES, RetryPolicy, get_retry_policy, new_client_order_id, order_not_found
+from utils.single_flight import SingleFlight, get_single_flight
+from utils.symbol_registry import OrderValidationError, SymbolRegistry
+from utils.time_sync import TimeSync
+from utils.tracing import Tracer, get_tracer
 
 logger = logging.getLogger(__name__)
 
+# 視為暫時性失敗而重試的例外
+RETRY_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+# 下單端點（結果不明時以 newClientOrderId 對帳）
+ORDER_ENDPOINT = '/api/v3/order'
+
+# 下單對帳流程的步驟（見 BinanceClient._order_steps）
+SEND = 'send'
+LOOKUP = 'lookup'
+SLEEP = 'sleep'
+
+
+class OrderResult:
+    """批次請求中單筆訂單的結果（HTTP 錯誤保留在 response，連線錯誤保留在 error）"""
+
+    __slots__ = ('request', 'response', 'error')
+
+    def __init__(self, request: Dict[str, Any], response: Any = None, error: Exception = None):
+        self.request = request
+        self.response = response
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        """請求是否成功"""
+        return self.error is None and self.response is not None and self.response.status_code == 200
+
+    def json(self) -> Any:
+        """響應 JSON（連線錯誤時為 None）"""
+        return self.response.json() if self.response is not None else None
+
+    def __repr__(self) -> str:
+        outcome = self.error if self.error is not None else self.response
+        return f"<OrderResult {self.request} -> {outcome}>"
+
 
 class BinanceClient:
     """幣安 API 客戶端"""
 
-    def __init__(self, api_key: str = None, secret_key: str = None):
+    def __init__(
+        self,
+        api_key: str = None,
+        secret_key: str = None,
+        base_url: str = None,
+        rate_limit: bool = None,
+        rate_limiter: RateLimiter = None,
+        session: requests.Session = None
+    ):
         """
         初始化客戶端
 
         Args:
             api_key: API 密鑰
             secret_key: Secret 密鑰
+            base_url: API 基礎 URL（預設 Config.BASE_URL，可指向本地模擬伺服器）
+            rate_limit: 是否啟用請求權重限速（預設 Config.RATE_LIMIT_ENABLED）
+            rate_limiter: 自訂限速器（預設與相同 API Key 的客戶端共用）
+            session: 共用的 Session（見 utils.client_factory，close() 時不會關閉）
         """
         self.api_key = api_key or Config.API_KEY
         self.secret_key = secret_key or Config.SECRET_KEY
-        self.base_url = Config.BASE_URL
+        self.base_url = base_url or Config.BASE_URL
         self.timeout = Config.REQUEST_TIMEOUT
-        self.session = requests.Session()
-        self.session.headers.update({
-            'X-MBX-APIKEY': self.api_key
-        })
+        self.rate_limiter = self._resolve_rate_limiter(rate_limit, rate_limiter)
+        self.time_sync: Optional[TimeSync] = None
+        self.symbol_registry: Optional[SymbolRegistry] = None
+        self.response_cache = get_response_cache() if Config.RESPONSE_CACHE_ENABLED else None
+        self.single_flight = get_single_flight() if Config.SINGLE_FLIGHT_ENABLED else None
+        self.retry_policy = get_retry_policy(self.base_url) if Config.RETRY_ENABLED else None
+        self._hmac = self._create_hmac()
+        self._owns_session = session is None
+        self.session = self._open_session(session)
+        self.metrics: Optional[MetricsRecorder] = None
+        if Config.METRICS_ENABLED:
+            self.enable_metrics()
+        self.tracer: Optional[Tracer] = get_tracer() if Config.TRACE_ENABLED else None
+
+    def _open_session(self, session: Optional[requests.Session]) -> requests.Session:
+        """建立傳輸層 Session（非同步客戶端覆寫為在事件迴圈內延遲建立）"""
+        if session is None:
+            session = requests.Session()
+            session.headers.update({
+                'X-MBX-APIKEY': self.api_key
+            })
+        return session
+
+    def _resolve_rate_limiter(self, rate_limit: bool, rate_limiter: RateLimiter) -> Optional[RateLimiter]:
+        """決定使用的限速器（同步與非同步客戶端共用）"""
+        if rate_limiter is not None:
+            return rate_limiter
+        if rate_limit is None:
+            rate_limit = Config.RATE_LIMIT_ENABLED
+        return get_rate_limiter(self.api_key, self.base_url) if rate_limit else None
+
+    def _create_hmac(self) -> 'hmac.HMAC':
+        """預先以 Secret 密鑰建立 HMAC 狀態，每次簽名只需 copy()"""
+        return hmac.new(self.secret_key.encode('utf-8'), digestmod=hashlib.sha256)
 
     def _generate_signature(self, params: Dict[str, Any]) -> str:
         """
@@ -45,18 +132,114 @@ class BinanceClient:
         Returns:
             簽名字串
         """
-        query_string = urlencode(params)
-        signature = hmac.new(
-            self.secret_key.encode('utf-8'),
-            query_string.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
-        return signature
+        return self._sign_query(urlencode(params))
+
+    def _sign_query(self, query_string: str) -> str:
+        """
+        對已編碼的查詢字串簽名
+
+        Args:
+            query_string: 查詢字串
+
+        Returns:
+            簽名字串
+        """
+        mac = self._hmac.copy()
+        mac.update(query_string.encode('utf-8'))
+        return mac.hexdigest()
 
     def _get_timestamp(self) -> int:
-        """獲取當前時間戳（毫秒）"""
+        """獲取當前時間戳（毫秒），啟用時間同步時使用校正後的伺服器時間"""
+        if self.time_sync is not None:
+            return self.time_sync.timestamp()
         return int(time.time() * 1000)
 
+    def enable_time_sync(self, interval: float = None, background: bool = True) -> TimeSync:
+        """
+        啟用伺服器時間同步
+
+        立即同步一次，之後由背景執行緒定期重新同步，簽名請求不需等待
+
+        Args:
+            interval: 重新同步間隔（秒，預設 Config.TIME_SYNC_INTERVAL）
+            background: 是否啟動背景同步
+
+        Returns:
+            TimeSync 實例
+        """
+        self.time_sync = TimeSync(self._fetch_server_time, interval=interval)
+        self.time_sync.sync()
+        if background:
+            self.time_sync.start()
+        return self.time_sync
+
+    def _fetch_server_time(self) -> int:
+        """取得伺服器時間（毫秒），供 TimeSync 取樣（不經快取與合併，RTT 必須是這次實際的往返）"""
+        response = self._send('GET', '/api/v3/time', {}, signed=False)
+        response.raise_for_status()
+        return response.json()['serverTime']
+
+    def enable_order_validation(self, ttl: float = None) -> SymbolRegistry:
+        """
+        啟用下單前的本地規則驗證
+
+        立即載入 exchangeInfo；之後 create_order / test_new_order 會先在本地檢查
+        價格、數量與名目價值，不合規時拋出 OrderValidationError 而不送出請求
+
+        Args:
+            ttl: 規則有效秒數（預設 Config.EXCHANGE_INFO_TTL）
+
+        Returns:
+            SymbolRegistry 實例
+        """
+        self.symbol_registry = SymbolRegistry(self._fetch_exchange_info, ttl=ttl)
+        self.symbol_registry.load()
+        return self.symbol_registry
+
+    def _fetch_exchange_info(self) -> Dict[str, Any]:
+        """取得 exchangeInfo，供 SymbolRegistry 載入"""
+        response = self.get_exchange_info()
+        response.raise_for_status()
+        return response.json()
+
+    def _build_query(self, params: Dict[str, Any], signed: bool) -> str:
+        """
+        組裝查詢字串（同步與非同步客戶端共用）
+
+        查詢字串只編碼一次，簽名與實際送出的是同一份內容
+
+        Args:
+            params: 請求參數（簽名時會加入 timestamp / recvWindow）
+            signed: 是否需要簽名
+
+        Returns:
+            已編碼的查詢字串（可能為空字串）
+        """
+        if signed:
+            params['timestamp'] = self._get_timestamp()
+            if self.time_sync is not None and self.time_sync.recv_window and 'recvWindow' not in params:
+                params['recvWindow'] = self.time_sync.recv_window
+            query_string = urlencode(params)
+            return f"{query_string}&signature={self._sign_query(query_string)}"
+        return urlencode(params) if params else ''
+
+    def _places_order(self, method: str, endpoint: str) -> bool:
+        """是否為需要對帳的下單請求（啟用重試時）"""
+        return method == 'POST' and endpoint == ORDER_ENDPOINT and self.retry_policy is not None
+
+    def _read_key(self, endpoint: str, params: Dict[str, Any], signed: bool) -> Tuple[Optional[str], float]:
+        """
+        未簽名 GET 的快取與合併鍵（同步與非同步客戶端共用）
+
+        Returns:
+            (鍵, 快取 TTL)；不經快取與合併時鍵為 None，不快取時 TTL 為 0
+        """
+        cache = self.response_cache
+        if signed or (cache is None and self.single_flight is None):
+            return None, 0
+        key = ResponseCache.key(self.base_url, endpoint, self._build_query(params, signed=False))
+        return key, cache.ttl_for(endpoint) if cache is not None else 0
+
     def _request(
         self,
         method: str,
@@ -68,7 +251,7 @@ class BinanceClient:
         發送 HTTP 請求
 
         Args:
-            method: HTTP 方法 (GET, POST, DELETE)
+            method: HTTP 方法 (GET, POST, PUT, DELETE)
             endpoint: API 端點
             params: 請求參數
             signed: 是否需要簽名
@@ -76,29 +259,286 @@ class BinanceClient:
         Returns:
             Response 對象
         """
-        url = f"{self.base_url}{endpoint}"
         params = params or {}
+        if self._places_order(method, endpoint):
+            return self._place_order(params, lambda: self._send(method, endpoint, params, signed))
+        if method != 'GET':
+            return self._send(method, endpoint, params, signed)
+
+        key, ttl = self._read_key(endpoint, params, signed)
+        if ttl:
+            return self.response_cache.fetch(
+                key, ttl, lambda headers: self._send_read(endpoint, params, signed, headers),
+                self._build_response
+            )
+        if key is not None and self.single_flight is not None:
+            # 相同的公開請求已在途時共用同一個響應
+            return self.single_flight.do(key, lambda: self._send_read(endpoint, params, signed))
+        return self._send_read(endpoint, params, signed)
 
-        if signed:
-            params['timestamp'] = self._get_timestamp()
-            params['signature'] = self._generate_signature(params)
+    def _send_read(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        signed: bool,
+        headers: Optional[Dict[str, str]] = None
+    ) -> requests.Response:
+        """送出 GET 請求（連線錯誤、5xx 與 429 依 retry_policy 重試，可選擇對沖）"""
+        if self.retry_policy is None:
+            return self._send('GET', endpoint, params, signed, headers)
+        return self.retry_policy.call(
+            endpoint, lambda: self._send('GET', endpoint, params, signed, headers), RETRY_ERRORS
+        )
+
+    def _order_steps(self, params: Dict[str, Any]) -> Generator[Tuple[str, Any], Any, Any]:
+        """
+        下單與對帳的流程（同步與非同步客戶端共用，只產生步驟、不執行 I/O）
+
+        連線錯誤與 5xx 時訂單可能已成立：先以 origClientOrderId 查詢，查到則返回查詢結果，
+        確認不存在（-2013）才以同一個 newClientOrderId 重送，查詢失敗時不重送；
+        429 表示請求未被處理，依 Retry-After 等待後重送
+
+        產生的步驟與送回的結果：
+            (SEND, None)：送出一次下單，送回響應或連線例外
+            (LOOKUP, client_order_id)：查詢訂單，送回 GET /api/v3/order 的響應
+            (SLEEP, 秒數)：等待後繼續
+
+        Args:
+            params: 下單參數（未指定時加入 newClientOrderId）
+
+        Returns:
+            下單響應，或對帳時查到的訂單（無法確認時拋出最後一次的連線例外）
+        """
+        policy = self.retry_policy
+        client_order_id = params.setdefault('newClientOrderId', new_client_order_id())
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            outcome = yield SEND, None
+            response, error = (None, outcome) if isinstance(outcome, Exception) else (outcome, None)
+
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                if attempt and response.status_code == 400 and b'Duplicate order' in response.content:
+                    # 重送時遇到重複訂單：先前的請求其實已成立
+                    found = yield LOOKUP, client_order_id
+                    if found.status_code == 200:
+                        policy.reconciled += 1
+                        return found
+                return response
+            if response is None or response.status_code != 429:
+                found = yield LOOKUP, client_order_id
+                if found.status_code == 200:
+                    policy.reconciled += 1
+                    logger.warning(f"Order {client_order_id} was placed despite the failed response")
+                    return found
+                if not order_not_found(found):
+                    # 無法確認訂單是否成立，不重送
+                    if error is not None:
+                        raise error
+                    return response
+
+            wait_seconds = policy.delay(attempt, time.monotonic() - start, response)
+            if wait_seconds is None:
+                policy.gave_up += 1
+                if error is not None:
+                    raise error
+                return response
+            policy.log_retry(ORDER_ENDPOINT, attempt, wait_seconds, response, error)
+            yield SLEEP, wait_seconds
+            attempt += 1
+
+    def _place_order(self, params: Dict[str, Any], send: Callable[[], Any]) -> requests.Response:
+        """
+        送出下單請求；結果不明時以 newClientOrderId 對帳，不盲目重送（流程見 _order_steps）
+
+        Args:
+            params: 下單參數
+            send: 送出一次下單請求的函數
+
+        Returns:
+            下單響應，或對帳時查到的訂單（GET /api/v3/order 的響應）
+        """
+        steps = self._order_steps(params)
+        try:
+            step, argument = next(steps)
+            while True:
+                if step == SEND:
+                    try:
+                        result = send()
+                    except RETRY_ERRORS as e:
+                        result = e
+                elif step == LOOKUP:
+                    result = self.get_order(params['symbol'], client_order_id=argument)
+                else:
+                    result = time.sleep(argument)
+                step, argument = steps.send(result)
+        except StopIteration as done:
+            return done.value
+
+    def _record_response(
+        self,
+        method: str,
+        endpoint: str,
+        params: Dict[str, Any],
+        signed: bool,
+        status: int,
+        headers: Mapping[str, str],
+        content: bytes,
+        sent_bytes: int,
+        phases: Optional[Dict[str, float]],
+        elapsed: float
+    ):
+        """記錄響應：延遲量測、追蹤、限速狀態與時間同步（同步與非同步客戶端共用）"""
+        metrics = self.metrics
+        if metrics is not None and phases is not None:
+            metrics.observe(method, endpoint, status, phases, sent_bytes, len(content), headers)
+        if self.tracer is not None:
+            self.tracer.observe(method, endpoint, params, status, elapsed, sent_bytes, content, headers)
+        if self.rate_limiter is not None:
+            self.rate_limiter.update(status, headers)
+        if signed and status == 400 and self.time_sync is not None and b'-1021' in content:
+            self.time_sync.request_resync()
+
+    def _record_error(self, method: str, endpoint: str, params: Dict[str, Any], error: Exception, elapsed: float):
+        """記錄失敗的請求（同步與非同步客戶端共用）"""
+        if self.metrics is not None:
+            self.metrics.observe_error(method, endpoint, error, elapsed)
+        if self.tracer is not None:
+            self.tracer.observe_error(method, endpoint, params, error, elapsed)
+
+    def _send(
+        self,
+        method: str,
+        endpoint: str,
+        params: Dict[str, Any],
+        signed: bool,
+        headers: Optional[Dict[str, str]] = None
+    ) -> requests.Response:
+        """送出 HTTP 請求（限速、簽名、更新限速狀態、記錄延遲）"""
+        url = f"{self.base_url}{endpoint}"
+
+        # 先排隊再簽名，避免等待期間時間戳過期
+        queued = 0.0
+        if self.rate_limiter is not None:
+            queued = self.rate_limiter.acquire(method, endpoint, params)
+
+        query_string = self._build_query(params, signed)
+        if query_string:
+            url = f"{url}?{query_string}"
 
-        logger.debug(f"{method} {url} - Params: {params}")
+        # 日誌字串只在 DEBUG 啟用時才組裝
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(f"{method} {url} - Params: {params}")
 
+        metrics = self.metrics
+        if metrics is not None:
+            phases = begin_connection_phases()
+        start = time.perf_counter()
         try:
             response = self.session.request(
                 method=method,
                 url=url,
-                params=params,
+                headers=headers,
                 timeout=self.timeout
             )
-            logger.debug(f"Response: {response.status_code} - {response.text[:200]}")
-            return response
-
         except requests.exceptions.RequestException as e:
+            self._record_error(method, endpoint, params, e, time.perf_counter() - start)
             logger.error(f"Request failed: {e}")
             raise
 
+        end = time.perf_counter()
+        if debug:
+            # 只解碼前 200 個位元組，不解碼整個 body
+            logger.debug(f"Response: {response.status_code} - "
+                         f"{response.content[:200].decode('utf-8', errors='replace')}")
+        if metrics is not None:
+            phases = finish_phases(phases, start, start + response.elapsed.total_seconds(), end)
+            if queued:
+                phases['queue'] = queued
+        else:
+            phases = None
+        self._record_response(method, endpoint, params, signed, response.status_code, response.headers,
+                              response.content, len(query_string), phases, end - start)
+        return response
+
+    @staticmethod
+    def _build_response(status_code: int, headers: Dict[str, str], content: bytes, url: str) -> requests.Response:
+        """由快取資料重建 Response（見 ResponseCache）"""
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = content
+        response.encoding = 'utf-8'
+        response.url = url
+        return response
+
+    def enable_response_cache(self, cache: ResponseCache = None) -> ResponseCache:
+        """
+        啟用公開端點響應快取
+
+        Args:
+            cache: 自訂快取（預設使用程序內共用的快取，見 get_response_cache）
+
+        Returns:
+            ResponseCache 實例
+        """
+        self.response_cache = cache or get_response_cache()
+        return self.response_cache
+
+    def enable_single_flight(self, flight: SingleFlight = None) -> SingleFlight:
+        """
+        啟用在途請求合併（未簽名的 GET）
+
+        Args:
+            flight: 自訂實例（預設使用程序內共用的實例，見 get_single_flight）
+
+        Returns:
+            SingleFlight 實例
+        """
+        self.single_flight = flight or get_single_flight()
+        return self.single_flight
+
+    def enable_metrics(self, recorder: MetricsRecorder = None) -> MetricsRecorder:
+        """
+        啟用請求延遲量測
+
+        Args:
+            recorder: 自訂記錄器（預設使用程序內共用的記錄器，見 get_metrics）
+
+        Returns:
+            MetricsRecorder 實例
+        """
+        self.metrics = recorder or get_metrics()
+        instrument_session(self.session)
+        return self.metrics
+
+    def enable_retry(self, policy: RetryPolicy = None) -> RetryPolicy:
+        """
+        啟用讀取重試、對沖與下單對帳
+
+        Args:
+            policy: 自訂策略（預設使用與基礎 URL 綁定的共用策略，見 get_retry_policy）
+
+        Returns:
+            RetryPolicy 實例
+        """
+        self.retry_policy = policy or get_retry_policy(self.base_url)
+        return self.retry_policy
+
+    def enable_tracing(self, tracer: Tracer = None) -> Tracer:
+        """
+        啟用請求追蹤
+
+        Args:
+            tracer: 自訂記錄器（預設使用程序內共用的記錄器，見 get_tracer）
+
+        Returns:
+            Tracer 實例
+        """
+        self.tracer = tracer if tracer is not None else get_tracer()
+        return self.tracer
+
     # ==================== 公開 API (無需認證) ====================
 
     def ping(self) -> requests.Response:
@@ -205,7 +645,13 @@ class BinanceClient:
             quantity: 數量
             price: 價格（限價單必填）
             time_in_force: 有效期類型
+
+        Raises:
+            OrderValidationError: 啟用本地驗證且訂單不符合交易對規則
         """
+        if self.symbol_registry is not None:
+            self.symbol_registry.validate_order(symbol, side, order_type, quantity=quantity, price=price)
+
         params = {
             'symbol': symbol,
             'side': side,
@@ -229,11 +675,14 @@ class BinanceClient:
         quantity: float = None,
         quote_order_qty: float = None,
         price: float = None,
-        time_in_force: str = 'GTC'
+        time_in_force: str = 'GTC',
+        client_order_id: str = None
     ) -> requests.Response:
         """
         創建訂單
 
+        啟用重試時，響應遺失或 5xx 會以 newClientOrderId 查詢訂單是否已成立，不會重複下單
+
         Args:
             symbol: 交易對
             side: BUY 或 SELL
@@ -242,7 +691,14 @@ class BinanceClient:
             quote_order_qty: 報價資產數量（市價單可用）
             price: 價格（限價單必填）
             time_in_force: 有效期類型
+            client_order_id: 自訂 newClientOrderId（啟用重試時預設自動產生）
+
+        Raises:
+            OrderValidationError: 啟用本地驗證且訂單不符合交易對規則
         """
+        if self.symbol_registry is not None:
+            self.symbol_registry.validate_order(symbol, side, order_type, quantity, quote_order_qty, price)
+
         params = {
             'symbol': symbol,
             'side': side,
@@ -258,17 +714,25 @@ class BinanceClient:
             params['timeInForce'] = time_in_force
             params['price'] = price
 
-        return self._request('POST', '/api/v3/order', params=params, signed=True)
+        if client_order_id:
+            params['newClientOrderId'] = client_order_id
 
-    def get_order(self, symbol: str, order_id: int) -> requests.Response:
+        return self._request('POST', ORDER_ENDPOINT, params=params, signed=True)
+
+    def get_order(self, symbol: str, order_id: int = None, client_order_id: str = None) -> requests.Response:
         """
         查詢訂單
 
         Args:
             symbol: 交易對
             order_id: 訂單 ID
+            client_order_id: 下單時的 newClientOrderId（未提供 order_id 時使用）
         """
-        params = {'symbol': symbol, 'orderId': order_id}
+        params = {'symbol': symbol}
+        if order_id is not None:
+            params['orderId'] = order_id
+        else:
+            params['origClientOrderId'] = client_order_id
         return self._request('GET', '/api/v3/order', params=params, signed=True)
 
     def cancel_order(self, symbol: str, order_id: int) -> requests.Response:
@@ -305,8 +769,108 @@ class BinanceClient:
         params = {'symbol': symbol, 'limit': limit}
         return self._request('GET', '/api/v3/allOrders', params=params, signed=True)
 
+    def cancel_open_orders(self, symbol: str) -> requests.Response:
+        """
+        取消交易對的所有掛單
+
+        Args:
+            symbol: 交易對
+        """
+        params = {'symbol': symbol}
+        return self._request('DELETE', '/api/v3/openOrders', params=params, signed=True)
+
+    # ==================== 用戶數據流 ====================
+
+    def create_listen_key(self) -> requests.Response:
+        """建立用戶數據流 listenKey（有效 60 分鐘，已存在時返回同一個並延長效期）"""
+        return self._request('POST', '/api/v3/userDataStream')
+
+    def keepalive_listen_key(self, listen_key: str) -> requests.Response:
+        """
+        延長 listenKey 效期（建議每 30 分鐘一次）
+
+        Args:
+            listen_key: create_listen_key 返回的 listenKey
+        """
+        params = {'listenKey': listen_key}
+        return self._request('PUT', '/api/v3/userDataStream', params=params)
+
+    def close_listen_key(self, listen_key: str) -> requests.Response:
+        """
+        關閉用戶數據流
+
+        Args:
+            listen_key: create_listen_key 返回的 listenKey
+        """
+        params = {'listenKey': listen_key}
+        return self._request('DELETE', '/api/v3/userDataStream', params=params)
+
+    # ==================== 批次下單 ====================
+
+    def submit_orders(self, orders: List[Dict[str, Any]], max_concurrency: int = None) -> List[OrderResult]:
+        """
+        併發送出多筆訂單
+
+        每筆訂單為 create_order 的參數字典；下單次數限制由限速器排隊控制
+
+        Args:
+            orders: 訂單參數列表，例如 [{'symbol': 'BTCUSDT', 'side': 'BUY', 'order_type': 'LIMIT', ...}]
+            max_concurrency: 同時在途的請求數（預設 Config.BATCH_MAX_CONCURRENCY）
+
+        Returns:
+            與輸入順序相同的 OrderResult 列表
+        """
+        return self._run_batch(self.create_order, orders, max_concurrency)
+
+    def cancel_orders(
+        self,
+        symbol: str,
+        order_ids: List[int] = None,
+        max_concurrency: int = None
+    ) -> List[OrderResult]:
+        """
+        批次取消訂單
+
+        未指定 order_ids 時以 DELETE /api/v3/openOrders 一次取消所有掛單，
+        返回的列表只有一筆，響應內容為被取消的訂單陣列
+
+        Args:
+            symbol: 交易對
+            order_ids: 訂單 ID 列表
+            max_concurrency: 同時在途的請求數（預設 Config.BATCH_MAX_CONCURRENCY）
+
+        Returns:
+            與輸入順序相同的 OrderResult 列表
+        """
+        if order_ids is None:
+            return self._run_batch(self.cancel_open_orders, [{'symbol': symbol}], max_concurrency)
+        batch = [{'symbol': symbol, 'order_id': order_id} for order_id in order_ids]
+        return self._run_batch(self.cancel_order, batch, max_concurrency)
+
+    def _run_batch(
+        self,
+        method: Callable[..., requests.Response],
+        batch: List[Dict[str, Any]],
+        max_concurrency: Optional[int]
+    ) -> List[OrderResult]:
+        """以執行緒池併發呼叫，結果依輸入順序返回"""
+        def call(kwargs: Dict[str, Any]) -> OrderResult:
+            try:
+                return OrderResult(kwargs, method(**kwargs))
+            except (requests.exceptions.RequestException, OrderValidationError) as e:
+                return OrderResult(kwargs, error=e)
+
+        workers = min(max_concurrency or Config.BATCH_MAX_CONCURRENCY, len(batch))
+        if workers <= 1:
+            return [call(kwargs) for kwargs in batch]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='binance-batch') as pool:
+            return list(pool.map(call, batch))
+
     # ==================== 工具方法 ====================
 
     def close(self):
-        """關閉 Session"""
-        self.session.close()
+        """關閉 Session（共用的 Session 由 client_factory 管理，不在此關閉）"""
+        if self.time_sync is not None:
+            self.time_sync.stop()
+        if self._owns_session:
+            self.session.close()
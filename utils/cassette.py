@@ -0,0 +1,321 @@
+"""
+錄製與重播傳輸層
+掛載到 BinanceClient.session 的 requests 轉接器：錄製模式把實際的請求與響應存入
+壓縮的卡帶檔（cassette），重播模式直接由卡帶返回響應，不需網絡與 API 憑證。
+
+請求以「方法 + 路徑 + 正規化參數」比對：參數依名稱排序，忽略 timestamp、signature
+與自動產生的 newClientOrderId；主機不參與比對，在測試網錄製的卡帶可在任何 base_url 重播。
+同一個鍵錄到多個響應時依序重播（例如下單前後查詢同一筆訂單），用完後重複最後一個
+"""
+import base64
+import gzip
+import json
+import re
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+
+RECORD = 'record'              # 一律送出並錄製（覆寫同鍵的既有錄製）
+REPLAY = 'replay'              # 只重播，卡帶中沒有的請求拋出 CassetteMissError
+NEW_EPISODES = 'new_episodes'  # 重播已有的請求，錄製新的請求
+RECORD_MODES = (RECORD, REPLAY, NEW_EPISODES)
+
+# 每次請求都不同、不參與比對的參數（recvWindow 隨時間同步量測到的誤差調整，見 utils.time_sync）
+IGNORED_PARAMS = frozenset({'timestamp', 'signature', 'recvWindow'})
+# 客戶端自動產生的訂單 ID（見 utils.retry.new_client_order_id，可能帶有 worker 命名空間）
+GENERATED_ID = re.compile(r'^x-(?:[A-Za-z0-9]{1,8}-)?[0-9a-f]{25,32}$')
+GENERATED_ID_PARAMS = frozenset({'newClientOrderId', 'origClientOrderId'})
+
+# 不保存的響應頭（重播時由內容決定，或與連線有關）
+DROPPED_HEADERS = frozenset({'date', 'connection', 'keep-alive', 'transfer-encoding', 'content-encoding',
+                             'content-length'})
+
+
+class CassetteMissError(requests.exceptions.RequestException):
+    """重播模式下卡帶中沒有對應的請求"""
+
+
+def match_key(method: str, url: str) -> str:
+    """
+    請求的比對鍵
+
+    Args:
+        method: HTTP 方法
+        url: 完整 URL（含查詢字串）
+
+    Returns:
+        例如 'GET /api/v3/depth?limit=100&symbol=BTCUSDT'
+    """
+    parts = urlsplit(url)
+    params = []
+    for name, value in parse_qsl(parts.query, keep_blank_values=True):
+        if name in IGNORED_PARAMS:
+            continue
+        if name in GENERATED_ID_PARAMS and GENERATED_ID.match(value):
+            value = '*'
+        params.append((name, value))
+    params.sort()
+    query = urlencode(params)
+    return f"{method.upper()} {parts.path}?{query}" if query else f"{method.upper()} {parts.path}"
+
+
+class Interaction:
+    """一組錄製的響應"""
+
+    __slots__ = ('status', 'reason', 'headers', 'content', 'latency')
+
+    def __init__(self, status: int, reason: str, headers: Dict[str, str], content: bytes, latency: float):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        self.latency = latency
+
+    @classmethod
+    def from_response(cls, response: requests.Response, content: bytes, latency: float) -> 'Interaction':
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS}
+        return cls(response.status_code, response.reason or '', headers, content, latency)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {'status': self.status, 'reason': self.reason, 'headers': self.headers,
+                'latency': round(self.latency, 6)}
+        try:
+            data['body'] = self.content.decode('utf-8')
+        except UnicodeDecodeError:
+            data['body_b64'] = base64.b64encode(self.content).decode('ascii')
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Interaction':
+        if 'body_b64' in data:
+            content = base64.b64decode(data['body_b64'])
+        else:
+            content = data['body'].encode('utf-8')
+        return cls(data['status'], data.get('reason', ''), data['headers'], content, data.get('latency', 0.0))
+
+
+class Cassette:
+    """
+    卡帶：以比對鍵索引的錄製響應
+
+    檔案為 gzip 壓縮的 JSON，內容即為 {比對鍵: [響應, ...]} 的索引，載入後查詢為 O(1)
+    """
+
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path: 卡帶檔路徑（存在時自動載入）
+        """
+        self.path = Path(path) if path else None
+        self.interactions: Dict[str, List[Interaction]] = {}
+        self.dirty = False
+        self._cursors: Dict[str, int] = {}
+        self._recorded = set()
+        self._lock = threading.Lock()
+        if self.path is not None and self.path.exists():
+            self.load()
+
+    def __len__(self) -> int:
+        return sum(len(items) for items in self.interactions.values())
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.interactions
+
+    def load(self):
+        """從檔案載入"""
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != CASSETTE_VERSION:
+            raise ValueError(f"不支援的卡帶版本: {data.get('version')}")
+        self.interactions = {
+            key: [Interaction.from_dict(item) for item in items] for key, items in data['interactions'].items()
+        }
+        self._cursors.clear()
+        self.dirty = False
+        logger.info(f"Loaded cassette {self.path} ({len(self)} interactions)")
+
+    def save(self, path: str = None) -> Path:
+        """
+        寫入檔案
+
+        Args:
+            path: 輸出路徑（預設為載入時的路徑）
+
+        Returns:
+            檔案路徑
+        """
+        path = Path(path) if path else self.path
+        if path is None:
+            raise ValueError("未指定卡帶路徑")
+        with self._lock:
+            data = {
+                'version': CASSETTE_VERSION,
+                'interactions': {
+                    key: [item.to_dict() for item in items] for key, items in sorted(self.interactions.items())
+                },
+            }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        self.dirty = False
+        logger.info(f"Saved cassette {path} ({len(self)} interactions)")
+        return path
+
+    def record(self, key: str, interaction: Interaction, overwrite: bool = False):
+        """
+        加入一個響應
+
+        Args:
+            key: 比對鍵
+            interaction: 響應
+            overwrite: 是否捨棄此鍵在本次執行之前錄製的響應
+        """
+        with self._lock:
+            items = self.interactions.get(key)
+            if items is None or (overwrite and key not in self._recorded):
+                items = self.interactions[key] = []
+            self._recorded.add(key)
+            items.append(interaction)
+            self.dirty = True
+
+    def play(self, key: str) -> Optional[Interaction]:
+        """
+        依序取出下一個響應
+
+        Returns:
+            響應（沒有此鍵時為 None；響應用完後重複最後一個）
+        """
+        with self._lock:
+            items = self.interactions.get(key)
+            if not items:
+                return None
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            return items[min(cursor, len(items) - 1)]
+
+    def rewind(self):
+        """從頭重播"""
+        with self._lock:
+            self._cursors.clear()
+
+    def bodies(self, path: str) -> List[bytes]:
+        """
+        某個路徑錄製的所有響應內容（用於以真實資料測試解析效能）
+
+        Args:
+            path: API 端點，例如 /api/v3/depth
+        """
+        return [
+            item.content
+            for key, items in self.interactions.items() if key.split(' ', 1)[1].split('?', 1)[0] == path
+            for item in items
+        ]
+
+
+class RecordReplayAdapter(BaseAdapter):
+    """
+    錄製與重播轉接器
+
+    包裝 Session 原本的轉接器（保留連線池設定），需要送出請求時才交給它：
+
+        adapter = attach(client.session, Cassette('tests/cassettes/session.json.gz'), REPLAY)
+    """
+
+    def __init__(self, cassette: Cassette, mode: str, inner: BaseAdapter = None,
+                 replay_latency: bool = False, latency_scale: float = 1.0):
+        """
+        Args:
+            cassette: 卡帶
+            mode: record / replay / new_episodes
+            inner: 實際送出請求的轉接器（預設新建 HTTPAdapter）
+            replay_latency: 重播時是否依錄製的延遲等待
+            latency_scale: 重播延遲的倍率
+        """
+        if mode not in RECORD_MODES:
+            raise ValueError(f"不支援的錄製模式: {mode}")
+        super().__init__()
+        self.cassette = cassette
+        self.mode = mode
+        self.inner = inner or requests.adapters.HTTPAdapter()
+        self.replay_latency = replay_latency
+        self.latency_scale = latency_scale
+        self.hits = 0
+        self.recorded = 0
+
+    @property
+    def poolmanager(self):
+        """內層轉接器的連線池（供 instrument_session 等工具使用）"""
+        return getattr(self.inner, 'poolmanager', None)
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        key = match_key(request.method, request.url)
+
+        if self.mode != RECORD:
+            interaction = self.cassette.play(key)
+            if interaction is not None:
+                self.hits += 1
+                return self._replay(request, interaction)
+            if self.mode == REPLAY:
+                raise CassetteMissError(f"卡帶中沒有此請求: {key}", request=request)
+
+        start = time.perf_counter()
+        response = self.inner.send(request, **kwargs)
+        # 讀完 body 才計時（Session 會覆寫 response.elapsed，錄製的延遲在此自行量測）
+        content = response.content
+        interaction = Interaction.from_response(response, content, time.perf_counter() - start)
+        self.cassette.record(key, interaction, overwrite=self.mode == RECORD)
+        self.recorded += 1
+        return response
+
+    def _replay(self, request: requests.PreparedRequest, interaction: Interaction) -> requests.Response:
+        if self.replay_latency and interaction.latency:
+            time.sleep(interaction.latency * self.latency_scale)
+        response = requests.Response()
+        response.status_code = interaction.status
+        response.reason = interaction.reason
+        response.headers = CaseInsensitiveDict(interaction.headers)
+        response._content = interaction.content
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        self.inner.close()
+
+
+def attach(session: requests.Session, cassette: Cassette, mode: str, **kwargs: Any) -> RecordReplayAdapter:
+    """
+    為 Session 掛載錄製與重播轉接器（http 與 https）；重播模式同時關閉 session.trust_env
+
+    Args:
+        session: requests.Session（例如 client.session）
+        cassette: 卡帶
+        mode: record / replay / new_episodes
+        **kwargs: 傳給 RecordReplayAdapter 的其他參數
+
+    Returns:
+        RecordReplayAdapter 實例
+    """
+    current = session.get_adapter('https://')
+    if isinstance(current, RecordReplayAdapter):
+        current = current.inner
+    adapter = RecordReplayAdapter(cassette, mode, inner=current, **kwargs)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if mode == REPLAY:
+        # 不會送出請求，略過每次請求掃描環境變數中的代理設定（佔重播耗時的大部分）
+        session.trust_env = False
+    return adapter
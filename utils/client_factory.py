@@ -0,0 +1,200 @@
+"""
+共用連線池與客戶端工廠
+以 (base_url, api_key) 為鍵在程序內共用 requests.Session 與 HTTPAdapter 連線池，
+TCP 連線與 TLS 握手每個程序只需付出一次
+"""
+import socket
+import threading
+import logging
+from typing import Dict, Optional, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+from config import Config
+from utils.binance_client import BinanceClient
+
+logger = logging.getLogger(__name__)
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    調校過的 HTTPAdapter
+
+    可設定連線池大小、是否阻塞等待空閒連線，以及 TCP keep-alive，
+    並提供連線重用統計
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = None,
+        pool_maxsize: int = None,
+        pool_block: bool = None,
+        keepalive: bool = None
+    ):
+        """
+        Args:
+            pool_connections: 快取的主機連線池數量
+            pool_maxsize: 單一主機最大連線數
+            pool_block: 連線用完時是否阻塞等待（否則臨時建立、用完即丟）
+            keepalive: 是否啟用 TCP keep-alive 探測
+        """
+        self.keepalive = Config.POOL_KEEPALIVE if keepalive is None else keepalive
+        super().__init__(
+            pool_connections=pool_connections or Config.POOL_CONNECTIONS,
+            pool_maxsize=pool_maxsize or Config.POOL_MAXSIZE,
+            pool_block=Config.POOL_BLOCK if pool_block is None else pool_block,
+            max_retries=0
+        )
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.keepalive:
+            kwargs['socket_options'] = HTTPConnection.default_socket_options + _keepalive_socket_options()
+        super().init_poolmanager(*args, **kwargs)
+
+    def connection_stats(self) -> Dict[str, int]:
+        """
+        連線重用統計
+
+        Returns:
+            {'requests': 發出的請求數, 'connections': 新建的連線數, 'reused': 重用連線的請求數}
+        """
+        total_requests = 0
+        total_connections = 0
+        for key in list(self.poolmanager.pools.keys()):
+            pool = self.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            total_requests += pool.num_requests
+            total_connections += pool.num_connections
+        return {
+            'requests': total_requests,
+            'connections': total_connections,
+            'reused': max(total_requests - total_connections, 0)
+        }
+
+
+def _keepalive_socket_options() -> list:
+    """平台支援的 TCP keep-alive 選項"""
+    options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    for name, value in (('TCP_KEEPIDLE', 60), ('TCP_KEEPINTVL', 10), ('TCP_KEEPCNT', 3)):
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return options
+
+
+_sessions: Dict[tuple, requests.Session] = {}
+_adapters: Dict[tuple, PooledHTTPAdapter] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(base_url: str, api_key: str) -> requests.Session:
+    """
+    取得共用 Session（程序內單例，以 base_url 與 api_key 為鍵）
+
+    Args:
+        base_url: API 基礎 URL
+        api_key: API 密鑰
+
+    Returns:
+        已掛載 PooledHTTPAdapter 並帶有 API Key 標頭的 Session
+    """
+    key = (base_url, api_key)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            adapter = PooledHTTPAdapter()
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update({'X-MBX-APIKEY': api_key})
+            _sessions[key] = session
+            _adapters[key] = adapter
+            logger.debug(f"Created connection pool for {base_url}")
+        return session
+
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    """
+    所有共用連線池的重用統計
+
+    Returns:
+        {base_url: {'requests': ..., 'connections': ..., 'reused': ...}}
+        （相同 base_url 不同 API Key 的連線池會合併計算）
+    """
+    with _sessions_lock:
+        items = list(_adapters.items())
+
+    stats: Dict[str, Dict[str, int]] = {}
+    for (base_url, _), adapter in items:
+        merged = stats.setdefault(base_url, {'requests': 0, 'connections': 0, 'reused': 0})
+        for name, value in adapter.connection_stats().items():
+            merged[name] += value
+    return stats
+
+
+def close_all_sessions():
+    """關閉所有共用 Session 與連線池"""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+        _adapters.clear()
+    for session in sessions:
+        session.close()
+
+
+class ClientFactory:
+    """
+    客戶端工廠
+
+    產生的 BinanceClient 共用程序內的連線池；呼叫 client.close()
+    不會關閉共用連線，程序結束前呼叫 close_all_sessions() 即可：
+
+        factory = ClientFactory()
+        client = factory.create()
+    """
+
+    def __init__(self, api_key: str = None, secret_key: str = None, base_url: str = None):
+        """
+        Args:
+            api_key: 預設 API 密鑰
+            secret_key: 預設 Secret 密鑰
+            base_url: 預設 API 基礎 URL
+        """
+        self.api_key = api_key or Config.API_KEY
+        self.secret_key = secret_key or Config.SECRET_KEY
+        self.base_url = base_url or Config.BASE_URL
+
+    def create(
+        self,
+        api_key: str = None,
+        secret_key: str = None,
+        base_url: str = None,
+        **kwargs: Any
+    ) -> BinanceClient:
+        """
+        建立共用連線池的客戶端
+
+        Args:
+            api_key: API 密鑰（預設使用工廠設定）
+            secret_key: Secret 密鑰（預設使用工廠設定）
+            base_url: API 基礎 URL（預設使用工廠設定）
+            **kwargs: 其餘傳給 BinanceClient 的參數
+
+        Returns:
+            BinanceClient 實例
+        """
+        api_key = api_key or self.api_key
+        base_url = base_url or self.base_url
+        return BinanceClient(
+            api_key=api_key,
+            secret_key=secret_key or self.secret_key,
+            base_url=base_url,
+            session=get_session(base_url, api_key),
+            **kwargs
+        )
+
+    def stats(self) -> Optional[Dict[str, int]]:
+        """此工廠預設 base_url 的連線重用統計"""
+        return pool_stats().get(self.base_url)
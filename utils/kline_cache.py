@@ -0,0 +1,290 @@
+"""
+K 線本地快取
+已收盤的 K 線不會再變動，依交易對與間隔存成只追加的列式區段檔，
+以記憶體映射讀取；查詢時只向伺服器抓取缺漏區間與尚未收盤的最後一根
+"""
+import json
+import os
+import re
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+
+from config import Config
+from utils.binance_client import BinanceClient
+from utils.kline_store import KLINE_COLUMNS, KLINE_DTYPE, KlineStore, interval_to_ms
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = 'index.json'
+
+Columns = Dict[str, np.ndarray]
+
+
+def _empty() -> Columns:
+    return {name: np.empty(0, dtype=KLINE_DTYPE[name]) for name in KLINE_COLUMNS}
+
+
+def _concat(parts: List[Columns]) -> Columns:
+    parts = [part for part in parts if len(part['open_time'])]
+    if not parts:
+        return _empty()
+    if len(parts) == 1:
+        return parts[0]
+    return {name: np.concatenate([part[name] for part in parts]) for name in KLINE_COLUMNS}
+
+
+def _slice(columns: Columns, start: int, end: int) -> Columns:
+    return {name: column[start:end] for name, column in columns.items()}
+
+
+def _between(columns: Columns, low: int, high: int) -> Columns:
+    """以開盤時間索引擷取 [low, high] 範圍（只建立視圖）"""
+    open_times = columns['open_time']
+    start = int(np.searchsorted(open_times, low, side='left'))
+    end = int(np.searchsorted(open_times, high, side='right'))
+    return _slice(columns, start, end)
+
+
+class _Segment:
+    """
+    連續覆蓋區間的區段
+
+    start / end 為已覆蓋的開盤時間範圍（含），該範圍內的所有已收盤 K 線
+    都在區段檔中（伺服器本身缺漏的 K 線不會重複抓取）
+    """
+
+    __slots__ = ('name', 'start', 'end', 'rows')
+
+    def __init__(self, name: str, start: int, end: int, rows: int):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.rows = rows
+
+    def to_dict(self) -> dict:
+        return {'name': self.name, 'start': self.start, 'end': self.end, 'rows': self.rows}
+
+
+class _Series:
+    """單一交易對與間隔的區段集合"""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.segments: List[_Segment] = []
+        index_path = directory / INDEX_FILE
+        if index_path.exists():
+            with open(index_path, 'r', encoding='utf-8') as f:
+                self.segments = [_Segment(**item) for item in json.load(f)['segments']]
+
+    def _path(self, segment: _Segment, column: str) -> Path:
+        return self.directory / f"{segment.name}.{column}.bin"
+
+    def _save_index(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.directory / f"{INDEX_FILE}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'segments': [s.to_dict() for s in self.segments]}, f)
+        os.replace(tmp_path, self.directory / INDEX_FILE)
+
+    def read(self, segment: _Segment) -> Columns:
+        """以記憶體映射讀取區段（唯讀、不複製）"""
+        if not segment.rows:
+            return _empty()
+        return {
+            name: np.memmap(self._path(segment, name), dtype=KLINE_DTYPE[name], mode='r', shape=(segment.rows,))
+            for name in KLINE_COLUMNS
+        }
+
+    def _append_rows(self, segment: _Segment, columns: Columns):
+        """追加到區段檔尾端；以索引中的列數為準，覆寫中斷寫入留下的殘餘資料"""
+        count = len(columns['open_time'])
+        if not count:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for name in KLINE_COLUMNS:
+            path = self._path(segment, name)
+            with open(path, 'r+b' if path.exists() else 'wb') as f:
+                f.seek(segment.rows * KLINE_DTYPE[name].itemsize)
+                f.write(np.ascontiguousarray(columns[name], dtype=KLINE_DTYPE[name]).tobytes())
+                f.truncate()
+        segment.rows += count
+
+    def _remove(self, segment: _Segment):
+        for name in KLINE_COLUMNS:
+            path = self._path(segment, name)
+            if path.exists():
+                path.unlink()
+
+    def missing(self, low: int, high: int) -> List[Tuple[int, int]]:
+        """[low, high] 範圍內未覆蓋的區間"""
+        gaps = []
+        cursor = low
+        for segment in self.segments:
+            if segment.end < cursor:
+                continue
+            if segment.start > high:
+                break
+            if segment.start > cursor:
+                gaps.append((cursor, segment.start - 1))
+            cursor = max(cursor, segment.end + 1)
+            if cursor > high:
+                break
+        if cursor <= high:
+            gaps.append((cursor, high))
+        return gaps
+
+    def add(self, start: int, end: int, columns: Columns):
+        """
+        記錄新覆蓋的區間（必須是 missing() 回傳的缺口）
+
+        與前一區段相鄰時直接追加，補上缺口後與下一區段合併，
+        使連續的歷史資料維持在同一區段、讀取時不需拼接
+        """
+        position = 0
+        while position < len(self.segments) and self.segments[position].start < start:
+            position += 1
+
+        previous = self.segments[position - 1] if position else None
+        if previous is not None and previous.end + 1 == start:
+            segment = previous
+        else:
+            segment = _Segment(f"{start}", start, start - 1, 0)
+            self.segments.insert(position, segment)
+            position += 1
+
+        self._append_rows(segment, columns)
+        segment.end = end
+
+        following = self.segments[position] if position < len(self.segments) else None
+        if following is not None and following.start == end + 1:
+            self._append_rows(segment, {name: np.array(col) for name, col in self.read(following).items()})
+            segment.end = following.end
+            self.segments.remove(following)
+            self._save_index()
+            self._remove(following)
+        else:
+            self._save_index()
+
+
+class KlineCache:
+    """
+    K 線本地快取
+
+    參數與 BinanceClient.get_klines 相同，返回欄位陣列；查詢範圍落在同一個
+    已快取區段且不含未收盤 K 線時，返回的是記憶體映射的唯讀視圖：
+
+        cache = KlineCache(client)
+        columns = cache.get_klines('BTCUSDT', '1m', limit=1000, start_time=start)
+    """
+
+    def __init__(self, client: BinanceClient, cache_dir: str = None):
+        """
+        Args:
+            client: 同步 Binance 客戶端
+            cache_dir: 快取目錄（預設 Config.KLINE_CACHE_DIR）
+        """
+        self.client = client
+        self.store = KlineStore(client)
+        host = urlparse(client.base_url).netloc or 'default'
+        self.root = Path(cache_dir or Config.KLINE_CACHE_DIR) / re.sub(r'[^A-Za-z0-9.\-]', '_', host)
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.fetched_ranges = 0
+
+    def _get_series(self, symbol: str, interval: str) -> _Series:
+        key = (symbol, interval)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series(self.root / symbol / interval)
+        return series
+
+    def _resolve_range(
+        self,
+        interval_ms: int,
+        now: int,
+        limit: int,
+        start_time: Optional[int],
+        end_time: Optional[int]
+    ) -> Tuple[int, int]:
+        """依 get_klines 的語意換算成開盤時間範圍"""
+        end = min(end_time, now) if end_time else now
+        if start_time:
+            return start_time, min(end, start_time + limit * interval_ms - 1)
+        return end - limit * interval_ms + 1, end
+
+    def missing_ranges(self, symbol: str, interval: str, start_time: int, end_time: int) -> List[Tuple[int, int]]:
+        """
+        未快取的開盤時間區間
+
+        Args:
+            symbol: 交易對
+            interval: K 線間隔
+            start_time: 開始時間（毫秒時間戳，含）
+            end_time: 結束時間（毫秒時間戳，含）
+
+        Returns:
+            [(開始, 結束)] 列表
+        """
+        with self._lock:
+            return self._get_series(symbol, interval).missing(start_time, end_time)
+
+    def get_klines(
+        self,
+        symbol: str,
+        interval: str,
+        limit: int = 500,
+        start_time: int = None,
+        end_time: int = None
+    ) -> Columns:
+        """
+        獲取 K 線數據（優先讀取快取）
+
+        Args:
+            symbol: 交易對
+            interval: K 線間隔 (1m, 5m, 1h, 1d 等)
+            limit: 返回數量
+            start_time: 開始時間（毫秒時間戳）
+            end_time: 結束時間（毫秒時間戳）
+
+        Returns:
+            {欄位名: NumPy 陣列}
+        """
+        interval_ms = interval_to_ms(interval)
+        now = self.client._get_timestamp()
+        low, high = self._resolve_range(interval_ms, now, limit, start_time, end_time)
+        # 開盤時間早於此值的 K 線都已收盤，可以寫入快取
+        closed_until = now - interval_ms
+
+        with self._lock:
+            series = self._get_series(symbol, interval)
+            cached_high = min(high, closed_until)
+            gaps = series.missing(low, cached_high) if low <= cached_high else []
+            for gap_start, gap_end in gaps:
+                columns = self.store.fetch_columns(symbol, interval, gap_start, gap_end)
+                self.fetched_ranges += 1
+                series.add(gap_start, gap_end, _between(columns, gap_start, gap_end))
+                logger.debug(f"Cached {len(columns['open_time'])} {interval} klines for {symbol} [{gap_start}, {gap_end}]")
+            if not gaps and low <= cached_high:
+                self.hits += 1
+
+            parts = [
+                _between(series.read(segment), low, cached_high)
+                for segment in series.segments
+                if segment.end >= low and segment.start <= cached_high
+            ]
+
+        if high > closed_until:
+            # 尚未收盤的 K 線每次都向伺服器取得
+            parts.append(self.store.fetch_columns(symbol, interval, max(low, closed_until + 1), high))
+
+        result = _concat(parts)
+        if not start_time and len(result['open_time']) > limit:
+            result = _slice(result, -limit, None)
+        return result
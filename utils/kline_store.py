@@ -0,0 +1,190 @@
+"""
+列式 K 線載入器
+依 startTime / endTime 自動分頁抓取歷史 K 線，直接解碼成連續的 NumPy 欄位陣列
+"""
+import time
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+
+from utils.binance_client import BinanceClient
+from utils.models import parse_json
+
+logger = logging.getLogger(__name__)
+
+INTERVAL_MS = {
+    '1s': 1000,
+    '1m': 60_000,
+    '3m': 3 * 60_000,
+    '5m': 5 * 60_000,
+    '15m': 15 * 60_000,
+    '30m': 30 * 60_000,
+    '1h': 3_600_000,
+    '2h': 2 * 3_600_000,
+    '4h': 4 * 3_600_000,
+    '6h': 6 * 3_600_000,
+    '8h': 8 * 3_600_000,
+    '12h': 12 * 3_600_000,
+    '1d': 86_400_000,
+    '3d': 3 * 86_400_000,
+    '1w': 7 * 86_400_000,
+}
+
+# K 線欄位（對應 API 回傳的前 11 個欄位，第 12 個為保留欄位）
+KLINE_DTYPE = np.dtype([
+    ('open_time', np.int64),
+    ('open', np.float64),
+    ('high', np.float64),
+    ('low', np.float64),
+    ('close', np.float64),
+    ('volume', np.float64),
+    ('close_time', np.int64),
+    ('quote_volume', np.float64),
+    ('trade_count', np.int64),
+    ('taker_buy_base_volume', np.float64),
+    ('taker_buy_quote_volume', np.float64),
+])
+
+KLINE_COLUMNS = KLINE_DTYPE.names
+
+# 單次請求最多返回的 K 線數
+MAX_PAGE_LIMIT = 1000
+
+
+def interval_to_ms(interval: str) -> int:
+    """
+    K 線間隔轉毫秒
+
+    Args:
+        interval: K 線間隔 (1m, 5m, 1h, 1d 等)
+
+    Returns:
+        間隔毫秒數
+    """
+    try:
+        return INTERVAL_MS[interval]
+    except KeyError:
+        raise ValueError(f"不支援的 K 線間隔: {interval}")
+
+
+def empty_columns(size: int) -> Dict[str, np.ndarray]:
+    """配置指定長度的欄位陣列"""
+    return {name: np.empty(size, dtype=KLINE_DTYPE[name]) for name in KLINE_COLUMNS}
+
+
+def decode_rows(rows: list, columns: Dict[str, np.ndarray], offset: int = 0) -> int:
+    """
+    將 API 回傳的 K 線陣列寫入欄位陣列
+
+    Args:
+        rows: get_klines 回傳的 JSON（12 欄位陣列的列表）
+        columns: 目標欄位陣列
+        offset: 寫入起始位置
+
+    Returns:
+        寫入的列數
+    """
+    count = len(rows)
+    if not count:
+        return 0
+    transposed = list(zip(*rows))
+    end = offset + count
+    for index, name in enumerate(KLINE_COLUMNS):
+        # 字串價格由 NumPy 直接轉為 float64，不產生中間的 Python float
+        columns[name][offset:end] = transposed[index]
+    return count
+
+
+def to_structured(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """欄位陣列轉為結構化陣列"""
+    size = len(columns['open_time'])
+    array = np.empty(size, dtype=KLINE_DTYPE)
+    for name in KLINE_COLUMNS:
+        array[name] = columns[name]
+    return array
+
+
+class KlineStore:
+    """
+    歷史 K 線載入器
+
+        store = KlineStore(client)
+        columns = store.fetch_columns('BTCUSDT', '1m', start_time, end_time)
+        columns['close'].mean()
+    """
+
+    def __init__(self, client: BinanceClient, page_limit: int = MAX_PAGE_LIMIT):
+        """
+        Args:
+            client: 同步 Binance 客戶端
+            page_limit: 每頁 K 線數（最大 1000）
+        """
+        self.client = client
+        self.page_limit = min(page_limit, MAX_PAGE_LIMIT)
+
+    def fetch_columns(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: int,
+        end_time: Optional[int] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        抓取時間範圍內的 K 線
+
+        Args:
+            symbol: 交易對
+            interval: K 線間隔
+            start_time: 開始時間（毫秒時間戳，含）
+            end_time: 結束時間（毫秒時間戳，含；預設為現在）
+
+        Returns:
+            {欄位名: 連續 NumPy 陣列}
+        """
+        interval_ms = interval_to_ms(interval)
+        if end_time is None:
+            end_time = int(time.time() * 1000)
+
+        capacity = max((end_time - start_time) // interval_ms + 1, 0)
+        columns = empty_columns(capacity)
+        filled = 0
+        cursor = start_time
+
+        while cursor <= end_time and filled < capacity:
+            limit = min(self.page_limit, capacity - filled)
+            response = self.client.get_klines(
+                symbol=symbol,
+                interval=interval,
+                limit=limit,
+                start_time=cursor,
+                end_time=end_time
+            )
+            response.raise_for_status()
+            rows = parse_json(response)
+            if not rows:
+                break
+
+            filled += decode_rows(rows, columns, filled)
+            cursor = rows[-1][0] + interval_ms
+            if len(rows) < limit:
+                break
+
+        logger.debug(f"Fetched {filled} {interval} klines for {symbol}")
+        if filled < capacity:
+            columns = {name: column[:filled].copy() for name, column in columns.items()}
+        return columns
+
+    def fetch(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: int,
+        end_time: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        抓取時間範圍內的 K 線（結構化陣列）
+
+        參數同 fetch_columns
+        """
+        return to_structured(self.fetch_columns(symbol, interval, start_time, end_time))
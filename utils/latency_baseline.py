@@ -0,0 +1,411 @@
+"""
+延遲基準與回歸檢查
+以 MetricsRecorder 的各端點延遲直方圖作為樣本：保存為基準檔，之後的執行與基準比較
+p50 / p95 / p99。整體分佈的偏移以單尾 Mann-Whitney U 檢定（常態近似，含同值校正），
+各分位數的變化以自助法（bootstrap）估計「目前 / 基準」比值的信賴區間。
+
+分位數的點估計比基準高出門檻以上，且信賴區間下限高於 1 才判定為回歸；
+p50 另需 Mann-Whitney 檢定顯著；尾端樣本太少的分位數（見 MIN_TAIL_SAMPLES）只報告不判定。
+直方圖的桶對兩次執行相同，檢定直接以桶為單位計算，不需保存原始樣本
+"""
+import html
+import json
+import math
+import time
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+from utils.metrics import BUCKET_COUNT, Histogram, MetricsRecorder, bucket_value
+
+logger = logging.getLogger(__name__)
+
+BASELINE_VERSION = 1
+
+# 比較的分位數
+QUANTILES = (0.50, 0.95, 0.99)
+QUANTILE_NAMES = tuple(f"p{q * 100:g}" for q in QUANTILES)
+
+# 判定分位數時兩邊各需超過該分位數的樣本數（p99 約需 1000 個樣本），不足時只報告不判定
+MIN_TAIL_SAMPLES = 10
+
+OK = 'ok'
+REGRESSED = 'regressed'
+INSUFFICIENT = 'insufficient'    # 樣本不足，不判定
+NEW = 'new'                      # 基準中沒有此端點
+
+_BUCKET_VALUES = np.array([bucket_value(index) for index in range(BUCKET_COUNT)])
+
+
+def endpoint_histograms(recorder: MetricsRecorder, phase: str = 'total') -> Dict[str, Histogram]:
+    """
+    記錄器中各端點的延遲直方圖
+
+    Returns:
+        {'GET /api/v3/depth': Histogram}
+    """
+    return {
+        f"{method} {endpoint}": stats.phases[phase]
+        for (method, endpoint), stats in sorted(recorder.endpoints().items()) if phase in stats.phases
+    }
+
+
+def merge_histograms(target: Dict[str, Histogram], source: Mapping[str, Histogram]):
+    """把 source 的直方圖合併到 target（例如多個 xdist worker 的結果）"""
+    for key, histogram in source.items():
+        target.setdefault(key, Histogram()).merge(histogram)
+
+
+# ==================== 基準檔 ====================
+
+def save_baseline(path: str, histograms: Mapping[str, Histogram], meta: Mapping[str, Any] = None) -> Path:
+    """
+    保存基準
+
+    Args:
+        path: 基準檔路徑（JSON）
+        histograms: 各端點的延遲直方圖
+        meta: 執行環境等說明（例如目標伺服器）
+
+    Returns:
+        檔案路徑
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        'version': BASELINE_VERSION,
+        'created': time.time(),
+        'meta': dict(meta or {}),
+        'endpoints': {key: histogram.to_dict() for key, histogram in sorted(histograms.items())},
+    }
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding='utf-8')
+    logger.info(f"Saved latency baseline for {len(histograms)} endpoints to {path}")
+    return path
+
+
+def load_baseline(path: str) -> Tuple[Dict[str, Histogram], Dict[str, Any]]:
+    """
+    載入基準
+
+    Returns:
+        (各端點的延遲直方圖, meta)
+    """
+    data = json.loads(Path(path).read_text(encoding='utf-8'))
+    if data.get('version') != BASELINE_VERSION:
+        raise ValueError(f"不支援的基準版本: {data.get('version')}")
+    histograms = {key: Histogram.from_dict(item) for key, item in data['endpoints'].items()}
+    return histograms, data.get('meta', {})
+
+
+# ==================== 統計檢定 ====================
+
+def mann_whitney(baseline: Histogram, current: Histogram) -> Tuple[float, float]:
+    """
+    單尾 Mann-Whitney U 檢定：目前的延遲是否傾向大於基準
+
+    同一個桶內的樣本視為同值，以平均秩次計算並校正變異數
+
+    Returns:
+        (目前樣本的 U 統計量, p 值)
+    """
+    a = np.asarray(baseline.counts, dtype=float)
+    b = np.asarray(current.counts, dtype=float)
+    n1, n2 = a.sum(), b.sum()
+    if not n1 or not n2:
+        return 0.0, 1.0
+    ties = a + b
+    used = ties > 0
+    b, ties = b[used], ties[used]
+
+    # 每個桶的平均秩次
+    ranks = np.cumsum(ties) - (ties - 1) / 2
+    u = float((b * ranks).sum() - n2 * (n2 + 1) / 2)
+
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - float((ties ** 3 - ties).sum()) / (n * (n - 1)))
+    if variance <= 0:
+        return u, 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return u, 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def _resampled_percentiles(histogram: Histogram, quantiles: Tuple[float, ...], iterations: int,
+                           rng: np.random.Generator) -> np.ndarray:
+    """以多項分佈重抽直方圖，返回 (iterations, len(quantiles)) 的分位數"""
+    counts = np.asarray(histogram.counts, dtype=float)
+    used = np.flatnonzero(counts)
+    values = np.clip(_BUCKET_VALUES[used], histogram.min, histogram.max)
+    draws = rng.multinomial(histogram.count, counts[used] / histogram.count, size=iterations)
+    cumulative = np.cumsum(draws, axis=1)
+    result = np.empty((iterations, len(quantiles)))
+    for column, q in enumerate(quantiles):
+        rank = max(int(q * histogram.count + 0.5), 1)
+        result[:, column] = values[(cumulative >= rank).argmax(axis=1)]
+    return result
+
+
+def bootstrap_ratios(
+    baseline: Histogram,
+    current: Histogram,
+    quantiles: Tuple[float, ...] = QUANTILES,
+    iterations: int = None,
+    confidence: float = None,
+    seed: int = None
+) -> List[Tuple[float, float]]:
+    """
+    以自助法估計各分位數「目前 / 基準」比值的信賴區間
+
+    Args:
+        baseline: 基準直方圖
+        current: 目前直方圖
+        quantiles: 分位數
+        iterations: 重抽次數（預設 Config.LATENCY_BOOTSTRAP_ITERATIONS）
+        confidence: 信賴水準（預設 Config.LATENCY_CONFIDENCE）
+        seed: 亂數種子
+
+    Returns:
+        各分位數的 (下限, 上限)
+    """
+    iterations = iterations or Config.LATENCY_BOOTSTRAP_ITERATIONS
+    confidence = confidence or Config.LATENCY_CONFIDENCE
+    rng = np.random.default_rng(seed)
+    ratios = (_resampled_percentiles(current, quantiles, iterations, rng)
+              / _resampled_percentiles(baseline, quantiles, iterations, rng))
+    tail = (1 - confidence) / 2
+    low, high = np.quantile(ratios, [tail, 1 - tail], axis=0)
+    return list(zip(low.tolist(), high.tolist()))
+
+
+# ==================== 比較 ====================
+
+class QuantileChange:
+    """單一分位數的變化"""
+
+    __slots__ = ('quantile', 'baseline', 'current', 'ratio', 'ci_low', 'ci_high', 'judged', 'regressed')
+
+    def __init__(self, quantile: float, baseline: float, current: float, ci_low: float, ci_high: float,
+                 judged: bool, regressed: bool):
+        self.quantile = quantile
+        self.baseline = baseline
+        self.current = current
+        self.ratio = current / baseline if baseline else float('inf')
+        self.ci_low = ci_low
+        self.ci_high = ci_high
+        self.judged = judged
+        self.regressed = regressed
+
+    @property
+    def name(self) -> str:
+        return f"p{self.quantile * 100:g}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'quantile': self.quantile,
+            'baseline_ms': round(self.baseline * 1000, 3),
+            'current_ms': round(self.current * 1000, 3),
+            'ratio': round(self.ratio, 4),
+            'ci': [round(self.ci_low, 4), round(self.ci_high, 4)],
+            'judged': self.judged,
+            'regressed': self.regressed,
+        }
+
+
+class EndpointComparison:
+    """單一端點與基準的比較結果"""
+
+    def __init__(self, endpoint: str, status: str, baseline_count: int, current_count: int,
+                 u: float = None, p_value: float = None, quantiles: List[QuantileChange] = None):
+        self.endpoint = endpoint
+        self.status = status
+        self.baseline_count = baseline_count
+        self.current_count = current_count
+        self.u = u
+        self.p_value = p_value
+        self.quantiles = quantiles or []
+
+    @property
+    def regressed(self) -> bool:
+        return self.status == REGRESSED
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'endpoint': self.endpoint,
+            'status': self.status,
+            'baseline_count': self.baseline_count,
+            'current_count': self.current_count,
+            'mann_whitney': None if self.p_value is None else {'u': self.u, 'p_value': self.p_value},
+            'quantiles': {change.name: change.to_dict() for change in self.quantiles},
+        }
+
+
+def compare_endpoint(
+    endpoint: str,
+    baseline: Optional[Histogram],
+    current: Histogram,
+    threshold: float = None,
+    confidence: float = None,
+    iterations: int = None,
+    min_samples: int = None,
+    seed: int = None
+) -> EndpointComparison:
+    """
+    比較單一端點的延遲分佈
+
+    Args:
+        endpoint: 端點名稱（'GET /api/v3/depth'）
+        baseline: 基準直方圖（None 表示基準中沒有此端點）
+        current: 目前直方圖
+        threshold: 分位數退步門檻（0.2 表示慢 20%，預設 Config.LATENCY_REGRESSION_THRESHOLD）
+        confidence: 信賴水準（預設 Config.LATENCY_CONFIDENCE）
+        iterations: 自助法重抽次數
+        min_samples: 兩邊各需的最少樣本數（預設 Config.LATENCY_MIN_SAMPLES）
+        seed: 亂數種子
+
+    Returns:
+        EndpointComparison
+    """
+    threshold = Config.LATENCY_REGRESSION_THRESHOLD if threshold is None else threshold
+    confidence = confidence or Config.LATENCY_CONFIDENCE
+    min_samples = Config.LATENCY_MIN_SAMPLES if min_samples is None else min_samples
+
+    if baseline is None:
+        return EndpointComparison(endpoint, NEW, 0, current.count)
+    if min(baseline.count, current.count) < max(min_samples, 1):
+        return EndpointComparison(endpoint, INSUFFICIENT, baseline.count, current.count)
+
+    u, p_value = mann_whitney(baseline, current)
+    intervals = bootstrap_ratios(baseline, current, QUANTILES, iterations, confidence, seed)
+    changes = []
+    for q, (ci_low, ci_high) in zip(QUANTILES, intervals):
+        base, now = baseline.percentile(q), current.percentile(q)
+        judged = min(baseline.count, current.count) * (1 - q) >= MIN_TAIL_SAMPLES
+        regressed = judged and now >= base * (1 + threshold) and ci_low > 1.0
+        if q == 0.50:
+            # 中位數的偏移另需整體分佈的檢定支持
+            regressed = regressed and p_value < 1 - confidence
+        changes.append(QuantileChange(q, base, now, ci_low, ci_high, judged, regressed))
+
+    status = REGRESSED if any(change.regressed for change in changes) else OK
+    return EndpointComparison(endpoint, status, baseline.count, current.count, u, p_value, changes)
+
+
+class RegressionReport:
+    """所有端點的比較結果"""
+
+    def __init__(self, endpoints: List[EndpointComparison], threshold: float, confidence: float,
+                 meta: Mapping[str, Any] = None, warnings: List[str] = None):
+        self.endpoints = endpoints
+        self.threshold = threshold
+        self.confidence = confidence
+        self.meta = dict(meta or {})
+        self.warnings = warnings or []
+
+    @property
+    def regressions(self) -> List[EndpointComparison]:
+        return [endpoint for endpoint in self.endpoints if endpoint.regressed]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'threshold': self.threshold,
+            'confidence': self.confidence,
+            'regressions': [endpoint.endpoint for endpoint in self.regressions],
+            'warnings': self.warnings,
+            'meta': self.meta,
+            'endpoints': [endpoint.to_dict() for endpoint in self.endpoints],
+        }
+
+    def dump(self, path: str) -> Path:
+        """輸出 JSON（供 CI 讀取）"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=1), encoding='utf-8')
+        return path
+
+    def _rows(self) -> List[Tuple[EndpointComparison, List[str]]]:
+        rows = []
+        for endpoint in self.endpoints:
+            cells = []
+            for change in endpoint.quantiles:
+                mark = ' !' if change.regressed else ('' if change.judged else ' 樣本不足')
+                cells.append(f"{change.baseline * 1000:.1f}→{change.current * 1000:.1f}ms "
+                             f"({change.ratio - 1:+.0%} [{change.ci_low - 1:+.0%}, {change.ci_high - 1:+.0%}]){mark}")
+            if not cells:
+                cells = ['-'] * len(QUANTILES)
+            rows.append((endpoint, cells))
+        return rows
+
+    def format(self) -> str:
+        """文字表格（終端機輸出）"""
+        lines = [f"門檻 +{self.threshold:.0%}，信賴水準 {self.confidence:.0%}；"
+                 f"{len(self.regressions)} / {len(self.endpoints)} 個端點退步"]
+        lines.extend(f"警告: {warning}" for warning in self.warnings)
+        for endpoint, cells in self._rows():
+            p_value = '' if endpoint.p_value is None else f" MW p={endpoint.p_value:.3g}"
+            lines.append(f"[{endpoint.status}] {endpoint.endpoint} "
+                         f"(n={endpoint.baseline_count}→{endpoint.current_count}{p_value})")
+            if endpoint.quantiles:
+                lines.extend(f"    {q}: {cell}" for q, cell in zip(QUANTILE_NAMES, cells))
+        return '\n'.join(lines)
+
+    def to_html(self) -> str:
+        """HTML 表格（加入 pytest-html 報告摘要）"""
+        header = ''.join(f"<th>{name}</th>" for name in ('端點', '狀態', '樣本數', 'Mann-Whitney p') + QUANTILE_NAMES)
+        rows = []
+        for endpoint, cells in self._rows():
+            color = ' style="color:#c00"' if endpoint.regressed else ''
+            p_value = '-' if endpoint.p_value is None else f"{endpoint.p_value:.3g}"
+            values = [endpoint.endpoint, endpoint.status, f"{endpoint.baseline_count}→{endpoint.current_count}",
+                      p_value] + cells
+            rows.append(f"<tr{color}>" + ''.join(f"<td>{html.escape(value)}</td>" for value in values) + "</tr>")
+        warnings = ''.join(f"<p>警告: {html.escape(warning)}</p>" for warning in self.warnings)
+        return (f"<h2>延遲回歸檢查</h2><p>門檻 +{self.threshold:.0%}，信賴水準 {self.confidence:.0%}；"
+                f"{len(self.regressions)} / {len(self.endpoints)} 個端點退步</p>{warnings}"
+                f"<table><tr>{header}</tr>{''.join(rows)}</table>")
+
+
+def compare(
+    baseline: Mapping[str, Histogram],
+    current: Mapping[str, Histogram],
+    threshold: float = None,
+    confidence: float = None,
+    iterations: int = None,
+    min_samples: int = None,
+    baseline_meta: Mapping[str, Any] = None,
+    meta: Mapping[str, Any] = None,
+    seed: int = None
+) -> RegressionReport:
+    """
+    比較所有端點
+
+    Args:
+        baseline: 基準的各端點直方圖
+        current: 目前的各端點直方圖
+        threshold: 分位數退步門檻
+        confidence: 信賴水準
+        iterations: 自助法重抽次數
+        min_samples: 每個端點兩邊各需的最少樣本數
+        baseline_meta: 基準的 meta（與 meta 的目標伺服器不同時加入警告）
+        meta: 目前執行的說明
+        seed: 亂數種子
+
+    Returns:
+        RegressionReport
+    """
+    threshold = Config.LATENCY_REGRESSION_THRESHOLD if threshold is None else threshold
+    confidence = confidence or Config.LATENCY_CONFIDENCE
+    warnings = []
+    baseline_meta, meta = dict(baseline_meta or {}), dict(meta or {})
+    if baseline_meta.get('target') != meta.get('target'):
+        warnings.append(f"基準的目標伺服器 {baseline_meta.get('target')} 與本次 {meta.get('target')} 不同")
+    missing = sorted(set(baseline) - set(current))
+    if missing:
+        warnings.append(f"本次沒有請求的端點: {', '.join(missing)}")
+
+    endpoints = [
+        compare_endpoint(key, baseline.get(key), histogram, threshold, confidence, iterations, min_samples, seed)
+        for key, histogram in sorted(current.items())
+    ]
+    return RegressionReport(endpoints, threshold, confidence, meta, warnings)
@@ -0,0 +1,587 @@
+"""
+負載產生器
+以非同步客戶端產生可控的負載，量測客戶端堆疊的實際容量：
+
+- 開放模型（open model）：依到達率送出請求，不等待前一個請求完成；
+  延遲從「預定送出時間」起算，產生器或伺服器卡住時排隊的時間也會計入，
+  避免協同遺漏（coordinated omission）
+- 封閉模型（closed model）：N 個虛擬用戶各自循環送出請求；設定 pacing 時
+  每個用戶依固定節奏送出，延遲同樣從預定時間起算
+
+負載以分段（Stage）描述，可做線性爬升；請求依權重從組合（RequestMix）中抽選。
+單一程序以 asyncio 執行，run_multiprocess 將負載平均分給多個程序後合併結果
+"""
+import asyncio
+import bisect
+import itertools
+import math
+import os
+import random
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+OPEN = 'open'
+CLOSED = 'closed'
+
+
+# ==================== 請求組合 ====================
+
+class Operation:
+    """
+    請求組合中的一種請求
+
+    以客戶端方法名稱與參數描述（而非函數），可傳給其他程序：
+
+        Operation('get_order_book', weight=5, symbol='BTCUSDT', limit=100)
+    """
+
+    __slots__ = ('method', 'weight', 'name', 'kwargs')
+
+    def __init__(self, method: str, weight: float = 1, name: str = None, **kwargs: Any):
+        """
+        Args:
+            method: 客戶端方法名稱（例如 ping、get_order_book）
+            weight: 抽選權重
+            name: 報告中的名稱（預設為方法名稱）
+            **kwargs: 呼叫方法的參數
+        """
+        if weight <= 0:
+            raise ValueError(f"權重必須大於 0: {method}")
+        self.method = method
+        self.weight = weight
+        self.name = name or method
+        self.kwargs = kwargs
+
+    def __call__(self, client: Any):
+        return getattr(client, self.method)(**self.kwargs)
+
+    def __repr__(self) -> str:
+        return f"Operation({self.name}, weight={self.weight})"
+
+
+class RequestMix:
+    """依權重抽選請求"""
+
+    def __init__(self, operations: Sequence[Operation], seed: int = None):
+        """
+        Args:
+            operations: 請求列表
+            seed: 亂數種子（固定後抽選順序可重現）
+        """
+        if not operations:
+            raise ValueError("請求組合不可為空")
+        self.operations = list(operations)
+        self.seed = seed
+        self._cumulative = list(itertools.accumulate(op.weight for op in self.operations))
+        self._random = random.Random(seed)
+
+    def choose(self) -> Operation:
+        point = self._random.random() * self._cumulative[-1]
+        return self.operations[bisect.bisect_right(self._cumulative, point)]
+
+    def fork(self, index: int) -> 'RequestMix':
+        """給第 index 個程序使用的副本（固定種子時各程序的序列不同但可重現）"""
+        return RequestMix(self.operations, None if self.seed is None else self.seed + index)
+
+
+# ==================== 負載分段 ====================
+
+class Stage:
+    """負載分段：在 duration 秒內把目標值從上一段的目標線性變化到 target"""
+
+    __slots__ = ('duration', 'target')
+
+    def __init__(self, duration: float, target: float):
+        """
+        Args:
+            duration: 分段秒數
+            target: 分段結束時的目標值（開放模型為每秒請求數，封閉模型為虛擬用戶數）
+        """
+        self.duration = duration
+        self.target = target
+
+    def __repr__(self) -> str:
+        return f"Stage({self.duration}s -> {self.target})"
+
+
+class LoadProfile:
+    """
+    由多個分段組成的負載曲線
+
+        LoadProfile.ramp(200, ramp_up=10, hold=30)        # 10 秒爬升到 200，維持 30 秒
+        LoadProfile([Stage(5, 50), Stage(20, 50), Stage(5, 0)])
+    """
+
+    def __init__(self, stages: Sequence[Stage], start: float = 0.0):
+        """
+        Args:
+            stages: 負載分段
+            start: 第一段開始時的目標值
+        """
+        if not stages:
+            raise ValueError("負載分段不可為空")
+        self.stages = list(stages)
+        self.start = start
+
+    @classmethod
+    def constant(cls, target: float, duration: float) -> 'LoadProfile':
+        """固定負載"""
+        return cls([Stage(duration, target)], start=target)
+
+    @classmethod
+    def ramp(cls, target: float, ramp_up: float, hold: float = 0.0) -> 'LoadProfile':
+        """從 0 線性爬升到 target 後維持 hold 秒"""
+        stages = [Stage(ramp_up, target)]
+        if hold:
+            stages.append(Stage(hold, target))
+        return cls(stages)
+
+    @property
+    def duration(self) -> float:
+        return sum(stage.duration for stage in self.stages)
+
+    def target_at(self, offset: float) -> float:
+        """開始後 offset 秒的目標值"""
+        previous = self.start
+        for stage in self.stages:
+            if offset < stage.duration:
+                return previous + (stage.target - previous) * offset / stage.duration
+            offset -= stage.duration
+            previous = stage.target
+        return previous
+
+    def scaled(self, factor: float) -> 'LoadProfile':
+        """目標值乘以 factor 的負載曲線（分給多個程序時使用）"""
+        return LoadProfile([Stage(s.duration, s.target * factor) for s in self.stages], self.start * factor)
+
+    def arrivals(self) -> Iterator[float]:
+        """
+        開放模型的預定送出時間（距開始秒數）
+
+        第 k 個請求（從 1 起算）在到達率的積分達到 k - 0.5 時送出；分段內到達率為線性，
+        解二次方程即可得到下一個送出時間，爬升初期不會因瞬時到達率趨近 0 而跳過
+        """
+        offset = 0.0
+        previous = self.start
+        need = 0.5
+        for stage in self.stages:
+            slope = (stage.target - previous) / stage.duration if stage.duration else 0.0
+            elapsed = 0.0
+            while True:
+                rate = previous + slope * elapsed
+                # 解 rate * x + slope * x^2 / 2 = need（分母形式避免 slope 趨近 0 時的相消誤差）
+                discriminant = rate * rate + 2 * slope * need
+                denominator = rate + math.sqrt(discriminant) if discriminant >= 0 else 0.0
+                step = 2 * need / denominator if denominator > 0 else math.inf
+                if elapsed + step >= stage.duration:
+                    remaining = stage.duration - elapsed
+                    need -= rate * remaining + slope * remaining * remaining / 2
+                    break
+                elapsed += step
+                yield offset + elapsed
+                need = 1.0
+            offset += stage.duration
+            previous = stage.target
+
+
+# ==================== 結果 ====================
+
+class LoadResult:
+    """
+    負載測試結果
+
+    整體與各請求的延遲直方圖、錯誤分類，以及每個時間區間的吞吐量與延遲
+    """
+
+    def __init__(self, model: str, interval: float = 1.0):
+        """
+        Args:
+            model: open 或 closed
+            interval: 時間序列的區間秒數
+        """
+        self.model = model
+        self.interval = interval
+        self.latency = Histogram()
+        self.operations: Dict[str, Histogram] = {}
+        self.errors: Dict[str, int] = {}
+        self.failed = 0
+        self.duration = 0.0
+        # 區間序號 -> [請求數, 錯誤數, 延遲直方圖]
+        self.timeline: Dict[int, list] = {}
+
+    @property
+    def requests(self) -> int:
+        return self.latency.count
+
+    @property
+    def throughput(self) -> float:
+        """每秒完成的請求數"""
+        return self.requests / self.duration if self.duration else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.failed / self.requests if self.requests else 0.0
+
+    def record(self, name: str, completed_at: float, latency: float, error: Optional[str] = None):
+        """
+        記錄一個完成的請求
+
+        Args:
+            name: 請求名稱
+            completed_at: 完成時間（距開始秒數）
+            latency: 延遲秒數
+            error: 錯誤分類（HTTP 狀態碼或例外類型，成功時為 None）
+        """
+        self.latency.record(latency)
+        histogram = self.operations.get(name)
+        if histogram is None:
+            histogram = self.operations[name] = Histogram()
+        histogram.record(latency)
+
+        index = int(completed_at // self.interval)
+        bucket = self.timeline.get(index)
+        if bucket is None:
+            bucket = self.timeline[index] = [0, 0, Histogram()]
+        bucket[0] += 1
+        bucket[2].record(latency)
+        if error is not None:
+            self.failed += 1
+            bucket[1] += 1
+            self.errors[error] = self.errors.get(error, 0) + 1
+
+    def merge(self, other: 'LoadResult'):
+        """合併另一個程序的結果（時間序列依區間序號對齊）"""
+        self.latency.merge(other.latency)
+        for name, histogram in other.operations.items():
+            self.operations.setdefault(name, Histogram()).merge(histogram)
+        for error, count in other.errors.items():
+            self.errors[error] = self.errors.get(error, 0) + count
+        for index, (count, errors, histogram) in other.timeline.items():
+            bucket = self.timeline.setdefault(index, [0, 0, Histogram()])
+            bucket[0] += count
+            bucket[1] += errors
+            bucket[2].merge(histogram)
+        self.failed += other.failed
+        self.duration = max(self.duration, other.duration)
+
+    def series(self) -> List[Dict[str, float]]:
+        """各時間區間的吞吐量、錯誤數與延遲分位數"""
+        return [
+            {
+                'time': index * self.interval,
+                'throughput': count / self.interval,
+                'errors': errors,
+                'p50': histogram.percentile(0.50),
+                'p99': histogram.percentile(0.99),
+            }
+            for index, (count, errors, histogram) in sorted(self.timeline.items())
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        """摘要（可直接輸出為 JSON）"""
+        return {
+            'model': self.model,
+            'duration': self.duration,
+            'requests': self.requests,
+            'failed': self.failed,
+            'error_rate': self.error_rate,
+            'throughput': self.throughput,
+            'errors': dict(self.errors),
+            'latency': self.latency.snapshot(),
+            'operations': {name: h.snapshot() for name, h in sorted(self.operations.items())},
+            'timeline': self.series(),
+        }
+
+    def format(self) -> str:
+        """可讀的文字報告"""
+        snapshot = self.latency.snapshot()
+        lines = [
+            f"負載測試結果（{self.model} model）:",
+            f"  總請求數: {self.requests}（錯誤 {self.failed}，{self.error_rate * 100:.2f}%）",
+            f"  持續時間: {self.duration:.2f}s",
+            f"  吞吐量: {self.throughput:.1f} req/s",
+        ]
+        if self.requests:
+            lines.append(
+                f"  延遲: p50 {snapshot['p50'] * 1000:.1f}ms, p90 {snapshot['p90'] * 1000:.1f}ms, "
+                f"p99 {snapshot['p99'] * 1000:.1f}ms, max {snapshot['max'] * 1000:.1f}ms"
+            )
+        for name, histogram in sorted(self.operations.items()):
+            lines.append(f"  {name}: {histogram.count} 次, p99 {histogram.percentile(0.99) * 1000:.1f}ms")
+        if self.errors:
+            lines.append(f"  錯誤分類: {self.errors}")
+        for point in self.series():
+            lines.append(
+                f"  [{point['time']:6.1f}s] {point['throughput']:8.1f} req/s, "
+                f"p50 {point['p50'] * 1000:.1f}ms, p99 {point['p99'] * 1000:.1f}ms, 錯誤 {point['errors']}"
+            )
+        return '\n'.join(lines)
+
+
+# ==================== 執行 ====================
+
+async def _execute(client: Any, operation: Operation) -> Optional[str]:
+    """送出一個請求，返回錯誤分類（成功時為 None）"""
+    try:
+        response = await operation(client)
+    except Exception as e:
+        return type(e).__name__
+    if response.status_code >= 400:
+        return str(response.status_code)
+    return None
+
+
+async def run_open(
+    client: Any,
+    mix: RequestMix,
+    profile: LoadProfile,
+    max_in_flight: int = None,
+    interval: float = 1.0
+) -> LoadResult:
+    """
+    開放模型：依到達率送出請求
+
+    Args:
+        client: 非同步客戶端（AsyncBinanceClient 或介面相同的物件）
+        mix: 請求組合
+        profile: 負載曲線（目標值為每秒請求數）
+        max_in_flight: 同時進行中的請求上限（超出時排隊，排隊時間計入延遲）
+        interval: 時間序列的區間秒數
+
+    Returns:
+        LoadResult 實例
+    """
+    result = LoadResult(OPEN, interval)
+    semaphore = asyncio.Semaphore(max_in_flight) if max_in_flight else None
+    tasks = set()
+    start = time.perf_counter()
+
+    async def fire(operation: Operation, intended: float):
+        if semaphore is not None:
+            async with semaphore:
+                error = await _execute(client, operation)
+        else:
+            error = await _execute(client, operation)
+        completed = time.perf_counter() - start
+        result.record(operation.name, completed, completed - intended, error)
+
+    for intended in profile.arrivals():
+        delay = intended - (time.perf_counter() - start)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.ensure_future(fire(mix.choose(), intended))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.gather(*tasks)
+    result.duration = time.perf_counter() - start
+    return result
+
+
+async def run_closed(
+    client: Any,
+    mix: RequestMix,
+    profile: LoadProfile,
+    think_time: float = 0.0,
+    pacing: float = None,
+    interval: float = 1.0,
+    share: Tuple[int, int] = (0, 1)
+) -> LoadResult:
+    """
+    封閉模型：虛擬用戶循環送出請求
+
+    每 10ms 依負載曲線調整虛擬用戶數。未設定 pacing 時延遲為實際服務時間
+    （伺服器變慢時用戶也跟著變慢，這是封閉模型的本質）；設定 pacing 時每個
+    用戶每 pacing 秒送出一次，延遲從預定時間起算
+
+    Args:
+        client: 非同步客戶端
+        mix: 請求組合
+        profile: 負載曲線（目標值為虛擬用戶數）
+        think_time: 每次請求後的思考時間（未設定 pacing 時使用）
+        pacing: 每個用戶的送出間隔秒數
+        interval: 時間序列的區間秒數
+        share: (index, count)，多程序時只執行編號 i % count == index 的用戶
+
+    Returns:
+        LoadResult 實例
+    """
+    result = LoadResult(CLOSED, interval)
+    duration = profile.duration
+    index, count = share
+    users: Dict[int, asyncio.Task] = {}
+    start = time.perf_counter()
+
+    async def user(number: int):
+        began = time.perf_counter() - start
+        for iteration in itertools.count():
+            now = time.perf_counter() - start
+            if now >= duration or number >= _users_at(profile, now):
+                return
+            intended = now
+            if pacing:
+                intended = began + iteration * pacing
+                if intended > now:
+                    await asyncio.sleep(intended - now)
+            operation = mix.choose()
+            error = await _execute(client, operation)
+            completed = time.perf_counter() - start
+            result.record(operation.name, completed, completed - intended, error)
+            if think_time and not pacing:
+                await asyncio.sleep(think_time)
+
+    while True:
+        now = time.perf_counter() - start
+        if now >= duration:
+            break
+        target = _users_at(profile, now)
+        for number in range(index, target, count):
+            task = users.get(number)
+            if task is None or task.done():
+                users[number] = asyncio.ensure_future(user(number))
+        await asyncio.sleep(0.01)
+
+    if users:
+        await asyncio.gather(*users.values())
+    result.duration = time.perf_counter() - start
+    return result
+
+
+def _users_at(profile: LoadProfile, offset: float) -> int:
+    return int(math.floor(profile.target_at(offset) + 0.5))
+
+
+# ==================== 多程序 ====================
+
+def _create_client(client_settings: Dict[str, Any]):
+    """
+    負載測試用的非同步客戶端
+
+    預設關閉在途請求合併（coalesce=True 時啟用）：相同的並發 GET 會被合併成一個，吞吐量不代表實際送出的請求
+    """
+    from utils.async_client import AsyncBinanceClient
+
+    settings = dict(client_settings)
+    coalesce = settings.pop('coalesce', False)
+    client = AsyncBinanceClient(**settings)
+    if coalesce:
+        client.enable_single_flight()
+    else:
+        client.single_flight = None
+    return client
+
+
+async def _run_worker(
+    model: str,
+    mix: RequestMix,
+    profile: LoadProfile,
+    client_settings: Dict[str, Any],
+    start_at: float,
+    options: Dict[str, Any]
+) -> LoadResult:
+    async with _create_client(client_settings) as client:
+        delay = start_at - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if model == OPEN:
+            return await run_open(client, mix, profile, **options)
+        return await run_closed(client, mix, profile, **options)
+
+
+def _worker(index: int, processes: int, model: str, mix: RequestMix, profile: LoadProfile,
+            client_settings: Dict[str, Any], start_at: float, options: Dict[str, Any]) -> LoadResult:
+    """子程序入口：各自以 asyncio 執行分到的負載"""
+    mix = mix.fork(index)
+    options = dict(options)
+    if model == OPEN:
+        profile = profile.scaled(1.0 / processes)
+    else:
+        options['share'] = (index, processes)
+    return asyncio.run(_run_worker(model, mix, profile, client_settings, start_at, options))
+
+
+def run_multiprocess(
+    model: str,
+    mix: RequestMix,
+    profile: LoadProfile,
+    processes: int = None,
+    client_settings: Dict[str, Any] = None,
+    **options: Any
+) -> LoadResult:
+    """
+    以多個程序執行負載（每個程序一個事件迴圈），避免單一核心成為瓶頸
+
+    開放模型的到達率平均分給各程序；封閉模型依用戶編號分配
+
+    Args:
+        model: open 或 closed
+        mix: 請求組合
+        profile: 整體負載曲線
+        processes: 程序數（預設為 CPU 核心數）
+        client_settings: AsyncBinanceClient 建構參數（coalesce=True 時保留在途請求合併）
+        **options: 傳給 run_open / run_closed 的其他參數
+
+    Returns:
+        合併後的 LoadResult
+    """
+    if model not in (OPEN, CLOSED):
+        raise ValueError(f"不支援的負載模型: {model}")
+    processes = processes or os.cpu_count() or 1
+    # 預留啟動程序與建立客戶端的時間，讓各程序同時開始
+    start_at = time.time() + 0.5 + 0.05 * processes
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [
+            executor.submit(_worker, index, processes, model, mix, profile, client_settings or {}, start_at, options)
+            for index in range(processes)
+        ]
+        results = [future.result() for future in futures]
+
+    merged = LoadResult(model, options.get('interval', 1.0))
+    for result in results:
+        merged.merge(result)
+    logger.info(f"Load test finished: {processes} processes, {merged.requests} requests, "
+                f"{merged.throughput:.1f} req/s")
+    return merged
+
+
+def run(
+    model: str,
+    mix: RequestMix,
+    profile: LoadProfile,
+    client: Any = None,
+    client_settings: Dict[str, Any] = None,
+    **options: Any
+) -> LoadResult:
+    """
+    在目前程序以 asyncio 執行負載（同步測試中使用）
+
+    Args:
+        model: open 或 closed
+        mix: 請求組合
+        profile: 負載曲線
+        client: 非同步客戶端（預設依 client_settings 建立並在結束時關閉）
+        client_settings: AsyncBinanceClient 建構參數
+        **options: 傳給 run_open / run_closed 的其他參數
+
+    Returns:
+        LoadResult 實例
+    """
+    if model not in (OPEN, CLOSED):
+        raise ValueError(f"不支援的負載模型: {model}")
+    runner: Callable = run_open if model == OPEN else run_closed
+
+    async def main():
+        if client is not None:
+            return await runner(client, mix, profile, **options)
+        async with _create_client(client_settings or {}) as own:
+            return await runner(own, mix, profile, **options)
+
+    return asyncio.run(main())
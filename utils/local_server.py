@@ -0,0 +1,1177 @@
+"""
+本地 Binance REST 模擬伺服器
+在背景執行緒中以 aiohttp 提供 /api/v3 端點與 WebSocket 串流，用於離線與高 RPS 測試
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import random
+import re
+import secrets
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import deque
+from decimal import Decimal
+from typing import Dict, List, Optional, Any
+from urllib.parse import parse_qsl, urlencode
+
+from aiohttp import WSMsgType, web
+
+from utils.kline_store import INTERVAL_MS
+from utils.rate_limiter import is_order_request, request_weight
+from utils.ws_api import WS_API_METHODS
+
+logger = logging.getLogger(__name__)
+
+SYMBOL_PATTERN = re.compile(r'^[A-Z0-9\-_.]{1,20}$')
+
+# 交易對設定：基準價、最小價格單位、最小數量單位
+DEFAULT_SYMBOLS = {
+    'BTCUSDT': {'base': 'BTC', 'quote': 'USDT', 'price': '30000', 'tick': '0.01', 'step': '0.00001'},
+    'ETHUSDT': {'base': 'ETH', 'quote': 'USDT', 'price': '2000', 'tick': '0.01', 'step': '0.0001'},
+    'BNBUSDT': {'base': 'BNB', 'quote': 'USDT', 'price': '300', 'tick': '0.1', 'step': '0.001'},
+}
+
+DEFAULT_BALANCES = {'USDT': '100000', 'BTC': '1', 'ETH': '10', 'BNB': '100'}
+
+# 每個深度檔位預先填入的模擬流動性
+SEED_LEVELS = 5000
+SEED_LEVEL_QTY = Decimal('1')
+
+# 路由的認證方式：只需 API 密鑰（userDataStream）
+API_KEY_ONLY = 'api-key'
+
+# listenKey 有效期（毫秒）
+LISTEN_KEY_TTL_MS = 60 * 60 * 1000
+
+
+class _ApiError(Exception):
+    """以 Binance 格式返回的錯誤"""
+
+    def __init__(self, status: int, code: int, msg: str, data: dict = None):
+        super().__init__(msg)
+        self.status = status
+        self.code = code
+        self.msg = msg
+        self.data = data
+
+
+class _BookSide:
+    """
+    單邊掛單簿
+
+    價格以排序陣列保存，每個價位是一個 FIFO 列表，
+    元素為 [order, qty]；order 為 None 表示模擬流動性
+    """
+
+    def __init__(self, descending: bool):
+        self.descending = descending
+        self.prices: List[Decimal] = []
+        self.levels: Dict[Decimal, List[list]] = {}
+
+    def _key(self, price: Decimal) -> Decimal:
+        return -price if self.descending else price
+
+    def add(self, price: Decimal, qty: Decimal, order: Optional[dict] = None):
+        if price not in self.levels:
+            insort(self.prices, self._key(price))
+            self.levels[price] = []
+        self.levels[price].append([order, qty])
+
+    def remove_order(self, order: dict):
+        price = Decimal(order['price'])
+        level = self.levels.get(price)
+        if level is None:
+            return
+        level[:] = [entry for entry in level if entry[0] is not order]
+        if not level:
+            self._drop_level(price)
+
+    def _drop_level(self, price: Decimal):
+        del self.levels[price]
+        index = bisect_left(self.prices, self._key(price))
+        del self.prices[index]
+
+    def best(self) -> Optional[Decimal]:
+        if not self.prices:
+            return None
+        return self._key(self.prices[0])
+
+    def quantity(self, price: Decimal) -> Decimal:
+        return sum((entry[1] for entry in self.levels.get(price, ())), Decimal(0))
+
+    def depth(self, limit: int) -> List[List[str]]:
+        result = []
+        for key in self.prices[:limit]:
+            price = self._key(key)
+            qty = sum(entry[1] for entry in self.levels[price])
+            result.append([f"{price:f}", f"{qty:f}"])
+        return result
+
+    def consume(self, price: Decimal, qty: Decimal) -> List[tuple]:
+        """
+        從最佳價位開始吃單，直到價格不再交叉或數量用完
+
+        Returns:
+            成交列表 [(price, qty, resting_order)]
+        """
+        fills = []
+        while qty > 0 and self.prices:
+            best = self._key(self.prices[0])
+            crosses = best >= price if self.descending else best <= price
+            if not crosses:
+                break
+            level = self.levels[best]
+            while qty > 0 and level:
+                entry = level[0]
+                traded = min(qty, entry[1])
+                entry[1] -= traded
+                qty -= traded
+                fills.append((best, traded, entry[0]))
+                if entry[1] == 0:
+                    level.pop(0)
+            if not level:
+                self._drop_level(best)
+        return fills
+
+
+class _WsConnection:
+    """WebSocket 連線與其訂閱的串流；訊息經佇列依序送出"""
+
+    def __init__(self, ws: web.WebSocketResponse, combined: bool, streams: set):
+        self.ws = ws
+        self.combined = combined
+        self.streams = streams
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    async def write_loop(self):
+        while True:
+            payload = await self.queue.get()
+            if self.ws.closed:
+                return
+            await self.ws.send_str(json.dumps(payload))
+
+
+class _SymbolState:
+    """單一交易對的撮合簿、成交與設定"""
+
+    def __init__(self, symbol: str, spec: Dict[str, str]):
+        self.symbol = symbol
+        self.spec = spec
+        self.base_asset = spec['base']
+        self.quote_asset = spec['quote']
+        self.reference_price = Decimal(spec['price'])
+        self.tick = Decimal(spec['tick'])
+        self.step = Decimal(spec['step'])
+        self.bids = _BookSide(descending=True)
+        self.asks = _BookSide(descending=False)
+        self.trades: deque = deque(maxlen=1000)
+        self.next_trade_id = 1
+        self.update_id = 1
+
+        for i in range(1, SEED_LEVELS + 1):
+            self.bids.add(self.reference_price - self.tick * i, SEED_LEVEL_QTY)
+            self.asks.add(self.reference_price + self.tick * i, SEED_LEVEL_QTY)
+
+        now = int(time.time() * 1000)
+        for i in range(self.trades.maxlen):
+            self.record_trade(self.reference_price, SEED_LEVEL_QTY, now - (1000 - i) * 100, i % 2 == 0)
+
+    def record_trade(self, price: Decimal, qty: Decimal, trade_time: int, buyer_maker: bool):
+        self.trades.append({
+            'id': self.next_trade_id,
+            'price': f"{price:f}",
+            'qty': f"{qty:f}",
+            'quoteQty': f"{price * qty:f}",
+            'time': trade_time,
+            'isBuyerMaker': buyer_maker,
+            'isBestMatch': True
+        })
+        self.next_trade_id += 1
+
+
+class LocalBinanceServer:
+    """
+    本地 Binance REST 模擬伺服器
+
+    實作 BinanceClient 會呼叫的 /api/v3 端點，驗證 HMAC 簽名、
+    維護記憶體內撮合簿，並支援延遲與錯誤注入；/ws 與 /stream 提供
+    WebSocket 串流，撮合簿變動時推送 trade / depthUpdate / bookTicker，
+    訂單狀態變動時推送 executionReport 到 /ws/<listenKey>；
+    /ws-api/v3 提供 WebSocket API 下單：
+
+        with LocalBinanceServer() as server:
+            client = BinanceClient(server.api_key, server.secret_key, base_url=server.base_url)
+    """
+
+    def __init__(
+        self,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        api_key: str = 'local-api-key',
+        secret_key: str = 'local-secret-key',
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        weight_limit: int = None,
+        clock_offset_ms: int = 0,
+        seed: int = None
+    ):
+        """
+        初始化伺服器
+
+        Args:
+            host: 監聽位址
+            port: 監聽埠（0 表示自動分配）
+            api_key: 接受的 API 密鑰
+            secret_key: 驗證簽名用的 Secret 密鑰
+            latency: 每個請求的固定延遲（秒）
+            latency_jitter: 額外隨機延遲上限（秒）
+            error_rate: 錯誤注入機率 (0 ~ 1)
+            error_status: 注入錯誤時返回的狀態碼
+            weight_limit: 每分鐘權重上限（None 表示不限制）
+            clock_offset_ms: 伺服器時鐘相對本機的偏移（毫秒），用於模擬時鐘漂移
+            seed: 隨機數種子（延遲與錯誤注入用）
+        """
+        self.host = host
+        self.port = port
+        self.api_key = api_key
+        self.secret_key = secret_key
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.error_route: Optional[tuple] = None
+        self.error_after = False
+        self.error_count: Optional[int] = None
+        self.weight_limit = weight_limit
+        self.clock_offset_ms = clock_offset_ms
+        self._random = random.Random(seed)
+
+        self.symbols = {name: _SymbolState(name, spec) for name, spec in DEFAULT_SYMBOLS.items()}
+        self.balances = {asset: Decimal(amount) for asset, amount in DEFAULT_BALANCES.items()}
+        self.orders: Dict[int, dict] = {}
+        self.next_order_id = 1
+        self.request_count = 0
+
+        self._used_weight = 0
+        self._weight_window = 0
+        self._order_count_10s = 0
+        self._order_window_10s = 0
+        self._order_count_1d = 0
+
+        self._ws_connections: set = set()
+        self.listen_key: Optional[str] = None
+        self._listen_key_expiry = 0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+
+    # ==================== 生命週期 ====================
+
+    @property
+    def base_url(self) -> str:
+        """伺服器基礎 URL（對應 Config.BASE_URL）"""
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def ws_url(self) -> str:
+        """WebSocket 基礎 URL（對應 Config.WS_URL）"""
+        return f"ws://{self.host}:{self.port}/ws"
+
+    @property
+    def ws_api_url(self) -> str:
+        """WebSocket API URL（對應 Config.WS_API_URL）"""
+        return f"ws://{self.host}:{self.port}/ws-api/v3"
+
+    def start(self) -> 'LocalBinanceServer':
+        """在背景執行緒啟動伺服器"""
+        self._thread = threading.Thread(target=self._run, name='local-binance-server', daemon=True)
+        self._thread.start()
+        self._started.wait()
+        logger.info(f"Local Binance server listening on {self.base_url}")
+        return self
+
+    def stop(self):
+        """停止伺服器"""
+        if self._loop is None:
+            return
+        future = asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop)
+        future.result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop = None
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._runner = web.AppRunner(self._build_app(), access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, self.host, self.port)
+        self._loop.run_until_complete(site.start())
+        self.port = self._runner.addresses[0][1]
+        self._started.set()
+        self._loop.run_forever()
+        self._loop.close()
+
+    def __enter__(self) -> 'LocalBinanceServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def set_latency(self, latency: float, jitter: float = 0.0):
+        """調整延遲注入"""
+        self.latency = latency
+        self.latency_jitter = jitter
+
+    def set_error_injection(
+        self,
+        rate: float,
+        status: int = 500,
+        method: str = None,
+        path: str = None,
+        after: bool = False,
+        count: int = None
+    ):
+        """
+        調整錯誤注入
+
+        Args:
+            rate: 錯誤注入機率 (0 ~ 1)
+            status: 注入錯誤時返回的狀態碼
+            method: 只對此 HTTP 方法注入（需與 path 一起指定）
+            path: 只對此路徑注入
+            after: 在請求處理完成後才返回錯誤（模擬已執行但響應遺失）
+            count: 最多注入的次數（None 表示不限）
+        """
+        self.error_rate = rate
+        self.error_status = status
+        self.error_route = (method, path) if path else None
+        self.error_after = after
+        self.error_count = count
+
+    def _inject_error(self, request: web.Request) -> bool:
+        """本次請求是否注入錯誤"""
+        if not self.error_rate or self.error_count == 0:
+            return False
+        if self.error_route is not None:
+            method, path = self.error_route
+            if request.path != path or (method is not None and request.method != method):
+                return False
+        if self._random.random() >= self.error_rate:
+            return False
+        if self.error_count is not None:
+            self.error_count -= 1
+        return True
+
+    def _now_ms(self) -> int:
+        """伺服器時間（毫秒，含模擬的時鐘偏移）"""
+        return int(time.time() * 1000) + self.clock_offset_ms
+
+    # ==================== 路由 ====================
+
+    def _build_app(self) -> web.Application:
+        routes = [
+            ('GET', '/api/v3/ping', self._ping, False),
+            ('GET', '/api/v3/time', self._time, False),
+            ('GET', '/api/v3/exchangeInfo', self._exchange_info, False),
+            ('GET', '/api/v3/depth', self._depth, False),
+            ('GET', '/api/v3/trades', self._trades, False),
+            ('GET', '/api/v3/klines', self._klines, False),
+            ('GET', '/api/v3/ticker/24hr', self._ticker_24hr, False),
+            ('GET', '/api/v3/account', self._account, True),
+            ('POST', '/api/v3/order', self._new_order, True),
+            ('POST', '/api/v3/order/test', self._test_order, True),
+            ('GET', '/api/v3/order', self._query_order, True),
+            ('DELETE', '/api/v3/order', self._cancel_order, True),
+            ('GET', '/api/v3/openOrders', self._open_orders, True),
+            ('DELETE', '/api/v3/openOrders', self._cancel_open_orders, True),
+            ('GET', '/api/v3/allOrders', self._all_orders, True),
+            ('POST', '/api/v3/userDataStream', self._new_listen_key, API_KEY_ONLY),
+            ('PUT', '/api/v3/userDataStream', self._keepalive_listen_key, API_KEY_ONLY),
+            ('DELETE', '/api/v3/userDataStream', self._close_listen_key, API_KEY_ONLY),
+        ]
+        app = web.Application()
+        for method, path, handler, signed in routes:
+            app.router.add_route(method, path, self._wrap(handler, signed))
+
+        handlers = {(method, path): (handler, signed) for method, path, handler, signed in routes}
+        self._ws_api_routes = {
+            ws_method: (method, path) + handlers[(method, path)]
+            for (method, path), ws_method in WS_API_METHODS.items()
+        }
+        app.router.add_get('/ws-api/v3', self._ws_api_endpoint)
+        app.router.add_get('/ws', self._ws_endpoint)
+        app.router.add_get('/ws/{streams:.+}', self._ws_endpoint)
+        app.router.add_get('/stream', self._ws_endpoint)
+        app.on_shutdown.append(lambda app: self._close_ws_connections())
+        return app
+
+    def _wrap(self, handler, signed):
+        async def endpoint(request: web.Request) -> web.Response:
+            self.request_count += 1
+            body = await request.text() if request.can_read_body else ''
+            total_params = request.query_string + ('&' if request.query_string and body else '') + body
+            params = dict(parse_qsl(total_params, keep_blank_values=True))
+
+            weight = request_weight(request.method, request.path, params)
+            headers = self._track_weight(weight, is_order=is_order_request(request.method, request.path))
+
+            if self.latency or self.latency_jitter:
+                await asyncio.sleep(self.latency + self._random.uniform(0, self.latency_jitter))
+
+            try:
+                if self.weight_limit is not None and self._used_weight > self.weight_limit:
+                    headers['Retry-After'] = str(60 - int(time.time()) % 60)
+                    raise _ApiError(429, -1003, 'Too much request weight used; please use the websocket for live updates to avoid polling the API.')
+                inject = self._inject_error(request)
+                if inject and self.error_status == 429:
+                    headers['Retry-After'] = '1'
+                if inject and not self.error_after:
+                    raise _ApiError(self.error_status, -1000, 'An unknown error occurred while processing the request.')
+                if signed == API_KEY_ONLY:
+                    self._check_api_key(request.headers.get('X-MBX-APIKEY'))
+                elif signed:
+                    self._verify_signature(request, total_params, params)
+                payload = handler(params)
+                if inject:
+                    # 已執行，但客戶端收不到結果
+                    raise _ApiError(self.error_status, -1000, 'Internal error; unable to process your request. Please try again.')
+                return web.json_response(payload, headers=headers)
+            except _ApiError as e:
+                return web.json_response({'code': e.code, 'msg': e.msg}, status=e.status, headers=headers)
+
+        return endpoint
+
+    # ==================== WebSocket 串流 ====================
+
+    async def _ws_endpoint(self, request: web.Request) -> web.WebSocketResponse:
+        """
+        /ws/<stream> 為原始格式，/stream?streams=a/b 為組合格式 {"stream", "data"}；
+        兩者都支援 SUBSCRIBE / UNSUBSCRIBE / LIST_SUBSCRIPTIONS
+        """
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        combined = request.path == '/stream'
+        raw_streams = request.query.get('streams', '') if combined else request.match_info.get('streams', '')
+        connection = _WsConnection(ws, combined, {s for s in raw_streams.split('/') if s})
+        self._ws_connections.add(connection)
+        writer = asyncio.ensure_future(connection.write_loop())
+        try:
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                try:
+                    command = json.loads(message.data)
+                    method, params, request_id = command['method'], command.get('params', []), command.get('id')
+                except (ValueError, KeyError, TypeError):
+                    connection.queue.put_nowait({'error': {'code': 3, 'msg': 'Invalid JSON'}})
+                    continue
+                if method == 'SUBSCRIBE':
+                    connection.streams.update(params)
+                    result = None
+                elif method == 'UNSUBSCRIBE':
+                    connection.streams.difference_update(params)
+                    result = None
+                elif method == 'LIST_SUBSCRIPTIONS':
+                    result = sorted(connection.streams)
+                else:
+                    connection.queue.put_nowait({'error': {'code': 2, 'msg': f'Invalid request: unknown method {method}'}, 'id': request_id})
+                    continue
+                connection.queue.put_nowait({'result': result, 'id': request_id})
+        finally:
+            self._ws_connections.discard(connection)
+            writer.cancel()
+        return ws
+
+    def publish(self, stream: str, data: dict):
+        """
+        推送串流訊息給所有訂閱者（可從任何執行緒呼叫）
+
+        Args:
+            stream: 串流名稱（例如 btcusdt@trade）
+            data: 事件內容
+        """
+        if self._loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._broadcast(stream, data)
+        else:
+            self._loop.call_soon_threadsafe(self._broadcast, stream, data)
+
+    def _broadcast(self, stream: str, data: dict):
+        for connection in list(self._ws_connections):
+            if stream in connection.streams:
+                connection.queue.put_nowait({'stream': stream, 'data': data} if connection.combined else data)
+
+    # ==================== WebSocket API ====================
+
+    async def _ws_api_endpoint(self, request: web.Request) -> web.WebSocketResponse:
+        """WebSocket API：每個請求獨立處理，響應以 id 對應，可能不依送出順序返回"""
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        connection = _WsConnection(ws, combined=False, streams=set())
+        self._ws_connections.add(connection)
+        writer = asyncio.ensure_future(connection.write_loop())
+        calls = set()
+        try:
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                call = asyncio.ensure_future(self._ws_api_call(message.data, connection))
+                calls.add(call)
+                call.add_done_callback(calls.discard)
+        finally:
+            self._ws_connections.discard(connection)
+            for call in calls:
+                call.cancel()
+            writer.cancel()
+        return ws
+
+    async def _ws_api_call(self, data: str, connection: _WsConnection):
+        self.request_count += 1
+        request_id = None
+        headers: Dict[str, str] = {}
+        try:
+            try:
+                command = json.loads(data)
+                request_id = command.get('id')
+                method = command['method']
+                raw_params = command.get('params') or {}
+            except (ValueError, KeyError, TypeError, AttributeError):
+                raise _ApiError(400, -1102, 'Malformed request.')
+            if method not in self._ws_api_routes:
+                raise _ApiError(400, -1102, f"Unknown method '{method}'.")
+
+            rest_method, path, handler, signed = self._ws_api_routes[method]
+            params = {key: str(value) for key, value in raw_params.items() if key not in ('apiKey', 'signature')}
+            headers = self._track_weight(
+                request_weight(rest_method, path, params), is_order=is_order_request(rest_method, path)
+            )
+            if self.latency or self.latency_jitter:
+                await asyncio.sleep(self.latency + self._random.uniform(0, self.latency_jitter))
+
+            if self.weight_limit is not None and self._used_weight > self.weight_limit:
+                retry_after = (int(time.time()) // 60 + 1) * 60 * 1000
+                raise _ApiError(429, -1003, 'Too much request weight used.', {'retryAfter': retry_after})
+            if signed:
+                payload = urlencode(sorted((k, v) for k, v in raw_params.items() if k != 'signature'))
+                signed_params = dict(params)
+                if 'signature' in raw_params:
+                    signed_params['signature'] = str(raw_params['signature'])
+                self._check_signature(raw_params.get('apiKey'), payload, signed_params)
+            response = {'id': request_id, 'status': 200, 'result': handler(params)}
+        except _ApiError as e:
+            error = {'code': e.code, 'msg': e.msg}
+            if e.data:
+                error['data'] = e.data
+            response = {'id': request_id, 'status': e.status, 'error': error}
+        response['rateLimits'] = self._rate_limits(headers)
+        connection.queue.put_nowait(response)
+
+    @staticmethod
+    def _rate_limits(headers: Dict[str, str]) -> List[dict]:
+        """以 WebSocket API 的 rateLimits 格式回報用量"""
+        limits = []
+        if 'X-MBX-USED-WEIGHT-1M' in headers:
+            limits.append({'rateLimitType': 'REQUEST_WEIGHT', 'interval': 'MINUTE', 'intervalNum': 1,
+                           'limit': 6000, 'count': int(headers['X-MBX-USED-WEIGHT-1M'])})
+        if 'X-MBX-ORDER-COUNT-10S' in headers:
+            limits.append({'rateLimitType': 'ORDERS', 'interval': 'SECOND', 'intervalNum': 10,
+                           'limit': 100, 'count': int(headers['X-MBX-ORDER-COUNT-10S'])})
+            limits.append({'rateLimitType': 'ORDERS', 'interval': 'DAY', 'intervalNum': 1,
+                           'limit': 200000, 'count': int(headers['X-MBX-ORDER-COUNT-1D'])})
+        return limits
+
+    async def _close_ws_connections(self):
+        for connection in list(self._ws_connections):
+            await connection.ws.close(code=1001, message=b'going away')
+
+    def drop_ws_connections(self):
+        """中斷所有 WebSocket 連線（模擬伺服器斷線）"""
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._close_ws_connections(), self._loop).result()
+
+    def _publish_book(self, state: _SymbolState, bid_prices, ask_prices):
+        """撮合簿變動後推送 depthUpdate 與 bookTicker"""
+        if not self._ws_connections:
+            return
+        symbol = state.symbol.lower()
+        event = {
+            'e': 'depthUpdate',
+            'E': self._now_ms(),
+            's': state.symbol,
+            'U': state.update_id,
+            'u': state.update_id,
+            'b': [[f"{p:f}", f"{state.bids.quantity(p):f}"] for p in sorted(set(bid_prices), reverse=True)],
+            'a': [[f"{p:f}", f"{state.asks.quantity(p):f}"] for p in sorted(set(ask_prices))]
+        }
+        self._broadcast(f"{symbol}@depth", event)
+        self._broadcast(f"{symbol}@depth@100ms", event)
+
+        bid, ask = state.bids.best(), state.asks.best()
+        self._broadcast(f"{symbol}@bookTicker", {
+            'u': state.update_id,
+            's': state.symbol,
+            'b': f"{bid or 0:f}", 'B': f"{state.bids.quantity(bid) if bid else 0:f}",
+            'a': f"{ask or 0:f}", 'A': f"{state.asks.quantity(ask) if ask else 0:f}"
+        })
+
+    def _report(self, order: dict, exec_type: str, last_qty: Decimal = Decimal(0),
+                last_price: Decimal = Decimal(0), trade_id: int = -1, maker: bool = False):
+        """訂單狀態變動時推送 executionReport 到用戶數據流"""
+        if self.listen_key is None or not self._ws_connections:
+            return
+        self._broadcast(self.listen_key, {
+            'e': 'executionReport',
+            'E': self._now_ms(),
+            's': order['symbol'],
+            'c': order['clientOrderId'],
+            'S': order['side'],
+            'o': order['type'],
+            'f': order['timeInForce'],
+            'q': order['origQty'],
+            'p': order['price'],
+            'P': '0',
+            'F': '0',
+            'g': -1,
+            'C': order['clientOrderId'] if exec_type == 'CANCELED' else '',
+            'x': exec_type,
+            'X': order['status'],
+            'r': 'NONE',
+            'i': order['orderId'],
+            'l': f"{last_qty:f}",
+            'z': order['executedQty'],
+            'L': f"{last_price:f}",
+            'n': '0',
+            'N': None,
+            'T': order['updateTime'],
+            't': trade_id,
+            'w': order['status'] in ('NEW', 'PARTIALLY_FILLED'),
+            'm': maker,
+            'M': False,
+            'O': order['time'],
+            'Z': order['cummulativeQuoteQty'],
+            'Y': f"{last_qty * last_price:f}",
+            'Q': '0'
+        })
+
+    # ==================== 權重與簽名 ====================
+
+    def _track_weight(self, weight: int, is_order: bool) -> Dict[str, str]:
+        now = int(time.time())
+        minute = now // 60
+        if minute != self._weight_window:
+            self._weight_window = minute
+            self._used_weight = 0
+        self._used_weight += weight
+        headers = {'X-MBX-USED-WEIGHT-1M': str(self._used_weight)}
+
+        if is_order:
+            window = now // 10
+            if window != self._order_window_10s:
+                self._order_window_10s = window
+                self._order_count_10s = 0
+            self._order_count_10s += 1
+            self._order_count_1d += 1
+            headers['X-MBX-ORDER-COUNT-10S'] = str(self._order_count_10s)
+            headers['X-MBX-ORDER-COUNT-1D'] = str(self._order_count_1d)
+        return headers
+
+    def _verify_signature(self, request: web.Request, total_params: str, params: Dict[str, str]):
+        payload = '&'.join(part for part in total_params.split('&') if not part.startswith('signature='))
+        self._check_signature(request.headers.get('X-MBX-APIKEY'), payload, params)
+
+    def _check_api_key(self, api_key: Optional[str]):
+        if api_key != self.api_key:
+            raise _ApiError(401, -2015, 'Invalid API-key, IP, or permissions for action.')
+
+    def _check_signature(self, api_key: Optional[str], payload: str, params: Dict[str, str]):
+        self._check_api_key(api_key)
+        if 'signature' not in params:
+            raise _ApiError(400, -1102, "Mandatory parameter 'signature' was not sent, was empty/null, or malformed.")
+        if 'timestamp' not in params:
+            raise _ApiError(400, -1102, "Mandatory parameter 'timestamp' was not sent, was empty/null, or malformed.")
+
+        expected = hmac.new(self.secret_key.encode('utf-8'), payload.encode('utf-8'), hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(expected, params['signature']):
+            raise _ApiError(401, -1022, 'Signature for this request is not valid.')
+
+        timestamp = self._integer(params, 'timestamp')
+        recv_window = self._integer(params, 'recvWindow', 5000)
+        now = self._now_ms()
+        if timestamp < now - recv_window or timestamp > now + 1000:
+            raise _ApiError(400, -1021, "Timestamp for this request is outside of the recvWindow.")
+
+    # ==================== 參數工具 ====================
+
+    def _symbol(self, params: Dict[str, str], required: bool = True) -> Optional[_SymbolState]:
+        symbol = params.get('symbol')
+        if symbol is None:
+            if required:
+                raise _ApiError(400, -1102, "Mandatory parameter 'symbol' was not sent, was empty/null, or malformed.")
+            return None
+        if not SYMBOL_PATTERN.match(symbol):
+            raise _ApiError(400, -1100, "Illegal characters found in parameter 'symbol'; legal range is '^[A-Z0-9-_.]{1,20}$'.")
+        if symbol not in self.symbols:
+            raise _ApiError(400, -1121, 'Invalid symbol.')
+        return self.symbols[symbol]
+
+    @staticmethod
+    def _decimal(params: Dict[str, str], name: str) -> Optional[Decimal]:
+        value = params.get(name)
+        if value is None:
+            return None
+        try:
+            number = Decimal(value)
+        except ArithmeticError:
+            raise _ApiError(400, -1100, f"Illegal characters found in parameter '{name}'.")
+        if not number.is_finite() or number <= 0:
+            raise _ApiError(400, -1100, f"Illegal characters found in parameter '{name}'; legal range is '^([0-9]{{1,20}})(\\.[0-9]{{1,20}})?$'.")
+        return number
+
+    @staticmethod
+    def _integer(params: Dict[str, str], name: str, default: Optional[int] = None) -> int:
+        value = params.get(name)
+        if value is None and default is not None:
+            return default
+        if not value:
+            raise _ApiError(400, -1102, f"Mandatory parameter '{name}' was not sent, was empty/null, or malformed.")
+        try:
+            return int(value)
+        except ValueError:
+            raise _ApiError(400, -1100, f"Illegal characters found in parameter '{name}'; legal range is '^[0-9]{{1,20}}$'.")
+
+    @staticmethod
+    def _limit(params: Dict[str, str], default: int, maximum: int) -> int:
+        try:
+            limit = int(params.get('limit', default))
+        except ValueError:
+            raise _ApiError(400, -1100, "Illegal characters found in parameter 'limit'.")
+        return max(1, min(limit, maximum))
+
+    # ==================== 公開端點 ====================
+
+    def _ping(self, params: Dict[str, str]) -> dict:
+        return {}
+
+    def _time(self, params: Dict[str, str]) -> dict:
+        return {'serverTime': self._now_ms()}
+
+    def _exchange_info(self, params: Dict[str, str]) -> dict:
+        state = self._symbol(params, required=False)
+        states = [state] if state else list(self.symbols.values())
+        return {
+            'timezone': 'UTC',
+            'serverTime': self._now_ms(),
+            'rateLimits': [
+                {'rateLimitType': 'REQUEST_WEIGHT', 'interval': 'MINUTE', 'intervalNum': 1, 'limit': 6000},
+                {'rateLimitType': 'ORDERS', 'interval': 'SECOND', 'intervalNum': 10, 'limit': 100},
+                {'rateLimitType': 'ORDERS', 'interval': 'DAY', 'intervalNum': 1, 'limit': 200000},
+            ],
+            'exchangeFilters': [],
+            'symbols': [self._symbol_info(s) for s in states]
+        }
+
+    @staticmethod
+    def _symbol_info(state: _SymbolState) -> dict:
+        return {
+            'symbol': state.symbol,
+            'status': 'TRADING',
+            'baseAsset': state.base_asset,
+            'baseAssetPrecision': 8,
+            'quoteAsset': state.quote_asset,
+            'quotePrecision': 8,
+            'quoteAssetPrecision': 8,
+            'orderTypes': ['LIMIT', 'LIMIT_MAKER', 'MARKET'],
+            'isSpotTradingAllowed': True,
+            'filters': [
+                {'filterType': 'PRICE_FILTER', 'minPrice': f"{state.tick:f}",
+                 'maxPrice': '1000000.00000000', 'tickSize': f"{state.tick:f}"},
+                {'filterType': 'LOT_SIZE', 'minQty': f"{state.step:f}",
+                 'maxQty': '9000.00000000', 'stepSize': f"{state.step:f}"},
+                {'filterType': 'MARKET_LOT_SIZE', 'minQty': '0.00000000',
+                 'maxQty': '100.00000000', 'stepSize': '0.00000000'},
+                {'filterType': 'NOTIONAL', 'minNotional': '5.00000000', 'applyMinToMarket': True,
+                 'maxNotional': '9000000.00000000', 'applyMaxToMarket': False, 'avgPriceMins': 5},
+            ],
+            'permissions': ['SPOT']
+        }
+
+    def _depth(self, params: Dict[str, str]) -> dict:
+        state = self._symbol(params)
+        limit = self._limit(params, 100, 5000)
+        return {
+            'lastUpdateId': state.update_id,
+            'bids': state.bids.depth(limit),
+            'asks': state.asks.depth(limit)
+        }
+
+    def _trades(self, params: Dict[str, str]) -> list:
+        state = self._symbol(params)
+        limit = self._limit(params, 500, 1000)
+        return list(state.trades)[-limit:]
+
+    def _klines(self, params: Dict[str, str]) -> list:
+        state = self._symbol(params)
+        interval = params.get('interval')
+        if interval not in INTERVAL_MS:
+            raise _ApiError(400, -1120, 'Invalid interval.')
+        interval_ms = INTERVAL_MS[interval]
+        limit = self._limit(params, 500, 1000)
+        now = self._now_ms()
+        last_open = now - now % interval_ms
+
+        end_time = min(int(params['endTime']), now) if 'endTime' in params else now
+        if 'startTime' in params:
+            start = int(params['startTime'])
+            first_open = start + (-start) % interval_ms
+        else:
+            last = end_time - end_time % interval_ms
+            first_open = last - (limit - 1) * interval_ms
+
+        rows = []
+        open_time = first_open
+        while len(rows) < limit and open_time <= min(end_time, last_open):
+            rows.append(self._kline_row(state, open_time, interval_ms))
+            open_time += interval_ms
+        return rows
+
+    @staticmethod
+    def _kline_row(state: _SymbolState, open_time: int, interval_ms: int) -> list:
+        """依開盤時間產生確定性的 K 線，分頁查詢結果可重現"""
+        n = open_time // interval_ms
+        base = float(state.reference_price)
+
+        def noise(k: int) -> float:
+            return ((k * 2654435761) % 10007) / 10007 - 0.5
+
+        open_price = base * (1 + 0.02 * noise(n))
+        close_price = base * (1 + 0.02 * noise(n + 1))
+        high = max(open_price, close_price) * (1 + 0.002 * abs(noise(n * 7)))
+        low = min(open_price, close_price) * (1 - 0.002 * abs(noise(n * 13)))
+        volume = 10 + 100 * abs(noise(n * 3))
+        trades = 100 + int(1000 * abs(noise(n * 5)))
+        return [
+            open_time, f"{open_price:.2f}", f"{high:.2f}", f"{low:.2f}", f"{close_price:.2f}",
+            f"{volume:.5f}", open_time + interval_ms - 1, f"{volume * close_price:.5f}",
+            trades, f"{volume / 2:.5f}", f"{volume * close_price / 2:.5f}", '0'
+        ]
+
+    def _ticker_24hr(self, params: Dict[str, str]):
+        state = self._symbol(params, required=False)
+        if state:
+            return self._ticker(state)
+        return [self._ticker(s) for s in self.symbols.values()]
+
+    def _ticker(self, state: _SymbolState) -> dict:
+        now = self._now_ms()
+        last = state.trades[-1]['price'] if state.trades else f"{state.reference_price:f}"
+        open_price = state.reference_price
+        change = Decimal(last) - open_price
+        return {
+            'symbol': state.symbol,
+            'priceChange': f"{change:f}",
+            'priceChangePercent': f"{change / open_price * 100:.3f}",
+            'weightedAvgPrice': f"{open_price:f}",
+            'prevClosePrice': f"{open_price:f}",
+            'lastPrice': last,
+            'lastQty': state.trades[-1]['qty'] if state.trades else '0',
+            'bidPrice': f"{state.bids.best() or 0:f}",
+            'askPrice': f"{state.asks.best() or 0:f}",
+            'openPrice': f"{open_price:f}",
+            'highPrice': f"{open_price * Decimal('1.02'):f}",
+            'lowPrice': f"{open_price * Decimal('0.98'):f}",
+            'volume': '1000.00000000',
+            'quoteVolume': f"{open_price * 1000:f}",
+            'openTime': now - 86_400_000,
+            'closeTime': now,
+            'firstId': state.trades[0]['id'] if state.trades else -1,
+            'lastId': state.trades[-1]['id'] if state.trades else -1,
+            'count': len(state.trades)
+        }
+
+    # ==================== 需要簽名的端點 ====================
+
+    def _account(self, params: Dict[str, str]) -> dict:
+        return {
+            'makerCommission': 0,
+            'takerCommission': 0,
+            'canTrade': True,
+            'canWithdraw': False,
+            'canDeposit': False,
+            'updateTime': self._now_ms(),
+            'accountType': 'SPOT',
+            'balances': [
+                {'asset': asset, 'free': f"{amount:f}", 'locked': '0.00000000'}
+                for asset, amount in sorted(self.balances.items())
+            ],
+            'permissions': ['SPOT']
+        }
+
+    def _validate_order(self, params: Dict[str, str]) -> tuple:
+        state = self._symbol(params)
+        side = params.get('side')
+        order_type = params.get('type')
+        if side not in ('BUY', 'SELL'):
+            raise _ApiError(400, -1102, "Mandatory parameter 'side' was not sent, was empty/null, or malformed.")
+        if order_type not in ('LIMIT', 'LIMIT_MAKER', 'MARKET'):
+            raise _ApiError(400, -1116, 'Invalid orderType.')
+
+        quantity = self._decimal(params, 'quantity')
+        quote_qty = self._decimal(params, 'quoteOrderQty')
+        price = self._decimal(params, 'price')
+
+        if order_type == 'MARKET':
+            if quantity is None and quote_qty is None:
+                raise _ApiError(400, -1102, "Param 'quantity' or 'quoteOrderQty' must be sent, but both were empty/null!")
+        else:
+            if quantity is None:
+                raise _ApiError(400, -1102, "Mandatory parameter 'quantity' was not sent, was empty/null, or malformed.")
+            if price is None:
+                raise _ApiError(400, -1102, "Mandatory parameter 'price' was not sent, was empty/null, or malformed.")
+            if order_type == 'LIMIT' and 'timeInForce' not in params:
+                raise _ApiError(400, -1102, "Mandatory parameter 'timeInForce' was not sent, was empty/null, or malformed.")
+        return state, side, order_type, quantity, quote_qty, price
+
+    def _test_order(self, params: Dict[str, str]) -> dict:
+        self._validate_order(params)
+        return {}
+
+    def _new_order(self, params: Dict[str, str]) -> dict:
+        state, side, order_type, quantity, quote_qty, price = self._validate_order(params)
+        client_order_id = params.get('newClientOrderId') or f"local{self.next_order_id:016d}"
+        for existing in self.orders.values():
+            if existing['clientOrderId'] == client_order_id and existing['status'] in ('NEW', 'PARTIALLY_FILLED'):
+                raise _ApiError(400, -2010, 'Duplicate order sent.')
+
+        now = self._now_ms()
+        opposite = state.asks if side == 'BUY' else state.bids
+        if order_type == 'MARKET':
+            limit_price = Decimal('Infinity') if side == 'BUY' else Decimal(0)
+            if quantity is None:
+                best = opposite.best() or state.reference_price
+                quantity = (quote_qty / best).quantize(state.step, rounding='ROUND_DOWN')
+        else:
+            limit_price = price
+            if order_type == 'LIMIT_MAKER':
+                best = opposite.best()
+                if best is not None and (best <= price if side == 'BUY' else best >= price):
+                    raise _ApiError(400, -2010, 'Order would immediately match and take.')
+
+        order = {
+            'symbol': state.symbol,
+            'orderId': self.next_order_id,
+            'orderListId': -1,
+            'clientOrderId': client_order_id,
+            'transactTime': now,
+            'price': f"{price or Decimal(0):f}",
+            'origQty': f"{quantity:f}",
+            'executedQty': '0',
+            'cummulativeQuoteQty': '0',
+            'status': 'NEW',
+            'timeInForce': params.get('timeInForce', 'GTC'),
+            'type': order_type,
+            'side': side,
+            'time': now,
+            'updateTime': now,
+            'isWorking': True,
+            'workingTime': now,
+            'fills': []
+        }
+        self.next_order_id += 1
+        self.orders[order['orderId']] = order
+        self._report(order, 'NEW')
+
+        fills = opposite.consume(limit_price, quantity)
+        self._apply_fills(state, order, fills, taker=True)
+
+        own_prices = []
+        remaining = quantity - Decimal(order['executedQty'])
+        if remaining > 0:
+            if order_type == 'MARKET' or order['timeInForce'] in ('IOC', 'FOK'):
+                order['status'] = 'EXPIRED'
+                self._report(order, 'EXPIRED')
+            else:
+                own_side = state.bids if side == 'BUY' else state.asks
+                own_side.add(price, remaining, order)
+                own_prices.append(price)
+
+        state.update_id += 1
+        fill_prices = [fill[0] for fill in fills]
+        if side == 'BUY':
+            self._publish_book(state, own_prices, fill_prices)
+        else:
+            self._publish_book(state, fill_prices, own_prices)
+        response = dict(order)
+        response.pop('time')
+        response.pop('updateTime')
+        response.pop('isWorking')
+        return response
+
+    def _apply_fills(self, state: _SymbolState, order: dict, fills: List[tuple], taker: bool):
+        now = self._now_ms()
+        for price, qty, resting in fills:
+            trade_id = state.next_trade_id
+            self._fill(order, price, qty, now)
+            if taker:
+                order['fills'].append({
+                    'price': f"{price:f}",
+                    'qty': f"{qty:f}",
+                    'commission': '0.00000000',
+                    'commissionAsset': state.quote_asset,
+                    'tradeId': trade_id
+                })
+            self._report(order, 'TRADE', qty, price, trade_id, maker=not taker)
+            if resting is not None:
+                self._fill(resting, price, qty, now)
+                self._report(resting, 'TRADE', qty, price, trade_id, maker=True)
+            state.record_trade(price, qty, now, buyer_maker=order['side'] == 'SELL')
+            if self._ws_connections:
+                trade = state.trades[-1]
+                self._broadcast(f"{state.symbol.lower()}@trade", {
+                    'e': 'trade', 'E': now, 's': state.symbol, 't': trade['id'],
+                    'p': trade['price'], 'q': trade['qty'], 'T': now,
+                    'm': trade['isBuyerMaker'], 'M': True
+                })
+
+    def _fill(self, order: dict, price: Decimal, qty: Decimal, now: int):
+        executed = Decimal(order['executedQty']) + qty
+        order['executedQty'] = f"{executed:f}"
+        order['cummulativeQuoteQty'] = f"{Decimal(order['cummulativeQuoteQty']) + price * qty:f}"
+        order['status'] = 'FILLED' if executed >= Decimal(order['origQty']) else 'PARTIALLY_FILLED'
+        order['updateTime'] = now
+
+        state = self.symbols[order['symbol']]
+        sign = 1 if order['side'] == 'BUY' else -1
+        self.balances[state.base_asset] = self.balances.get(state.base_asset, Decimal(0)) + sign * qty
+        self.balances[state.quote_asset] = self.balances.get(state.quote_asset, Decimal(0)) - sign * price * qty
+
+    def _find_order(self, params: Dict[str, str], state: _SymbolState, error_code: int, error_msg: str) -> dict:
+        order = None
+        if 'orderId' in params:
+            order = self.orders.get(int(params['orderId']))
+        elif 'origClientOrderId' in params:
+            order = next(
+                (o for o in self.orders.values() if o['clientOrderId'] == params['origClientOrderId']),
+                None
+            )
+        else:
+            raise _ApiError(400, -1102, "Param 'origClientOrderId' or 'orderId' must be sent, but both were empty/null!")
+        if order is None or order['symbol'] != state.symbol:
+            raise _ApiError(400, error_code, error_msg)
+        return order
+
+    @staticmethod
+    def _order_view(order: dict) -> dict:
+        view = dict(order)
+        view.pop('fills')
+        view.pop('transactTime')
+        return view
+
+    def _query_order(self, params: Dict[str, str]) -> dict:
+        state = self._symbol(params)
+        order = self._find_order(params, state, -2013, 'Order does not exist.')
+        return self._order_view(order)
+
+    def _cancel_order(self, params: Dict[str, str]) -> dict:
+        state = self._symbol(params)
+        order = self._find_order(params, state, -2011, 'Unknown order sent.')
+        if order['status'] not in ('NEW', 'PARTIALLY_FILLED'):
+            raise _ApiError(400, -2011, 'Unknown order sent.')
+
+        own_side = state.bids if order['side'] == 'BUY' else state.asks
+        own_side.remove_order(order)
+        order['status'] = 'CANCELED'
+        order['updateTime'] = self._now_ms()
+        self._report(order, 'CANCELED')
+        state.update_id += 1
+        price = Decimal(order['price'])
+        if order['side'] == 'BUY':
+            self._publish_book(state, [price], [])
+        else:
+            self._publish_book(state, [], [price])
+
+        view = self._order_view(order)
+        view['origClientOrderId'] = order['clientOrderId']
+        return view
+
+    def _cancel_open_orders(self, params: Dict[str, str]) -> list:
+        state = self._symbol(params)
+        orders = [
+            o for o in self.orders.values()
+            if o['symbol'] == state.symbol and o['status'] in ('NEW', 'PARTIALLY_FILLED')
+        ]
+        if not orders:
+            raise _ApiError(400, -2011, 'Unknown order sent.')
+
+        now = self._now_ms()
+        bid_prices, ask_prices = [], []
+        canceled = []
+        for order in orders:
+            own_side = state.bids if order['side'] == 'BUY' else state.asks
+            own_side.remove_order(order)
+            order['status'] = 'CANCELED'
+            order['updateTime'] = now
+            self._report(order, 'CANCELED')
+            (bid_prices if order['side'] == 'BUY' else ask_prices).append(Decimal(order['price']))
+            view = self._order_view(order)
+            view['origClientOrderId'] = order['clientOrderId']
+            canceled.append(view)
+        state.update_id += 1
+        self._publish_book(state, bid_prices, ask_prices)
+        return canceled
+
+    def _open_orders(self, params: Dict[str, str]) -> list:
+        state = self._symbol(params, required=False)
+        return [
+            self._order_view(o) for o in self.orders.values()
+            if o['status'] in ('NEW', 'PARTIALLY_FILLED') and (state is None or o['symbol'] == state.symbol)
+        ]
+
+    def _all_orders(self, params: Dict[str, str]) -> list:
+        state = self._symbol(params)
+        limit = self._limit(params, 500, 1000)
+        orders = [self._order_view(o) for o in self.orders.values() if o['symbol'] == state.symbol]
+        return orders[-limit:]
+
+    # ==================== 用戶數據流 ====================
+
+    def _new_listen_key(self, params: Dict[str, str]) -> dict:
+        now = self._now_ms()
+        if self.listen_key is None or self._listen_key_expiry < now:
+            self.listen_key = secrets.token_hex(30)
+        self._listen_key_expiry = now + LISTEN_KEY_TTL_MS
+        return {'listenKey': self.listen_key}
+
+    def _check_listen_key(self, params: Dict[str, str]):
+        if 'listenKey' not in params:
+            raise _ApiError(400, -1102, "Mandatory parameter 'listenKey' was not sent, was empty/null, or malformed.")
+        if params['listenKey'] != self.listen_key or self._listen_key_expiry < self._now_ms():
+            raise _ApiError(400, -1125, 'This listenKey does not exist.')
+
+    def _keepalive_listen_key(self, params: Dict[str, str]) -> dict:
+        self._check_listen_key(params)
+        self._listen_key_expiry = self._now_ms() + LISTEN_KEY_TTL_MS
+        return {}
+
+    def _close_listen_key(self, params: Dict[str, str]) -> dict:
+        self._check_listen_key(params)
+        listen_key, self.listen_key = self.listen_key, None
+        for connection in list(self._ws_connections):
+            if listen_key in connection.streams:
+                asyncio.ensure_future(connection.ws.close(code=1000, message=b'listenKey closed'))
+        return {}
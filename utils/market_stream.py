@@ -0,0 +1,334 @@
+"""
+WebSocket 市場數據串流
+以組合串流（/stream）多工訂閱多個交易對的 trade / aggTrade / kline / bookTicker / depth，
+超過單一連線的串流上限時自動分散到多條連線，斷線後重新連線並重新訂閱；
+訊息經有界佇列交給非同步消費者，佇列滿時依策略阻塞或丟棄最舊訊息
+"""
+import asyncio
+import itertools
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import websockets
+
+from config import Config
+from utils.models import loads
+
+logger = logging.getLogger(__name__)
+
+# Binance 單一連線最多 1024 個串流
+MAX_STREAMS_PER_CONNECTION = 1024
+
+OVERFLOW_BLOCK = 'block'
+OVERFLOW_DROP_OLDEST = 'drop_oldest'
+
+
+# ==================== 串流名稱 ====================
+
+def trade_stream(symbol: str) -> str:
+    """逐筆成交"""
+    return f"{symbol.lower()}@trade"
+
+
+def agg_trade_stream(symbol: str) -> str:
+    """歸集成交"""
+    return f"{symbol.lower()}@aggTrade"
+
+
+def kline_stream(symbol: str, interval: str) -> str:
+    """K 線"""
+    return f"{symbol.lower()}@kline_{interval}"
+
+
+def book_ticker_stream(symbol: str) -> str:
+    """最佳掛單"""
+    return f"{symbol.lower()}@bookTicker"
+
+
+def depth_stream(symbol: str, levels: int = None, speed: str = '100ms') -> str:
+    """
+    深度串流
+
+    Args:
+        symbol: 交易對
+        levels: 有限檔位（5, 10, 20），None 表示增量深度
+        speed: 推送頻率（100ms 或 1000ms）
+    """
+    stream = f"{symbol.lower()}@depth{levels or ''}"
+    return f"{stream}@100ms" if speed == '100ms' else stream
+
+
+def combined_base_url(ws_url: str) -> str:
+    """由原始串流 URL（.../ws）推得組合串流 URL（.../stream）"""
+    base = ws_url.rstrip('/')
+    if base.endswith('/ws'):
+        base = base[:-3]
+    return f"{base}/stream"
+
+
+# ==================== 訂閱 ====================
+
+class Subscription:
+    """
+    一組串流的訊息佇列
+
+    訊息為組合串流格式 {'stream': 名稱, 'data': 事件}：
+
+        async for message in subscription:
+            handle(message['stream'], message['data'])
+    """
+
+    def __init__(self, stream: 'MarketStream', streams: Set[str], maxsize: int, overflow: str):
+        if overflow not in (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST):
+            raise ValueError(f"不支援的佇列策略: {overflow}")
+        self.market_stream = stream
+        self.streams = streams
+        self.overflow = overflow
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    async def put(self, message: Dict[str, Any]):
+        """放入訊息；block 策略會讓讀取該連線的任務等待（背壓）"""
+        if self.overflow == OVERFLOW_BLOCK:
+            await self.queue.put(message)
+            return
+        while True:
+            try:
+                self.queue.put_nowait(message)
+                return
+            except asyncio.QueueFull:
+                self.queue.get_nowait()
+                self.dropped += 1
+
+    async def get(self) -> Dict[str, Any]:
+        """取得下一則訊息"""
+        return await self.queue.get()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        return await self.queue.get()
+
+    async def close(self):
+        """取消訂閱"""
+        await self.market_stream.unsubscribe(self)
+
+
+class _Connection:
+    """單一組合串流連線：維護訂閱集合、斷線重連並重新訂閱"""
+
+    def __init__(self, owner: 'MarketStream', index: int):
+        self.owner = owner
+        self.index = index
+        self.streams: Set[str] = set()
+        self.ws: Optional[Any] = None
+        self.connected = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.reconnects = 0
+        self._ids = itertools.count(1)
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.ensure_future(self._run())
+
+    async def _send(self, method: str, streams: Iterable[str]):
+        if self.ws is None:
+            return
+        params = sorted(streams)
+        if not params and method != 'LIST_SUBSCRIPTIONS':
+            return
+        payload = {'method': method, 'params': params, 'id': next(self._ids)}
+        try:
+            await self.ws.send(json.dumps(payload))
+        except websockets.ConnectionClosed:
+            # 重新連線後會以完整訂閱集合重新訂閱
+            pass
+
+    async def subscribe(self, streams: Iterable[str]):
+        streams = set(streams) - self.streams
+        self.streams.update(streams)
+        await self._send('SUBSCRIBE', streams)
+
+    async def unsubscribe(self, streams: Iterable[str]):
+        streams = set(streams) & self.streams
+        self.streams.difference_update(streams)
+        await self._send('UNSUBSCRIBE', streams)
+
+    async def _run(self):
+        owner = self.owner
+        delay = owner.reconnect_delay
+        while not owner.closed:
+            try:
+                async with websockets.connect(
+                    owner.url,
+                    ping_interval=owner.ping_interval,
+                    ping_timeout=owner.ping_timeout,
+                    max_size=None
+                ) as ws:
+                    self.ws = ws
+                    await self._send('SUBSCRIBE', self.streams)
+                    self.connected.set()
+                    delay = owner.reconnect_delay
+                    logger.info(f"Market stream #{self.index} connected with {len(self.streams)} streams")
+                    async for raw in ws:
+                        message = loads(raw)
+                        stream = message.get('stream')
+                        if stream is None:
+                            if 'error' in message:
+                                logger.error(f"Market stream #{self.index} error: {message['error']}")
+                            continue
+                        await owner._dispatch(stream, message)
+            except (websockets.ConnectionClosed, OSError) as e:
+                logger.warning(f"Market stream #{self.index} disconnected: {e}")
+            finally:
+                self.ws = None
+                self.connected.clear()
+            if owner.closed:
+                break
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, owner.max_reconnect_delay)
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+
+class MarketStream:
+    """
+    市場數據串流管理器
+
+        async with MarketStream() as market:
+            subscription = await market.subscribe(trade_stream('BTCUSDT'), book_ticker_stream('ETHUSDT'))
+            async for message in subscription:
+                ...
+
+    同一串流可由多個 Subscription 訂閱，只會佔用一個連線名額
+    """
+
+    def __init__(
+        self,
+        ws_url: str = None,
+        max_streams_per_connection: int = MAX_STREAMS_PER_CONNECTION,
+        queue_size: int = 10000,
+        overflow: str = OVERFLOW_BLOCK,
+        ping_interval: Optional[float] = 20.0,
+        ping_timeout: Optional[float] = 20.0,
+        reconnect_delay: float = 0.5,
+        max_reconnect_delay: float = 30.0
+    ):
+        """
+        Args:
+            ws_url: WebSocket 基礎 URL（預設 Config.WS_URL）
+            max_streams_per_connection: 單一連線的串流上限
+            queue_size: 每個訂閱的佇列大小
+            overflow: 佇列滿時的策略（block 或 drop_oldest）
+            ping_interval: 客戶端 ping 間隔秒數（伺服器的 ping 會自動回應 pong）
+            ping_timeout: 等待 pong 的逾時秒數
+            reconnect_delay: 首次重連等待秒數（之後指數退避）
+            max_reconnect_delay: 重連等待上限秒數
+        """
+        self.url = combined_base_url(ws_url or Config.WS_URL)
+        self.max_streams_per_connection = max_streams_per_connection
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.closed = False
+
+        self.connections: List[_Connection] = []
+        self._routes: Dict[str, List[Subscription]] = {}
+        self.message_count = 0
+
+    async def subscribe(
+        self,
+        *streams: str,
+        maxsize: int = None,
+        overflow: str = None
+    ) -> Subscription:
+        """
+        訂閱串流
+
+        Args:
+            streams: 串流名稱（見 trade_stream 等函數）
+            maxsize: 佇列大小（預設 queue_size）
+            overflow: 佇列策略（預設 overflow）
+
+        Returns:
+            Subscription
+        """
+        subscription = Subscription(
+            self, set(streams), maxsize or self.queue_size, overflow or self.overflow
+        )
+        new_streams = []
+        for stream in subscription.streams:
+            routes = self._routes.setdefault(stream, [])
+            if not routes:
+                new_streams.append(stream)
+            routes.append(subscription)
+        await self._assign(new_streams)
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription):
+        """取消訂閱；沒有其他訂閱者的串流會從連線上退訂"""
+        unused = set()
+        for stream in subscription.streams:
+            routes = self._routes.get(stream, [])
+            if subscription in routes:
+                routes.remove(subscription)
+            if not routes:
+                self._routes.pop(stream, None)
+                unused.add(stream)
+        for connection in self.connections:
+            await connection.unsubscribe(unused)
+
+    async def _assign(self, streams: List[str]):
+        """將新串流分配到尚有名額的連線，不足時建立新連線"""
+        pending = sorted(streams)
+        while pending:
+            connection = next(
+                (c for c in self.connections if len(c.streams) < self.max_streams_per_connection),
+                None
+            )
+            if connection is None:
+                connection = _Connection(self, len(self.connections))
+                self.connections.append(connection)
+            room = self.max_streams_per_connection - len(connection.streams)
+            batch, pending = pending[:room], pending[room:]
+            await connection.subscribe(batch)
+            connection.start()
+
+    async def _dispatch(self, stream: str, message: Dict[str, Any]):
+        self.message_count += 1
+        for subscription in self._routes.get(stream, ()):
+            await subscription.put(message)
+
+    async def wait_connected(self, timeout: float = None):
+        """等待所有連線建立"""
+        await asyncio.wait_for(
+            asyncio.gather(*(c.connected.wait() for c in self.connections)), timeout
+        )
+
+    @property
+    def reconnects(self) -> int:
+        """累計重連次數"""
+        return sum(c.reconnects for c in self.connections)
+
+    async def close(self):
+        """關閉所有連線"""
+        self.closed = True
+        await asyncio.gather(*(c.close() for c in self.connections))
+
+    async def __aenter__(self) -> 'MarketStream':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
@@ -0,0 +1,545 @@
+"""
+請求延遲量測
+依 (method, endpoint) 以 HDR 風格的對數分桶直方圖記錄延遲，並盡可能拆分為
+排隊 / 連線池等待 / DNS / 連線 / TLS / 首位元組 / 讀取 body 各階段；
+另記錄傳輸位元組、狀態碼與伺服器的權重響應頭。
+快照可輸出為 JSON 或 Prometheus 文字格式，也可註冊自訂輸出格式
+"""
+import json
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Union
+
+import aiohttp
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# 每個 2 的冪次區間再細分為 2^5 個桶，相對誤差約 3%
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+# 以微秒記錄，上限約 19 小時
+MAX_VALUE = (1 << 36) - 1
+
+# 記錄的階段（同步客戶端沒有 pool / dns，非同步客戶端的 connect 包含 TLS）
+PHASES = ('total', 'queue', 'pool', 'dns', 'connect', 'tls', 'ttfb', 'body')
+
+# Prometheus 直方圖的桶上限（秒）
+PROMETHEUS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 權重相關響應頭前綴
+WEIGHT_HEADER_PREFIXES = ('x-mbx-used-weight', 'x-mbx-order-count')
+
+
+def _bucket_index(value: int) -> int:
+    if value < 2 * SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return SUB_BUCKETS * shift + (value >> shift)
+
+
+def _bucket_bounds(index: int) -> tuple:
+    """桶的 [下限, 上限)（微秒）"""
+    if index < 2 * SUB_BUCKETS:
+        return index, index + 1
+    shift = index // SUB_BUCKETS - 1
+    mantissa = index - SUB_BUCKETS * shift
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+BUCKET_COUNT = _bucket_index(MAX_VALUE) + 1
+
+
+def bucket_value(index: int) -> float:
+    """桶的代表值（中點，秒）"""
+    low, high = _bucket_bounds(index)
+    return (low + high - 1) / 2 / 1e6
+
+
+class Histogram:
+    """
+    延遲直方圖
+
+    固定大小的對數-線性分桶，記錄為 O(1)，分位數誤差約 3%；
+    不保存原始樣本，長時間運行的記憶體用量不變
+    """
+
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        """記錄一個樣本（秒）"""
+        value = int(seconds * 1e6)
+        self.counts[_bucket_index(min(max(value, 0), MAX_VALUE))] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: 'Histogram'):
+        """合併另一個直方圖（例如多個程序的結果）"""
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """
+        Args:
+            q: 分位數 (0 ~ 1)
+
+        Returns:
+            延遲秒數（以所在桶的中點估計，並限制在實際的最小與最大值之間）
+        """
+        if not self.count:
+            return 0.0
+        rank = max(int(q * self.count + 0.5), 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(max(bucket_value(index), self.min), self.max)
+        return self.max
+
+    def cumulative(self, bounds: Iterable[float]) -> List[int]:
+        """各上限（秒）以下的累計樣本數（Prometheus 的 le 桶）"""
+        result = []
+        seen = 0
+        index = 0
+        for bound in bounds:
+            limit = int(bound * 1e6)
+            while index < BUCKET_COUNT and _bucket_bounds(index)[1] <= limit + 1:
+                seen += self.counts[index]
+                index += 1
+            result.append(seen)
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """完整內容（只保存非零的桶），可輸出為 JSON 並以 from_dict 還原"""
+        return {
+            'count': self.count,
+            'total': self.total,
+            'min': self.min if self.count else None,
+            'max': self.max,
+            'buckets': {str(index): count for index, count in enumerate(self.counts) if count},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> 'Histogram':
+        histogram = cls()
+        for index, count in data['buckets'].items():
+            histogram.counts[int(index)] = count
+        histogram.count = data['count']
+        histogram.total = data['total']
+        if data['min'] is not None:
+            histogram.min = data['min']
+        histogram.max = data['max']
+        return histogram
+
+    def snapshot(self) -> Dict[str, float]:
+        """摘要統計（秒）"""
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(0.50),
+            'p90': self.percentile(0.90),
+            'p99': self.percentile(0.99),
+            'p999': self.percentile(0.999),
+        }
+
+
+class EndpointStats:
+    """單一 (method, endpoint) 的統計"""
+
+    __slots__ = ('phases', 'status_codes', 'errors', 'bytes_sent', 'bytes_received')
+
+    def __init__(self):
+        self.phases: Dict[str, Histogram] = {}
+        self.status_codes: Dict[int, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    @property
+    def requests(self) -> int:
+        return sum(self.status_codes.values()) + sum(self.errors.values())
+
+    def histogram(self, phase: str) -> Histogram:
+        histogram = self.phases.get(phase)
+        if histogram is None:
+            histogram = self.phases[phase] = Histogram()
+        return histogram
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'status_codes': {str(code): count for code, count in sorted(self.status_codes.items())},
+            'errors': dict(self.errors),
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'phases': {phase: self.phases[phase].snapshot() for phase in PHASES if phase in self.phases},
+        }
+
+
+class MetricsRecorder:
+    """
+    請求量測記錄器
+
+    由客戶端的 _send 在每次請求完成時呼叫；快照與輸出不影響記錄：
+
+        recorder = client.enable_metrics()
+        client.get_order_book('BTCUSDT')
+        recorder.histogram('GET', '/api/v3/depth').percentile(0.99)
+        print(recorder.export('prometheus'))
+    """
+
+    def __init__(self):
+        self.weights: Dict[str, int] = {}
+        self._endpoints: Dict[tuple, EndpointStats] = {}
+        self._lock = threading.Lock()
+
+    def _stats(self, method: str, endpoint: str) -> EndpointStats:
+        key = (method, endpoint)
+        stats = self._endpoints.get(key)
+        if stats is None:
+            stats = self._endpoints.setdefault(key, EndpointStats())
+        return stats
+
+    def observe(
+        self,
+        method: str,
+        endpoint: str,
+        status: int,
+        phases: Mapping[str, float],
+        bytes_sent: int = 0,
+        bytes_received: int = 0,
+        headers: Mapping[str, str] = None
+    ):
+        """
+        記錄一次完成的請求
+
+        Args:
+            method: HTTP 方法
+            endpoint: API 端點（不含查詢字串）
+            status: HTTP 狀態碼
+            phases: 各階段耗時（秒），至少包含 total
+            bytes_sent: 送出的查詢字串與 body 位元組數
+            bytes_received: 響應 body 位元組數
+            headers: 響應頭（取出權重相關的值）
+        """
+        with self._lock:
+            stats = self._stats(method, endpoint)
+            for phase, seconds in phases.items():
+                stats.histogram(phase).record(seconds)
+            stats.status_codes[status] = stats.status_codes.get(status, 0) + 1
+            stats.bytes_sent += bytes_sent
+            stats.bytes_received += bytes_received
+            if headers:
+                for name, value in headers.items():
+                    if name.lower().startswith(WEIGHT_HEADER_PREFIXES):
+                        self.weights[name.upper()] = int(value)
+
+    def observe_error(self, method: str, endpoint: str, error: BaseException, elapsed: float):
+        """記錄一次連線錯誤或逾時（耗時記在 total 以外的 error 階段）"""
+        with self._lock:
+            stats = self._stats(method, endpoint)
+            name = type(error).__name__
+            stats.errors[name] = stats.errors.get(name, 0) + 1
+            stats.histogram('error').record(elapsed)
+
+    def histogram(self, method: str, endpoint: str, phase: str = 'total') -> Optional[Histogram]:
+        """取得某端點某階段的直方圖（尚無樣本時為 None）"""
+        stats = self._endpoints.get((method, endpoint))
+        return stats.phases.get(phase) if stats is not None else None
+
+    def endpoints(self) -> Dict[tuple, EndpointStats]:
+        """所有端點的統計（複本）"""
+        with self._lock:
+            return dict(self._endpoints)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        目前的統計快照
+
+        Returns:
+            {'endpoints': {'GET /api/v3/depth': {...}}, 'weights': {...}}
+        """
+        with self._lock:
+            return {
+                'endpoints': {
+                    f"{method} {endpoint}": stats.snapshot()
+                    for (method, endpoint), stats in sorted(self._endpoints.items())
+                },
+                'weights': dict(self.weights),
+            }
+
+    def reset(self):
+        """清空統計"""
+        with self._lock:
+            self._endpoints.clear()
+            self.weights.clear()
+
+    def export(self, exporter: Union[str, Callable[['MetricsRecorder'], str]] = 'json') -> str:
+        """
+        以指定格式輸出
+
+        Args:
+            exporter: EXPORTERS 中的名稱，或接收記錄器並返回字串的函數
+
+        Returns:
+            輸出內容
+        """
+        if isinstance(exporter, str):
+            exporter = EXPORTERS[exporter]
+        return exporter(self)
+
+    def dump(self, path: str, exporter: Union[str, Callable[['MetricsRecorder'], str]] = 'json') -> Path:
+        """輸出到檔案"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.export(exporter), encoding='utf-8')
+        return path
+
+
+# ==================== 輸出格式 ====================
+
+def to_json(recorder: MetricsRecorder) -> str:
+    """JSON 格式的快照"""
+    return json.dumps(recorder.snapshot(), indent=2, ensure_ascii=False)
+
+
+def _labels(**labels: Any) -> str:
+    body = ','.join(f'{name}="{str(value).replace(chr(34), chr(92) + chr(34))}"' for name, value in labels.items())
+    return f"{{{body}}}"
+
+
+def to_prometheus(recorder: MetricsRecorder) -> str:
+    """Prometheus 文字格式（text exposition format 0.0.4）"""
+    endpoints = sorted(recorder.endpoints().items())
+    lines = [
+        '# HELP binance_request_duration_seconds Request latency by phase.',
+        '# TYPE binance_request_duration_seconds histogram',
+    ]
+    for (method, endpoint), stats in endpoints:
+        for phase in PHASES:
+            histogram = stats.phases.get(phase)
+            if histogram is None:
+                continue
+            for bound, count in zip(PROMETHEUS_BUCKETS, histogram.cumulative(PROMETHEUS_BUCKETS)):
+                labels = _labels(method=method, endpoint=endpoint, phase=phase, le=bound)
+                lines.append(f"binance_request_duration_seconds_bucket{labels} {count}")
+            labels = _labels(method=method, endpoint=endpoint, phase=phase, le='+Inf')
+            lines.append(f"binance_request_duration_seconds_bucket{labels} {histogram.count}")
+            labels = _labels(method=method, endpoint=endpoint, phase=phase)
+            lines.append(f"binance_request_duration_seconds_sum{labels} {histogram.total}")
+            lines.append(f"binance_request_duration_seconds_count{labels} {histogram.count}")
+
+    lines += ['# HELP binance_requests_total Completed requests by status code.',
+              '# TYPE binance_requests_total counter']
+    for (method, endpoint), stats in endpoints:
+        for status, count in sorted(stats.status_codes.items()):
+            lines.append(f"binance_requests_total{_labels(method=method, endpoint=endpoint, status=status)} {count}")
+
+    lines += ['# HELP binance_request_errors_total Requests that failed without a response.',
+              '# TYPE binance_request_errors_total counter']
+    for (method, endpoint), stats in endpoints:
+        for error, count in sorted(stats.errors.items()):
+            lines.append(f"binance_request_errors_total{_labels(method=method, endpoint=endpoint, error=error)} {count}")
+
+    for name, attribute in (('binance_request_bytes_total', 'bytes_sent'),
+                            ('binance_response_bytes_total', 'bytes_received')):
+        lines += [f"# TYPE {name} counter"]
+        for (method, endpoint), stats in endpoints:
+            lines.append(f"{name}{_labels(method=method, endpoint=endpoint)} {getattr(stats, attribute)}")
+
+    lines += ['# HELP binance_rate_limit_usage Latest rate limit usage reported by the server.',
+              '# TYPE binance_rate_limit_usage gauge']
+    for header, value in sorted(recorder.weights.items()):
+        lines.append(f"binance_rate_limit_usage{_labels(header=header)} {value}")
+    return '\n'.join(lines) + '\n'
+
+
+EXPORTERS: Dict[str, Callable[[MetricsRecorder], str]] = {
+    'json': to_json,
+    'prometheus': to_prometheus,
+}
+
+
+def register_exporter(name: str, exporter: Callable[[MetricsRecorder], str]):
+    """註冊自訂輸出格式（供 MetricsRecorder.export 以名稱使用）"""
+    EXPORTERS[name] = exporter
+
+
+# ==================== 同步客戶端連線階段 ====================
+
+_connection_phases = threading.local()
+
+
+def begin_connection_phases() -> Dict[str, float]:
+    """開始記錄本執行緒下一次請求的連線階段（新建連線時才會有 connect / tls）"""
+    phases = _connection_phases.phases = {}
+    return phases
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    """記錄 DNS 解析與 TCP 連線耗時的連線"""
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        sock = super()._new_conn()
+        phases = getattr(_connection_phases, 'phases', None)
+        if phases is not None:
+            phases['connect'] = time.perf_counter() - start
+        return sock
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    """另外記錄 TLS 握手耗時的連線"""
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        sock = super()._new_conn()
+        phases = getattr(_connection_phases, 'phases', None)
+        if phases is not None:
+            phases['connect'] = time.perf_counter() - start
+        return sock
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        phases = getattr(_connection_phases, 'phases', None)
+        if phases is not None:
+            phases['tls'] = max(time.perf_counter() - start - phases.get('connect', 0.0), 0.0)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+def instrument_session(session: Any):
+    """
+    讓 requests.Session 的連線記錄建立連線的階段耗時（可重複呼叫）
+
+    Args:
+        session: requests.Session
+    """
+    for adapter in session.adapters.values():
+        manager = getattr(adapter, 'poolmanager', None)
+        if manager is None:
+            continue
+        manager.pool_classes_by_scheme = {'http': _TimedHTTPConnectionPool, 'https': _TimedHTTPSConnectionPool}
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is not None:
+                pool.ConnectionCls = _TimedHTTPSConnection if pool.scheme == 'https' else _TimedHTTPConnection
+
+
+# ==================== 非同步客戶端連線階段 ====================
+
+def _trace_phases(context: Any) -> Optional[Dict[str, float]]:
+    return context.trace_request_ctx if isinstance(context.trace_request_ctx, dict) else None
+
+
+def _mark(start_name: str, phase: str = None):
+    """產生 TraceConfig 回呼：記錄開始時間，或以開始時間計算階段耗時"""
+    async def callback(session, context, params):
+        phases = _trace_phases(context)
+        if phases is None:
+            return
+        now = time.perf_counter()
+        if phase is None:
+            phases[start_name] = now
+        elif start_name in phases:
+            phases[phase] = phases.get(phase, 0.0) + now - phases.pop(start_name)
+    return callback
+
+
+def create_trace_config() -> aiohttp.TraceConfig:
+    """
+    aiohttp 的 TraceConfig：記錄連線池等待、DNS、連線（含 TLS）與收到響應頭的時間
+
+    呼叫 session.request 時以 trace_request_ctx 傳入 dict，各階段耗時寫入該 dict
+    """
+    trace = aiohttp.TraceConfig()
+    trace.on_connection_queued_start.append(_mark('_pool'))
+    trace.on_connection_queued_end.append(_mark('_pool', 'pool'))
+    trace.on_dns_resolvehost_start.append(_mark('_dns'))
+    trace.on_dns_resolvehost_end.append(_mark('_dns', 'dns'))
+    trace.on_connection_create_start.append(_mark('_connect'))
+    trace.on_connection_create_end.append(_mark('_connect', 'connect'))
+
+    async def on_request_end(session, context, params):
+        phases = _trace_phases(context)
+        if phases is not None:
+            phases['_headers'] = time.perf_counter()
+
+    trace.on_request_end.append(on_request_end)
+    return trace
+
+
+def finish_phases(phases: Dict[str, float], start: float, headers_at: float, end: float) -> Dict[str, float]:
+    """
+    由送出、收到響應頭與讀完 body 的時間補齊 ttfb / body / total
+
+    Args:
+        phases: 已記錄的連線階段
+        start: 開始送出的時間（perf_counter）
+        headers_at: 收到響應頭的時間
+        end: 讀完 body 的時間
+
+    Returns:
+        只含階段名稱的 dict
+    """
+    result = {name: value for name, value in phases.items() if not name.startswith('_')}
+    # 在 DNS 解析期間的時間同時算在 connect 內（aiohttp 的連線建立包含解析）
+    if 'dns' in result and 'connect' in result:
+        result['connect'] = max(result['connect'] - result['dns'], 0.0)
+    setup = sum(result.get(name, 0.0) for name in ('pool', 'dns', 'connect', 'tls'))
+    result['ttfb'] = max(headers_at - start - setup, 0.0)
+    result['body'] = max(end - headers_at, 0.0)
+    result['total'] = end - start
+    return result
+
+
+_default_recorder: Optional[MetricsRecorder] = None
+_default_recorder_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRecorder:
+    """
+    取得程序內共用的記錄器
+
+    Returns:
+        MetricsRecorder 實例
+    """
+    global _default_recorder
+    with _default_recorder_lock:
+        if _default_recorder is None:
+            _default_recorder = MetricsRecorder()
+        return _default_recorder
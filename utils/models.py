@@ -0,0 +1,311 @@
+"""
+型別化響應模型（選用）
+以 __slots__ 包裝原始 JSON，數值欄位在第一次存取時才轉為 Decimal 並快取；
+JSON 解析結果快取在 Response 上，同一響應只解析一次
+"""
+import json
+import logging
+from decimal import Decimal
+from typing import Any, Iterator, List, Optional, Sequence, Tuple, Type, TypeVar, Union
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 依安裝環境而定
+    orjson = None
+
+
+def _select_loads():
+    backend = Config.JSON_BACKEND
+    if backend == 'orjson' or (backend == 'auto' and orjson is not None):
+        if orjson is None:
+            raise ImportError("JSON_BACKEND=orjson 但未安裝 orjson")
+        return orjson.loads
+    return json.loads
+
+
+loads = _select_loads()
+
+_PARSED_ATTR = '_binance_json'
+
+
+def parse_json(response: Any) -> Any:
+    """
+    解析響應 JSON（結果快取在響應物件上）
+
+    Args:
+        response: requests.Response 或 AsyncResponse
+
+    Returns:
+        解析後的 JSON
+    """
+    try:
+        return getattr(response, _PARSED_ATTR)
+    except AttributeError:
+        payload = loads(response.content)
+        setattr(response, _PARSED_ATTR, payload)
+        return payload
+
+
+# ==================== 欄位描述器 ====================
+
+class _Field:
+    """直接讀取原始欄位"""
+
+    __slots__ = ('key',)
+
+    def __init__(self, key: Union[str, int]):
+        self.key = key
+
+    def __get__(self, obj, owner):
+        if obj is None:
+            return self
+        return obj._raw[self.key]
+
+
+class _DecimalField:
+    """第一次存取時轉為 Decimal 並快取"""
+
+    __slots__ = ('key', 'name')
+
+    def __init__(self, key: Union[str, int]):
+        self.key = key
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, owner):
+        if obj is None:
+            return self
+        cache = obj._cache
+        if cache is None:
+            cache = obj._cache = {}
+        try:
+            return cache[self.name]
+        except KeyError:
+            value = cache[self.name] = Decimal(obj._raw[self.key])
+            return value
+
+
+M = TypeVar('M', bound='Model')
+
+
+class Model:
+    """響應模型基類"""
+
+    __slots__ = ('_raw', '_cache')
+
+    def __init__(self, raw: Any):
+        self._raw = raw
+        self._cache = None
+
+    @classmethod
+    def from_response(cls: Type[M], response: Any) -> Union[M, 'ModelList']:
+        """
+        由響應建立模型
+
+        Returns:
+            響應為陣列時返回 ModelList，否則返回單一模型
+        """
+        return wrap(parse_json(response), cls)
+
+    @property
+    def raw(self) -> Any:
+        """原始 JSON"""
+        return self._raw
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._raw!r})"
+
+
+class ModelList(Sequence):
+    """延遲建立模型的序列，只在存取元素時才包裝"""
+
+    __slots__ = ('_raw', '_cls')
+
+    def __init__(self, raw: List[Any], cls: Type[Model]):
+        self._raw = raw
+        self._cls = cls
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ModelList(self._raw[index], self._cls)
+        return self._cls(self._raw[index])
+
+    def __iter__(self) -> Iterator[Model]:
+        cls = self._cls
+        for item in self._raw:
+            yield cls(item)
+
+    @property
+    def raw(self) -> List[Any]:
+        """原始 JSON"""
+        return self._raw
+
+
+def wrap(payload: Any, cls: Type[M]) -> Union[M, ModelList]:
+    """以模型包裝已解析的 JSON"""
+    if isinstance(payload, list):
+        return ModelList(payload, cls)
+    return cls(payload)
+
+
+# ==================== 模型 ====================
+
+class Balance(Model):
+    """帳戶餘額"""
+
+    __slots__ = ()
+
+    asset = _Field('asset')
+    free = _DecimalField('free')
+    locked = _DecimalField('locked')
+
+    @property
+    def total(self) -> Decimal:
+        """可用 + 凍結"""
+        return self.free + self.locked
+
+
+class Account(Model):
+    """帳戶資訊"""
+
+    __slots__ = ()
+
+    can_trade = _Field('canTrade')
+    update_time = _Field('updateTime')
+
+    @property
+    def balances(self) -> ModelList:
+        """所有餘額"""
+        return ModelList(self._raw['balances'], Balance)
+
+    def non_zero_balances(self) -> List[Balance]:
+        """非零餘額（只轉換需要比較的欄位）"""
+        return [b for b in self.balances if b.free > 0 or b.locked > 0]
+
+
+class Order(Model):
+    """訂單"""
+
+    __slots__ = ()
+
+    symbol = _Field('symbol')
+    order_id = _Field('orderId')
+    client_order_id = _Field('clientOrderId')
+    status = _Field('status')
+    side = _Field('side')
+    order_type = _Field('type')
+    time_in_force = _Field('timeInForce')
+    price = _DecimalField('price')
+    orig_qty = _DecimalField('origQty')
+    executed_qty = _DecimalField('executedQty')
+    cummulative_quote_qty = _DecimalField('cummulativeQuoteQty')
+
+    @property
+    def is_open(self) -> bool:
+        """是否仍在掛單中"""
+        return self.status in ('NEW', 'PARTIALLY_FILLED')
+
+
+class Trade(Model):
+    """成交紀錄"""
+
+    __slots__ = ()
+
+    id = _Field('id')
+    time = _Field('time')
+    is_buyer_maker = _Field('isBuyerMaker')
+    price = _DecimalField('price')
+    qty = _DecimalField('qty')
+    quote_qty = _DecimalField('quoteQty')
+
+
+class Kline(Model):
+    """K 線（原始資料為 12 欄位陣列）"""
+
+    __slots__ = ()
+
+    open_time = _Field(0)
+    open = _DecimalField(1)
+    high = _DecimalField(2)
+    low = _DecimalField(3)
+    close = _DecimalField(4)
+    volume = _DecimalField(5)
+    close_time = _Field(6)
+    quote_volume = _DecimalField(7)
+    trade_count = _Field(8)
+    taker_buy_base_volume = _DecimalField(9)
+    taker_buy_quote_volume = _DecimalField(10)
+
+
+class Ticker(Model):
+    """24 小時價格統計"""
+
+    __slots__ = ()
+
+    symbol = _Field('symbol')
+    count = _Field('count')
+    open_time = _Field('openTime')
+    close_time = _Field('closeTime')
+    price_change = _DecimalField('priceChange')
+    price_change_percent = _DecimalField('priceChangePercent')
+    last_price = _DecimalField('lastPrice')
+    open_price = _DecimalField('openPrice')
+    high_price = _DecimalField('highPrice')
+    low_price = _DecimalField('lowPrice')
+    bid_price = _DecimalField('bidPrice')
+    ask_price = _DecimalField('askPrice')
+    volume = _DecimalField('volume')
+    quote_volume = _DecimalField('quoteVolume')
+
+
+class DepthSnapshot(Model):
+    """
+    深度快照
+
+    bids / asks 在第一次存取時才整批轉換；只需要最佳價位時
+    使用 best_bid / best_ask，不會轉換其餘檔位
+    """
+
+    __slots__ = ()
+
+    last_update_id = _Field('lastUpdateId')
+
+    def _levels(self, side: str) -> List[Tuple[Decimal, Decimal]]:
+        cache = self._cache
+        if cache is None:
+            cache = self._cache = {}
+        levels = cache.get(side)
+        if levels is None:
+            levels = cache[side] = [(Decimal(p), Decimal(q)) for p, q in self._raw[side]]
+        return levels
+
+    @property
+    def bids(self) -> List[Tuple[Decimal, Decimal]]:
+        """買單檔位 [(price, qty)]，價格遞減"""
+        return self._levels('bids')
+
+    @property
+    def asks(self) -> List[Tuple[Decimal, Decimal]]:
+        """賣單檔位 [(price, qty)]，價格遞增"""
+        return self._levels('asks')
+
+    @property
+    def best_bid(self) -> Optional[Tuple[Decimal, Decimal]]:
+        """最佳買價"""
+        raw = self._raw['bids']
+        return (Decimal(raw[0][0]), Decimal(raw[0][1])) if raw else None
+
+    @property
+    def best_ask(self) -> Optional[Tuple[Decimal, Decimal]]:
+        """最佳賣價"""
+        raw = self._raw['asks']
+        return (Decimal(raw[0][0]), Decimal(raw[0][1])) if raw else None
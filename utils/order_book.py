@@ -0,0 +1,386 @@
+"""
+本地訂單簿
+以 REST 深度快照為起點，套用 WebSocket @depth 增量更新維持即時深度；
+依官方 U / u 序號規則檢查連續性，發現缺口時重新同步
+"""
+import asyncio
+import logging
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+import websockets
+
+from config import Config
+from utils.async_client import call_client
+from utils.models import loads, parse_json
+
+logger = logging.getLogger(__name__)
+
+Level = Tuple[float, float]
+
+
+class OrderBookGapError(Exception):
+    """增量更新序號不連續"""
+
+
+class _BookSide:
+    """
+    單邊深度
+
+    以排序陣列保存價格與數量，最佳價位固定在陣列尾端：買單遞增、
+    賣單以負價格遞增。查找為 O(log n)，最佳價位讀取為 O(1)；
+    增量更新大多發生在最佳價位附近，插入刪除只需搬移尾端少量元素
+    """
+
+    __slots__ = ('_keys', '_prices', '_qtys', '_sign')
+
+    def __init__(self, descending_best: bool):
+        self._keys: List[float] = []
+        self._prices: List[float] = []
+        self._qtys: List[float] = []
+        # 買單價格越高越好，直接以價格排序；賣單以負價格排序
+        self._sign = 1.0 if descending_best else -1.0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def clear(self):
+        self._keys.clear()
+        self._prices.clear()
+        self._qtys.clear()
+
+    def load(self, levels: List[List[str]]):
+        """以快照檔位重建（levels 由最佳價位開始）"""
+        self.clear()
+        for price, qty in reversed(levels):
+            qty = float(qty)
+            if qty:
+                price = float(price)
+                self._keys.append(self._sign * price)
+                self._prices.append(price)
+                self._qtys.append(qty)
+        if any(a > b for a, b in zip(self._keys, self._keys[1:])):
+            order = sorted(range(len(self._keys)), key=self._keys.__getitem__)
+            self._keys = [self._keys[i] for i in order]
+            self._prices = [self._prices[i] for i in order]
+            self._qtys = [self._qtys[i] for i in order]
+
+    def update(self, price: float, qty: float):
+        """更新價位，數量為 0 時刪除"""
+        key = self._sign * price
+        index = bisect_left(self._keys, key)
+        exists = index < len(self._keys) and self._keys[index] == key
+        if qty:
+            if exists:
+                self._qtys[index] = qty
+            else:
+                self._keys.insert(index, key)
+                self._prices.insert(index, price)
+                self._qtys.insert(index, qty)
+        elif exists:
+            del self._keys[index]
+            del self._prices[index]
+            del self._qtys[index]
+
+    def best(self) -> Optional[Level]:
+        if not self._keys:
+            return None
+        return self._prices[-1], self._qtys[-1]
+
+    def top(self, depth: int) -> List[Level]:
+        """由最佳價位開始的前 depth 檔"""
+        start = max(len(self._keys) - depth, 0)
+        return list(zip(reversed(self._prices[start:]), reversed(self._qtys[start:])))
+
+    def quantity(self, price: float) -> float:
+        key = self._sign * price
+        index = bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            return self._qtys[index]
+        return 0.0
+
+
+class OrderBook:
+    """
+    本地訂單簿
+
+    離線時可直接餵入快照與增量事件：
+
+        book = OrderBook('BTCUSDT')
+        book.load_snapshot(client.get_order_book('BTCUSDT', limit=5000).json())
+        book.process_event(event)
+        book.best_bid()
+
+    連線時由 run() 訂閱 <symbol>@depth@100ms 並自動取得快照；
+    client 可以是 BinanceClient 或 AsyncBinanceClient：
+
+        book = OrderBook('BTCUSDT', client)
+        task = asyncio.create_task(book.run())
+        await book.wait_synced()
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        client: Any = None,
+        ws_url: str = None,
+        snapshot_limit: int = 5000,
+        update_speed: str = '100ms',
+        reconnect_delay: float = 1.0
+    ):
+        """
+        Args:
+            symbol: 交易對
+            client: 取得深度快照的客戶端（同步或非同步）
+            ws_url: WebSocket 基礎 URL（預設 Config.WS_URL）
+            snapshot_limit: 快照檔位數
+            update_speed: 增量推送頻率（100ms 或 1000ms）
+            reconnect_delay: 斷線後重連等待秒數
+        """
+        self.symbol = symbol.upper()
+        self.client = client
+        self.ws_url = (ws_url or Config.WS_URL).rstrip('/')
+        self.snapshot_limit = snapshot_limit
+        self.update_speed = update_speed
+        self.reconnect_delay = reconnect_delay
+
+        self.bids = _BookSide(descending_best=True)
+        self.asks = _BookSide(descending_best=False)
+        self.last_update_id: Optional[int] = None
+        self.resync_count = 0
+        self.event_count = 0
+
+        self._buffer: List[Dict[str, Any]] = []
+        self._first_event = True
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self._synced: Optional[asyncio.Event] = None
+        self._stopped = False
+
+    @property
+    def stream_url(self) -> str:
+        """增量深度串流 URL"""
+        stream = f"{self.symbol.lower()}@depth"
+        if self.update_speed == '100ms':
+            stream += '@100ms'
+        return f"{self.ws_url}/{stream}"
+
+    @property
+    def synced(self) -> bool:
+        """是否已與伺服器同步"""
+        return self.last_update_id is not None
+
+    # ==================== 讀取 ====================
+
+    def best_bid(self) -> Optional[Level]:
+        """最佳買價 (price, qty)"""
+        return self.bids.best()
+
+    def best_ask(self) -> Optional[Level]:
+        """最佳賣價 (price, qty)"""
+        return self.asks.best()
+
+    def spread(self) -> Optional[float]:
+        """買賣價差"""
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return ask[0] - bid[0]
+
+    def mid_price(self) -> Optional[float]:
+        """中間價"""
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return (ask[0] + bid[0]) / 2
+
+    def depth(self, levels: int = 10) -> Dict[str, List[Level]]:
+        """
+        前幾檔深度
+
+        Args:
+            levels: 檔位數
+
+        Returns:
+            {'bids': [(price, qty)], 'asks': [(price, qty)]}
+        """
+        return {'bids': self.bids.top(levels), 'asks': self.asks.top(levels)}
+
+    # ==================== 同步規則 ====================
+
+    def load_snapshot(self, snapshot: Dict[str, Any]) -> bool:
+        """
+        套用 REST 深度快照，並重放快照前緩衝的增量事件
+
+        Args:
+            snapshot: get_order_book 的 JSON
+
+        Returns:
+            是否完成同步（快照比緩衝事件舊時需重新取得）
+        """
+        last_update_id = snapshot['lastUpdateId']
+        if self._buffer and last_update_id < self._buffer[0]['U']:
+            logger.debug(f"Snapshot {last_update_id} older than first buffered event {self._buffer[0]['U']}")
+            return False
+
+        self.bids.load(snapshot['bids'])
+        self.asks.load(snapshot['asks'])
+        self.last_update_id = last_update_id
+        self._first_event = True
+
+        buffered, self._buffer = self._buffer, []
+        try:
+            for event in buffered:
+                self._apply(event)
+        except OrderBookGapError as e:
+            logger.warning(f"Order book {self.symbol} gap during replay: {e}")
+            self._resync()
+            return False
+
+        if self._synced is not None:
+            self._synced.set()
+        return True
+
+    def process_event(self, event: Dict[str, Any]) -> bool:
+        """
+        處理一筆 depthUpdate 事件
+
+        尚未同步時先緩衝；序號不連續時清空訂單簿並重新同步
+
+        Args:
+            event: depthUpdate 事件
+
+        Returns:
+            事件是否已套用
+        """
+        self.event_count += 1
+        if self.last_update_id is None:
+            self._buffer.append(event)
+            return False
+        try:
+            return self._apply(event)
+        except OrderBookGapError as e:
+            logger.warning(f"Order book {self.symbol} out of sync: {e}")
+            self._resync()
+            return False
+
+    def _apply(self, event: Dict[str, Any]) -> bool:
+        first_id, final_id = event['U'], event['u']
+        if final_id <= self.last_update_id:
+            return False
+
+        expected = self.last_update_id + 1
+        if self._first_event:
+            # 第一筆事件需涵蓋快照之後的下一個序號
+            if not first_id <= expected <= final_id:
+                raise OrderBookGapError(f"首筆事件 [{first_id}, {final_id}] 未涵蓋 {expected}")
+        elif first_id != expected:
+            raise OrderBookGapError(f"預期序號 {expected}，收到 {first_id}")
+
+        update = self.bids.update
+        for price, qty in event['b']:
+            update(float(price), float(qty))
+        update = self.asks.update
+        for price, qty in event['a']:
+            update(float(price), float(qty))
+
+        self.last_update_id = final_id
+        self._first_event = False
+        return True
+
+    def _resync(self):
+        """清空訂單簿並重新取得快照"""
+        self.resync_count += 1
+        self.last_update_id = None
+        self.bids.clear()
+        self.asks.clear()
+        self._buffer = []
+        if self._synced is not None:
+            self._synced.clear()
+        self._request_snapshot()
+
+    # ==================== 連線 ====================
+
+    async def fetch_snapshot(self) -> Dict[str, Any]:
+        """以 REST 取得深度快照（同步客戶端在執行緒池中執行）"""
+        if self.client is None:
+            raise ValueError("取得快照需要提供 client")
+        response = await call_client(self.client, 'get_order_book', symbol=self.symbol, limit=self.snapshot_limit)
+        if response.status_code != 200:
+            raise RuntimeError(f"取得深度快照失敗: {response.status_code} {response.text[:200]}")
+        return parse_json(response)
+
+    def _request_snapshot(self):
+        """在事件迴圈中排程取得快照（同時只有一個）"""
+        if self._stopped or self.client is None:
+            return
+        if self._snapshot_task is not None and not self._snapshot_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._snapshot_task = loop.create_task(self._snapshot())
+
+    async def _snapshot(self):
+        try:
+            snapshot = await self.fetch_snapshot()
+        except Exception as e:
+            logger.error(f"Order book snapshot failed: {e}")
+            await asyncio.sleep(self.reconnect_delay)
+            self._snapshot_task = None
+            self._request_snapshot()
+            return
+        self._snapshot_task = None
+        if not self.load_snapshot(snapshot) and self.last_update_id is None:
+            self._request_snapshot()
+
+    async def wait_synced(self, timeout: float = None):
+        """等待訂單簿完成同步"""
+        if self._synced is None:
+            self._synced = asyncio.Event()
+            if self.synced:
+                self._synced.set()
+        await asyncio.wait_for(self._synced.wait(), timeout)
+
+    async def run(self):
+        """訂閱增量深度並維持同步，直到 stop() 或任務取消"""
+        if self._synced is None:
+            self._synced = asyncio.Event()
+        self._stopped = False
+
+        while not self._stopped:
+            try:
+                async with websockets.connect(self.stream_url, max_size=None) as ws:
+                    logger.info(f"Order book {self.symbol} connected: {self.stream_url}")
+                    self._reset()
+                    self._request_snapshot()
+                    async for message in ws:
+                        self.process_event(loads(message))
+                        if self._stopped:
+                            break
+            except (websockets.ConnectionClosed, OSError) as e:
+                logger.warning(f"Order book {self.symbol} disconnected: {e}")
+            if not self._stopped:
+                await asyncio.sleep(self.reconnect_delay)
+
+        self._cancel_snapshot()
+
+    def stop(self):
+        """停止 run()"""
+        self._stopped = True
+        self._cancel_snapshot()
+
+    def _reset(self):
+        """重新連線後舊的序號已無法銜接，需重新同步"""
+        self._cancel_snapshot()
+        self.last_update_id = None
+        self.bids.clear()
+        self.asks.clear()
+        self._buffer = []
+        if self._synced is not None:
+            self._synced.clear()
+
+    def _cancel_snapshot(self):
+        if self._snapshot_task is not None and not self._snapshot_task.done():
+            self._snapshot_task.cancel()
+        self._snapshot_task = None
@@ -0,0 +1,410 @@
+"""
+訂單狀態追蹤
+訂閱用戶數據流（listenKey）的 executionReport 事件，在記憶體中維護訂單狀態，
+取代下單後固定 sleep 再輪詢 get_order；每次（重新）連線後以 REST 對帳，
+補上斷線期間遺漏的事件
+"""
+import asyncio
+import inspect
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import websockets
+
+from config import Config
+from utils.async_client import call_client
+from utils.models import loads, parse_json
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = frozenset({'NEW', 'PARTIALLY_FILLED', 'PENDING_NEW'})
+TERMINAL_STATUSES = frozenset({'FILLED', 'CANCELED', 'REJECTED', 'EXPIRED', 'EXPIRED_IN_MATCH'})
+
+OrderState = Dict[str, Any]
+
+
+class OrderTerminatedError(Exception):
+    """等待的訂單已進入其他終止狀態，不可能再達到目標狀態"""
+
+    def __init__(self, order: OrderState, expected: Iterable[str]):
+        super().__init__(f"訂單 {order['orderId']} 已是 {order['status']}，不會變成 {'/'.join(sorted(expected))}")
+        self.order = order
+
+
+def order_from_event(event: Dict[str, Any]) -> OrderState:
+    """
+    將 executionReport 事件轉為與 REST 訂單相同欄位的狀態
+
+    Args:
+        event: executionReport 事件
+
+    Returns:
+        訂單狀態（欄位同 get_order）
+    """
+    return {
+        'symbol': event['s'],
+        'orderId': event['i'],
+        # 取消事件的 c 是取消請求的 ID，原始 ID 在 C
+        'clientOrderId': event.get('C') or event['c'],
+        'price': event['p'],
+        'origQty': event['q'],
+        'executedQty': event['z'],
+        'cummulativeQuoteQty': event['Z'],
+        'status': event['X'],
+        'timeInForce': event['f'],
+        'type': event['o'],
+        'side': event['S'],
+        'time': event['O'],
+        'updateTime': event['T'],
+    }
+
+
+def _progress(order: OrderState) -> Tuple[float, bool, int]:
+    """訂單進度：成交量與終止狀態不會倒退，用於丟棄比現有狀態舊的更新"""
+    return (
+        float(order.get('executedQty', 0)),
+        order['status'] in TERMINAL_STATUSES,
+        order.get('updateTime') or order.get('transactTime') or 0
+    )
+
+
+class OrderTracker:
+    """
+    訂單狀態追蹤器
+
+    client 可以是 BinanceClient 或 AsyncBinanceClient：
+
+        tracker = OrderTracker(client)
+        task = asyncio.create_task(tracker.run())
+        await tracker.wait_ready()
+        order = client.create_order(...).json()
+        await tracker.wait_for(order['orderId'], 'NEW', timeout=5)
+
+    同步測試可在背景執行緒中執行：
+
+        tracker = OrderTracker(client).start_in_thread()
+        tracker.wait_for_blocking(order_id, 'CANCELED', timeout=5)
+        tracker.stop_thread()
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        ws_url: str = None,
+        keepalive_interval: float = 30 * 60,
+        reconnect_delay: float = 1.0
+    ):
+        """
+        Args:
+            client: 建立 listenKey 與 REST 對帳的客戶端（同步或非同步）
+            ws_url: WebSocket 基礎 URL（預設 Config.WS_URL）
+            keepalive_interval: listenKey 續期間隔秒數（有效期 60 分鐘）
+            reconnect_delay: 斷線後重連等待秒數
+        """
+        self.client = client
+        self.ws_url = (ws_url or Config.WS_URL).rstrip('/')
+        self.keepalive_interval = keepalive_interval
+        self.reconnect_delay = reconnect_delay
+
+        self.orders: Dict[int, OrderState] = {}
+        self.symbols: Set[str] = set()
+        self.listen_key: Optional[str] = None
+        self.event_count = 0
+        self.reconnects = 0
+
+        self._callbacks: List[Callable[[OrderState], Any]] = []
+        self._waiters: Dict[int, List[Tuple[frozenset, asyncio.Future]]] = {}
+        self._ws: Optional[Any] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._stopped = False
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # ==================== 狀態 ====================
+
+    def get(self, order_id: int) -> Optional[OrderState]:
+        """目前已知的訂單狀態"""
+        return self.orders.get(order_id)
+
+    def on_update(self, callback: Callable[[OrderState], Any]) -> Callable[[OrderState], Any]:
+        """
+        註冊訂單更新回呼（可作為裝飾器）
+
+        Args:
+            callback: 接收訂單狀態的函數或協程函數
+
+        Returns:
+            callback 本身
+        """
+        self._callbacks.append(callback)
+        return callback
+
+    def track(self, order: OrderState) -> bool:
+        """
+        更新訂單狀態（REST 響應或轉換後的事件）
+
+        比現有狀態舊的更新會被忽略，因此 REST 對帳與串流事件的先後順序不影響結果
+
+        Args:
+            order: 訂單 JSON（至少包含 symbol / orderId / status）
+
+        Returns:
+            狀態是否已更新
+        """
+        order_id = order['orderId']
+        self.symbols.add(order['symbol'])
+        current = self.orders.get(order_id)
+        if current is not None and _progress(order) < _progress(current):
+            return False
+        if current is not None and current['status'] == order['status'] \
+                and current.get('executedQty') == order.get('executedQty'):
+            current.update(order)
+            return False
+
+        state = dict(current or {})
+        state.update(order)
+        self.orders[order_id] = state
+        self._notify(state)
+        return True
+
+    def _notify(self, state: OrderState):
+        waiters = self._waiters.get(state['orderId'])
+        if waiters:
+            remaining = []
+            for statuses, future in waiters:
+                if future.done():
+                    continue
+                if state['status'] in statuses:
+                    future.set_result(state)
+                elif state['status'] in TERMINAL_STATUSES:
+                    future.set_exception(OrderTerminatedError(state, statuses))
+                else:
+                    remaining.append((statuses, future))
+            if remaining:
+                self._waiters[state['orderId']] = remaining
+            else:
+                del self._waiters[state['orderId']]
+
+        for callback in self._callbacks:
+            try:
+                result = callback(state)
+                if inspect.isawaitable(result):
+                    asyncio.ensure_future(result)
+            except Exception as e:
+                logger.error(f"Order update callback failed: {e}")
+
+    def handle_event(self, event: Dict[str, Any]):
+        """處理一則用戶數據流事件"""
+        self.event_count += 1
+        event_type = event.get('e')
+        if event_type == 'executionReport':
+            self.track(order_from_event(event))
+        elif event_type == 'listenKeyExpired':
+            logger.warning(f"Listen key expired: {event.get('listenKey')}")
+            if self._ws is not None:
+                asyncio.ensure_future(self._ws.close())
+
+    async def wait_for(
+        self,
+        order_id: int,
+        status: Union[str, Iterable[str]],
+        timeout: float = None,
+        symbol: str = None
+    ) -> OrderState:
+        """
+        等待訂單達到指定狀態
+
+        Args:
+            order_id: 訂單 ID
+            status: 目標狀態（或多個狀態之一）
+            timeout: 逾時秒數（None 表示不限）
+            symbol: 交易對；提供時若尚無該訂單的狀態，會以 REST 查詢一次
+                （涵蓋串流連線前就已下的訂單）
+
+        Returns:
+            訂單狀態
+
+        Raises:
+            OrderTerminatedError: 訂單已進入其他終止狀態
+            asyncio.TimeoutError: 逾時
+        """
+        statuses = frozenset((status,) if isinstance(status, str) else status)
+        current = self.orders.get(order_id)
+        if current is not None:
+            if current['status'] in statuses:
+                return current
+            if current['status'] in TERMINAL_STATUSES:
+                raise OrderTerminatedError(current, statuses)
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(order_id, []).append((statuses, future))
+        if current is None and symbol is not None:
+            asyncio.ensure_future(self._reconcile_order(symbol, order_id))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            waiters = self._waiters.get(order_id)
+            if waiters:
+                waiters[:] = [w for w in waiters if w[1] is not future]
+                if not waiters:
+                    del self._waiters[order_id]
+
+    # ==================== REST 對帳 ====================
+
+    async def _reconcile_order(self, symbol: str, order_id: int):
+        try:
+            response = await call_client(self.client, 'get_order', symbol=symbol, order_id=order_id)
+        except Exception as e:
+            logger.error(f"Order reconciliation failed: {e}")
+            return
+        if response.status_code == 200:
+            self.track(parse_json(response))
+
+    async def reconcile(self):
+        """
+        以 REST 更新所有追蹤中的訂單
+
+        交易對的掛單以 get_open_orders 一次取得，斷線期間已結束的訂單
+        不在掛單列表中，再逐筆以 get_order 查詢
+        """
+        for symbol in sorted(self.symbols):
+            try:
+                response = await call_client(self.client, 'get_open_orders', symbol=symbol)
+            except Exception as e:
+                logger.error(f"Open orders reconciliation failed: {e}")
+                continue
+            if response.status_code != 200:
+                logger.warning(f"Open orders reconciliation failed: {response.status_code} {response.text[:200]}")
+                continue
+            open_ids = set()
+            for order in parse_json(response):
+                open_ids.add(order['orderId'])
+                self.track(order)
+            stale = [
+                order['orderId'] for order in list(self.orders.values())
+                if order['symbol'] == symbol and order['status'] not in TERMINAL_STATUSES
+                and order['orderId'] not in open_ids
+            ]
+            await asyncio.gather(*(self._reconcile_order(symbol, order_id) for order_id in stale))
+
+    # ==================== 連線 ====================
+
+    @property
+    def stream_url(self) -> Optional[str]:
+        """用戶數據流 URL"""
+        return f"{self.ws_url}/{self.listen_key}" if self.listen_key else None
+
+    async def _create_listen_key(self) -> str:
+        response = await call_client(self.client, 'create_listen_key')
+        if response.status_code != 200:
+            raise RuntimeError(f"建立 listenKey 失敗: {response.status_code} {response.text[:200]}")
+        return parse_json(response)['listenKey']
+
+    async def _keepalive(self, ws):
+        """定期續期 listenKey；listenKey 已失效時中斷連線以重新建立"""
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            try:
+                response = await call_client(self.client, 'keepalive_listen_key', listen_key=self.listen_key)
+            except Exception as e:
+                logger.error(f"Listen key keepalive failed: {e}")
+                continue
+            if response.status_code != 200:
+                logger.warning(f"Listen key keepalive rejected: {response.status_code} {response.text[:200]}")
+                await ws.close()
+                return
+
+    async def wait_ready(self, timeout: float = None):
+        """等待串流連線並完成對帳"""
+        if self._ready is None:
+            self._ready = asyncio.Event()
+        await asyncio.wait_for(self._ready.wait(), timeout)
+
+    async def run(self):
+        """訂閱用戶數據流並維持連線，直到 stop() 或任務取消"""
+        if self._ready is None:
+            self._ready = asyncio.Event()
+        self._stopped = False
+
+        while not self._stopped:
+            try:
+                self.listen_key = await self._create_listen_key()
+                async with websockets.connect(self.stream_url, max_size=None) as ws:
+                    self._ws = ws
+                    logger.info("User data stream connected")
+                    keepalive = asyncio.ensure_future(self._keepalive(ws))
+                    try:
+                        # 事件在對帳期間由連線緩衝，對帳後依序套用
+                        await self.reconcile()
+                        self._ready.set()
+                        async for message in ws:
+                            self.handle_event(loads(message))
+                            if self._stopped:
+                                break
+                    finally:
+                        keepalive.cancel()
+                        self._ready.clear()
+                        self._ws = None
+            except (websockets.ConnectionClosed, OSError, RuntimeError) as e:
+                logger.warning(f"User data stream disconnected: {e}")
+            if not self._stopped:
+                self.reconnects += 1
+                await asyncio.sleep(self.reconnect_delay)
+
+        if self.listen_key is not None:
+            try:
+                await call_client(self.client, 'close_listen_key', listen_key=self.listen_key)
+            except Exception as e:
+                logger.warning(f"Failed to close listen key: {e}")
+            self.listen_key = None
+
+    async def stop(self):
+        """停止 run()"""
+        self._stopped = True
+        if self._ws is not None:
+            await self._ws.close()
+
+    # ==================== 同步介面 ====================
+
+    def start_in_thread(self, timeout: float = None) -> 'OrderTracker':
+        """
+        在背景執行緒的事件迴圈中執行 run()，等待連線完成後返回
+
+        Args:
+            timeout: 等待連線的逾時秒數（預設 Config.REQUEST_TIMEOUT）
+        """
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_until_complete, args=(self.run(),), name='order-tracker', daemon=True
+        )
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(
+            self.wait_ready(), self._loop
+        ).result(timeout or Config.REQUEST_TIMEOUT)
+        return self
+
+    def wait_for_blocking(
+        self,
+        order_id: int,
+        status: Union[str, Iterable[str]],
+        timeout: float = None,
+        symbol: str = None
+    ) -> OrderState:
+        """wait_for 的同步版本（需先 start_in_thread）"""
+        if self._loop is None:
+            raise RuntimeError("需先呼叫 start_in_thread()")
+        return asyncio.run_coroutine_threadsafe(
+            self.wait_for(order_id, status, timeout, symbol), self._loop
+        ).result()
+
+    def stop_thread(self):
+        """停止背景執行緒"""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result()
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+        self._thread = None
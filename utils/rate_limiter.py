@@ -0,0 +1,376 @@
+"""
+請求權重限速器
+依端點權重在送出請求前排隊節流，並以 X-MBX-USED-WEIGHT-* / X-MBX-ORDER-COUNT-* 響應頭與伺服器同步；
+指定狀態目錄時額度存放在檔案中，由多個程序（例如 pytest-xdist 的 worker）共用
+"""
+import hashlib
+import os
+import re
+import struct
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Any, Mapping, Sequence
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 固定權重的端點 (method, endpoint) -> weight
+REQUEST_WEIGHTS = {
+    ('GET', '/api/v3/ping'): 1,
+    ('GET', '/api/v3/time'): 1,
+    ('GET', '/api/v3/exchangeInfo'): 20,
+    ('GET', '/api/v3/trades'): 25,
+    ('GET', '/api/v3/klines'): 2,
+    ('GET', '/api/v3/account'): 20,
+    ('POST', '/api/v3/order'): 1,
+    ('POST', '/api/v3/order/test'): 1,
+    ('GET', '/api/v3/order'): 4,
+    ('DELETE', '/api/v3/order'): 1,
+    ('DELETE', '/api/v3/openOrders'): 1,
+    ('GET', '/api/v3/allOrders'): 20,
+    ('POST', '/api/v3/userDataStream'): 2,
+    ('PUT', '/api/v3/userDataStream'): 2,
+    ('DELETE', '/api/v3/userDataStream'): 2,
+}
+
+# 依 limit 決定權重的深度端點：(limit 上限, weight)
+DEPTH_WEIGHTS = ((100, 5), (500, 25), (1000, 50), (5000, 250))
+
+ORDER_ENDPOINTS = {('POST', '/api/v3/order')}
+
+USED_WEIGHT_HEADER = re.compile(r'^x-mbx-used-weight-(\d+)([smhd])$', re.IGNORECASE)
+ORDER_COUNT_HEADER = re.compile(r'^x-mbx-order-count-(\d+)([smhd])$', re.IGNORECASE)
+
+
+def request_weight(method: str, endpoint: str, params: Optional[Mapping[str, Any]] = None) -> int:
+    """
+    計算請求權重
+
+    Args:
+        method: HTTP 方法
+        endpoint: API 端點
+        params: 請求參數
+
+    Returns:
+        請求權重
+    """
+    params = params or {}
+
+    if endpoint == '/api/v3/depth':
+        limit = int(params.get('limit') or 100)
+        for upper, weight in DEPTH_WEIGHTS:
+            if limit <= upper:
+                return weight
+        return DEPTH_WEIGHTS[-1][1]
+
+    if endpoint == '/api/v3/ticker/24hr':
+        return 2 if params.get('symbol') else 80
+
+    if endpoint == '/api/v3/openOrders' and method == 'GET':
+        return 6 if params.get('symbol') else 80
+
+    return REQUEST_WEIGHTS.get((method, endpoint), 1)
+
+
+def is_order_request(method: str, endpoint: str) -> bool:
+    """是否計入下單次數限制"""
+    return (method, endpoint) in ORDER_ENDPOINTS
+
+
+class TokenBucket:
+    """
+    執行緒安全的令牌桶
+
+    令牌可被預支為負數：呼叫端取得需要等待的秒數後自行 sleep，
+    多執行緒同時請求時會依預約順序自然排隊
+    """
+
+    def __init__(self, capacity: float, period: float):
+        """
+        Args:
+            capacity: 桶容量（對應伺服器在一個週期內的上限）
+            period: 週期長度（秒），容量在此期間內補滿
+        """
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        預約令牌
+
+        Args:
+            amount: 需要的令牌數（超過容量時以容量計）
+
+        Returns:
+            取得令牌前需要等待的秒數
+        """
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def sync(self, used: float):
+        """
+        依伺服器回報的已用量校正（只會收緊，不會放寬）
+
+        Args:
+            used: 伺服器回報本週期已使用量
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, self.capacity - float(used))
+
+    @property
+    def available(self) -> float:
+        """目前可用令牌數"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return self.tokens
+
+
+class SharedState:
+    """
+    跨程序共享的數個浮點數
+
+    存放在檔案中，以 flock 保護讀寫（同一程序內的執行緒另以 threading.Lock 互斥，
+    flock 只區分開檔，不區分執行緒）
+    """
+
+    def __init__(self, path: str, initial: Sequence[float]):
+        """
+        Args:
+            path: 狀態檔路徑（不存在時以 initial 建立）
+            initial: 初始值
+        """
+        if fcntl is None:
+            raise RuntimeError("此平台不支援跨程序共享限速狀態（需要 fcntl）")
+        self.path = path
+        self._initial = [float(value) for value in initial]
+        self._struct = struct.Struct(f'<{len(self._initial)}d')
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def locked(self) -> Iterator[List[float]]:
+        """
+        鎖定並讀出目前的值；區塊中修改的列表在離開時寫回
+        """
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                data = os.pread(self._fd, self._struct.size, 0)
+                values = list(self._struct.unpack(data)) if len(data) == self._struct.size else list(self._initial)
+                yield values
+                os.pwrite(self._fd, self._struct.pack(*values), 0)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self):
+        os.close(self._fd)
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    跨程序共用的令牌桶
+
+    令牌數與更新時間存放在狀態檔中；time.monotonic 在 Linux / macOS 為系統層級的時鐘，
+    各程序的讀數可直接比較
+    """
+
+    def __init__(self, path: str, capacity: float, period: float):
+        """
+        Args:
+            path: 狀態檔路徑
+            capacity: 桶容量
+            period: 週期長度（秒）
+        """
+        super().__init__(capacity, period)
+        self.state = SharedState(path, (self.capacity, time.monotonic()))
+
+    def _refilled(self, state: List[float], now: float) -> float:
+        return min(self.capacity, state[0] + (now - state[1]) * self.rate)
+
+    def reserve(self, amount: float) -> float:
+        amount = min(float(amount), self.capacity)
+        with self.state.locked() as state:
+            now = time.monotonic()
+            tokens = self._refilled(state, now) - amount
+            state[:] = [tokens, now]
+        return 0.0 if tokens >= 0 else -tokens / self.rate
+
+    def sync(self, used: float):
+        with self.state.locked() as state:
+            now = time.monotonic()
+            state[:] = [min(self._refilled(state, now), self.capacity - float(used)), now]
+
+    @property
+    def available(self) -> float:
+        with self.state.locked() as state:
+            return self._refilled(state, time.monotonic())
+
+
+class RateLimiter:
+    """
+    請求權重與下單次數限速器
+
+    同一組 API Key 的所有客戶端應共用同一個實例（見 get_rate_limiter），
+    以確保多執行緒或多個客戶端共享同一份額度；多個程序共用額度時指定相同的 state_dir
+    """
+
+    def __init__(
+        self,
+        weight_per_minute: int = None,
+        orders_per_10s: int = None,
+        orders_per_day: int = None,
+        state_dir: str = None
+    ):
+        """
+        初始化限速器
+
+        Args:
+            weight_per_minute: 每分鐘請求權重上限
+            orders_per_10s: 每 10 秒下單次數上限
+            orders_per_day: 每日下單次數上限
+            state_dir: 跨程序共享額度的狀態目錄（預設不共享）
+        """
+        self.state_dir = state_dir
+        self.weight = self._bucket('weight', weight_per_minute or Config.RATE_LIMIT_WEIGHT_PER_MINUTE, 60)
+        self.order_buckets = {
+            10: self._bucket('orders-10s', orders_per_10s or Config.RATE_LIMIT_ORDERS_PER_10S, 10),
+            86400: self._bucket('orders-1d', orders_per_day or Config.RATE_LIMIT_ORDERS_PER_DAY, 86400),
+        }
+        # 418 / 429 後暫停到的時間點（共享時所有程序一起暫停）
+        self._blocked = SharedState(os.path.join(state_dir, 'blocked'), (0.0,)) if state_dir else None
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _bucket(self, name: str, capacity: float, period: float) -> TokenBucket:
+        if self.state_dir:
+            return SharedTokenBucket(os.path.join(self.state_dir, name), capacity, period)
+        return TokenBucket(capacity, period)
+
+    def _block_until(self, until: float) -> float:
+        """延長暫停時間（until 為 0 時只讀取），返回暫停到的時間點"""
+        if self._blocked is None:
+            with self._lock:
+                self._blocked_until = max(self._blocked_until, until)
+                return self._blocked_until
+        with self._blocked.locked() as state:
+            state[0] = max(state[0], until)
+            return state[0]
+
+    def reserve(self, method: str, endpoint: str, params: Optional[Mapping[str, Any]] = None) -> float:
+        """
+        為即將送出的請求預約額度
+
+        Args:
+            method: HTTP 方法
+            endpoint: API 端點
+            params: 請求參數
+
+        Returns:
+            送出前需要等待的秒數
+        """
+        delay = self.weight.reserve(request_weight(method, endpoint, params))
+
+        if is_order_request(method, endpoint):
+            for bucket in self.order_buckets.values():
+                delay = max(delay, bucket.reserve(1))
+
+        delay = max(delay, self._block_until(0.0) - time.monotonic())
+
+        if delay > 0:
+            logger.debug(f"Rate limiter delaying {method} {endpoint} by {delay:.3f}s")
+        return max(delay, 0.0)
+
+    def acquire(self, method: str, endpoint: str, params: Optional[Mapping[str, Any]] = None) -> float:
+        """
+        預約額度並阻塞等待（同步客戶端使用）
+
+        Returns:
+            實際等待的秒數
+        """
+        delay = self.reserve(method, endpoint, params)
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    def update(self, status_code: int, headers: Mapping[str, str]):
+        """
+        依響應頭同步額度，並處理 429 / 418 的 Retry-After
+
+        Args:
+            status_code: HTTP 狀態碼
+            headers: 響應頭
+        """
+        for name, value in headers.items():
+            match = USED_WEIGHT_HEADER.match(name)
+            if match and _period_seconds(match) == 60:
+                self.weight.sync(int(value))
+                continue
+
+            match = ORDER_COUNT_HEADER.match(name)
+            if match:
+                bucket = self.order_buckets.get(_period_seconds(match))
+                if bucket is not None:
+                    bucket.sync(int(value))
+
+        if status_code in (418, 429):
+            retry_after = headers.get('Retry-After')
+            wait = float(retry_after) if retry_after else 60.0
+            self._block_until(time.monotonic() + wait)
+            logger.warning(f"Rate limited ({status_code}), pausing requests for {wait:.0f}s")
+
+
+def _period_seconds(match: re.Match) -> int:
+    units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+    return int(match.group(1)) * units[match.group(2).lower()]
+
+
+_limiters: Dict[tuple, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(api_key: str, base_url: str = None) -> RateLimiter:
+    """
+    取得與 API Key 綁定的共用限速器（程序內單例）
+
+    設定 Config.RATE_LIMIT_STATE_DIR 時額度存放在該目錄下，同一目錄的所有程序共用
+
+    Args:
+        api_key: API 密鑰
+        base_url: API 基礎 URL（不同交易所環境額度獨立）
+
+    Returns:
+        RateLimiter 實例
+    """
+    key = (base_url or Config.BASE_URL, api_key)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            state_dir = None
+            if Config.RATE_LIMIT_STATE_DIR:
+                digest = hashlib.sha256(f'{key[0]}\n{key[1]}'.encode('utf-8')).hexdigest()[:16]
+                state_dir = os.path.join(Config.RATE_LIMIT_STATE_DIR, digest)
+                os.makedirs(state_dir, exist_ok=True)
+            limiter = RateLimiter(state_dir=state_dir)
+            _limiters[key] = limiter
+        return limiter
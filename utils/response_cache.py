@@ -0,0 +1,291 @@
+"""
+公開端點響應快取
+依端點設定 TTL 快取未簽名 GET 的 200 響應；記憶體層為有界 LRU，
+可選的 SQLite 磁碟層讓同一台機器上的多個程序共用；過期時若上游提供
+ETag / Last-Modified 則發送條件請求，304 時沿用舊響應；
+同一個鍵同時只會有一個請求在途（見 utils.single_flight）
+"""
+import json
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from config import Config
+from utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# 預設快取的端點與 TTL（秒）；/api/v3/time 不快取，TimeSync 依賴每次實際往返
+DEFAULT_TTLS = {
+    '/api/v3/exchangeInfo': Config.EXCHANGE_INFO_TTL,
+    '/api/v3/ticker/24hr': 1.0,
+}
+
+# 由快取資料重建響應對象：(status_code, headers, content, url) -> 響應
+ResponseBuilder = Callable[[int, Dict[str, str], bytes, str], Any]
+
+
+class CacheEntry:
+    """快取項目；response 為原本的響應對象，重複命中時共用同一份 JSON 解析結果"""
+
+    __slots__ = ('response', 'expires_at', 'etag', 'last_modified')
+
+    def __init__(self, response: Any, expires_at: float, etag: str = None, last_modified: str = None):
+        self.response = response
+        self.expires_at = expires_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def validators(self) -> Optional[Dict[str, str]]:
+        """條件請求的標頭（上游沒有提供驗證器時為 None）"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers or None
+
+
+# ==================== 儲存層 ====================
+
+class MemoryBackend:
+    """執行緒安全的有界 LRU"""
+
+    def __init__(self, maxsize: int = None):
+        """
+        Args:
+            maxsize: 最多保存的項目數（預設 Config.RESPONSE_CACHE_SIZE）
+        """
+        self.maxsize = maxsize or Config.RESPONSE_CACHE_SIZE
+        self._items: 'OrderedDict[str, CacheEntry]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None:
+                self._items.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        with self._lock:
+            self._items[key] = entry
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class DiskBackend:
+    """
+    SQLite 磁碟層（多個程序可共用同一個檔案）
+
+    過期時間以牆上時鐘保存，讀出時以 builder 重建響應對象
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite 檔案路徑
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as db:
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, expires_at REAL, status INTEGER, headers TEXT, '
+                'content BLOB, url TEXT, etag TEXT, last_modified TEXT)'
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            self._local.db = db
+        return db
+
+    def get(self, key: str, builder: ResponseBuilder) -> Optional[CacheEntry]:
+        row = self._connect().execute(
+            'SELECT expires_at, status, headers, content, url, etag, last_modified FROM responses WHERE key = ?',
+            (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        expires_at, status, headers, content, url, etag, last_modified = row
+        return CacheEntry(builder(status, json.loads(headers), content, url), expires_at, etag, last_modified)
+
+    def set(self, key: str, entry: CacheEntry):
+        response = entry.response
+        self._connect().execute(
+            'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (key, entry.expires_at, response.status_code, json.dumps(dict(response.headers)),
+             response.content, str(response.url), entry.etag, entry.last_modified)
+        )
+
+    def clear(self):
+        self._connect().execute('DELETE FROM responses')
+
+
+# ==================== 快取 ====================
+
+class ResponseCache:
+    """
+    響應快取
+
+    由客戶端的 _request 呼叫，只處理未簽名的 GET；未設定 TTL 的端點直接送出：
+
+        client.enable_response_cache()
+        client.get_exchange_info()   # 送出請求
+        client.get_exchange_info()   # 命中快取
+    """
+
+    def __init__(
+        self,
+        ttls: Dict[str, float] = None,
+        maxsize: int = None,
+        disk_path: str = None
+    ):
+        """
+        Args:
+            ttls: 端點 TTL（秒），覆寫 DEFAULT_TTLS；設為 0 表示不快取
+            maxsize: 記憶體層項目上限（預設 Config.RESPONSE_CACHE_SIZE）
+            disk_path: SQLite 磁碟層路徑（預設 Config.RESPONSE_CACHE_PATH，空字串表示不使用）
+        """
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self.memory = MemoryBackend(maxsize)
+        disk_path = Config.RESPONSE_CACHE_PATH if disk_path is None else disk_path
+        self.disk = DiskBackend(disk_path) if disk_path else None
+
+        self.hits = 0
+        self.revalidated = 0
+        self._flight = SingleFlight()
+
+    @property
+    def misses(self) -> int:
+        """未命中而實際送出的次數"""
+        return self._flight.calls
+
+    @property
+    def coalesced(self) -> int:
+        """未命中但與在途請求合併的次數"""
+        return self._flight.deduplicated
+
+    def ttl_for(self, endpoint: str) -> float:
+        """端點的 TTL（0 表示不快取）"""
+        return self.ttls.get(endpoint, 0)
+
+    @staticmethod
+    def key(base_url: str, endpoint: str, query_string: str) -> str:
+        """快取鍵（包含基礎 URL，不同環境互不影響）"""
+        return f"{base_url}{endpoint}?{query_string}"
+
+    def _lookup(self, key: str, builder: ResponseBuilder) -> Optional[CacheEntry]:
+        entry = self.memory.get(key)
+        if self.disk is not None and (entry is None or entry.expires_at <= time.time()):
+            # 其他程序可能已更新磁碟層
+            stored = self.disk.get(key, builder)
+            if stored is not None and (entry is None or stored.expires_at > entry.expires_at):
+                entry = stored
+                self.memory.set(key, entry)
+        return entry
+
+    def _store(self, key: str, entry: Optional[CacheEntry], response: Any, ttl: float) -> Any:
+        """依響應更新快取，返回要交給呼叫端的響應"""
+        now = time.time()
+        if response.status_code == 304 and entry is not None:
+            self.revalidated += 1
+            entry.expires_at = now + ttl
+            response = entry.response
+        elif response.status_code == 200:
+            headers = response.headers
+            entry = CacheEntry(response, now + ttl, headers.get('ETag'), headers.get('Last-Modified'))
+        else:
+            return response
+        self.memory.set(key, entry)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, entry)
+            except sqlite3.Error as e:
+                logger.warning(f"Response cache write failed: {e}")
+        return response
+
+    def fetch(
+        self,
+        key: str,
+        ttl: float,
+        send: Callable[[Optional[Dict[str, str]]], Any],
+        builder: ResponseBuilder
+    ) -> Any:
+        """
+        取得快取響應，過期或不存在時呼叫 send（同步客戶端）
+
+        Args:
+            key: 快取鍵
+            ttl: 有效秒數
+            send: 送出請求的函數，參數為條件請求標頭（可能為 None）
+            builder: 由磁碟資料重建響應的函數
+
+        Returns:
+            響應對象
+        """
+        entry = self._lookup(key, builder)
+        if entry is not None and entry.expires_at > time.time():
+            self.hits += 1
+            return entry.response
+
+        return self._flight.do(key, lambda: self._store(key, entry, send(entry.validators() if entry else None), ttl))
+
+    async def fetch_async(
+        self,
+        key: str,
+        ttl: float,
+        send: Callable[[Optional[Dict[str, str]]], Awaitable[Any]],
+        builder: ResponseBuilder
+    ) -> Any:
+        """fetch 的非同步版本（非同步客戶端）"""
+        entry = self._lookup(key, builder)
+        if entry is not None and entry.expires_at > time.time():
+            self.hits += 1
+            return entry.response
+
+        async def refresh():
+            return self._store(key, entry, await send(entry.validators() if entry else None), ttl)
+
+        return await self._flight.do_async(key, refresh)
+
+    def clear(self):
+        """清空快取"""
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    取得程序內共用的響應快取（依 Config 建立）
+
+    Returns:
+        ResponseCache 實例
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
@@ -0,0 +1,382 @@
+"""
+重試與對沖請求
+讀取請求在連線錯誤、5xx 與 429 時以指數退避加隨機抖動重試（429 依 Retry-After），
+整體耗時不超過延遲預算；可選擇在請求超過該端點 p95 延遲時再送出一個對沖請求，
+取先完成者，以約 5% 的額外負載換取較低的 p99。
+下單不在此重試，見 BinanceClient._place_order（以 newClientOrderId 對帳）
+"""
+import asyncio
+import random
+import re
+import threading
+import time
+import uuid
+import logging
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 可重試的狀態碼（418 表示 IP 已被封禁，不重試）
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+# newClientOrderId 的命名空間（pytest-xdist 各 worker 不同，見 set_client_order_namespace）
+_client_order_namespace = ''
+CLIENT_ORDER_NAMESPACE = re.compile(r'^[A-Za-z0-9]{0,8}$')
+
+
+def set_client_order_namespace(namespace: str):
+    """
+    設定本程序產生的 newClientOrderId 命名空間
+
+    Args:
+        namespace: 最多 8 個英數字元（例如 xdist 的 worker id 'gw0'；空字串表示不使用）
+    """
+    global _client_order_namespace
+    if not CLIENT_ORDER_NAMESPACE.match(namespace):
+        raise ValueError(f"命名空間必須為最多 8 個英數字元: {namespace!r}")
+    _client_order_namespace = namespace
+
+
+def client_order_prefix() -> str:
+    """本程序產生的 newClientOrderId 前綴（用於篩選自己建立的訂單）"""
+    return f"x-{_client_order_namespace}-" if _client_order_namespace else 'x-'
+
+
+def new_client_order_id() -> str:
+    """產生 newClientOrderId（符合 ^[.A-Z:/a-z0-9_-]{1,36}$）"""
+    prefix = client_order_prefix()
+    return prefix + uuid.uuid4().hex[:36 - len(prefix)]
+
+
+def order_not_found(response: Any) -> bool:
+    """查詢訂單的響應是否確認訂單不存在（-2013 Order does not exist）"""
+    return response.status_code == 400 and b'-2013' in response.content
+
+
+class LatencyWindow:
+    """單一端點最近的延遲樣本，分位數每累積一定樣本才重新計算"""
+
+    def __init__(self, size: int = 200, recompute_every: int = 10):
+        self._samples: deque = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._recompute_every = recompute_every
+        self._pending = 0
+        self._cached: Dict[float, float] = {}
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self._pending += 1
+            if self._pending >= self._recompute_every:
+                self._cached.clear()
+                self._pending = 0
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Args:
+            q: 分位數 (0 ~ 1)
+
+        Returns:
+            延遲秒數（沒有樣本時為 None）
+        """
+        with self._lock:
+            value = self._cached.get(q)
+            if value is None and self._samples:
+                ordered = sorted(self._samples)
+                value = self._cached[q] = ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+            return value
+
+
+class RetryPolicy:
+    """
+    讀取請求的重試與對沖策略
+
+    由客戶端的 _request 對 GET 使用；send 為送出一次請求的函數：
+
+        policy = RetryPolicy(max_retries=3, hedge=True)
+        response = policy.call('/api/v3/depth', lambda: client._send(...), (requests.ConnectionError,))
+    """
+
+    def __init__(
+        self,
+        max_retries: int = None,
+        backoff_base: float = None,
+        backoff_max: float = None,
+        budget: float = None,
+        hedge: bool = None,
+        hedge_percentile: float = None,
+        hedge_min_samples: int = None
+    ):
+        """
+        Args:
+            max_retries: 最多重試次數（預設 Config.MAX_RETRIES）
+            backoff_base: 第一次重試的退避上限秒數，之後每次加倍（預設 Config.RETRY_BACKOFF_BASE）
+            backoff_max: 單次退避上限（預設 Config.RETRY_BACKOFF_MAX）
+            budget: 含重試的總延遲預算秒數，等待會超出預算時不再重試（預設 Config.RETRY_BUDGET）
+            hedge: 是否啟用對沖請求（預設 Config.HEDGE_ENABLED）
+            hedge_percentile: 超過此分位數延遲時送出對沖請求（預設 Config.HEDGE_PERCENTILE）
+            hedge_min_samples: 端點累積足夠樣本後才對沖（預設 Config.HEDGE_MIN_SAMPLES）
+        """
+        self.max_retries = Config.MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = Config.RETRY_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.backoff_max = Config.RETRY_BACKOFF_MAX if backoff_max is None else backoff_max
+        self.budget = Config.RETRY_BUDGET if budget is None else budget
+        self.hedge = Config.HEDGE_ENABLED if hedge is None else hedge
+        self.hedge_percentile = hedge_percentile or Config.HEDGE_PERCENTILE
+        self.hedge_min_samples = Config.HEDGE_MIN_SAMPLES if hedge_min_samples is None else hedge_min_samples
+
+        self.retries = 0       # 重試次數
+        self.gave_up = 0       # 重試用盡或超出預算而放棄的次數
+        self.hedged = 0        # 送出對沖請求的次數
+        self.hedge_wins = 0    # 對沖請求先完成的次數
+        self.reconciled = 0    # 下單結果不明、以 clientOrderId 查到訂單的次數
+
+        self._latencies: Dict[str, LatencyWindow] = {}
+        self._random = random.Random()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    # ==================== 退避 ====================
+
+    def backoff(self, attempt: int) -> float:
+        """第 attempt 次重試（從 0 起算）的退避秒數（full jitter）"""
+        return self._random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def delay(self, attempt: int, elapsed: float, response: Any = None) -> Optional[float]:
+        """
+        下一次重試前的等待秒數
+
+        Args:
+            attempt: 已重試次數
+            elapsed: 從第一次送出至今的秒數
+            response: 失敗的響應（連線錯誤時為 None）
+
+        Returns:
+            等待秒數（不應再重試時為 None）
+        """
+        if attempt >= self.max_retries:
+            return None
+        wait_seconds = self.backoff(attempt)
+        if response is not None and response.status_code == 429:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after:
+                wait_seconds = max(wait_seconds, float(retry_after))
+        if elapsed + wait_seconds > self.budget:
+            return None
+        return wait_seconds
+
+    # ==================== 延遲統計 ====================
+
+    def _window(self, endpoint: str) -> LatencyWindow:
+        window = self._latencies.get(endpoint)
+        if window is None:
+            with self._lock:
+                window = self._latencies.setdefault(endpoint, LatencyWindow())
+        return window
+
+    def record(self, endpoint: str, seconds: float):
+        """記錄一次請求的延遲"""
+        self._window(endpoint).add(seconds)
+
+    def hedge_delay(self, endpoint: str) -> Optional[float]:
+        """
+        送出對沖請求前的等待秒數
+
+        Returns:
+            端點的 p95 延遲（未啟用對沖或樣本不足時為 None）
+        """
+        if not self.hedge:
+            return None
+        window = self._window(endpoint)
+        if len(window) < self.hedge_min_samples:
+            return None
+        return window.percentile(self.hedge_percentile)
+
+    # ==================== 同步 ====================
+
+    def call(self, endpoint: str, send: Callable[[], Any], errors: Tuple[Type[BaseException], ...]) -> Any:
+        """
+        送出讀取請求，失敗時依策略重試
+
+        Args:
+            endpoint: API 端點（延遲統計與日誌用）
+            send: 送出一次請求並返回響應的函數
+            errors: 視為暫時性失敗而重試的例外類型
+
+        Returns:
+            響應對象（重試用盡時返回最後一次的響應，或拋出最後一次的例外）
+        """
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            error = None
+            try:
+                response = self._attempt(endpoint, send)
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+            except errors as e:
+                response, error = None, e
+
+            wait_seconds = self.delay(attempt, time.monotonic() - start, response)
+            if wait_seconds is None:
+                self.gave_up += 1
+                if error is not None:
+                    raise error
+                return response
+            self.log_retry(endpoint, attempt, wait_seconds, response, error)
+            time.sleep(wait_seconds)
+            attempt += 1
+
+    def _timed(self, endpoint: str, send: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        response = send()
+        self.record(endpoint, time.perf_counter() - start)
+        return response
+
+    def _attempt(self, endpoint: str, send: Callable[[], Any]) -> Any:
+        """送出一次請求；超過 p95 仍未完成時再送出一個，取先成功者"""
+        hedge_after = self.hedge_delay(endpoint)
+        if hedge_after is None:
+            return self._timed(endpoint, send)
+
+        executor = self._get_executor()
+        first = executor.submit(self._timed, endpoint, send)
+        try:
+            return first.result(timeout=hedge_after)
+        except FutureTimeout:
+            pass
+
+        self.hedged += 1
+        second = executor.submit(self._timed, endpoint, send)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is second:
+                        self.hedge_wins += 1
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=Config.POOL_MAXSIZE, thread_name_prefix='hedge')
+        return self._executor
+
+    # ==================== 非同步 ====================
+
+    async def call_async(
+        self,
+        endpoint: str,
+        send: Callable[[], Awaitable[Any]],
+        errors: Tuple[Type[BaseException], ...]
+    ) -> Any:
+        """call 的非同步版本"""
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            error = None
+            try:
+                response = await self._attempt_async(endpoint, send)
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+            except errors as e:
+                response, error = None, e
+
+            wait_seconds = self.delay(attempt, time.monotonic() - start, response)
+            if wait_seconds is None:
+                self.gave_up += 1
+                if error is not None:
+                    raise error
+                return response
+            self.log_retry(endpoint, attempt, wait_seconds, response, error)
+            await asyncio.sleep(wait_seconds)
+            attempt += 1
+
+    async def _timed_async(self, endpoint: str, send: Callable[[], Awaitable[Any]]) -> Any:
+        start = time.perf_counter()
+        response = await send()
+        self.record(endpoint, time.perf_counter() - start)
+        return response
+
+    async def _attempt_async(self, endpoint: str, send: Callable[[], Awaitable[Any]]) -> Any:
+        """_attempt 的非同步版本；落後的請求會被取消"""
+        hedge_after = self.hedge_delay(endpoint)
+        if hedge_after is None:
+            return await self._timed_async(endpoint, send)
+
+        first = asyncio.ensure_future(self._timed_async(endpoint, send))
+        pending = {first}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_after)
+            if done:
+                return first.result()
+
+            self.hedged += 1
+            second = asyncio.ensure_future(self._timed_async(endpoint, send))
+            pending = {first, second}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    # ==================== 其他 ====================
+
+    def log_retry(self, endpoint: str, attempt: int, wait_seconds: float, response: Any, error: Any):
+        """記錄一次重試（下單對帳的重送也使用）"""
+        self.retries += 1
+        reason = error if error is not None else f"HTTP {response.status_code}"
+        logger.warning(f"Retrying {endpoint} in {wait_seconds:.2f}s (attempt {attempt + 1}/{self.max_retries}): {reason}")
+
+    def stats(self) -> Dict[str, int]:
+        """重試與對沖統計"""
+        return {
+            'retries': self.retries,
+            'gave_up': self.gave_up,
+            'hedged': self.hedged,
+            'hedge_wins': self.hedge_wins,
+            'reconciled': self.reconciled,
+        }
+
+
+_policies: Dict[str, RetryPolicy] = {}
+_policies_lock = threading.Lock()
+
+
+def get_retry_policy(base_url: str = None) -> RetryPolicy:
+    """
+    取得與基礎 URL 綁定的共用重試策略（程序內單例，延遲統計跨客戶端累積）
+
+    Args:
+        base_url: API 基礎 URL
+
+    Returns:
+        RetryPolicy 實例
+    """
+    key = base_url or Config.BASE_URL
+    with _policies_lock:
+        policy = _policies.get(key)
+        if policy is None:
+            policy = _policies[key] = RetryPolicy()
+        return policy
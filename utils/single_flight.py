@@ -0,0 +1,150 @@
+"""
+在途請求合併（single-flight）
+同一個鍵同時只會有一個請求在途，其餘呼叫等待並共用同一個響應對象
+（JSON 也只解析一次，見 utils.models.parse_json）；
+突發扇出時同一份公開數據只向上游送出一次、只消耗一次請求權重
+"""
+import asyncio
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class _Call:
+    """在途請求：第一個呼叫者送出，其餘等待結果"""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    在途請求合併
+
+    同步呼叫以執行緒等待，非同步呼叫在各自的事件循環內共用 Future
+    （不同事件循環的呼叫互不合併）：
+
+        flight = SingleFlight()
+        response = flight.do(key, lambda: session.get(url))
+        response = await flight.do_async(key, lambda: session.get(url))
+    """
+
+    def __init__(self):
+        self.calls = 0          # 實際執行的次數
+        self.deduplicated = 0   # 等待並共用結果的次數
+
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._async_calls: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]' = \
+            weakref.WeakKeyDictionary()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        執行 fn，相同鍵已在途時等待並返回同一個結果
+
+        Args:
+            key: 合併鍵
+            fn: 實際送出請求的函數
+
+        Returns:
+            fn 的返回值（例外同樣傳給所有等待者）
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.deduplicated += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        do 的非同步版本
+
+        等待者以 asyncio.shield 等待，單一等待者被取消不影響其他呼叫；
+        送出者被取消時所有等待者一併收到 CancelledError
+
+        Args:
+            key: 合併鍵
+            fn: 返回 awaitable 的函數
+
+        Returns:
+            fn 的結果
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            calls = self._async_calls.setdefault(loop, {})
+            future = calls.get(key)
+            leader = future is None
+            if leader:
+                future = calls[key] = loop.create_future()
+                self.calls += 1
+            else:
+                self.deduplicated += 1
+        if not leader:
+            return await asyncio.shield(future)
+
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 沒有其他等待者時避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            del calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        """合併統計"""
+        return {'calls': self.calls, 'deduplicated': self.deduplicated}
+
+    def reset_stats(self):
+        """重置統計"""
+        with self._lock:
+            self.calls = 0
+            self.deduplicated = 0
+
+
+_default_flight: Optional[SingleFlight] = None
+_default_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """
+    取得程序內共用的 SingleFlight（同一程序中各客戶端的相同請求互相合併）
+
+    Returns:
+        SingleFlight 實例
+    """
+    global _default_flight
+    with _default_flight_lock:
+        if _default_flight is None:
+            _default_flight = SingleFlight()
+        return _default_flight
+
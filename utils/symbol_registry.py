@@ -0,0 +1,314 @@
+"""
+交易對規則快取與下單前驗證
+exchangeInfo 只載入一次並整理成每個交易對的精簡索引，依 TTL 在背景重新載入；
+下單前在本地檢查 PRICE_FILTER / LOT_SIZE / MARKET_LOT_SIZE / NOTIONAL 等規則，
+不合規的訂單不必花一次往返與請求權重才收到 400
+"""
+import threading
+import time
+import logging
+from decimal import ROUND_DOWN, ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Any, Callable, Dict, FrozenSet, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal(0)
+
+# 需要 price 的訂單類型（STOP_LOSS / TAKE_PROFIT 觸發後以市價成交，只需 quantity 與 stopPrice）
+PRICED_ORDER_TYPES = frozenset({'LIMIT', 'LIMIT_MAKER', 'STOP_LOSS_LIMIT', 'TAKE_PROFIT_LIMIT'})
+
+
+class OrderValidationError(ValueError):
+    """訂單不符合交易對規則（未送出）"""
+
+    def __init__(self, message: str, filter_type: str = None):
+        super().__init__(message)
+        self.filter_type = filter_type
+
+
+def _decimal(value: Any, name: str) -> Decimal:
+    """轉為 Decimal；float 先轉字串，避免 0.1 變成 0.1000000000000000055..."""
+    if isinstance(value, Decimal):
+        number = value
+    else:
+        try:
+            number = Decimal(str(value))
+        except (InvalidOperation, ValueError):
+            raise OrderValidationError(f"{name} 不是有效數字: {value!r}")
+    if not number.is_finite() or number <= 0:
+        raise OrderValidationError(f"{name} 必須為正數: {value}")
+    return number
+
+
+def _round_to_step(value: Decimal, step: Decimal, rounding: str) -> Decimal:
+    """取整到 step 的倍數，小數位數與 step 相同"""
+    if not step:
+        return value
+    units = (value / step).to_integral_value(rounding=rounding)
+    exponent = min(step.normalize().as_tuple().exponent, 0)
+    return (units * step).quantize(Decimal(1).scaleb(exponent))
+
+
+class SymbolFilters:
+    """單一交易對的規則索引（只保留驗證用的欄位，數值預先轉為 Decimal）"""
+
+    __slots__ = (
+        'symbol', 'status', 'base_asset', 'quote_asset', 'order_types',
+        'min_price', 'max_price', 'tick_size',
+        'min_qty', 'max_qty', 'step_size',
+        'market_min_qty', 'market_max_qty', 'market_step_size',
+        'min_notional', 'max_notional', 'apply_min_to_market', 'apply_max_to_market'
+    )
+
+    def __init__(self, info: Dict[str, Any]):
+        """
+        Args:
+            info: exchangeInfo 中 symbols 陣列的一個元素
+        """
+        self.symbol: str = info['symbol']
+        self.status: str = info.get('status', 'TRADING')
+        self.base_asset: str = info.get('baseAsset', '')
+        self.quote_asset: str = info.get('quoteAsset', '')
+        self.order_types: FrozenSet[str] = frozenset(info.get('orderTypes', ()))
+
+        self.min_price = self.max_price = self.tick_size = ZERO
+        self.min_qty = self.max_qty = self.step_size = ZERO
+        self.market_min_qty = self.market_max_qty = self.market_step_size = ZERO
+        self.min_notional = self.max_notional = ZERO
+        self.apply_min_to_market = self.apply_max_to_market = False
+
+        for item in info.get('filters', ()):
+            filter_type = item.get('filterType')
+            if filter_type == 'PRICE_FILTER':
+                self.min_price = Decimal(item['minPrice'])
+                self.max_price = Decimal(item['maxPrice'])
+                self.tick_size = Decimal(item['tickSize'])
+            elif filter_type == 'LOT_SIZE':
+                self.min_qty = Decimal(item['minQty'])
+                self.max_qty = Decimal(item['maxQty'])
+                self.step_size = Decimal(item['stepSize'])
+            elif filter_type == 'MARKET_LOT_SIZE':
+                self.market_min_qty = Decimal(item['minQty'])
+                self.market_max_qty = Decimal(item['maxQty'])
+                self.market_step_size = Decimal(item['stepSize'])
+            elif filter_type == 'NOTIONAL':
+                self.min_notional = Decimal(item['minNotional'])
+                self.max_notional = Decimal(item['maxNotional'])
+                self.apply_min_to_market = item.get('applyMinToMarket', False)
+                self.apply_max_to_market = item.get('applyMaxToMarket', False)
+            elif filter_type == 'MIN_NOTIONAL':
+                # 舊版規則，只有最小名目價值
+                self.min_notional = Decimal(item['minNotional'])
+                self.apply_min_to_market = item.get('applyToMarket', False)
+
+    def __repr__(self) -> str:
+        return f"<SymbolFilters {self.symbol} tick={self.tick_size} step={self.step_size}>"
+
+
+class SymbolRegistry:
+    """
+    交易對規則快取
+
+    規則只在本地檢查可確定的部分；PERCENT_PRICE_BY_SIDE 等需要即時均價的規則
+    與市價單的名目價值仍由伺服器判斷：
+
+        registry = SymbolRegistry(client._fetch_exchange_info)
+        registry.load()
+        registry.validate_order('BTCUSDT', 'BUY', 'LIMIT', quantity=0.001, price=20000)
+        price = registry.round_price('BTCUSDT', 20000.123)
+    """
+
+    def __init__(self, fetch_exchange_info: Callable[[], Dict[str, Any]], ttl: float = None):
+        """
+        Args:
+            fetch_exchange_info: 取得 exchangeInfo JSON 的函數
+            ttl: 規則有效秒數，過期後在背景重新載入（預設 Config.EXCHANGE_INFO_TTL）
+        """
+        self.fetch_exchange_info = fetch_exchange_info
+        self.ttl = Config.EXCHANGE_INFO_TTL if ttl is None else ttl
+
+        self.symbols: Dict[str, SymbolFilters] = {}
+        self.loaded_at: Optional[float] = None
+        self.load_count = 0
+
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    # ==================== 載入 ====================
+
+    def load(self) -> int:
+        """
+        載入（或重新載入）exchangeInfo
+
+        Returns:
+            交易對數量
+        """
+        info = self.fetch_exchange_info()
+        symbols = {item['symbol']: SymbolFilters(item) for item in info.get('symbols', ())}
+        with self._lock:
+            self.symbols = symbols
+            self.loaded_at = time.monotonic()
+            self.load_count += 1
+        logger.info(f"Loaded exchange info for {len(symbols)} symbols")
+        return len(symbols)
+
+    @property
+    def expired(self) -> bool:
+        """規則是否已超過 TTL"""
+        return self.loaded_at is None or time.monotonic() - self.loaded_at >= self.ttl
+
+    def _refresh(self):
+        try:
+            self.load()
+        except Exception as e:
+            logger.error(f"Exchange info refresh failed: {e}")
+        finally:
+            self._refreshing = False
+
+    def get(self, symbol: str) -> Optional[SymbolFilters]:
+        """
+        取得交易對規則
+
+        尚未載入時同步載入；已過期時沿用舊規則並在背景重新載入，
+        下單路徑不會因為重新載入而等待網絡
+
+        Args:
+            symbol: 交易對
+
+        Returns:
+            SymbolFilters（交易對不存在時為 None）
+        """
+        if self.loaded_at is None:
+            self.load()
+        elif self.expired and not self._refreshing:
+            with self._lock:
+                if not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._refresh, name='symbol-registry', daemon=True).start()
+        return self.symbols.get(symbol)
+
+    def _require(self, symbol: str) -> SymbolFilters:
+        filters = self.get(symbol)
+        if filters is None:
+            raise OrderValidationError(f"無效的交易對: {symbol}")
+        return filters
+
+    # ==================== 取整 ====================
+
+    def round_price(self, symbol: str, price: Any, rounding: str = ROUND_HALF_UP) -> Decimal:
+        """
+        價格取整到 tickSize
+
+        Args:
+            symbol: 交易對
+            price: 價格
+            rounding: decimal 取整模式（預設四捨五入）
+
+        Returns:
+            取整後的價格
+        """
+        return _round_to_step(_decimal(price, 'price'), self._require(symbol).tick_size, rounding)
+
+    def round_qty(self, symbol: str, quantity: Any, market: bool = False, rounding: str = ROUND_DOWN) -> Decimal:
+        """
+        數量取整到 stepSize
+
+        Args:
+            symbol: 交易對
+            quantity: 數量
+            market: 是否為市價單（使用 MARKET_LOT_SIZE 的 stepSize）
+            rounding: decimal 取整模式（預設無條件捨去，避免超過可用餘額）
+
+        Returns:
+            取整後的數量
+        """
+        filters = self._require(symbol)
+        step = filters.step_size
+        if market and filters.market_step_size:
+            step = filters.market_step_size
+        return _round_to_step(_decimal(quantity, 'quantity'), step, rounding)
+
+    # ==================== 驗證 ====================
+
+    def validate_order(
+        self,
+        symbol: str,
+        side: str,
+        order_type: str,
+        quantity: Any = None,
+        quote_order_qty: Any = None,
+        price: Any = None
+    ) -> SymbolFilters:
+        """
+        依交易對規則檢查訂單（參數同 create_order）
+
+        Args:
+            symbol: 交易對
+            side: BUY 或 SELL
+            order_type: LIMIT, MARKET 等
+            quantity: 數量
+            quote_order_qty: 報價資產數量（市價單可用）
+            price: 價格（LIMIT、LIMIT_MAKER、STOP_LOSS_LIMIT、TAKE_PROFIT_LIMIT 必填）
+
+        Returns:
+            交易對規則
+
+        Raises:
+            OrderValidationError: 訂單不符合規則
+        """
+        filters = self._require(symbol)
+        if filters.status != 'TRADING':
+            raise OrderValidationError(f"{symbol} 目前不可交易（{filters.status}）")
+        if side not in ('BUY', 'SELL'):
+            raise OrderValidationError(f"無效的買賣方向: {side}")
+        if filters.order_types and order_type not in filters.order_types:
+            raise OrderValidationError(f"{symbol} 不支援 {order_type} 訂單")
+
+        market = order_type == 'MARKET'
+        if market:
+            if quantity is None and quote_order_qty is None:
+                raise OrderValidationError("市價單需提供 quantity 或 quote_order_qty")
+            if quantity is None:
+                _decimal(quote_order_qty, 'quote_order_qty')
+                return filters
+        elif quantity is None:
+            raise OrderValidationError(f"{order_type} 訂單需提供 quantity")
+        elif price is None and order_type in PRICED_ORDER_TYPES:
+            raise OrderValidationError(f"{order_type} 訂單需提供 price")
+
+        qty = _decimal(quantity, 'quantity')
+        self._check_lot(qty, filters.min_qty, filters.max_qty, filters.step_size, 'LOT_SIZE')
+        if market:
+            # 市價單同時受 MARKET_LOT_SIZE 限制（stepSize 為 0 表示不檢查倍數）
+            self._check_lot(qty, filters.market_min_qty, filters.market_max_qty, filters.market_step_size,
+                            'MARKET_LOT_SIZE')
+            return filters
+        if order_type not in PRICED_ORDER_TYPES:
+            return filters
+
+        price = _decimal(price, 'price')
+        if filters.tick_size:
+            if filters.min_price and price < filters.min_price:
+                raise OrderValidationError(f"價格 {price} 低於最小價格 {filters.min_price}", 'PRICE_FILTER')
+            if filters.max_price and price > filters.max_price:
+                raise OrderValidationError(f"價格 {price} 高於最大價格 {filters.max_price}", 'PRICE_FILTER')
+            if (price - filters.min_price) % filters.tick_size:
+                raise OrderValidationError(f"價格 {price} 不是 tickSize {filters.tick_size} 的倍數", 'PRICE_FILTER')
+
+        notional = price * qty
+        if filters.min_notional and notional < filters.min_notional:
+            raise OrderValidationError(f"名目價值 {notional} 低於 {filters.min_notional}", 'NOTIONAL')
+        if filters.max_notional and notional > filters.max_notional:
+            raise OrderValidationError(f"名目價值 {notional} 高於 {filters.max_notional}", 'NOTIONAL')
+        return filters
+
+    @staticmethod
+    def _check_lot(qty: Decimal, min_qty: Decimal, max_qty: Decimal, step: Decimal, filter_type: str):
+        if min_qty and qty < min_qty:
+            raise OrderValidationError(f"數量 {qty} 低於最小數量 {min_qty}", filter_type)
+        if max_qty and qty > max_qty:
+            raise OrderValidationError(f"數量 {qty} 高於最大數量 {max_qty}", filter_type)
+        if step and (qty - min_qty) % step:
+            raise OrderValidationError(f"數量 {qty} 不是 stepSize {step} 的倍數", filter_type)
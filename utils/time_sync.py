@@ -0,0 +1,146 @@
+"""
+伺服器時間同步
+以 NTP 方式估計本地與伺服器的時間差與往返延遲，背景定期重新同步，
+簽名請求使用校正後的單調時間戳，並依量測到的抖動設定 recvWindow
+"""
+import math
+import statistics
+import threading
+import time
+import logging
+from typing import Callable, List, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class TimeSync:
+    """
+    伺服器時間同步器
+
+    sync() 會取樣數次伺服器時間，以往返延遲最小的樣本估計時間差；
+    timestamp() 只讀取單調時鐘，不會發出任何請求：
+
+        time_sync = TimeSync(lambda: client.get_server_time().json()['serverTime'])
+        time_sync.sync()
+        time_sync.start()
+    """
+
+    def __init__(
+        self,
+        fetch_server_time: Callable[[], int],
+        samples: int = None,
+        interval: float = None,
+        min_recv_window: int = None,
+        max_recv_window: int = None
+    ):
+        """
+        Args:
+            fetch_server_time: 取得伺服器時間（毫秒）的函數
+            samples: 每次同步的取樣次數
+            interval: 背景重新同步間隔（秒）
+            min_recv_window: recvWindow 下限（毫秒）
+            max_recv_window: recvWindow 上限（毫秒）
+        """
+        self.fetch_server_time = fetch_server_time
+        self.samples = samples or Config.TIME_SYNC_SAMPLES
+        self.interval = interval or Config.TIME_SYNC_INTERVAL
+        self.min_recv_window = min_recv_window or Config.RECV_WINDOW_MIN
+        self.max_recv_window = max_recv_window or Config.RECV_WINDOW_MAX
+
+        self.offset_ms = 0.0
+        self.rtt_ms = 0.0
+        self.jitter_ms = 0.0
+        self.recv_window: Optional[int] = None
+        self.last_sync: Optional[float] = None
+
+        self._wall_base_ms = time.time() * 1000
+        self._mono_base = time.monotonic()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> Tuple[float, float]:
+        """
+        取樣一次
+
+        Returns:
+            (時間差毫秒, 往返延遲毫秒)
+        """
+        mono_start = time.monotonic()
+        wall_start_ms = time.time() * 1000
+        server_time = self.fetch_server_time()
+        rtt_ms = (time.monotonic() - mono_start) * 1000
+        # 假設去回程對稱，伺服器時間對應本地送出時刻加上一半往返延遲
+        return server_time - (wall_start_ms + rtt_ms / 2), rtt_ms
+
+    def sync(self) -> float:
+        """
+        立即同步
+
+        Returns:
+            估計的時間差（伺服器 - 本地，毫秒）
+        """
+        results: List[Tuple[float, float]] = [self._sample() for _ in range(self.samples)]
+        offset_ms, rtt_ms = min(results, key=lambda r: r[1])
+        rtts = [r[1] for r in results]
+        jitter_ms = statistics.pstdev(rtts) if len(rtts) > 1 else 0.0
+
+        # recvWindow 需涵蓋請求單程延遲與估計誤差，以最慢樣本加上抖動的餘裕
+        recv_window = int(math.ceil(max(rtts) + 4 * jitter_ms + rtt_ms))
+        recv_window = max(self.min_recv_window, min(recv_window, self.max_recv_window))
+
+        with self._lock:
+            self.offset_ms = offset_ms
+            self.rtt_ms = rtt_ms
+            self.jitter_ms = jitter_ms
+            self.recv_window = recv_window
+            self._wall_base_ms = time.time() * 1000 + offset_ms
+            self._mono_base = time.monotonic()
+            self.last_sync = time.time()
+
+        logger.debug(
+            f"Time sync: offset={offset_ms:.1f}ms rtt={rtt_ms:.1f}ms "
+            f"jitter={jitter_ms:.1f}ms recvWindow={recv_window}"
+        )
+        return offset_ms
+
+    def timestamp(self) -> int:
+        """校正後的伺服器時間戳（毫秒），只讀取單調時鐘"""
+        with self._lock:
+            return int(self._wall_base_ms + (time.monotonic() - self._mono_base) * 1000)
+
+    # ==================== 背景同步 ====================
+
+    def start(self) -> 'TimeSync':
+        """啟動背景定期同步"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='binance-time-sync', daemon=True)
+            self._thread.start()
+        return self
+
+    def request_resync(self):
+        """要求背景執行緒立即重新同步（例如收到 -1021 時）"""
+        self._wakeup.set()
+
+    def stop(self):
+        """停止背景同步"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                self.sync()
+            except Exception as e:
+                logger.warning(f"Time sync failed: {e}")
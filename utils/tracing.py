@@ -0,0 +1,223 @@
+"""
+請求追蹤
+依抽樣率把請求摘要（端點、權重、延遲、大小、狀態碼）記錄到固定大小的環形緩衝區，
+測試失敗時可輸出最近的請求；未抽中的請求只付出一次亂數的成本，
+關閉追蹤時客戶端完全不建立記錄
+"""
+import itertools
+import json
+import random
+import threading
+import time
+import logging
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+from config import Config
+from utils.rate_limiter import request_weight
+
+logger = logging.getLogger(__name__)
+
+# 錯誤響應保留的 body 長度
+PREVIEW_BYTES = 200
+
+
+class TraceRecord:
+    """單一請求的追蹤記錄"""
+
+    __slots__ = ('seq', 'timestamp', 'method', 'endpoint', 'weight', 'status', 'latency',
+                 'request_bytes', 'response_bytes', 'used_weight', 'error', 'preview')
+
+    def __init__(
+        self,
+        seq: int,
+        method: str,
+        endpoint: str,
+        weight: int,
+        status: Optional[int],
+        latency: float,
+        request_bytes: int,
+        response_bytes: int,
+        used_weight: Optional[str] = None,
+        error: Optional[str] = None,
+        preview: Optional[bytes] = None
+    ):
+        self.seq = seq
+        self.timestamp = time.time()
+        self.method = method
+        self.endpoint = endpoint
+        self.weight = weight
+        self.status = status
+        self.latency = latency
+        self.request_bytes = request_bytes
+        self.response_bytes = response_bytes
+        self.used_weight = used_weight
+        self.error = error
+        self.preview = preview
+
+    def to_dict(self) -> Dict[str, Any]:
+        """可輸出為 JSON 的字典（body 片段在此才解碼）"""
+        return {
+            'seq': self.seq,
+            'timestamp': self.timestamp,
+            'method': self.method,
+            'endpoint': self.endpoint,
+            'weight': self.weight,
+            'status': self.status,
+            'latency_ms': round(self.latency * 1000, 3),
+            'request_bytes': self.request_bytes,
+            'response_bytes': self.response_bytes,
+            'used_weight': int(self.used_weight) if self.used_weight else None,
+            'error': self.error,
+            'preview': self.preview.decode('utf-8', errors='replace') if self.preview else None,
+        }
+
+    def __repr__(self) -> str:
+        return f"<TraceRecord #{self.seq} {self.method} {self.endpoint} {self.status or self.error}>"
+
+
+class Tracer:
+    """
+    環形緩衝區追蹤記錄器
+
+    由客戶端的 _send 在每次請求完成時呼叫：
+
+        tracer = client.enable_tracing(Tracer(sample_rate=0.1))
+        mark = tracer.mark()
+        ...
+        tracer.dump('reports/traces/failed.jsonl', since=mark)
+    """
+
+    def __init__(self, capacity: int = None, sample_rate: float = None, error_sample_rate: float = None):
+        """
+        Args:
+            capacity: 保留的記錄數（預設 Config.TRACE_BUFFER_SIZE）
+            sample_rate: 成功請求的抽樣率 0 ~ 1（預設 Config.TRACE_SAMPLE_RATE）
+            error_sample_rate: 錯誤響應（>= 400）與連線錯誤的抽樣率（預設 Config.TRACE_ERROR_SAMPLE_RATE）
+        """
+        self.capacity = capacity or Config.TRACE_BUFFER_SIZE
+        self.sample_rate = Config.TRACE_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.error_sample_rate = Config.TRACE_ERROR_SAMPLE_RATE if error_sample_rate is None else error_sample_rate
+        self.seen = 0
+        self._buffer: deque = deque(maxlen=self.capacity)
+        self._seq = itertools.count(1)
+        self._random = random.Random()
+
+    def _sampled(self, rate: float) -> bool:
+        return rate >= 1.0 or (rate > 0.0 and self._random.random() < rate)
+
+    def observe(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Mapping[str, Any]],
+        status: int,
+        latency: float,
+        request_bytes: int,
+        content: bytes,
+        headers: Mapping[str, str]
+    ):
+        """
+        記錄一個完成的請求（依抽樣率決定是否保留）
+
+        Args:
+            method: HTTP 方法
+            endpoint: API 端點
+            params: 請求參數（用於計算權重）
+            status: HTTP 狀態碼
+            latency: 延遲秒數
+            request_bytes: 查詢字串位元組數
+            content: 響應內容
+            headers: 響應頭
+        """
+        self.seen += 1
+        failed = status >= 400
+        if not self._sampled(self.error_sample_rate if failed else self.sample_rate):
+            return
+        self._buffer.append(TraceRecord(
+            next(self._seq), method, endpoint, request_weight(method, endpoint, params), status, latency,
+            request_bytes, len(content), headers.get('X-MBX-USED-WEIGHT-1M'),
+            preview=content[:PREVIEW_BYTES] if failed else None
+        ))
+
+    def observe_error(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Mapping[str, Any]],
+        error: BaseException,
+        latency: float
+    ):
+        """記錄一個沒有響應的請求（連線錯誤、逾時）"""
+        self.seen += 1
+        if not self._sampled(self.error_sample_rate):
+            return
+        self._buffer.append(TraceRecord(
+            next(self._seq), method, endpoint, request_weight(method, endpoint, params), None, latency,
+            0, 0, error=type(error).__name__
+        ))
+
+    def mark(self) -> int:
+        """目前最後一筆記錄的序號（之後的記錄序號都大於此值）"""
+        buffer = self._buffer
+        return buffer[-1].seq if buffer else 0
+
+    def records(self, since: int = 0) -> List[TraceRecord]:
+        """
+        Args:
+            since: 只返回序號大於此值的記錄（見 mark）
+
+        Returns:
+            依序號排列的記錄
+        """
+        return [record for record in list(self._buffer) if record.seq > since]
+
+    def __iter__(self) -> Iterator[TraceRecord]:
+        return iter(self.records())
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def clear(self):
+        self._buffer.clear()
+
+    def dump(self, path: str, since: int = 0) -> Optional[Path]:
+        """
+        以 JSON Lines 輸出記錄
+
+        Args:
+            path: 輸出檔案路徑
+            since: 只輸出序號大於此值的記錄
+
+        Returns:
+            檔案路徑（沒有記錄時不建立檔案並返回 None）
+        """
+        records = self.records(since)
+        if not records:
+            return None
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record.to_dict(), ensure_ascii=False) + '\n')
+        logger.info(f"Dumped {len(records)} trace records to {path}")
+        return path
+
+
+_default_tracer: Optional[Tracer] = None
+_default_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """
+    取得程序內共用的追蹤記錄器
+
+    Returns:
+        Tracer 實例
+    """
+    global _default_tracer
+    with _default_tracer_lock:
+        if _default_tracer is None:
+            _default_tracer = Tracer()
+        return _default_tracer
@@ -0,0 +1,199 @@
+"""
+WebSocket API 下單通道
+以單一持久連線送出 order.place / order.cancel / order.status 等請求，
+每個請求以 id 對應響應，可同時有多筆請求在途；
+響應包裝成與 REST 相同介面的 AsyncResponse，呼叫端不需修改
+"""
+import asyncio
+import itertools
+import json
+import time
+import logging
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode
+
+import websockets
+
+from config import Config
+from utils.async_client import AsyncResponse
+from utils.binance_client import BinanceClient
+from utils.models import loads
+
+logger = logging.getLogger(__name__)
+
+# REST 端點對應的 WebSocket API 方法
+WS_API_METHODS = {
+    ('POST', '/api/v3/order'): 'order.place',
+    ('POST', '/api/v3/order/test'): 'order.test',
+    ('GET', '/api/v3/order'): 'order.status',
+    ('DELETE', '/api/v3/order'): 'order.cancel',
+    ('GET', '/api/v3/openOrders'): 'openOrders.status',
+    ('DELETE', '/api/v3/openOrders'): 'openOrders.cancelAll',
+    ('GET', '/api/v3/allOrders'): 'allOrders',
+    ('GET', '/api/v3/account'): 'account.status',
+}
+
+_INTERVAL_UNITS = {'SECOND': 'S', 'MINUTE': 'M', 'HOUR': 'H', 'DAY': 'D'}
+
+
+def rate_limit_headers(rate_limits: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    將響應中的 rateLimits 轉為等效的 REST 響應頭，供 RateLimiter.update 使用
+
+    Args:
+        rate_limits: WebSocket API 響應的 rateLimits
+
+    Returns:
+        {'X-MBX-USED-WEIGHT-1M': ..., 'X-MBX-ORDER-COUNT-10S': ...}
+    """
+    headers = {}
+    for limit in rate_limits or ():
+        suffix = f"{limit['intervalNum']}{_INTERVAL_UNITS.get(limit['interval'], 'M')}"
+        if limit['rateLimitType'] == 'REQUEST_WEIGHT':
+            headers[f"X-MBX-USED-WEIGHT-{suffix}"] = str(limit['count'])
+        elif limit['rateLimitType'] == 'ORDERS':
+            headers[f"X-MBX-ORDER-COUNT-{suffix}"] = str(limit['count'])
+    return headers
+
+
+class WsApiClient:
+    """
+    WebSocket API 客戶端
+
+    簽名、時間戳與限速沿用所屬的 BinanceClient；連線在第一次請求時建立，
+    斷線時在途請求以 ConnectionError 結束，下一次請求自動重新連線：
+
+        ws_api = WsApiClient(client)
+        response = await ws_api.request('order.place', params, signed=True)
+    """
+
+    def __init__(self, client: BinanceClient, url: str = None, timeout: float = None):
+        """
+        Args:
+            client: 提供金鑰、簽名與限速器的客戶端
+            url: WebSocket API URL（預設 Config.WS_API_URL）
+            timeout: 單一請求逾時秒數（預設 Config.REQUEST_TIMEOUT）
+        """
+        self.client = client
+        self.url = url or Config.WS_API_URL
+        self.timeout = timeout or Config.REQUEST_TIMEOUT
+        self.ws: Optional[Any] = None
+
+        self._ids = itertools.count(1)
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._reader: Optional[asyncio.Task] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+
+    async def connect(self):
+        """建立連線（已連線時直接返回）"""
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self.ws is not None:
+                return
+            self.ws = await websockets.connect(self.url, max_size=None)
+            self._reader = asyncio.ensure_future(self._read_loop(self.ws))
+            logger.info(f"WebSocket API connected: {self.url}")
+
+    async def _read_loop(self, ws):
+        try:
+            async for raw in ws:
+                message = loads(raw)
+                future = self._pending.pop(str(message.get('id')), None)
+                if future is not None and not future.done():
+                    future.set_result(message)
+        except websockets.ConnectionClosed as e:
+            logger.warning(f"WebSocket API disconnected: {e}")
+        finally:
+            if self.ws is ws:
+                self.ws = None
+            pending, self._pending = self._pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("WebSocket API 連線已中斷"))
+
+    def _sign(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """加入 apiKey / timestamp，依參數名排序後簽名"""
+        params['apiKey'] = self.client.api_key
+        params['timestamp'] = self.client._get_timestamp()
+        time_sync = self.client.time_sync
+        if time_sync is not None and time_sync.recv_window and 'recvWindow' not in params:
+            params['recvWindow'] = time_sync.recv_window
+        params['signature'] = self.client._sign_query(urlencode(sorted(params.items())))
+        return params
+
+    async def request(self, method: str, params: Optional[Dict[str, Any]] = None, signed: bool = False,
+                      rest_method: str = None, rest_endpoint: str = None) -> AsyncResponse:
+        """
+        送出請求並等待對應 id 的響應
+
+        Args:
+            method: WebSocket API 方法（例如 order.place）
+            params: 請求參數
+            signed: 是否需要簽名
+            rest_method: 對應的 REST 方法（用於計算限速權重）
+            rest_endpoint: 對應的 REST 端點（用於計算限速權重）
+
+        Returns:
+            AsyncResponse（status_code 為響應中的 status，內容為 result 或 error）
+        """
+        params = dict(params or {})
+        limiter = self.client.rate_limiter
+        if limiter is not None and rest_endpoint is not None:
+            delay = limiter.reserve(rest_method, rest_endpoint, params)
+            if delay:
+                await asyncio.sleep(delay)
+
+        await self.connect()
+        request_id = str(next(self._ids))
+        if signed:
+            params = self._sign(params)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"WS API {method} id={request_id}")
+        try:
+            await self.ws.send(json.dumps({'id': request_id, 'method': method, 'params': params}))
+            message = await asyncio.wait_for(future, self.timeout)
+        except (websockets.ConnectionClosed, AttributeError) as e:
+            self._pending.pop(request_id, None)
+            logger.error(f"WS API request failed: {e}")
+            raise ConnectionError("WebSocket API 連線已中斷") from e
+        except asyncio.TimeoutError:
+            self._pending.pop(request_id, None)
+            logger.error(f"WS API request timed out: {method} id={request_id}")
+            raise
+
+        status = message.get('status', 200)
+        headers = rate_limit_headers(message.get('rateLimits'))
+        if status in (418, 429):
+            retry_at = (message.get('error', {}).get('data') or {}).get('retryAfter')
+            if retry_at:
+                headers['Retry-After'] = str(max(int(retry_at / 1000 - time.time()), 1))
+        if limiter is not None:
+            limiter.update(status, headers)
+
+        body = message['result'] if 'result' in message else message.get('error', {})
+        if signed and status == 400 and self.client.time_sync is not None and body.get('code') == -1021:
+            self.client.time_sync.request_resync()
+        return AsyncResponse(status, headers, json.dumps(body).encode('utf-8'), f"{self.url}#{method}")
+
+    async def request_rest(self, method: str, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                           signed: bool = False) -> AsyncResponse:
+        """以 REST 方法與端點送出對應的 WebSocket API 請求"""
+        return await self.request(WS_API_METHODS[(method, endpoint)], params, signed, method, endpoint)
+
+    @staticmethod
+    def supports(method: str, endpoint: str) -> bool:
+        """該 REST 端點是否有對應的 WebSocket API 方法"""
+        return (method, endpoint) in WS_API_METHODS
+
+    async def close(self):
+        """關閉連線"""
+        ws, self.ws = self.ws, None
+        if ws is not None:
+            await ws.close()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+            self._reader = None